@@ -0,0 +1,342 @@
+"""
+Admission control: per-client rate limits and a cap on requests in flight.
+
+Two checks run before a request reaches its endpoint, each answering
+without touching the endpoint when it fails:
+
+- Overload: when max_concurrent requests are already being handled, new
+  ones get 503 Service Unavailable straight away instead of queueing behind
+  them. A request stops counting once its response starts, so streams (SSE,
+  NDJSON) hold a slot only until their first byte.
+- Rate limit: every client has a token bucket per route (refilled at
+  ``rate`` tokens a second, holding at most ``burst``). A request takes a
+  token; a client whose bucket is empty gets 429 Too Many Requests with a
+  Retry-After telling it when the next token arrives.
+
+Each bucket is stored as a single float, the time at which it will be full
+again (the "theoretical arrival time" form of a token bucket), in one
+bounded table keyed by (route, client). Checking a request is a dict lookup
+and a little arithmetic; when the table is full the least recently used
+bucket is dropped, which at worst gives that client a full bucket again.
+
+The checks are installed on the app's routes rather than as middleware, so
+the route is already matched and no path is parsed twice. Requests to
+unknown paths are not limited.
+"""
+
+import json
+import math
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+# Buckets held at once across all clients and routes
+DEFAULT_MAX_BUCKETS = 100_000
+
+# Requests handled at once before new ones are turned away
+DEFAULT_MAX_CONCURRENT = 256
+
+# Routes never limited, so operators can still look in on an overloaded server
+DEFAULT_EXEMPT_PREFIXES = ("/admin/", "/metrics")
+
+
+class RateLimit(NamedTuple):
+    """Tokens added per second and the most a bucket holds."""
+    rate: float
+    burst: int
+
+
+def parse_rate_limit(text: str) -> Optional[RateLimit]:
+    """
+    Parse "rate" or "rate:burst" (burst defaults to one second's worth); "0" means no limit.
+
+    Raises:
+        ValueError: If the text is not a rate, or the rate or burst is negative
+    """
+    rate_text, _, burst_text = text.strip().partition(":")
+    rate = float(rate_text)
+    if rate < 0:
+        raise ValueError(f"Rate limit must not be negative: {text!r}")
+    if rate == 0:
+        return None
+    burst = int(burst_text) if burst_text else max(1, math.ceil(rate))
+    if burst < 1:
+        raise ValueError(f"Rate limit burst must be at least 1: {text!r}")
+    return RateLimit(rate, burst)
+
+
+def parse_route_limits(text: str) -> Dict[str, Optional[RateLimit]]:
+    """
+    Parse per-route limits: "POST /games=2:5,GET /games=10" ("=0" exempts a route).
+
+    Raises:
+        ValueError: If an entry is not "METHOD /path=limit"
+    """
+    limits: Dict[str, Optional[RateLimit]] = {}
+    for entry in filter(None, (part.strip() for part in text.split(","))):
+        route, separator, limit = entry.rpartition("=")
+        method, _, path = route.strip().partition(" ")
+        if not separator or not method or not path.strip().startswith("/"):
+            raise ValueError(f"Expected 'METHOD /path=rate[:burst]', got {entry!r}")
+        limits[f"{method.upper()} {path.strip()}"] = parse_rate_limit(limit)
+    return limits
+
+
+def route_key(route: Any) -> str:
+    """Name a route as "METHOD /path", picking GET for routes that also answer HEAD."""
+    methods = route.methods
+    method = "GET" if "GET" in methods else sorted(methods)[0]
+    return f"{method} {route.path}"
+
+
+class BucketTable:
+    """Token buckets of every (route, client), least recently used first."""
+
+    def __init__(self, max_buckets: int = DEFAULT_MAX_BUCKETS):
+        self.max_buckets = max_buckets
+        # (route, client) -> time at which the bucket is full again
+        self._full_at: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self.evictions = 0
+
+    def take(self, key: Tuple[str, str], limit: RateLimit, now: float) -> float:
+        """Take a token: 0.0 if one was available, otherwise the seconds until one is."""
+        full_at = self._full_at.get(key)
+        if full_at is None:
+            if len(self._full_at) >= self.max_buckets:
+                self._full_at.popitem(last=False)
+                self.evictions += 1
+            full_at = now
+        else:
+            self._full_at.move_to_end(key)
+            if full_at < now:
+                full_at = now
+        interval = 1.0 / limit.rate
+        # Full at now + burst intervals means the bucket is empty
+        wait = full_at - now - (limit.burst - 1) * interval
+        if wait > 0:
+            return wait
+        self._full_at[key] = full_at + interval
+        return 0.0
+
+    def tokens(self, key: Tuple[str, str], limit: RateLimit, now: float) -> float:
+        """Tokens left in a bucket (a bucket not in the table is full)."""
+        full_at = self._full_at.get(key, now)
+        return min(limit.burst, max(0.0, limit.burst - (full_at - now) * limit.rate))
+
+    def keys(self) -> Iterable[Tuple[str, str]]:
+        return self._full_at.keys()
+
+    def __len__(self) -> int:
+        return len(self._full_at)
+
+
+class RouteAdmission:
+    """A route's limit and rejection counters."""
+
+    __slots__ = ('key', 'limit', 'capped', 'rate_limited', 'overloaded')
+
+    def __init__(self, key: str, limit: Optional[RateLimit], capped: bool):
+        self.key = key
+        self.limit = limit
+        self.capped = capped
+        self.rate_limited = 0
+        self.overloaded = 0
+
+
+def _rejection(status_code: int, message: str, retry_after: float) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Response messages for a refused request, shaped like the app's HTTPException responses."""
+    body = json.dumps({"error": "HTTPException", "message": message, "status_code": status_code}).encode()
+    start = {
+        "type": "http.response.start",
+        "status": status_code,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    }
+    return start, {"type": "http.response.body", "body": body}
+
+
+class Admission:
+    """Rate limits and the in-flight cap of one API process."""
+
+    def __init__(self, rate_limit: Optional[RateLimit] = None,
+                 route_limits: Optional[Dict[str, Optional[RateLimit]]] = None,
+                 max_buckets: int = DEFAULT_MAX_BUCKETS,
+                 max_concurrent: Optional[int] = DEFAULT_MAX_CONCURRENT,
+                 client_header: Optional[str] = None,
+                 uncapped: Iterable[str] = (),
+                 exempt_prefixes: Tuple[str, ...] = DEFAULT_EXEMPT_PREFIXES,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            rate_limit: Limit of every route per client, or None for no default limit
+            route_limits: Limits of particular routes ("METHOD /path"), overriding rate_limit
+            max_buckets: Buckets kept before the least recently used is dropped
+            max_concurrent: Requests handled at once, or None for no cap
+            client_header: Header naming the client (e.g. X-Forwarded-For behind a proxy);
+                the connection's address is used when unset or absent
+            uncapped: Routes left out of the in-flight cap because they wait on purpose
+                (long polls), named "METHOD /path"
+            exempt_prefixes: Paths never limited nor capped
+            clock: Monotonic time source, replaceable in tests
+        """
+        self.rate_limit = rate_limit
+        self.route_limits = dict(route_limits or {})
+        self.buckets = BucketTable(max_buckets)
+        self.max_concurrent = max_concurrent
+        self.client_header = client_header.lower().encode("latin-1") if client_header else None
+        self.uncapped = set(uncapped)
+        self.exempt_prefixes = exempt_prefixes
+        self._clock = clock
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        # Keyed by id() of the route object, since Starlette routes are unhashable
+        self.routes: Dict[int, RouteAdmission] = {}
+
+    def install(self, routes: Iterable[Any]) -> None:
+        """
+        Put the checks in front of every HTTP route of an app (once per route).
+
+        Raises:
+            ValueError: If route_limits names a route the app does not have
+        """
+        known = set()
+        for route in routes:
+            if not getattr(route, "methods", None) or route.path.startswith(self.exempt_prefixes):
+                continue
+            key = route_key(route)
+            known.add(key)
+            if id(route) in self.routes:
+                continue
+            limit = self.route_limits.get(key, self.rate_limit)
+            capped = self.max_concurrent is not None and key not in self.uncapped
+            admission = self.routes[id(route)] = RouteAdmission(key, limit, capped)
+            if limit is not None or capped:
+                route.app = self._gate(route.app, admission)
+        unknown = set(self.route_limits) - known
+        if unknown:
+            raise ValueError(f"Rate limits set for unknown routes: {', '.join(sorted(unknown))}")
+
+    def client(self, scope: Dict[str, Any]) -> str:
+        """The client a request counts against."""
+        if self.client_header is not None:
+            for name, value in scope["headers"]:
+                if name == self.client_header:
+                    # The first address of X-Forwarded-For is the original client
+                    return value.decode("latin-1").split(",", 1)[0].strip()
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    def _gate(self, app: Callable, route: RouteAdmission) -> Callable:
+        """Wrap a route's ASGI app in the overload and rate limit checks."""
+        buckets, clock, limit, capped = self.buckets, self._clock, route.limit, route.capped
+
+        async def gate(scope, receive, send):
+            if capped and self.in_flight >= self.max_concurrent:
+                route.overloaded += 1
+                start, body = _rejection(503, "Server is busy; try again shortly", 1.0)
+                await send(start)
+                await send(body)
+                return
+            if limit is not None:
+                wait = buckets.take((route.key, self.client(scope)), limit, clock())
+                if wait:
+                    route.rate_limited += 1
+                    start, body = _rejection(429, f"Rate limit of {limit.rate:g} requests per second "
+                                                  f"exceeded for {route.key}", wait)
+                    await send(start)
+                    await send(body)
+                    return
+            if not capped:
+                await app(scope, receive, send)
+                return
+            self.in_flight += 1
+            if self.in_flight > self.peak_in_flight:
+                self.peak_in_flight = self.in_flight
+            counted = True
+
+            async def release_on_start(message):
+                nonlocal counted
+                if counted and message["type"] == "http.response.start":
+                    counted = False
+                    self.in_flight -= 1
+                await send(message)
+
+            try:
+                await app(scope, receive, release_on_start)
+            finally:
+                if counted:
+                    self.in_flight -= 1
+
+        return gate
+
+    def client_buckets(self, client: str) -> List[Dict[str, Any]]:
+        """Tokens left in each of a client's buckets on limited routes."""
+        now = self._clock()
+        return [
+            {"route": route.key, "tokens": round(self.buckets.tokens((route.key, client), route.limit, now), 3),
+             "burst": route.limit.burst}
+            for route in self.routes.values() if route.limit is not None
+        ]
+
+    def limited(self, limit: int) -> List[Dict[str, Any]]:
+        """Up to ``limit`` buckets that are empty now: who is being turned away, on which route."""
+        now = self._clock()
+        limits = {route.key: route.limit for route in self.routes.values() if route.limit is not None}
+        empty = []
+        for key in reversed(list(self.buckets.keys())):
+            route_limit = limits.get(key[0])
+            if route_limit is None:
+                continue
+            tokens = self.buckets.tokens(key, route_limit, now)
+            if tokens < 1:
+                empty.append({"route": key[0], "client": key[1],
+                              "retry_after": round((1 - tokens) / route_limit.rate, 3)})
+                if len(empty) >= limit:
+                    break
+        return empty
+
+    def stats(self) -> Dict[str, Any]:
+        """Settings, load and rejection counters."""
+        rejected = {route.key: {"rate_limited": route.rate_limited, "overloaded": route.overloaded}
+                    for route in self.routes.values() if route.rate_limited or route.overloaded}
+        return {
+            "rate_limit": self.rate_limit._asdict() if self.rate_limit else None,
+            "route_limits": {key: limit._asdict() if limit else None for key, limit in self.route_limits.items()},
+            "max_concurrent": self.max_concurrent,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "buckets": len(self.buckets),
+            "max_buckets": self.buckets.max_buckets,
+            "bucket_evictions": self.buckets.evictions,
+            "rate_limited": sum(route.rate_limited for route in self.routes.values()),
+            "overloaded": sum(route.overloaded for route in self.routes.values()),
+            "rejected_by_route": rejected,
+        }
+
+
+def create_admission(uncapped: Iterable[str] = ()) -> Admission:
+    """
+    Create the admission checks configured by the environment.
+
+    RATE_LIMIT: Requests per second per client on every route, "rate[:burst]" (default off)
+    RATE_LIMIT_ROUTES: Per-route overrides, "POST /games=2:5,GET /games=10" ("=0" for no limit)
+    RATE_LIMIT_MAX_BUCKETS: Buckets kept across all clients (default 100000)
+    RATE_LIMIT_CLIENT_HEADER: Header naming the client, e.g. X-Forwarded-For (default: peer address)
+    MAX_CONCURRENT_REQUESTS: Requests handled at once before answering 503 (default 256, 0 for no cap)
+
+    Raises:
+        ValueError: If a setting cannot be parsed
+    """
+    max_concurrent = int(os.getenv("MAX_CONCURRENT_REQUESTS", str(DEFAULT_MAX_CONCURRENT)))
+    return Admission(
+        rate_limit=parse_rate_limit(os.getenv("RATE_LIMIT", "0")),
+        route_limits=parse_route_limits(os.getenv("RATE_LIMIT_ROUTES", "")),
+        max_buckets=int(os.getenv("RATE_LIMIT_MAX_BUCKETS", str(DEFAULT_MAX_BUCKETS))),
+        max_concurrent=max_concurrent if max_concurrent > 0 else None,
+        client_header=os.getenv("RATE_LIMIT_CLIENT_HEADER") or None,
+        uncapped=uncapped,
+    )
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Vectorized batch simulation of random m,n,k games.
+
+Instead of driving TicTacToeGame one move at a time, a batch of N games is
+held as two NumPy arrays of bitboards (one word per game per player). Each
+ply applies one move to every unfinished game in a single vectorized step,
+and wins are detected for the whole batch by testing the mover's bitboards
+against the board's win masks.
+
+Uniformly random play is the same as playing the cells in a uniformly random
+order, so every game's move order is drawn up front as a random permutation
+of the cells. The outcome statistics match simulate_scalar(), which plays the
+same policy through TicTacToeGame.
+
+Usage:
+    python3 batch_sim.py --games 10000000 [--compare 100000]
+"""
+
+import argparse
+import math
+import random
+import sys
+import time
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from game import TicTacToeGame, get_geometry
+
+# Bitboards are stored in one unsigned 64-bit word per game and player
+MAX_BATCH_CELLS = 64
+
+# Bytes of working arrays per vectorized chunk, from which the games per
+# chunk are derived for each board size; bounds peak memory
+CHUNK_BYTES = 64 * 1024 * 1024
+
+# Working bytes per game and cell (float32 sort keys, their int64 argsort
+# and two uint8 copies of the move order) and per game (bitboards, the
+# move and win temporaries and flags)
+_BYTES_PER_CELL = 14
+_BYTES_PER_GAME = 48
+
+
+class OutcomeStats(NamedTuple):
+    """Aggregate outcome of a set of simulated games."""
+    games: int
+    x_wins: int
+    o_wins: int
+    draws: int
+    length_counts: Tuple[int, ...]  # length_counts[p] = games that ended after p moves
+
+    @property
+    def x_win_rate(self) -> float:
+        return self.x_wins / self.games if self.games else 0.0
+
+    @property
+    def o_win_rate(self) -> float:
+        return self.o_wins / self.games if self.games else 0.0
+
+    @property
+    def draw_rate(self) -> float:
+        return self.draws / self.games if self.games else 0.0
+
+    @property
+    def mean_length(self) -> float:
+        if not self.games:
+            return 0.0
+        return sum(plies * count for plies, count in enumerate(self.length_counts)) / self.games
+
+    def merge(self, other: "OutcomeStats") -> "OutcomeStats":
+        """Combine the statistics of two disjoint sets of games."""
+        size = max(len(self.length_counts), len(other.length_counts))
+        lengths = [0] * size
+        for counts in (self.length_counts, other.length_counts):
+            for plies, count in enumerate(counts):
+                lengths[plies] += count
+        return OutcomeStats(
+            self.games + other.games,
+            self.x_wins + other.x_wins,
+            self.o_wins + other.o_wins,
+            self.draws + other.draws,
+            tuple(lengths),
+        )
+
+
+def chunk_games(cells: int) -> int:
+    """Games per vectorized chunk on a board of ``cells`` cells, keeping its arrays within CHUNK_BYTES."""
+    return max(1, CHUNK_BYTES // (_BYTES_PER_CELL * cells + _BYTES_PER_GAME))
+
+
+def _simulate_chunk(count: int, bit_values: np.ndarray, win_masks: np.ndarray, k: int,
+                    rng: np.random.Generator) -> OutcomeStats:
+    """Play ``count`` random games to completion, all plies vectorized across the batch."""
+    cells = len(bit_values)
+    # Column i is game i's move order: a uniformly random permutation of the cells.
+    # Stored ply-major so each ply reads one contiguous row.
+    order = np.ascontiguousarray(
+        rng.random((count, cells), dtype=np.float32).argsort(axis=1).astype(np.uint8).T
+    )
+
+    x_bits = np.zeros(count, dtype=np.uint64)
+    o_bits = np.zeros(count, dtype=np.uint64)
+    active = np.ones(count, dtype=bool)
+    x_won = np.zeros(count, dtype=bool)
+    o_won = np.zeros(count, dtype=bool)
+    length = np.full(count, cells, dtype=np.uint8)
+    zero = np.uint64(0)
+
+    for ply in range(cells):
+        moves = np.where(active, bit_values[order[ply]], zero)
+        player_bits = x_bits if ply % 2 == 0 else o_bits
+        player_bits |= moves
+        if ply // 2 + 1 < k:
+            # The mover cannot have k marks yet
+            continue
+        # A game is won when any win mask is fully covered by the mover's bits;
+        # testing one mask at a time keeps the temporaries to one word per game
+        won = np.zeros(count, dtype=bool)
+        for mask in win_masks:
+            won |= (player_bits & mask) == mask
+        won &= active
+        if ply % 2 == 0:
+            x_won |= won
+        else:
+            o_won |= won
+        length[won] = ply + 1
+        active &= ~won
+        if not active.any():
+            break
+
+    x_wins = int(x_won.sum())
+    o_wins = int(o_won.sum())
+    lengths = np.bincount(length, minlength=cells + 1)
+    return OutcomeStats(count, x_wins, o_wins, count - x_wins - o_wins,
+                        tuple(int(c) for c in lengths))
+
+
+def simulate_random_games(count: int, m: int = 3, n: int = 3, k: int = 3,
+                          seed: Optional[int] = None,
+                          chunk_size: Optional[int] = None) -> OutcomeStats:
+    """
+    Simulate ``count`` uniformly random games in vectorized batches.
+
+    Args:
+        count: Number of games to play
+        m, n, k: Board shape (at most 64 cells)
+        seed: Seed for reproducible runs
+        chunk_size: Games per vectorized batch (default: chunk_games() for the board)
+
+    Raises:
+        ValueError: If the board is invalid or has more than 64 cells
+    """
+    geometry = get_geometry(m, n, k)
+    if geometry.cells > MAX_BATCH_CELLS:
+        raise ValueError(f"Batch simulation supports at most {MAX_BATCH_CELLS} cells")
+
+    rng = np.random.default_rng(seed)
+    bit_values = np.left_shift(np.uint64(1), np.arange(geometry.cells, dtype=np.uint64))
+    win_masks = np.array(geometry.win_masks, dtype=np.uint64)
+
+    if chunk_size is None:
+        chunk_size = chunk_games(geometry.cells)
+    stats = OutcomeStats(0, 0, 0, 0, (0,) * (geometry.cells + 1))
+    remaining = count
+    while remaining > 0:
+        size = min(chunk_size, remaining)
+        stats = stats.merge(_simulate_chunk(size, bit_values, win_masks, k, rng))
+        remaining -= size
+    return stats
+
+
+def simulate_scalar(count: int, m: int = 3, n: int = 3, k: int = 3,
+                    seed: Optional[int] = None) -> OutcomeStats:
+    """Simulate random games one at a time through TicTacToeGame (reference implementation)."""
+    rng = random.Random(seed)
+    geometry = get_geometry(m, n, k)
+    cells = list(range(geometry.cells))
+    x_wins = o_wins = draws = 0
+    lengths = [0] * (geometry.cells + 1)
+    for _ in range(count):
+        game = TicTacToeGame(m=m, n=n, k=k)
+        rng.shuffle(cells)
+        plies = 0
+        for cell in cells:
+            game.make_move(cell // n, cell % n)
+            plies += 1
+            if game.game_over:
+                break
+        lengths[plies] += 1
+        if game.winner == 'X':
+            x_wins += 1
+        elif game.winner == 'O':
+            o_wins += 1
+        else:
+            draws += 1
+    return OutcomeStats(count, x_wins, o_wins, draws, tuple(lengths))
+
+
+def max_rate_gap(first: OutcomeStats, second: OutcomeStats) -> float:
+    """Largest difference between two runs' X-win, O-win and draw rates, in standard errors."""
+    worst = 0.0
+    for first_count, second_count in ((first.x_wins, second.x_wins),
+                                      (first.o_wins, second.o_wins),
+                                      (first.draws, second.draws)):
+        pooled = (first_count + second_count) / (first.games + second.games)
+        error = math.sqrt(pooled * (1 - pooled) * (1 / first.games + 1 / second.games))
+        if error > 0:
+            gap = abs(first_count / first.games - second_count / second.games)
+            worst = max(worst, gap / error)
+    return worst
+
+
+def _print_stats(label: str, stats: OutcomeStats, elapsed: float) -> None:
+    rate = stats.games / elapsed if elapsed > 0 else 0.0
+    print(f"{label:<8} {stats.games:>12,} {stats.x_win_rate:>8.4f} {stats.o_win_rate:>8.4f} "
+          f"{stats.draw_rate:>8.4f} {stats.mean_length:>8.3f} {elapsed:>9.2f}s {rate:>14,.0f}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Simulate random tic-tac-toe games in bulk")
+    parser.add_argument("--games", type=int, default=1_000_000, help="Games for the batch engine")
+    parser.add_argument("--compare", type=int, default=0, help="Also play this many games through TicTacToeGame")
+    parser.add_argument("--m", type=int, default=3, help="Board rows")
+    parser.add_argument("--n", type=int, default=3, help="Board columns")
+    parser.add_argument("--k", type=int, default=3, help="Marks in a row to win")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed")
+    parser.add_argument("--chunk-size", type=int, default=None,
+                        help="Games per vectorized batch (default: sized to the board)")
+    args = parser.parse_args()
+
+    print(f"🎲 Random play on {args.m}x{args.n} (k={args.k})")
+    print(f"{'engine':<8} {'games':>12} {'X wins':>8} {'O wins':>8} {'draws':>8} {'plies':>8} "
+          f"{'time':>10} {'games/s':>14}")
+
+    start = time.perf_counter()
+    batch = simulate_random_games(args.games, args.m, args.n, args.k, args.seed, args.chunk_size)
+    _print_stats("batch", batch, time.perf_counter() - start)
+
+    if args.compare:
+        start = time.perf_counter()
+        scalar = simulate_scalar(args.compare, args.m, args.n, args.k, args.seed)
+        _print_stats("scalar", scalar, time.perf_counter() - start)
+
+        worst = max_rate_gap(batch, scalar)
+        verdict = "✅ consistent" if worst < 4 else "❌ mismatch"
+        print(f"{verdict}: largest outcome-rate gap is {worst:.2f} standard errors")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the tic-tac-toe game engine.
+
+Compares the bitboard engine in game.py against the original list-of-lists
+board implementation. Each benchmark reports the mean cost of one operation
+in nanoseconds (the best of several repeats, to damp scheduler noise), plus
+the memory allocated per live game:
+
+- construct: building a game, including its uuid4 game_id
+- make_move: one move of a random game
+- check_winner: a full-board win scan on mid-game boards
+- board_state: get_board_state() on mid-game boards
+- reset: reset_game() on finished games
+- random_game: constructing a game and playing it to the end
+- memory: bytes per live game
+
+Results can be saved as a JSON baseline and later runs compared against it;
+compare mode exits non-zero if any metric got worse by more than the
+threshold, so engine changes can be gated on it.
+
+Usage:
+    python3 bench_engine.py [--games N] [--seed S] [--repeat R]
+    python3 bench_engine.py --engines bitboard --save baseline.json
+    python3 bench_engine.py --engines bitboard --compare baseline.json --threshold 0.10
+"""
+
+import argparse
+import gc
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+import uuid
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from game import TicTacToeGame
+
+
+class ListBoardGame:
+    """
+    Reference engine using the original list-of-lists board.
+
+    Kept only as a baseline for benchmarking; it mirrors the move and
+    win-detection logic game.py used before the bitboard rewrite.
+    """
+
+    def __init__(self, player1_name: str = "Player X", player2_name: str = "Player O"):
+        self.game_id = str(uuid.uuid4())
+        self.board = [[None for _ in range(3)] for _ in range(3)]
+        self.current_player = 'X'
+        self.winner = None
+        self.is_draw = False
+        self.game_over = False
+        self.player1_name = player1_name
+        self.player2_name = player2_name
+        self.last_move_rejected = False
+
+    def make_move(self, row: int, col: int, player: Optional[str] = None) -> bool:
+        self.last_move_rejected = False
+        if self.game_over or not (0 <= row <= 2 and 0 <= col <= 2):
+            self.last_move_rejected = True
+            return False
+        if self.board[row][col] is not None:
+            self.last_move_rejected = True
+            return False
+        if player is not None and player != self.current_player:
+            self.last_move_rejected = True
+            return False
+        self.board[row][col] = self.current_player
+        if self._check_winner():
+            self.winner = self.current_player
+            self.game_over = True
+        elif self._is_board_full():
+            self.is_draw = True
+            self.game_over = True
+        else:
+            self.current_player = 'O' if self.current_player == 'X' else 'X'
+        return True
+
+    def get_board_state(self) -> List[List[Optional[str]]]:
+        return [row[:] for row in self.board]
+
+    def reset_game(self) -> None:
+        self.board = [[None for _ in range(3)] for _ in range(3)]
+        self.current_player = 'X'
+        self.winner = None
+        self.is_draw = False
+        self.game_over = False
+        self.last_move_rejected = False
+
+    def _check_winner(self) -> bool:
+        for row in self.board:
+            if row[0] == row[1] == row[2] and row[0] is not None:
+                return True
+        for col in range(3):
+            if (self.board[0][col] == self.board[1][col] == self.board[2][col]
+                    and self.board[0][col] is not None):
+                return True
+        if (self.board[0][0] == self.board[1][1] == self.board[2][2]
+                and self.board[0][0] is not None):
+            return True
+        if (self.board[0][2] == self.board[1][1] == self.board[2][0]
+                and self.board[0][2] is not None):
+            return True
+        return False
+
+    def _is_board_full(self) -> bool:
+        for row in self.board:
+            for cell in row:
+                if cell is None:
+                    return False
+        return True
+
+
+ENGINES = {
+    "list": ListBoardGame,
+    "bitboard": TicTacToeGame,
+}
+
+# Default slowdown tolerated by compare mode before a metric counts as a regression
+DEFAULT_THRESHOLD = 0.10
+
+# Version of the baseline file layout
+BASELINE_FORMAT = 1
+
+
+def random_move_sequences(count: int, seed: int) -> List[List[Tuple[int, int]]]:
+    """Generate shuffled move orders; each game plays its sequence until it ends."""
+    rng = random.Random(seed)
+    cells = [(row, col) for row in range(3) for col in range(3)]
+    sequences = []
+    for _ in range(count):
+        order = cells[:]
+        rng.shuffle(order)
+        sequences.append(order)
+    return sequences
+
+
+def play(game, order: List[Tuple[int, int]]) -> int:
+    """Play a move order until the game ends; return the number of moves made."""
+    make_move = game.make_move
+    moves = 0
+    for row, col in order:
+        make_move(row, col)
+        moves += 1
+        if game.game_over:
+            break
+    return moves
+
+
+def mid_game_boards(engine, sequences: List[List[Tuple[int, int]]], moves: int = 4) -> List:
+    """Build one game per sequence with its first few moves played."""
+    games = []
+    for order in sequences:
+        game = engine()
+        for row, col in order[:moves]:
+            game.make_move(row, col)
+        games.append(game)
+    return games
+
+
+def bench_construct(engine, sequences: List[List[Tuple[int, int]]]) -> float:
+    """Return the mean cost of constructing one game in nanoseconds."""
+    count = len(sequences)
+    start = time.perf_counter_ns()
+    for _ in range(count):
+        engine()
+    elapsed = time.perf_counter_ns() - start
+    return elapsed / count
+
+
+def bench_moves(engine, sequences: List[List[Tuple[int, int]]]) -> float:
+    """Return the mean cost of one make_move call in nanoseconds."""
+    games = [engine() for _ in sequences]
+    moves = 0
+    start = time.perf_counter_ns()
+    for game, order in zip(games, sequences):
+        moves += play(game, order)
+    elapsed = time.perf_counter_ns() - start
+    return elapsed / moves
+
+
+def bench_check_winner(engine, sequences: List[List[Tuple[int, int]]]) -> float:
+    """Return the mean cost of one full-board _check_winner scan in nanoseconds on mid-game boards."""
+    games = mid_game_boards(engine, sequences)
+    start = time.perf_counter_ns()
+    for game in games:
+        game._check_winner()
+    elapsed = time.perf_counter_ns() - start
+    return elapsed / len(games)
+
+
+def bench_board_state(engine, sequences: List[List[Tuple[int, int]]]) -> float:
+    """Return the mean cost of one get_board_state call in nanoseconds on mid-game boards."""
+    games = mid_game_boards(engine, sequences)
+    start = time.perf_counter_ns()
+    for game in games:
+        game.get_board_state()
+    elapsed = time.perf_counter_ns() - start
+    return elapsed / len(games)
+
+
+def bench_reset(engine, sequences: List[List[Tuple[int, int]]]) -> float:
+    """Return the mean cost of one reset_game call in nanoseconds on finished games."""
+    games = mid_game_boards(engine, sequences, moves=9)
+    start = time.perf_counter_ns()
+    for game in games:
+        game.reset_game()
+    elapsed = time.perf_counter_ns() - start
+    return elapsed / len(games)
+
+
+def bench_random_games(engine, sequences: List[List[Tuple[int, int]]]) -> float:
+    """Return the mean cost of constructing and playing one random game in nanoseconds."""
+    start = time.perf_counter_ns()
+    for order in sequences:
+        play(engine(), order)
+    elapsed = time.perf_counter_ns() - start
+    return elapsed / len(sequences)
+
+
+def bench_uuid4(count: int) -> float:
+    """Return the mean cost of str(uuid.uuid4()) in nanoseconds, the id cost inside construct."""
+    start = time.perf_counter_ns()
+    for _ in range(count):
+        str(uuid.uuid4())
+    elapsed = time.perf_counter_ns() - start
+    return elapsed / count
+
+
+def bench_memory(engine, count: int) -> float:
+    """Return the mean number of bytes allocated per live game object."""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    games = [engine("Alice", "Bob") for _ in range(count)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    # Exclude the list that holds the games
+    allocated -= sys.getsizeof(games)
+    return allocated / count
+
+
+# Timed benchmarks, reported in nanoseconds per operation
+TIMINGS: Dict[str, Callable] = {
+    "construct_ns": bench_construct,
+    "make_move_ns": bench_moves,
+    "check_winner_ns": bench_check_winner,
+    "board_state_ns": bench_board_state,
+    "reset_ns": bench_reset,
+    "random_game_ns": bench_random_games,
+}
+
+
+def run_benchmarks(engine, sequences: List[List[Tuple[int, int]]], repeat: int = 5) -> Dict[str, float]:
+    """Run every benchmark for one engine, keeping the best of ``repeat`` timings."""
+    results = {}
+    for name, bench in TIMINGS.items():
+        timings = []
+        for _ in range(repeat):
+            # Like timeit, keep garbage collection pauses out of the timings
+            gc.collect()
+            gc.disable()
+            try:
+                timings.append(bench(engine, sequences))
+            finally:
+                gc.enable()
+        results[name] = min(timings)
+    results["bytes_per_game"] = bench_memory(engine, len(sequences))
+    return {name: round(value, 1) for name, value in results.items()}
+
+
+class Regression(NamedTuple):
+    """A metric that got worse than the baseline allows."""
+    engine: str
+    metric: str
+    baseline: float
+    current: float
+
+    @property
+    def change(self) -> float:
+        """Relative change from the baseline (0.25 is 25% worse)."""
+        return self.current / self.baseline - 1
+
+
+def compare_results(baseline: Dict[str, Dict[str, float]], current: Dict[str, Dict[str, float]],
+                    threshold: float = DEFAULT_THRESHOLD) -> List[Regression]:
+    """
+    Find metrics that got worse than the baseline by more than ``threshold``.
+
+    Every metric is a cost, so higher is worse. Engines and metrics missing
+    from either side are skipped.
+    """
+    regressions = []
+    for engine, metrics in current.items():
+        for metric, value in metrics.items():
+            reference = baseline.get(engine, {}).get(metric)
+            if reference and value > reference * (1 + threshold):
+                regressions.append(Regression(engine, metric, reference, value))
+    return regressions
+
+
+def save_baseline(path: str, results: Dict[str, Dict[str, float]], games: int, seed: int) -> None:
+    """Write results as a JSON baseline, noting where they were measured."""
+    baseline = {
+        "format": BASELINE_FORMAT,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "games": games,
+        "seed": seed,
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as output:
+        json.dump(baseline, output, indent=2)
+        output.write("\n")
+
+
+def load_baseline(path: str) -> Dict[str, Dict[str, float]]:
+    """
+    Read the results of a JSON baseline.
+
+    Raises:
+        ValueError: If the file is not a baseline written by this script
+    """
+    with open(path, encoding="utf-8") as baseline_file:
+        baseline = json.load(baseline_file)
+    if not isinstance(baseline, dict) or baseline.get("format") != BASELINE_FORMAT:
+        raise ValueError(f"{path} is not a format {BASELINE_FORMAT} benchmark baseline")
+    return baseline["results"]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the tic-tac-toe game engine")
+    parser.add_argument("--games", type=int, default=20000, help="Number of games per benchmark")
+    parser.add_argument("--seed", type=int, default=1234, help="Seed for the random move orders")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing repeats; the best is kept")
+    parser.add_argument("--engines", nargs="+", choices=list(ENGINES), default=list(ENGINES),
+                        help="Engines to benchmark")
+    parser.add_argument("--save", help="Write the results to this JSON baseline file")
+    parser.add_argument("--compare", help="Compare the results with this JSON baseline file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Relative slowdown that fails --compare (0.10 = 10%%)")
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.compare:
+        try:
+            baseline = load_baseline(args.compare)
+        except (OSError, ValueError) as exc:
+            parser.error(str(exc))
+
+    sequences = random_move_sequences(args.games, args.seed)
+    results = {name: run_benchmarks(ENGINES[name], sequences, max(1, args.repeat))
+               for name in args.engines}
+    metrics = list(TIMINGS) + ["bytes_per_game"]
+
+    print("🏁 Tic-Tac-Toe Engine Benchmarks")
+    print("=" * 72)
+    print(f"Games: {args.games} | Seed: {args.seed} | Best of {args.repeat} | "
+          f"uuid4: {bench_uuid4(args.games):.1f} ns")
+    print("-" * 72)
+    print(f"{'metric':<18}" + "".join(f"{name:>14}" for name in results)
+          + (f"{'baseline':>14}{'change':>10}" if baseline and len(results) == 1 else ""))
+    for metric in metrics:
+        line = f"{metric:<18}" + "".join(f"{engine_results[metric]:>14.1f}" for engine_results in results.values())
+        if baseline and len(results) == 1:
+            engine, = results
+            reference = baseline.get(engine, {}).get(metric)
+            if reference:
+                line += f"{reference:>14.1f}{results[engine][metric] / reference - 1:>+10.1%}"
+        print(line)
+    print("=" * 72)
+
+    if args.save:
+        save_baseline(args.save, results, args.games, args.seed)
+        print(f"💾 Baseline written to {args.save}")
+
+    if baseline is not None:
+        regressions = compare_results(baseline, results, args.threshold)
+        for regression in regressions:
+            print(f"❌ {regression.engine} {regression.metric}: {regression.baseline:.1f} -> "
+                  f"{regression.current:.1f} ({regression.change:+.1%})")
+        if regressions:
+            print(f"❌ {len(regressions)} metric(s) regressed by more than {args.threshold:.0%}")
+            return 1
+        print(f"✅ No metric regressed by more than {args.threshold:.0%} against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
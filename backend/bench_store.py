@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Memory benchmarks for the game stores at millions of games.
+
+Fills a store with live games and reports what each game costs: resident
+memory growth per game (as the operating system sees it, so allocator
+overhead and the store's own indexes are included), plus the time to create
+a game and to look one up by id and make a move. Each store and size is
+measured in a fresh child process so earlier runs do not skew the numbers.
+
+- memory: InMemoryGameStore, one TicTacToeGame object per game
+- table: TableGameStore, one row of typed arrays per game
+
+With --snapshot, each full store is also saved to a snapshot file and
+restored into a new store, timing both (see snapshot.py).
+
+Runs that would not fit in the memory available (estimated from a small
+probe run) are skipped rather than left to exhaust the machine.
+
+Usage:
+    python3 bench_store.py [--games 1000000 10000000] [--stores memory table]
+    python3 bench_store.py --games 1000000 --moves 4 --output store.json
+    python3 bench_store.py --games 1000000 --snapshot /tmp/games.snapshot
+"""
+
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+from typing import Dict, List, Optional
+
+from metrics import resident_memory_bytes
+from snapshot import Snapshotter
+from store import InMemoryGameStore, TableGameStore
+
+STORES = {
+    "memory": InMemoryGameStore,
+    "table": TableGameStore,
+}
+
+# Games in the probe run used to estimate the memory a full run needs
+PROBE_GAMES = 100_000
+
+# Lookups timed per run
+LOOKUPS = 100_000
+
+
+def fill_store(store_name: str, games: int, moves: int, seed: int,
+               snapshot_path: Optional[str] = None) -> Dict[str, float]:
+    """
+    Fill a new store with games and measure it.
+
+    Every game gets the same first ``moves`` moves, so each holds a
+    partly played board and a move log.
+
+    Returns:
+        bytes_per_game, create_us and lookup_move_us, plus snapshot_bytes,
+        save_seconds and restore_seconds when given a snapshot path
+    """
+    rng = random.Random(seed)
+    store = STORES[store_name]()
+    cells = [(row, col) for row in range(3) for col in range(3)]
+    opening = rng.sample(cells, moves)
+    gc.collect()
+    gc.disable()
+    try:
+        before = resident_memory_bytes() or 0
+        start = time.perf_counter()
+        for _ in range(games):
+            game = store.create("Player X", "Player O")
+            for row, col in opening:
+                game.make_move(row, col)
+        created = time.perf_counter() - start
+        after = resident_memory_bytes() or 0
+
+        # Ids are collected only now: a table store builds id strings on
+        # demand, so holding every id would count against the store
+        sample = [game.game_id for game in store.page(None, min(LOOKUPS, games))[0]]
+        rng.shuffle(sample)
+        free_cells = [cell for cell in cells if cell not in opening]
+        start = time.perf_counter()
+        for game_id in sample:
+            row, col = free_cells[0]
+            store.get(game_id).make_move(row, col)
+        looked_up = time.perf_counter() - start
+    finally:
+        gc.enable()
+    result = {
+        "bytes_per_game": (after - before) / games,
+        "create_us": created / games * 1e6,
+        "lookup_move_us": looked_up / len(sample) * 1e6,
+    }
+
+    if snapshot_path is not None:
+        saved = Snapshotter(store, snapshot_path).save()
+        del store
+        gc.collect()
+        restored = STORES[store_name]()
+        start = time.perf_counter()
+        Snapshotter(restored, snapshot_path).restore()
+        result["restore_seconds"] = time.perf_counter() - start
+        result["snapshot_bytes"] = saved["bytes"]
+        result["save_seconds"] = saved["seconds"]
+        os.remove(snapshot_path)
+    return result
+
+
+def _measure(store_name: str, games: int, moves: int, seed: int, snapshot_path: Optional[str],
+             results) -> None:
+    results.put(fill_store(store_name, games, moves, seed, snapshot_path))
+
+
+def measure(store_name: str, games: int, moves: int, seed: int,
+            snapshot_path: Optional[str] = None) -> Dict[str, float]:
+    """Run fill_store() in a child process, so the parent's memory and earlier runs do not count."""
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    child = context.Process(target=_measure, args=(store_name, games, moves, seed, snapshot_path, results))
+    child.start()
+    result = results.get()
+    child.join()
+    return result
+
+
+def available_memory_bytes() -> Optional[int]:
+    """Memory available for new allocations without swapping, or None where it cannot be read."""
+    try:
+        with open("/proc/meminfo") as meminfo:
+            for line in meminfo:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark game store memory at millions of games")
+    parser.add_argument("--games", type=int, nargs="+", default=[1_000_000, 10_000_000],
+                        help="Store sizes to measure")
+    parser.add_argument("--stores", nargs="+", choices=list(STORES), default=list(STORES),
+                        help="Stores to measure")
+    parser.add_argument("--moves", type=int, default=2, choices=range(0, 9), metavar="0-8",
+                        help="Moves played in every game")
+    parser.add_argument("--seed", type=int, default=1234, help="Seed for the opening and lookups")
+    parser.add_argument("--snapshot", metavar="PATH",
+                        help="Also time saving each store to this snapshot file and restoring it")
+    parser.add_argument("--output", help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    available = available_memory_bytes()
+    print("🗄️  Tic-Tac-Toe Store Memory Benchmarks")
+    print("=" * 72)
+    print(f"Moves per game: {args.moves} | Available memory: "
+          + (f"{available / 2**30:.1f} GiB" if available else "unknown"))
+    print("-" * 72)
+    print(f"{'store':<8}{'games':>12}{'bytes/game':>14}{'total MiB':>12}{'create us':>12}{'get+move us':>14}")
+
+    results: List[Dict] = []
+    for store_name in args.stores:
+        probe = measure(store_name, min(PROBE_GAMES, min(args.games)), args.moves, args.seed)
+        for games in args.games:
+            needed = probe["bytes_per_game"] * games * 1.25
+            if available is not None and needed > available:
+                print(f"{store_name:<8}{games:>12,}   skipped: needs about {needed / 2**30:.1f} GiB")
+                results.append({"store": store_name, "games": games, "skipped": True})
+                continue
+            result = measure(store_name, games, args.moves, args.seed, args.snapshot)
+            print(f"{store_name:<8}{games:>12,}{result['bytes_per_game']:>14.1f}"
+                  f"{result['bytes_per_game'] * games / 2**20:>12.1f}"
+                  f"{result['create_us']:>12.2f}{result['lookup_move_us']:>14.2f}")
+            if args.snapshot:
+                print(f"{'':<8}{'snapshot':>12}{result['snapshot_bytes'] / games:>14.1f}"
+                      f"{result['snapshot_bytes'] / 2**20:>12.1f}"
+                      f"   save {result['save_seconds']:.3f}s, restore {result['restore_seconds']:.3f}s")
+            results.append({"store": store_name, "games": games, **result})
+    print("=" * 72)
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump({"moves": args.moves, "seed": args.seed, "results": results}, output, indent=2)
+        print(f"💾 Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+"""
+Production server: several worker processes behind one port.
+
+The supervisor binds the port once and starts WORKERS processes, each
+running uvicorn on that shared socket (the kernel spreads connections
+between them). Each also listens on unix sockets of its own, on which the
+other workers forward requests for games it owns: its uvicorn socket for
+WebSockets and its app's relay socket for everything else (see
+sharding.py). Workers share nothing but the listening socket, so throughput
+grows with the number of cores rather than being bound by one event loop.
+
+Stopping (SIGTERM or SIGINT to the supervisor) drains in two phases so no
+request is cut off:
+
+1. Drain: every worker stops accepting on the public port and lets its open
+   connections finish the request in progress; idle keep-alive connections
+   are closed. The unix sockets stay open meanwhile, so requests already
+   being forwarded still reach their owner.
+2. Stop: once every worker has drained (or DRAIN_TIMEOUT has passed) each
+   one gets SIGTERM and shuts down as a single server would: streams still
+   open are closed and the store is snapshotted.
+
+A worker that dies is started again with the same number, so it owns the
+same games (restored from its snapshot, if snapshots are on). Workers whose
+supervisor dies stop as if sent SIGTERM.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import shutil
+import signal
+import socket
+import tempfile
+import time
+from multiprocessing.connection import wait
+from typing import List, Optional
+
+import uvicorn
+
+# Seconds workers get to finish open requests before being stopped anyway
+DEFAULT_DRAIN_TIMEOUT = 30.0
+
+# Seconds a stopping worker waits for streams and long polls to end
+STOP_TIMEOUT = 5.0
+
+# Signal from the supervisor telling a worker to drain
+DRAIN_SIGNAL = signal.SIGUSR1
+
+# Files each worker keeps for itself, named after the setting with the worker's number added
+_PER_WORKER_PATHS = ("GAME_STORE_PATH", "GAME_SNAPSHOT_PATH")
+
+
+def worker_path(path: str, index: int) -> str:
+    """A worker's own copy of a file setting: games.db becomes games.0.db for worker 0."""
+    root, extension = os.path.splitext(path)
+    return f"{root}.{index}{extension}"
+
+
+class WorkerServer(uvicorn.Server):
+    """A uvicorn server that can drain its public connections while still serving forwarded ones."""
+
+    def __init__(self, config: uvicorn.Config, drained, drain_timeout: float):
+        super().__init__(config)
+        self.drained = drained
+        self.drain_timeout = drain_timeout
+        self._draining: Optional[asyncio.Task] = None
+        self._supervisor = os.getppid()
+
+    async def startup(self, sockets: Optional[List[socket.socket]] = None) -> None:
+        await super().startup(sockets)
+        asyncio.get_running_loop().add_signal_handler(DRAIN_SIGNAL, self._start_drain)
+
+    async def on_tick(self, counter: int) -> bool:
+        # A supervisor killed outright cannot stop its workers, so they stop themselves
+        if counter % 10 == 0 and os.getppid() != self._supervisor:
+            self.should_exit = True
+        return await super().on_tick(counter)
+
+    def _start_drain(self) -> None:
+        if self._draining is None:
+            self._draining = asyncio.ensure_future(self.drain())
+
+    async def drain(self) -> None:
+        """Stop accepting on the public port and wait for its connections to finish, then report drained."""
+        # The first server is the shared public socket; the second is this worker's unix socket
+        self.servers[0].close()
+        deadline = time.monotonic() + self.drain_timeout
+        while time.monotonic() < deadline:
+            public = [connection for connection in self.server_state.connections if _is_public(connection)]
+            if not public:
+                break
+            for connection in public:
+                # Closes idle connections now and busy ones after their current response
+                connection.shutdown()
+            await asyncio.sleep(0.05)
+        self.drained.set()
+
+
+def _is_public(connection) -> bool:
+    transport = getattr(connection, "transport", None)
+    return transport is not None and isinstance(transport.get_extra_info("sockname"), tuple)
+
+
+def run_worker(index: int, workers: int, sock: socket.socket, socket_dir: str, drained,
+               drain_timeout: float, log_level: str) -> None:
+    """Serve the app as one worker (runs in its own process)."""
+    # Out of the terminal's process group: Ctrl-C reaches the supervisor, which drains first
+    os.setpgrp()
+    os.environ.update(WORKER_INDEX=str(index), WORKER_COUNT=str(workers), WORKER_SOCKET_DIR=socket_dir)
+    for name in _PER_WORKER_PATHS:
+        if os.getenv(name):
+            os.environ[name] = worker_path(os.environ[name], index)
+    # One computer-player process per core in total, rather than per worker
+    os.environ.setdefault("MCTS_WORKERS", str(max(1, (os.cpu_count() or 1) // workers)))
+
+    private = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    path = os.path.join(socket_dir, f"worker-{index}.sock")
+    if os.path.exists(path):
+        os.unlink(path)
+    private.bind(path)
+    private.listen(2048)
+
+    config = uvicorn.Config("main:app", log_level=log_level, access_log=False,
+                            timeout_graceful_shutdown=STOP_TIMEOUT)
+    WorkerServer(config, drained, drain_timeout).run(sockets=[sock, private])
+
+
+def _listen(host: str, port: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_cluster(host: str, port: int, workers: int, log_level: str = "info",
+                drain_timeout: float = DEFAULT_DRAIN_TIMEOUT) -> None:
+    """Serve the app from ``workers`` processes until SIGTERM or SIGINT, then drain and stop them."""
+    sock = _listen(host, port)
+    socket_dir = tempfile.mkdtemp(prefix="tictactoe-workers-")
+    context = multiprocessing.get_context("spawn")
+    drained = [context.Event() for _ in range(workers)]
+    stopping = []
+
+    def start(index: int) -> multiprocessing.Process:
+        process = context.Process(target=run_worker, name=f"worker-{index}", args=(
+            index, workers, sock, socket_dir, drained[index], drain_timeout, log_level))
+        process.start()
+        return process
+
+    def stop(signum, frame) -> None:
+        stopping.append(signum)
+
+    previous = {signum: signal.signal(signum, stop) for signum in (signal.SIGTERM, signal.SIGINT)}
+    processes = [start(index) for index in range(workers)]
+    try:
+        while not stopping:
+            for ready in wait([process.sentinel for process in processes], timeout=0.5):
+                index = next(i for i, process in enumerate(processes) if process.sentinel == ready)
+                if not stopping:
+                    print(f"⚠️  Worker {index} exited with code {processes[index].exitcode}; restarting it")
+                    processes[index] = start(index)
+
+        print(f"\n🛑 Draining {workers} workers (up to {drain_timeout:g}s)")
+        sock.close()
+        for process in processes:
+            if process.is_alive():
+                os.kill(process.pid, DRAIN_SIGNAL)
+        deadline = time.monotonic() + drain_timeout + 1
+        for event, process in zip(drained, processes):
+            while process.is_alive() and not event.wait(0.1) and time.monotonic() < deadline:
+                pass
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        for process in processes:
+            process.join(STOP_TIMEOUT + 10)
+            if process.is_alive():
+                process.kill()
+                process.join()
+    finally:
+        for signum, handler in previous.items():
+            signal.signal(signum, handler)
+        shutil.rmtree(socket_dir, ignore_errors=True)
@@ -0,0 +1,116 @@
+"""
+Push channel for game updates.
+
+Clients following a game subscribe to it instead of polling. Each game has
+its own set of subscriber queues; publishing an update serializes it once
+and hands the same encoded event to every subscriber, so the cost of a move
+does not grow with the serialization work per viewer. Games nobody follows
+cost a single dict lookup per update.
+
+A subscriber that falls more than its queue size behind is sent a "lagged"
+event and disconnected rather than allowed to buffer without bound; clients
+reconnect and receive the current state as their first event. Subscribers
+of a deleted or evicted game receive a final "deleted" event.
+"""
+
+import asyncio
+import json
+from typing import Any, AsyncIterator, Callable, Dict, NamedTuple, Optional, Set
+
+# Events buffered per subscriber before it is considered too slow and dropped
+DEFAULT_QUEUE_SIZE = 64
+
+
+class GameEvent(NamedTuple):
+    """An update encoded once for every transport."""
+    event: str
+    version: Optional[int]
+    sse: bytes  # Complete Server-Sent Events message
+    frame: str  # {"event", "version", "data"} envelope, sent as a WebSocket text frame
+
+
+def encode_event(event: str, version: Optional[int], payload: Any) -> GameEvent:
+    """Serialize an update for both SSE and WebSocket delivery."""
+    data = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+    lines = f"event: {event}\n"
+    if version is not None:
+        lines += f"id: {version}\n"
+    sse = f"{lines}data: {data}\n\n".encode("utf-8")
+    frame = f'{{"event":"{event}","version":{json.dumps(version)},"data":{data}}}'
+    return GameEvent(event, version, sse, frame)
+
+
+# Final events, after which a subscription ends
+DELETED = encode_event("deleted", None, None)
+LAGGED = encode_event("lagged", None, None)
+
+
+class GameEvents:
+    """Per-game fan-out of updates to asyncio subscribers."""
+
+    def __init__(self, queue_size: int = DEFAULT_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+
+    def has_subscribers(self, game_id: str) -> bool:
+        """Check whether anyone follows a game, so callers can skip building updates."""
+        return game_id in self._subscribers
+
+    def subscriber_count(self, game_id: str) -> int:
+        """Number of open subscriptions to a game."""
+        return len(self._subscribers.get(game_id, ()))
+
+    def publish(self, game_id: str, event: GameEvent) -> None:
+        """Deliver an encoded update to every subscriber of a game."""
+        for queue in list(self._subscribers.get(game_id, ())):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self._drop(game_id, queue)
+
+    def close(self, game_id: str) -> None:
+        """End every subscription to a game (it was deleted or evicted)."""
+        for queue in self._subscribers.pop(game_id, ()):
+            _end(queue, DELETED)
+
+    async def listen(self, game_id: str, snapshot: Callable[[], GameEvent]) -> AsyncIterator[GameEvent]:
+        """
+        Subscribe to a game and yield its updates until the subscription ends.
+
+        Args:
+            game_id: Game to follow
+            snapshot: Builds the first event (normally the current state). It is
+                called as the subscription starts, so no update can fall between
+                the snapshot and the first queued event. Returning DELETED ends
+                the subscription at once.
+        """
+        queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        self._subscribers.setdefault(game_id, set()).add(queue)
+        try:
+            event = snapshot()
+            while True:
+                yield event
+                if event is DELETED or event is LAGGED:
+                    return
+                event = await queue.get()
+        finally:
+            self._remove(game_id, queue)
+
+    def _drop(self, game_id: str, queue: asyncio.Queue) -> None:
+        """Disconnect a subscriber whose queue is full."""
+        self._remove(game_id, queue)
+        _end(queue, LAGGED)
+
+    def _remove(self, game_id: str, queue: asyncio.Queue) -> None:
+        subscribers = self._subscribers.get(game_id)
+        if subscribers is not None:
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._subscribers[game_id]
+
+
+def _end(queue: asyncio.Queue, final: GameEvent) -> None:
+    """Replace whatever a subscriber has buffered with a final event."""
+    while not queue.empty():
+        queue.get_nowait()
+    queue.put_nowait(final)
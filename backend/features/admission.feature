@@ -0,0 +1,56 @@
+Feature: Admission control
+  As an operator of the game service
+  I want each client rate limited per route and the work in flight capped
+  So that one flooding client cannot degrade latency for everyone else
+
+  Scenario: A client over its burst is told when to come back
+    Given an API limiting every route to 1 request per second with bursts of 3
+    When client "10.0.0.1" sends 4 requests to POST /games
+    Then client "10.0.0.1" should have been answered 201, 201, 201, 429
+    And the last response should ask to retry after 1 second
+
+  Scenario: Buckets refill over time
+    Given an API limiting every route to 1 request per second with bursts of 3
+    When client "10.0.0.1" sends 3 requests to POST /games
+    And 2 seconds pass for the rate limiter
+    And client "10.0.0.1" sends 3 requests to POST /games
+    Then client "10.0.0.1" should have been answered 201, 201, 201, 201, 201, 429
+
+  Scenario: Clients and routes have buckets of their own
+    Given an API limiting every route to 1 request per second with bursts of 1
+    When client "10.0.0.1" sends 2 requests to POST /games
+    And client "10.0.0.2" sends 1 request to POST /games
+    And client "10.0.0.1" sends 1 request to GET /games
+    Then client "10.0.0.1" should have been answered 201, 429, 200
+    And client "10.0.0.2" should have been answered 201
+
+  Scenario: Route limits override the default, and admin routes are never limited
+    Given an API limiting every route to 1 request per second with bursts of 1 except "GET /games=0"
+    When client "10.0.0.1" sends 3 requests to GET /games
+    And client "10.0.0.1" sends 3 requests to GET /admin/stats
+    Then client "10.0.0.1" should have been answered 200, 200, 200, 200, 200, 200
+
+  Scenario: A forwarded client address is limited instead of the proxy's
+    Given an API limiting every route to 1 request per second with bursts of 1 by X-Forwarded-For
+    When client "10.0.0.1" sends 1 request to POST /games for "203.0.113.7, 10.0.0.1"
+    And client "10.0.0.1" sends 1 request to POST /games for "203.0.113.8"
+    And client "10.0.0.1" sends 1 request to POST /games for "203.0.113.7"
+    Then client "10.0.0.1" should have been answered 201, 201, 429
+    And the rate limiter should list "203.0.113.7" as limited on "POST /games"
+
+  Scenario: Requests beyond the in-flight cap are shed until one finishes
+    Given an API handling at most 2 requests at once
+    When 2 slow requests are in flight
+    And client "10.0.0.1" sends 1 request to POST /games
+    And the slow requests finish
+    And client "10.0.0.1" sends 1 request to POST /games
+    Then client "10.0.0.1" should have been answered 503, 201
+    And the rate limiter should report 1 overloaded request and 0 in flight
+
+  Scenario: The bucket table stays within its bound
+    Given an API limiting every route to 1 request per second with bursts of 1 keeping at most 100 buckets
+    When 250 different clients each send 1 request to GET /games
+    Then the rate limiter should hold 100 buckets after 150 evictions
+
+  Scenario: Limits for routes the app does not have are refused
+    Then limiting "POST /nowhere=1" should fail with "unknown routes"
@@ -0,0 +1,19 @@
+Feature: Batch simulation
+  As an analyst
+  I want to simulate millions of random games at once
+  So that outcome statistics are available in seconds
+
+  Scenario: The batch engine matches the game engine's outcome statistics
+    When I simulate 200000 random games with the batch engine
+    And I simulate 20000 random games with the game engine
+    Then both engines should report the same outcome rates
+
+  Scenario: Every simulated game is accounted for
+    When I simulate 50000 random games with the batch engine
+    Then the wins and draws should add up to 50000 games
+
+  Scenario: Simulating a large board stays within the chunk memory budget
+    Given batch chunks limited to 4 MB of working arrays
+    When I simulate 50000 random games on an 8x8 board with 3 in a row with the batch engine
+    Then the simulation should have allocated at most 8 MB at once
+    And the wins and draws should add up to 50000 games
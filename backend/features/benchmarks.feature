@@ -0,0 +1,23 @@
+Feature: Engine benchmark baselines
+  As a developer optimizing the game engine
+  I want benchmark results saved and compared against a baseline
+  So that performance regressions fail the build
+
+  Scenario: A metric slower than the threshold is a regression
+    Given a benchmark baseline where bitboard make_move_ns is 100.0
+    When the current bitboard make_move_ns is 125.0
+    Then comparing with a 10% threshold should report make_move_ns 25% worse
+
+  Scenario: A metric within the threshold passes
+    Given a benchmark baseline where bitboard make_move_ns is 100.0
+    When the current bitboard make_move_ns is 108.0
+    Then comparing with a 10% threshold should report no regressions
+
+  Scenario: A saved baseline reads back unchanged
+    Given a benchmark baseline where bitboard make_move_ns is 100.0
+    When the baseline is saved and loaded again
+    Then the loaded bitboard make_move_ns should be 100.0
+
+  Scenario: Every engine benchmark runs on a small sample
+    When I benchmark the bitboard engine on 50 games
+    Then every benchmark metric should be positive
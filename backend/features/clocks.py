@@ -0,0 +1,13 @@
+"""
+Test doubles for the time sources the stores, snapshots and rate limiter are given.
+"""
+
+
+class FakeClock:
+    """Manually advanced time source: set or add to ``now`` to move time on."""
+
+    def __init__(self, start: float = 0.0):
+        self.now = start
+
+    def __call__(self) -> float:
+        return self.now
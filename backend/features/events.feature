@@ -0,0 +1,22 @@
+Feature: Game event push
+  As a player watching a game
+  I want moves pushed to me as they happen
+  So that I do not have to poll for my opponent's move
+
+  Scenario: Every subscriber receives the same encoded update
+    Given a game with 3 subscribers
+    When a move event is published for the game
+    Then every subscriber should receive the state first
+    And every subscriber should receive the same move event
+
+  Scenario: A subscriber that falls behind is disconnected
+    Given a game with 2 subscribers that buffer at most 2 events
+    When 3 move events are published without the first subscriber reading
+    Then the first subscriber should receive a "lagged" event and stop
+    And the game should have 1 subscriber left
+
+  Scenario: Deleting a game ends its subscriptions
+    Given a game with 2 subscribers
+    When the game's subscriptions are closed
+    Then every subscriber should receive a "deleted" event and stop
+    And the game should have 0 subscribers left
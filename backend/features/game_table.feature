@@ -0,0 +1,59 @@
+Feature: Array-backed game table
+  As an operator running millions of concurrent games
+  I want games kept as rows of typed arrays instead of objects
+  So that each game costs tens of bytes rather than over a kilobyte
+
+  Scenario: Table games play exactly like game objects
+    Given a game table
+    When 500 random games with undo, redo, reset and named moves are played on both the table and game objects
+    Then every table game should match its game object after every step
+
+  Scenario: Public ids find their games and nothing else
+    Given a game table store
+    And 3 table games are created
+    When the second table game is deleted
+    And another table game is created
+    Then the new table game should reuse the deleted game's slot
+    And the deleted game's id should not be found
+    And the first and third table games should be found by their ids
+
+  Scenario: A game's id in any other spelling is answered 404
+    Given an API keeping its games in a game table store
+    When a game is created through the API
+    Then the game should be found by its id
+    And the game's id uppercased should be answered 404
+    And the game's id with an underscore for its first dash should be answered 404
+
+  Scenario: Views of a deleted game cannot change its slot's next game
+    Given a game table store
+    And 1 table games are created
+    When I hold a view of the first table game and delete it
+    And another table game is created
+    Then a move through the old view should be rejected
+    And the new table game should have an empty board
+
+  Scenario: Boards too large for the table are stored as game objects
+    Given a game table store
+    When a 15x15 game with 5 in a row is created in the table store
+    Then the game should be a game object
+    And the table store should hold 1 game
+
+  Scenario: A full table evicts finished games first
+    Given a game table store holding at most 2 games
+    And 2 table games are created
+    When the first table game is played to a win for X
+    And another table game is created
+    Then the first table game should have been evicted
+    And the second table game should still be stored
+    And the table store should report 1 "capacity" eviction
+
+  Scenario: Idle table games expire
+    Given a game table store where idle games expire after 60 seconds
+    And 2 table games are created
+    When 45 seconds pass for the table store
+    And the first table game is read
+    And 30 seconds pass for the table store
+    And the table store is swept
+    Then the first table game should still be stored
+    And the second table game should have been evicted
+    And the table store should report 1 "idle" eviction
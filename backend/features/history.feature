@@ -0,0 +1,60 @@
+Feature: Move history
+  As a player
+  I want every move recorded
+  So that I can take moves back, replay them and review the game
+
+  Scenario: Undo takes back the last move
+    Given I have a tic-tac-toe game
+    When player X places their mark in position (0,0)
+    And player O places their mark in position (1,1)
+    And I undo the last move
+    Then the board should show X in position (0,0)
+    And position (1,1) should be empty
+    And it should be Player O's turn
+    And the move history should be "(0,0)"
+
+  Scenario: Redo replays a taken-back move
+    Given I have a tic-tac-toe game
+    When player X places their mark in position (0,0)
+    And player O places their mark in position (1,1)
+    And I undo the last move
+    And I redo the move
+    Then the board should show O in position (1,1)
+    And the move history should be "(0,0) (1,1)"
+
+  Scenario: A new move discards the moves that could be redone
+    Given I have a tic-tac-toe game
+    When player X places their mark in position (0,0)
+    And player O places their mark in position (1,1)
+    And I undo the last move
+    And player O places their mark in position (2,2)
+    Then there should be no move to redo
+    And the move history should be "(0,0) (2,2)"
+
+  Scenario: Undoing the winning move reopens the game
+    Given I have a tic-tac-toe game with player names "Alice" and "Bob"
+    And the board has X in positions (0,0) and (0,1)
+    And it is Alice's turn
+    When Alice places her mark in position (0,2)
+    And I undo the last move
+    Then the game should not be over
+    And it should be Alice's turn
+
+  Scenario: Moves cleared by a reset can be redone
+    Given I have a tic-tac-toe game
+    When player X places their mark in position (0,0)
+    And player O places their mark in position (1,1)
+    And I reset the game
+    And I redo the move
+    Then the board should show X in position (0,0)
+    And position (1,1) should be empty
+
+  Scenario: Nothing to undo on a new game
+    Given I have a new tic-tac-toe game
+    Then there should be no move to undo
+
+  Scenario: A game rebuilt from its move log matches the original
+    Given I have a 15x15 game where 5 in a row wins
+    When 40 random moves are played with seed 3
+    And the game is rebuilt from its move log
+    Then the rebuilt game should match the original
@@ -0,0 +1,43 @@
+Feature: Idempotent move retries
+  As a client retrying moves over a flaky connection
+  I want a retried request to get the first attempt's response back
+  So that a move is never applied twice
+
+  Scenario: A retry with the same key gets the stored response
+    Given an idempotency cache keeping 4 keys per game and 100 keys in all
+    When the response "moved" is stored for key "k1" of game "g1" and move (0,0)
+    Then a retry of move (0,0) with key "k1" on game "g1" should get "moved"
+    And the cache should have replayed 1 response
+
+  Scenario: Keys belong to their game
+    Given an idempotency cache keeping 4 keys per game and 100 keys in all
+    When the response "moved" is stored for key "k1" of game "g1" and move (0,0)
+    Then a request for move (0,0) with key "k1" on game "g2" should not be a retry
+
+  Scenario: Reusing a key for a different move is refused
+    Given an idempotency cache keeping 4 keys per game and 100 keys in all
+    When the response "moved" is stored for key "k1" of game "g1" and move (0,0)
+    Then a request for move (1,1) with key "k1" on game "g1" should be refused as key reuse
+
+  Scenario: Each game keeps only its most recent keys
+    Given an idempotency cache keeping 2 keys per game and 100 keys in all
+    When responses are stored for keys "k1 k2 k3" of game "g1"
+    Then key "k1" of game "g1" should be forgotten
+    And keys "k2 k3" of game "g1" should be remembered
+
+  Scenario: The oldest keys overall are dropped first
+    Given an idempotency cache keeping 4 keys per game and 3 keys in all
+    When responses are stored for keys "k1 k2" of game "g1"
+    And responses are stored for keys "k3 k4" of game "g2"
+    Then key "k1" of game "g1" should be forgotten
+    And keys "k2" of game "g1" should be remembered
+    And keys "k3 k4" of game "g2" should be remembered
+
+  Scenario: Deleting a game drops its keys
+    Given an idempotency cache keeping 4 keys per game and 100 keys in all
+    When responses are stored for keys "k1 k2" of game "g1"
+    And responses are stored for keys "k3" of game "g2"
+    And game "g1" is forgotten by the idempotency cache
+    Then key "k1" of game "g1" should be forgotten
+    And keys "k3" of game "g2" should be remembered
+    And the idempotency cache should hold 1 key
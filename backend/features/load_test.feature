@@ -0,0 +1,18 @@
+Feature: API load test
+  As a developer changing the API
+  I want to measure latency and throughput under concurrent traffic
+  So that regressions are caught before they reach production
+
+  Scenario: A mixed load test reports every endpoint
+    When I run an in-process load test of 400 requests from 8 clients with mix "create=1,move=6,poll=4,list=1"
+    Then the load test should report create, move, poll and list traffic
+    And the load test should have no errors
+    And every endpoint's p50 should not exceed its p95, nor its p95 its p99
+
+  Scenario: Latency percentiles use the nearest rank
+    Given latencies of 1 to 100 milliseconds
+    Then the p50 latency should be 50 milliseconds
+    And the p99 latency should be 99 milliseconds
+
+  Scenario: An unknown traffic kind is rejected
+    Then the traffic mix "create=1,delete=2" should be rejected
@@ -0,0 +1,34 @@
+Feature: Matchmaking lobby
+  As a player without an opponent
+  I want to wait in a lobby until someone else wants the same game
+  So that strangers can be paired into new games
+
+  Scenario: Players are paired first come, first served
+    Given a matchmaking lobby
+    When "Ann" joins the lobby for a 3x3 board
+    And "Bob" joins the lobby for a 4x4 board
+    And "Cat" joins the lobby for a 3x3 board
+    Then "Ann" should be paired with "Cat" and play X
+    And "Cat" should be paired with "Ann" and play O
+    And 1 player should be waiting in the lobby
+
+  Scenario: Players who leave are skipped
+    Given a matchmaking lobby
+    When "Ann" joins the lobby for a 3x3 board
+    And "Ann" leaves the lobby
+    And "Bob" joins the lobby for a 3x3 board
+    Then "Bob" should still be waiting
+    And "Ann" should have been told they left
+
+  Scenario: A player nobody joins times out
+    Given a matchmaking lobby
+    When "Ann" joins the lobby for a 3x3 board and waits at most 0.05 seconds
+    Then "Ann" should time out
+    And 0 players should be waiting in the lobby
+
+  Scenario: A full lobby turns players away
+    Given a matchmaking lobby holding at most 2 waiting players
+    When "Ann" joins the lobby for a 3x3 board
+    And "Bob" joins the lobby for a 4x4 board
+    Then "Cat" should be turned away when joining for a 5x5 board
+    But "Dan" should be paired at once when joining for a 3x3 board
@@ -0,0 +1,27 @@
+Feature: Monte Carlo tree search player
+  As a player on a large board
+  I want a computer opponent that searches within a time budget
+  So that I get a strong move without waiting for an exact solution
+
+  Scenario: MCTS takes an immediate win
+    Given I have a tic-tac-toe game in progress
+    And the board has X in positions (0,0) and (0,1)
+    And the board has O in positions (1,0) and (1,1)
+    And it is player X's turn
+    When the MCTS player searches for 2000 iterations
+    Then the MCTS player should choose position (0,2)
+    And the search should report 2000 iterations
+
+  Scenario: MCTS blocks a closed four on a larger board
+    Given I have a 6x6 game where 4 in a row wins
+    And the board has X in row 2 from column 1 to column 3
+    And the board has O in positions (2,0) and (5,5)
+    And it is player O's turn
+    When the MCTS player searches for 10000 iterations
+    Then the MCTS player should choose position (2,4)
+
+  Scenario: Concurrent searches with different budgets share one process pool
+    Given I have a 5x5 game where 4 in a row wins
+    When 6 threads search at once with 4 workers and budgets of 2, 3 and 4 iterations
+    Then every concurrent search should have returned a move
+    And every concurrent search should have used the same process pool
@@ -0,0 +1,28 @@
+Feature: Service metrics
+  As an operator of the game service
+  I want request, game and store metrics in the Prometheus format
+  So that latency and load can be monitored and alerted on
+
+  Scenario: Requests are counted by route and status class
+    Given a metrics registry with the route GET /games/{game_id}
+    When 3 requests to GET /games/{game_id} take 2 ms and answer 200
+    And 1 request to GET /games/{game_id} takes 2 ms and answers 404
+    Then the metrics should include 'tictactoe_http_requests_total{method="GET",route="/games/{game_id}",status="2xx"} 3'
+    And the metrics should include 'tictactoe_http_requests_total{method="GET",route="/games/{game_id}",status="4xx"} 1'
+
+  Scenario: Latencies fill a cumulative histogram
+    Given a metrics registry with the route GET /games/{game_id}
+    When 3 requests to GET /games/{game_id} take 2 ms and answer 200
+    And 1 request to GET /games/{game_id} takes 3000 ms and answers 200
+    Then the metrics should include 'tictactoe_http_request_duration_seconds_bucket{method="GET",route="/games/{game_id}",le="0.001"} 0'
+    And the metrics should include 'tictactoe_http_request_duration_seconds_bucket{method="GET",route="/games/{game_id}",le="0.0025"} 3'
+    And the metrics should include 'tictactoe_http_request_duration_seconds_bucket{method="GET",route="/games/{game_id}",le="2.5"} 3'
+    And the metrics should include 'tictactoe_http_request_duration_seconds_bucket{method="GET",route="/games/{game_id}",le="+Inf"} 4'
+    And the metrics should include 'tictactoe_http_request_duration_seconds_count{method="GET",route="/games/{game_id}"} 4'
+
+  Scenario: Moves per second average the last minute
+    Given a metrics registry with the route GET /games/{game_id}
+    When 120 moves are recorded at second 1000
+    And 60 moves are recorded at second 1030
+    Then the move rate at second 1031 should be 3.0 moves per second
+    And the move rate at second 1090 should be 1.0 moves per second
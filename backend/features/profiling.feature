@@ -0,0 +1,22 @@
+Feature: Request profiling
+  As an operator chasing a latency spike
+  I want per-phase request timings and on-demand profiles
+  So that I can see where request time goes without paying for it when off
+
+  Scenario: Server-Timing breaks a request down by phase
+    Given an app whose handler builds a response for 5 ms, encoding it for 10 ms
+    When Server-Timing is turned on and the app serves a request
+    Then the Server-Timing header should list build, encode and total
+    And the build phase should exclude the time spent encoding
+
+  Scenario: Turning Server-Timing off restores the original functions
+    Given an app whose handler builds a response for 5 ms, encoding it for 10 ms
+    When Server-Timing is turned on and then off
+    Then the app's response builder should be the original function
+    And a served request should have no Server-Timing header
+
+  Scenario: A profile session ends after the requested number of requests
+    Given a cProfile session for the next 3 requests
+    When 3 requests finish
+    Then the session should have stopped after 3 requests
+    And the profile should list the functions called
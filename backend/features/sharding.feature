@@ -0,0 +1,58 @@
+Feature: Sharded worker processes
+  As an operator of the game service
+  I want games split between worker processes, each owning its share
+  So that throughput grows with the number of cores without locks between workers
+
+  Scenario: Every worker owns a similar share of the games
+    Given a hash ring of 4 workers
+    When 20000 random game ids are placed on the ring
+    Then every worker should own between 20% and 30% of them
+
+  Scenario: Adding a worker only moves the games it takes over
+    Given a hash ring of 4 workers
+    When 20000 random game ids are placed on the ring
+    And the ring grows to 5 workers
+    Then at most 25% of the games should have moved
+    And every game that moved should now belong to worker 4
+
+  Scenario Outline: A worker's store only hands out ids the worker owns
+    Given a <kind> game store for worker 1 of 3
+    When 60 games are created in the worker's store, every tenth on a 20x20 board
+    Then every game created should belong to worker 1
+
+    Examples:
+      | kind      |
+      | in-memory |
+      | table     |
+
+  Scenario: Requests are routed to the worker that must answer them
+    Given the shard of worker 1 of 3
+    Then a request for a game should go to the game's owner
+    And "POST /lobby" should go to worker 0
+    And "GET /health" should go to worker 1
+    And "GET /health" naming worker 2 should go to worker 2
+    And "GET /health" naming worker 7 should go to worker 1
+
+  Scenario: Worker metrics are merged with a worker label
+    When the metrics of 2 workers are merged
+    Then the merged metrics should describe each family once
+    And every merged sample should carry its worker's label
+
+  Scenario: Forwarded requests share one relay connection to their owner
+    Given worker 1 of 2 answering forwarded requests
+    When worker 0 forwards 20 requests to it one after another
+    Then every forwarded request should get the owner's response
+    And the owner should have accepted 1 relay connection
+
+  Scenario: An owner's app sees the client of a forwarded stream leave
+    Given worker 1 of 2 answering forwarded requests
+    When worker 0 forwards a stream whose client leaves after the first chunk
+    Then the owner's app should see the client disconnect
+
+  Scenario: A cluster serves every game from any worker and drains on shutdown
+    Given a production server with 2 workers
+    When 3 games are created on each worker
+    And one move is made in every game with a single batch
+    Then every game should show X's move
+    And listing 1 game at a time should find all 6 games
+    And stopping the server should drain both workers and exit cleanly
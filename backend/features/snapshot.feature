@@ -0,0 +1,62 @@
+Feature: Store snapshots
+  As an operator restarting the API
+  I want the game store saved to a snapshot file and loaded back at startup
+  So that games in progress survive restarts without a database
+
+  Scenario Outline: Games survive a snapshot and restore
+    Given a "<backend>" store with 300 randomly played games, some deleted
+    When the store is saved to a snapshot file
+    And the snapshot is restored into a new "<backend>" store
+    Then the restored store should hold the same games in the same state
+    And the restored store should page through the games in the same order
+
+    Examples:
+      | backend |
+      | memory  |
+      | table   |
+
+  Scenario: Games keep their idle time across a restore
+    Given a "table" store where idle games expire after 60 seconds
+    And 2 games are created in the snapshot store
+    When 45 seconds pass for the snapshot store
+    And the first snapshot game is read
+    And 30 seconds pass for the snapshot store
+    And the store is saved to a snapshot file
+    And the snapshot is restored into a new "table" store where idle games expire after 60 seconds
+    And the restored store is swept
+    Then the first snapshot game should be in the restored store
+    And the second snapshot game should not be in the restored store
+
+  Scenario: A restored store over its game limit evicts down to the limit
+    Given a "memory" store with 10 randomly played games, some deleted
+    When the store is saved to a snapshot file
+    And the snapshot is restored into a new "memory" store holding at most 5 games
+    Then the restored store should hold 5 games
+
+  Scenario: A damaged snapshot file is refused
+    Given a "table" store with 20 randomly played games, some deleted
+    When the store is saved to a snapshot file
+    And a byte in the middle of the snapshot file is changed
+    Then restoring the snapshot into a new "table" store should fail with "checksum"
+
+  Scenario: A snapshot is only restored by the kind of store that wrote it
+    Given a "memory" store with 20 randomly played games, some deleted
+    When the store is saved to a snapshot file
+    Then restoring the snapshot into a new "table" store should fail with "InMemoryGameStore"
+
+  Scenario: A background snapshot captures the store as it was when it started
+    Given a "table" store with 50 randomly played games, some deleted
+    When a background snapshot starts and a game is created before it finishes
+    And the snapshot is restored into a new "table" store
+    Then the restored store should hold 1 game fewer than the saved store
+
+  Scenario: A final snapshot that cannot be written does not stop the shutdown
+    Given a "memory" store with 10 randomly played games, some deleted
+    When the server shuts down with a snapshot file in a missing directory
+    Then the shutdown should have finished with 1 snapshot failure recorded
+
+  Scenario: A background snapshot writer that hangs is killed
+    Given a "table" store with 20 randomly played games, some deleted
+    When a background snapshot is taken by a writer that hangs, with a 0.2 second limit
+    Then the background snapshot should have failed with "killed"
+    And the hung snapshot writer should have exited
@@ -0,0 +1,32 @@
+Feature: Perfect-play solver
+  As a player
+  I want a computer opponent that never makes a mistake
+  So that I can practise against perfect play
+
+  Scenario: The empty board is a draw under perfect play
+    Given I have a new tic-tac-toe game
+    When I ask the solver for the best move
+    Then the solver should predict a draw
+
+  Scenario: The solver takes an immediate win
+    Given I have a tic-tac-toe game in progress
+    And the board has X in positions (0,0) and (0,1)
+    And the board has O in positions (1,0) and (1,1)
+    And it is player X's turn
+    When I ask the solver for the best move
+    Then the solver should suggest position (0,2)
+    And the solver should predict a win
+
+  Scenario: The solver blocks the opponent's line
+    Given I have a tic-tac-toe game in progress
+    And the board has X in positions (0,0) and (0,1)
+    And the board has O in position (1,1)
+    And it is player O's turn
+    When I ask the solver for the best move
+    Then the solver should suggest position (0,2)
+    And the solver should predict a draw
+
+  Scenario: The solver gives no move once the game is over
+    Given I have a completed tic-tac-toe game with a winner
+    When I ask the solver for the best move
+    Then the solver should not suggest a move
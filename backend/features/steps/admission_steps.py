@@ -0,0 +1,167 @@
+"""
+Step definitions for the admission control BDD tests.
+"""
+
+from behave import given, when, then
+import asyncio
+import sys
+import os
+
+import httpx
+from fastapi import FastAPI, status
+
+# Add the backend and features directories to the path so we can import admission.py and clocks.py
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from clocks import FakeClock
+from admission import Admission, RateLimit, parse_route_limits
+
+
+def _app(context, admission):
+    """A small app with a game route pair, an admin route and a route that waits until released."""
+    app = FastAPI()
+    context.release = asyncio.Event()
+
+    @app.post("/games", status_code=status.HTTP_201_CREATED)
+    async def create_game():
+        return {}
+
+    @app.get("/games")
+    async def list_games():
+        return []
+
+    @app.get("/admin/stats")
+    async def get_stats():
+        return {}
+
+    @app.get("/slow")
+    async def slow():
+        await context.release.wait()
+        return {}
+
+    admission.install(app.routes)
+    return app
+
+
+def _create_api(context, **options):
+    context.loop = asyncio.new_event_loop()
+    context.add_cleanup(context.loop.close)
+    context.clock = FakeClock(1000.0)
+    context.admission = Admission(clock=context.clock, **options)
+    asyncio.set_event_loop(context.loop)
+    context.app = _app(context, context.admission)
+    context.statuses = {}
+    context.slow = []
+
+async def _send(context, client, method, path, forwarded_for=None):
+    transport = httpx.ASGITransport(app=context.app, client=(client, 50000))
+    headers = {"X-Forwarded-For": forwarded_for} if forwarded_for else {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+        return await http.request(method, path, headers=headers)
+
+def _send_many(context, client, count, method, path, forwarded_for=None):
+    for _ in range(count):
+        context.response = context.loop.run_until_complete(_send(context, client, method, path, forwarded_for))
+        context.statuses.setdefault(client, []).append(context.response.status_code)
+
+@given('an API limiting every route to {rate:g} request per second with bursts of {burst:d}')
+def step_api_with_limit(context, rate, burst):
+    """Create an app whose routes share one default limit."""
+    _create_api(context, rate_limit=RateLimit(rate, burst))
+
+@given('an API limiting every route to {rate:g} request per second with bursts of {burst:d} except "{routes}"')
+def step_api_with_route_limits(context, rate, burst, routes):
+    """Create an app with a default limit and per-route overrides."""
+    _create_api(context, rate_limit=RateLimit(rate, burst), route_limits=parse_route_limits(routes))
+
+@given('an API limiting every route to {rate:g} request per second with bursts of {burst:d} by {header}')
+def step_api_with_client_header(context, rate, burst, header):
+    """Create an app that takes the client from a header."""
+    _create_api(context, rate_limit=RateLimit(rate, burst), client_header=header)
+
+@given('an API limiting every route to {rate:g} request per second with bursts of {burst:d} keeping at most {count:d} buckets')
+def step_api_with_small_table(context, rate, burst, count):
+    """Create an app with a small bucket table."""
+    _create_api(context, rate_limit=RateLimit(rate, burst), max_buckets=count)
+
+@given('an API handling at most {count:d} requests at once')
+def step_api_with_cap(context, count):
+    """Create an app with an in-flight cap and no rate limit."""
+    _create_api(context, max_concurrent=count)
+
+@when('client "{client}" sends {count:d} requests to {method} {path}')
+@when('client "{client}" sends {count:d} request to {method} {path}')
+def step_send_requests(context, client, count, method, path):
+    """Send requests one after another."""
+    if " for " in path:
+        path, forwarded_for = path.split(" for ", 1)
+        _send_many(context, client, count, method, path, forwarded_for.strip('"'))
+    else:
+        _send_many(context, client, count, method, path)
+
+@when('{count:d} different clients each send 1 request to {method} {path}')
+def step_send_from_many_clients(context, count, method, path):
+    """Send one request from each of many addresses."""
+    for index in range(count):
+        _send_many(context, f"10.1.{index // 256}.{index % 256}", 1, method, path)
+
+@when('{seconds:g} seconds pass for the rate limiter')
+def step_advance_limiter_clock(context, seconds):
+    """Advance the limiter's clock."""
+    context.clock.now += seconds
+
+@when('{count:d} slow requests are in flight')
+def step_start_slow_requests(context, count):
+    """Start requests that wait until released, and let them reach their endpoint."""
+    for index in range(count):
+        context.slow.append(context.loop.create_task(_send(context, f"10.2.0.{index}", "GET", "/slow")))
+    context.loop.run_until_complete(asyncio.sleep(0.05))
+    assert context.admission.in_flight == count, context.admission.in_flight
+
+@when('the slow requests finish')
+def step_finish_slow_requests(context):
+    """Release the waiting requests and collect them."""
+    context.release.set()
+    responses = context.loop.run_until_complete(asyncio.gather(*context.slow))
+    assert [response.status_code for response in responses] == [200] * len(responses)
+
+@then('client "{client}" should have been answered {statuses}')
+def step_verify_statuses(context, client, statuses):
+    """Verify the statuses a client got, in order."""
+    expected = [int(value) for value in statuses.split(", ")]
+    assert context.statuses[client] == expected, context.statuses[client]
+
+@then('the last response should ask to retry after {seconds:d} second')
+def step_verify_retry_after(context, seconds):
+    """Verify the Retry-After header and error body of a refusal."""
+    assert context.response.headers["Retry-After"] == str(seconds), context.response.headers
+    assert context.response.json()["status_code"] == 429
+
+@then('the rate limiter should list "{client}" as limited on "{route}"')
+def step_verify_limited(context, client, route):
+    """Verify a client appears among the empty buckets."""
+    limited = [(entry["client"], entry["route"]) for entry in context.admission.limited(10)]
+    assert (client, route) in limited, limited
+
+@then('the rate limiter should report {overloaded:d} overloaded request and {in_flight:d} in flight')
+def step_verify_overload_stats(context, overloaded, in_flight):
+    """Verify the shed request count and that every slot was given back."""
+    stats = context.admission.stats()
+    assert stats["overloaded"] == overloaded, stats
+    assert stats["in_flight"] == in_flight, stats
+
+@then('the rate limiter should hold {count:d} buckets after {evictions:d} evictions')
+def step_verify_bucket_table(context, count, evictions):
+    """Verify the bucket table's size and eviction count."""
+    stats = context.admission.stats()
+    assert (stats["buckets"], stats["bucket_evictions"]) == (count, evictions), stats
+
+@then('limiting "{routes}" should fail with "{message}"')
+def step_verify_unknown_route(context, routes, message):
+    """Verify limits for a route the app lacks are refused when installed."""
+    try:
+        _create_api(context, route_limits=parse_route_limits(routes))
+    except ValueError as exc:
+        assert message in str(exc), str(exc)
+    else:
+        raise AssertionError("The limits were installed")
@@ -0,0 +1,60 @@
+"""
+Step definitions for the batch simulation BDD tests.
+"""
+
+from behave import given, when, then
+import sys
+import os
+import tracemalloc
+
+# Add the backend directory to the path so we can import batch_sim.py
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+import batch_sim
+from batch_sim import max_rate_gap, simulate_random_games, simulate_scalar
+
+
+@when('I simulate {count:d} random games with the batch engine')
+def step_simulate_batch(context, count):
+    """Run a seeded vectorized simulation."""
+    context.batch_stats = simulate_random_games(count, seed=11)
+
+@given('batch chunks limited to {megabytes:d} MB of working arrays')
+def step_limit_chunks(context, megabytes):
+    """Lower the chunk memory budget for this scenario."""
+    context.add_cleanup(setattr, batch_sim, "CHUNK_BYTES", batch_sim.CHUNK_BYTES)
+    batch_sim.CHUNK_BYTES = megabytes * 1024 * 1024
+
+@when('I simulate {count:d} random games on an {m:d}x{n:d} board with {k:d} in a row with the batch engine')
+def step_simulate_batch_board(context, count, m, n, k):
+    """Run a seeded vectorized simulation on a larger board, tracing its allocations."""
+    tracemalloc.start()
+    try:
+        context.batch_stats = simulate_random_games(count, m, n, k, seed=11)
+        context.peak_bytes = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+@then('the simulation should have allocated at most {megabytes:d} MB at once')
+def step_verify_peak(context, megabytes):
+    """Verify peak traced memory stayed near the chunk budget."""
+    peak = context.peak_bytes / (1024 * 1024)
+    assert peak <= megabytes, f"The simulation peaked at {peak:.1f} MB"
+
+@when('I simulate {count:d} random games with the game engine')
+def step_simulate_scalar(context, count):
+    """Run a seeded simulation through TicTacToeGame."""
+    context.scalar_stats = simulate_scalar(count, seed=11)
+
+@then('both engines should report the same outcome rates')
+def step_verify_same_rates(context):
+    """Verify the outcome rates agree within sampling error."""
+    gap = max_rate_gap(context.batch_stats, context.scalar_stats)
+    assert gap < 4, f"Outcome rates differ by {gap:.2f} standard errors"
+
+@then('the wins and draws should add up to {count:d} games')
+def step_verify_totals(context, count):
+    """Verify every game ended exactly once."""
+    stats = context.batch_stats
+    assert stats.games == count
+    assert stats.x_wins + stats.o_wins + stats.draws == count
+    assert sum(stats.length_counts) == count
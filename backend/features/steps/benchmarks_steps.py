@@ -0,0 +1,62 @@
+"""
+Step definitions for the engine benchmark BDD tests.
+"""
+
+from behave import given, when, then
+import sys
+import os
+import tempfile
+
+# Add the backend directory to the path so we can import bench_engine.py
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+from bench_engine import (TIMINGS, compare_results, load_baseline, random_move_sequences,
+                          run_benchmarks, save_baseline)
+from game import TicTacToeGame
+
+
+@given('a benchmark baseline where {engine} {metric} is {value:f}')
+def step_benchmark_baseline(context, engine, metric, value):
+    """Set up baseline results with one metric."""
+    context.baseline = {engine: {metric: value}}
+
+@when('the current {engine} {metric} is {value:f}')
+def step_current_results(context, engine, metric, value):
+    """Set up current results with one metric."""
+    context.current = {engine: {metric: value}}
+
+@when('the baseline is saved and loaded again')
+def step_save_load_baseline(context):
+    """Round-trip the baseline through a JSON file."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "baseline.json")
+        save_baseline(path, context.baseline, games=10, seed=1)
+        context.loaded = load_baseline(path)
+
+@when('I benchmark the bitboard engine on {games:d} games')
+def step_run_benchmarks(context, games):
+    """Run every benchmark once on a few games."""
+    context.benchmark_results = run_benchmarks(TicTacToeGame, random_move_sequences(games, 1), repeat=1)
+
+@then('comparing with a {threshold:d}% threshold should report {metric} {change:d}% worse')
+def step_verify_regression(context, threshold, metric, change):
+    """Verify exactly one regression is found, with its relative change."""
+    regressions = compare_results(context.baseline, context.current, threshold / 100)
+    assert len(regressions) == 1, f"Expected one regression, got {regressions}"
+    assert regressions[0].metric == metric
+    assert round(regressions[0].change * 100) == change
+
+@then('comparing with a {threshold:d}% threshold should report no regressions')
+def step_verify_no_regression(context, threshold):
+    """Verify the comparison passes."""
+    assert compare_results(context.baseline, context.current, threshold / 100) == []
+
+@then('the loaded {engine} {metric} should be {value:f}')
+def step_verify_loaded(context, engine, metric, value):
+    """Verify a metric read back from the baseline file."""
+    assert context.loaded[engine][metric] == value
+
+@then('every benchmark metric should be positive')
+def step_verify_benchmark_metrics(context):
+    """Verify every timing and the memory figure were measured."""
+    assert set(context.benchmark_results) == set(TIMINGS) | {"bytes_per_game"}
+    assert all(value > 0 for value in context.benchmark_results.values())
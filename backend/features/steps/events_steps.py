@@ -0,0 +1,91 @@
+"""
+Step definitions for the game event push BDD tests.
+"""
+
+from behave import given, when, then
+import asyncio
+import sys
+import os
+
+# Add the backend directory to the path so we can import events.py
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+from events import GameEvents, encode_event
+
+GAME_ID = "game-1"
+
+
+def _run(context, coroutine):
+    return context.loop.run_until_complete(coroutine)
+
+def _subscribe(context, count, queue_size=None):
+    context.loop = asyncio.new_event_loop()
+    context.add_cleanup(context.loop.close)
+    context.events = GameEvents() if queue_size is None else GameEvents(queue_size)
+    context.state = encode_event("state", 0, {"board": []})
+    context.listeners = [context.events.listen(GAME_ID, lambda: context.state) for _ in range(count)]
+    # Start each subscription by reading its first event
+    context.first_events = [_run(context, listener.__anext__()) for listener in context.listeners]
+
+def _read_until_end(context, listener):
+    """Read a subscription's remaining events until it stops."""
+    async def drain():
+        return [event async for event in listener]
+    return _run(context, drain())
+
+@given('a game with {count:d} subscribers')
+def step_game_with_subscribers(context, count):
+    """Subscribe several listeners to one game."""
+    _subscribe(context, count)
+
+@given('a game with {count:d} subscribers that buffer at most {size:d} events')
+def step_game_with_small_buffers(context, count, size):
+    """Subscribe listeners with small queues."""
+    _subscribe(context, count, size)
+
+@when('a move event is published for the game')
+def step_publish_move(context):
+    """Publish one move."""
+    context.move = encode_event("move", 1, {"row": 1, "col": 1})
+    context.events.publish(GAME_ID, context.move)
+
+@when('{count:d} move events are published without the first subscriber reading')
+def step_publish_moves_lagging(context, count):
+    """Publish moves while only the second subscriber keeps up."""
+    for version in range(1, count + 1):
+        context.events.publish(GAME_ID, encode_event("move", version, {}))
+        _run(context, context.listeners[1].__anext__())
+
+@when('the game\'s subscriptions are closed')
+def step_close_subscriptions(context):
+    """Close the game's subscriptions, as deleting it does."""
+    context.events.close(GAME_ID)
+
+@then('every subscriber should receive the state first')
+def step_verify_state_first(context):
+    """Verify the snapshot came first."""
+    assert all(event is context.state for event in context.first_events)
+
+@then('every subscriber should receive the same move event')
+def step_verify_same_move(context):
+    """Verify the move was encoded once and shared."""
+    for listener in context.listeners:
+        assert _run(context, listener.__anext__()) is context.move
+
+@then('the first subscriber should receive a "{event}" event and stop')
+def step_verify_first_ends(context, event):
+    """Verify the lagging subscriber was ended."""
+    events = _read_until_end(context, context.listeners[0])
+    assert [e.event for e in events] == [event], f"Got {[e.event for e in events]}"
+
+@then('every subscriber should receive a "{event}" event and stop')
+def step_verify_all_end(context, event):
+    """Verify every subscription ended with the given event."""
+    for listener in context.listeners:
+        events = _read_until_end(context, listener)
+        assert [e.event for e in events] == [event], f"Got {[e.event for e in events]}"
+
+@then('the game should have {count:d} subscriber left')
+@then('the game should have {count:d} subscribers left')
+def step_verify_subscriber_count(context, count):
+    """Verify how many subscriptions remain open."""
+    assert context.events.subscriber_count(GAME_ID) == count
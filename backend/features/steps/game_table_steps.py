@@ -0,0 +1,256 @@
+"""
+Step definitions for the array-backed game table BDD tests.
+"""
+
+from behave import given, when, then
+import asyncio
+import random
+import sys
+import os
+
+import httpx
+
+# Add the backend and features directories to the path so we can import game_table.py and clocks.py
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from clocks import FakeClock
+from game import TicTacToeGame
+from game_table import GameTable
+from store import TableGameStore
+
+ORDINALS = {'first': 0, 'second': 1, 'third': 2}
+
+BOARDS = [(3, 3, 3), (4, 4, 3), (4, 4, 4), (3, 4, 3), (2, 5, 2), (4, 4, 2), (1, 4, 1), (2, 2, 2)]
+
+
+def observe(game):
+    """Everything the API can read from a game."""
+    return (
+        game.current_player, game.winner, game.is_draw, game.game_over, game.last_move_rejected,
+        game.version, game.get_board_state(), game.get_board_string(), game.get_packed_board(),
+        game.get_moves(), game.get_redo_moves(), game.get_move_log(), game.get_move_count(),
+        game.legal_moves(), game.count_legal_moves(), game.can_undo(), game.can_redo(),
+        game.get_winner_name(), game.get_current_player_name(), game.get_empty_mask(),
+        game.get_empty_cells(), str(game),
+        [game.get_position(row, col) for row in range(-1, game.m + 1) for col in range(-1, game.n + 1)],
+    )
+
+
+@given('a game table')
+def step_game_table(context):
+    """Create an empty table."""
+    context.game_table = GameTable()
+
+def _table_store(context, **limits):
+    context.clock = FakeClock()
+    context.store = TableGameStore(clock=context.clock, **limits)
+    context.table_games = []
+
+@given('a game table store')
+def step_table_store(context):
+    """Create a table store without limits."""
+    _table_store(context)
+
+@given('a game table store holding at most {count:d} games')
+def step_table_store_with_capacity(context, count):
+    """Create a table store with a game limit."""
+    _table_store(context, max_games=count)
+
+@given('a game table store where idle games expire after {seconds:d} seconds')
+def step_table_store_with_idle_ttl(context, seconds):
+    """Create a table store with an idle TTL."""
+    _table_store(context, idle_ttl=seconds)
+
+@when('{count:d} random games with undo, redo, reset and named moves are played on both the table and game objects')
+def step_play_both(context, count):
+    """Apply the same random operations to table games and game objects, comparing after each."""
+    rng = random.Random(7)
+    context.mismatches = []
+    for _ in range(count):
+        m, n, k = rng.choice(BOARDS)
+        game = TicTacToeGame("Alice", "Bob", m, n, k)
+        view = context.game_table.view(context.game_table.create("Alice", "Bob", m, n, k))
+        for step in range(30):
+            roll = rng.random()
+            if roll < 0.5:
+                row, col = rng.randrange(-1, m + 1), rng.randrange(-1, n + 1)
+                player = rng.choice([None, 'X', 'O'])
+                results = (game.make_move(row, col, player), view.make_move(row, col, player))
+            elif roll < 0.6:
+                row, col = rng.randrange(m), rng.randrange(n)
+                name = rng.choice(["Alice", "Bob", "Eve"])
+                results = (game.make_move_by_name(row, col, name), view.make_move_by_name(row, col, name))
+            elif roll < 0.63:
+                player = rng.choice(['X', 'O', 'Z'])
+                results = (game.set_current_player(player), view.set_current_player(player))
+            elif roll < 0.75:
+                results = (game.undo(), view.undo())
+            elif roll < 0.9:
+                results = (game.redo(), view.redo())
+            else:
+                game.reset_game()
+                view.reset_game()
+                results = (None, None)
+            if results[0] != results[1] or observe(game) != observe(view):
+                context.mismatches.append((m, n, k, step))
+            copy = view.copy()
+            if observe(copy)[:4] != observe(view)[:4] or copy.get_moves() != view.get_moves():
+                context.mismatches.append((m, n, k, step, "copy"))
+
+@then('every table game should match its game object after every step')
+def step_verify_match(context):
+    """Verify no operation diverged."""
+    assert not context.mismatches, f"Diverged at {context.mismatches[:5]}"
+
+@given('{count:d} table games are created')
+def step_create_table_games(context, count):
+    """Create games through the store."""
+    for _ in range(count):
+        context.table_games.append(context.store.create("Alice", "Bob"))
+
+@when('another table game is created')
+def step_create_another(context):
+    """Create one more game."""
+    context.new_game = context.store.create("Carol", "Dan")
+    context.table_games.append(context.new_game)
+
+@when('the {ordinal} table game is deleted')
+def step_delete_table_game(context, ordinal):
+    """Delete a game through the store."""
+    context.deleted_game = context.table_games[ORDINALS[ordinal]]
+    context.deleted_slot = context.deleted_game.slot
+    assert context.store.delete(context.deleted_game.game_id)
+
+@then('the new table game should reuse the deleted game\'s slot')
+def step_verify_slot_reused(context):
+    """Verify the freed row was reused."""
+    assert context.new_game.slot == context.deleted_slot
+
+@then('the deleted game\'s id should not be found')
+def step_verify_deleted_missing(context):
+    """Verify the old id does not resolve to the slot's new game."""
+    assert context.store.get(context.deleted_game.game_id) is None
+    assert context.deleted_game.game_id != context.new_game.game_id
+
+@then('the first and third table games should be found by their ids')
+def step_verify_found(context):
+    """Verify the other games resolve to their own slots."""
+    for index in (0, 2):
+        game = context.table_games[index]
+        found = context.store.get(game.game_id)
+        assert found is not None and found.slot == game.slot
+
+@when('I hold a view of the first table game and delete it')
+def step_hold_and_delete(context):
+    """Keep a view while deleting its game."""
+    context.old_view = context.table_games[0]
+    context.store.delete(context.old_view.game_id)
+
+@then('a move through the old view should be rejected')
+def step_verify_stale_move(context):
+    """Verify the stale view does not write to the reused slot."""
+    assert context.old_view.is_stale
+    assert not context.old_view.make_move(1, 1)
+
+@then('the new table game should have an empty board')
+def step_verify_new_empty(context):
+    """Verify the slot's new game is untouched."""
+    assert context.new_game.get_move_count() == 0
+
+@when('a {m:d}x{n:d} game with {k:d} in a row is created in the table store')
+def step_create_large(context, m, n, k):
+    """Create a game on a board larger than the table allows."""
+    context.large_game = context.store.create("Alice", "Bob", m, n, k)
+
+@then('the game should be a game object')
+def step_verify_object(context):
+    """Verify the large game was stored as an object."""
+    assert isinstance(context.large_game, TicTacToeGame)
+    assert context.store.get(context.large_game.game_id) is context.large_game
+
+@then('the table store should hold {count:d} game')
+def step_verify_table_store_size(context, count):
+    """Verify the number of stored games."""
+    assert len(context.store) == count
+
+@when('the {ordinal} table game is played to a win for X')
+def step_table_game_won(context, ordinal):
+    """Play X to a win along the top row and save the game."""
+    game = context.table_games[ORDINALS[ordinal]]
+    for row, col in [(0, 0), (1, 0), (0, 1), (1, 1), (0, 2)]:
+        game.make_move(row, col)
+    assert game.get_winner() == 'X'
+    context.store.save(game)
+
+@when('the {ordinal} table game is read')
+def step_table_game_read(context, ordinal):
+    """Read a game through the store."""
+    assert context.store.get(context.table_games[ORDINALS[ordinal]].game_id) is not None
+
+@when('{seconds:d} seconds pass for the table store')
+def step_table_time_passes(context, seconds):
+    """Advance the store's clock."""
+    context.clock.now += seconds
+
+@when('the table store is swept')
+def step_table_store_swept(context):
+    """Evict expired games."""
+    context.store.sweep()
+
+@then('the {ordinal} table game should have been evicted')
+def step_verify_table_evicted(context, ordinal):
+    """Verify a game is no longer stored."""
+    assert context.table_games[ORDINALS[ordinal]].game_id not in context.store
+
+@then('the {ordinal} table game should still be stored')
+def step_verify_table_stored(context, ordinal):
+    """Verify a game is still stored."""
+    assert context.table_games[ORDINALS[ordinal]].game_id in context.store
+
+@then('the table store should report {count:d} "{reason}" eviction')
+def step_verify_table_evictions(context, count, reason):
+    """Verify the eviction counter for one cause."""
+    evictions = context.store.stats()["evictions"]
+    assert evictions[reason] == count, f"Expected {count} {reason} evictions, got {evictions}"
+
+def _restore_api_store(context, store):
+    import main
+    main.store = store
+
+@given('an API keeping its games in a game table store')
+def step_api_with_table_store(context):
+    """Serve the app in-process with a table store in place of its own."""
+    import main
+    context.add_cleanup(_restore_api_store, context, main.store)
+    main.store = TableGameStore()
+    context.api_app = main.app
+
+def _api_request(context, method, path, **kwargs):
+    async def request():
+        transport = httpx.ASGITransport(app=context.api_app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.request(method, path, **kwargs)
+    return asyncio.run(request())
+
+@when('a game is created through the API')
+def step_api_create_game(context):
+    """Create a game with POST /games."""
+    response = _api_request(context, "POST", "/games", json={"player1_name": "Alice", "player2_name": "Bob"})
+    assert response.status_code == 201, response.text
+    context.api_game_id = response.json()["game_id"]
+
+@then('the game should be found by its id')
+def step_api_game_found(context):
+    """Check the id the API handed out finds the game."""
+    response = _api_request(context, "GET", f"/games/{context.api_game_id}")
+    assert response.status_code == 200, response.text
+    assert response.json()["game_id"] == context.api_game_id
+
+@then('the game\'s id {spelling} should be answered 404')
+def step_api_alias_not_found(context, spelling):
+    """Check an alias of the id names no game, rather than the same game under another id."""
+    alias = {"uppercased": context.api_game_id.upper(),
+             "with an underscore for its first dash": context.api_game_id.replace("-", "_", 1)}[spelling]
+    assert alias != context.api_game_id
+    response = _api_request(context, "GET", f"/games/{alias}")
+    assert response.status_code == 404, response.text
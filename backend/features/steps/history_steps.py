@@ -0,0 +1,76 @@
+"""
+Step definitions for the move history BDD tests.
+"""
+
+from behave import when, then
+import random
+import sys
+import os
+
+# Add the backend directory to the path so we can import game.py
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+from game import TicTacToeGame
+
+
+@when('I undo the last move')
+def step_undo(context):
+    """Take back the last move."""
+    assert context.game.undo()
+
+@when('I redo the move')
+def step_redo(context):
+    """Replay the last taken-back move."""
+    assert context.game.redo()
+
+@when('{count:d} random moves are played with seed {seed:d}')
+def step_random_moves(context, count, seed):
+    """Play random legal moves until the count is reached or the game ends."""
+    rng = random.Random(seed)
+    game = context.game
+    for _ in range(count):
+        if game.is_game_over():
+            break
+        row, col = rng.choice(game.legal_moves())
+        assert game.make_move(row, col)
+
+@when('the game is rebuilt from its move log')
+def step_rebuild(context):
+    """Rebuild the game by replaying its stored log."""
+    game = context.game
+    moves, ply = game.get_move_log()
+    context.rebuilt = TicTacToeGame.replay(game.game_id, game.player1_name, game.player2_name,
+                                           game.m, game.n, game.k, moves, ply)
+
+@then('position ({row:d},{col:d}) should be empty')
+def step_verify_empty(context, row, col):
+    """Verify a cell is empty."""
+    assert context.game.get_position(row, col) is None
+
+@then('the move history should be "{expected}"')
+def step_verify_history(context, expected):
+    """Verify the moves on the board, as (row,col) in play order."""
+    n = context.game.n
+    actual = " ".join(f"({cell // n},{cell % n})" for cell in context.game.get_moves())
+    assert actual == expected, f"Expected {expected}, got {actual}"
+
+@then('there should be no move to redo')
+def step_verify_no_redo(context):
+    """Verify redo has nothing to replay."""
+    assert not context.game.can_redo()
+    assert not context.game.redo()
+
+@then('there should be no move to undo')
+def step_verify_no_undo(context):
+    """Verify undo has nothing to take back."""
+    assert not context.game.can_undo()
+    assert not context.game.undo()
+
+@then('the rebuilt game should match the original')
+def step_verify_rebuilt(context):
+    """Verify the replayed game has the same board, turn and result."""
+    original, rebuilt = context.game, context.rebuilt
+    assert rebuilt.get_bitboards() == original.get_bitboards()
+    assert rebuilt.current_player == original.current_player
+    assert rebuilt.get_winner() == original.get_winner()
+    assert rebuilt.is_game_over() == original.is_game_over()
+    assert rebuilt.get_moves() == original.get_moves()
@@ -0,0 +1,79 @@
+"""
+Step definitions for the idempotent move retry BDD tests.
+"""
+
+from behave import given, when, then
+import sys
+import os
+
+# Add the backend directory to the path so we can import idempotency.py
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+from idempotency import IdempotencyCache, KeyReused, StoredResponse
+
+
+def stored(request, body: str) -> StoredResponse:
+    return StoredResponse(request, 200, body.encode(), "application/json")
+
+
+@given('an idempotency cache keeping {per_game:d} keys per game and {total:d} keys in all')
+def step_idempotency_cache(context, per_game, total):
+    """Create an empty cache."""
+    context.idempotency = IdempotencyCache(keys_per_game=per_game, max_keys=total)
+
+@when('the response "{body}" is stored for key "{key}" of game "{game_id}" and move ({row:d},{col:d})')
+def step_store_response(context, body, key, game_id, row, col):
+    """Remember a response for a keyed move."""
+    context.idempotency.put(game_id, key, stored((row, col), body))
+
+@when('responses are stored for keys "{keys}" of game "{game_id}"')
+def step_store_responses(context, keys, game_id):
+    """Remember one response per key, in order."""
+    for key in keys.split():
+        context.idempotency.put(game_id, key, stored((0, 0), key))
+
+@when('game "{game_id}" is forgotten by the idempotency cache')
+def step_forget_game(context, game_id):
+    """Drop a deleted game's keys."""
+    context.idempotency.forget(game_id)
+
+@then('a retry of move ({row:d},{col:d}) with key "{key}" on game "{game_id}" should get "{body}"')
+def step_verify_replay(context, row, col, key, game_id, body):
+    """Verify the stored response is returned."""
+    response = context.idempotency.get(game_id, key, (row, col))
+    assert response is not None and response.body == body.encode(), response
+
+@then('a request for move ({row:d},{col:d}) with key "{key}" on game "{game_id}" should not be a retry')
+def step_verify_not_retry(context, row, col, key, game_id):
+    """Verify no response is stored for the key."""
+    assert context.idempotency.get(game_id, key, (row, col)) is None
+
+@then('a request for move ({row:d},{col:d}) with key "{key}" on game "{game_id}" should be refused as key reuse')
+def step_verify_key_reuse(context, row, col, key, game_id):
+    """Verify a different request under a used key is refused."""
+    try:
+        context.idempotency.get(game_id, key, (row, col))
+    except KeyReused:
+        return
+    raise AssertionError("The key was accepted for a different request")
+
+@then('the cache should have replayed {count:d} response')
+def step_verify_replays(context, count):
+    """Verify the replay counter."""
+    assert context.idempotency.replays == count
+
+@then('key "{key}" of game "{game_id}" should be forgotten')
+def step_verify_forgotten(context, key, game_id):
+    """Verify the key's response was dropped."""
+    assert context.idempotency.get(game_id, key, (0, 0)) is None
+
+@then('keys "{keys}" of game "{game_id}" should be remembered')
+def step_verify_remembered(context, keys, game_id):
+    """Verify every key's response is still stored."""
+    for key in keys.split():
+        response = context.idempotency.get(game_id, key, (0, 0))
+        assert response is not None and response.body == key.encode(), key
+
+@then('the idempotency cache should hold {count:d} key')
+def step_verify_cache_size(context, count):
+    """Verify the number of stored responses."""
+    assert len(context.idempotency) == count
@@ -0,0 +1,59 @@
+"""
+Step definitions for the load test BDD tests.
+"""
+
+from behave import given, when, then
+import asyncio
+import sys
+import os
+
+# Add the backend directory to the path so we can import load_test.py
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+from load_test import parse_mix, run_load_test, summarize
+
+
+@when('I run an in-process load test of {requests:d} requests from {clients:d} clients with mix "{mix}"')
+def step_run_load_test(context, requests, clients, mix):
+    """Run a small load test against the app served in-process."""
+    context.load_report = asyncio.run(
+        run_load_test(parse_mix(mix), clients, requests=requests, seed=1, warmup_games=10)
+    )
+
+@given('latencies of 1 to {count:d} milliseconds')
+def step_latencies(context, count):
+    """Summarize evenly spread latencies."""
+    context.latency_summary = summarize([ms / 1000 for ms in range(count, 0, -1)], 0, 1.0)
+
+@then('the load test should report create, move, poll and list traffic')
+def step_verify_load_endpoints(context):
+    """Verify every traffic kind was sent."""
+    endpoints = context.load_report.endpoints
+    assert list(endpoints) == ["create", "move", "poll", "list"]
+    assert all(summary.requests > 0 for summary in endpoints.values())
+    assert context.load_report.requests == 400
+
+@then('the load test should have no errors')
+def step_verify_load_errors(context):
+    """Verify no request failed."""
+    assert context.load_report.errors == 0
+
+@then('every endpoint\'s p50 should not exceed its p95, nor its p95 its p99')
+def step_verify_load_percentiles(context):
+    """Verify the percentiles are ordered."""
+    for summary in context.load_report.endpoints.values():
+        assert 0 < summary.p50 <= summary.p95 <= summary.p99 <= summary.max
+
+@then('the p{rank:d} latency should be {expected:d} milliseconds')
+def step_verify_percentile(context, rank, expected):
+    """Verify one percentile of the summary."""
+    actual = getattr(context.latency_summary, f"p{rank}")
+    assert round(actual, 6) == expected, f"Expected {expected}ms, got {actual}ms"
+
+@then('the traffic mix "{mix}" should be rejected')
+def step_verify_mix_rejected(context, mix):
+    """Verify an invalid mix raises ValueError."""
+    try:
+        parse_mix(mix)
+    except ValueError:
+        return
+    raise AssertionError(f"Mix {mix!r} was accepted")
@@ -0,0 +1,105 @@
+"""
+Step definitions for the matchmaking lobby BDD tests.
+"""
+
+from behave import given, when, then
+import asyncio
+import sys
+import os
+
+# Add the backend directory to the path so we can import lobby.py
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+from lobby import Lobby, LobbyFull, MatchTimeout, PlayerLeft
+
+
+def _run(context, coroutine):
+    return context.loop.run_until_complete(coroutine)
+
+def _create_lobby(context, **options):
+    context.loop = asyncio.new_event_loop()
+    context.add_cleanup(context.loop.close)
+    # Games are stood in for by the players and board they were created with
+    context.lobby = Lobby(lambda player_x, player_o, board: (player_x, player_o, board), **options)
+    context.tickets = {}
+
+def _join(context, name, size, timeout=30.0):
+    async def join():
+        return context.lobby.join(name, (size, size, 3), timeout)
+    context.tickets[name] = _run(context, join())
+    return context.tickets[name]
+
+def _outcome(context, name):
+    """Wait for a player's result, returning the match or the error it ended with."""
+    async def wait():
+        try:
+            return await context.lobby.wait(context.tickets[name])
+        except (MatchTimeout, PlayerLeft) as exc:
+            return exc
+    return _run(context, wait())
+
+@given('a matchmaking lobby')
+def step_lobby(context):
+    """Create an empty lobby."""
+    _create_lobby(context)
+
+@given('a matchmaking lobby holding at most {count:d} waiting players')
+def step_small_lobby(context, count):
+    """Create a lobby with a small capacity."""
+    _create_lobby(context, max_waiting=count)
+
+@when('"{name}" joins the lobby for a {size:d}x{size2:d} board')
+def step_join(context, name, size, size2):
+    """Join the queue for a square board."""
+    _join(context, name, size)
+
+@when('"{name}" joins the lobby for a {size:d}x{size2:d} board and waits at most {seconds:g} seconds')
+def step_join_with_timeout(context, name, size, size2, seconds):
+    """Join with a short timeout."""
+    _join(context, name, size, seconds)
+
+@when('"{name}" leaves the lobby')
+def step_leave(context, name):
+    """Give up a player's place."""
+    context.lobby.leave(context.tickets[name])
+
+@then('"{name}" should be paired with "{opponent}" and play {symbol}')
+def step_verify_paired(context, name, opponent, symbol):
+    """Verify a player's side of a pairing."""
+    match = _outcome(context, name)
+    assert match.opponent == opponent and match.symbol == symbol, f"Got {match}"
+
+@then('{count:d} player should be waiting in the lobby')
+@then('{count:d} players should be waiting in the lobby')
+def step_verify_waiting(context, count):
+    """Verify the number of waiting players."""
+    assert context.lobby.stats()["waiting"] == count, context.lobby.stats()
+
+@then('"{name}" should still be waiting')
+def step_verify_still_waiting(context, name):
+    """Verify a player has not been paired."""
+    ticket = context.tickets[name]
+    assert ticket.waiting and not ticket.future.done()
+
+@then('"{name}" should have been told they left')
+def step_verify_left(context, name):
+    """Verify a departed player's wait ended with PlayerLeft."""
+    assert isinstance(_outcome(context, name), PlayerLeft)
+
+@then('"{name}" should time out')
+def step_verify_timeout(context, name):
+    """Verify a player's wait ended with MatchTimeout."""
+    assert isinstance(_outcome(context, name), MatchTimeout)
+
+@then('"{name}" should be turned away when joining for a {size:d}x{size2:d} board')
+def step_verify_turned_away(context, name, size, size2):
+    """Verify a full lobby rejects a player who would have to wait."""
+    try:
+        _join(context, name, size)
+    except LobbyFull:
+        return
+    raise AssertionError("The full lobby accepted another waiting player")
+
+@then('"{name}" should be paired at once when joining for a {size:d}x{size2:d} board')
+def step_verify_paired_at_once(context, name, size, size2):
+    """Verify a player who finds an opponent is paired even when the lobby is full."""
+    assert _join(context, name, size).future.done()
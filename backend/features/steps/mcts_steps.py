@@ -0,0 +1,76 @@
+"""
+Step definitions for the Monte Carlo tree search BDD tests.
+"""
+
+from behave import when, then
+import sys
+import os
+import threading
+
+# Add the backend directory to the path so we can import mcts.py
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+import mcts
+
+
+@when('the MCTS player searches for {iterations:d} iterations')
+def step_mcts_search(context, iterations):
+    """Run a seeded, single-process search with an iteration budget."""
+    context.search_result = mcts.search(
+        context.game, think_time=None, iterations=iterations, workers=1, seed=7
+    )
+
+@then('the MCTS player should choose position ({row:d},{col:d})')
+def step_verify_mcts_choice(context, row, col):
+    """Verify the move picked by the search."""
+    chosen = (context.search_result.row, context.search_result.col)
+    assert chosen == (row, col), f"Expected ({row},{col}), got {chosen}"
+
+@then('the search should report {iterations:d} iterations')
+def step_verify_mcts_iterations(context, iterations):
+    """Verify the search ran exactly its iteration budget."""
+    assert context.search_result.iterations == iterations
+    assert context.search_result.iterations_per_second > 0
+
+@when('{threads:d} threads search at once with {workers:d} workers and budgets of {budgets} iterations')
+def step_concurrent_searches(context, threads, workers, budgets):
+    """Search from several threads at once, as concurrent ai-move requests do."""
+    iterations = [int(budget) for budget in budgets.replace(" and ", ", ").split(", ")]
+    context.add_cleanup(mcts.shutdown_pool)
+    context.search_results = []
+    context.search_errors = []
+    context.search_pools = []
+    start = threading.Barrier(threads)
+
+    def run(index):
+        start.wait()
+        # Several rounds each, so searches with different budgets overlap
+        for round_ in range(len(iterations)):
+            try:
+                context.search_results.append(mcts.search(
+                    context.game.copy(), think_time=None,
+                    iterations=iterations[(index + round_) % len(iterations)], workers=workers, seed=index
+                ))
+            except Exception as exc:
+                context.search_errors.append(exc)
+            if all(pool is not mcts._pool for pool in context.search_pools):
+                context.search_pools.append(mcts._pool)
+
+    searchers = [threading.Thread(target=run, args=(index,)) for index in range(threads)]
+    for thread in searchers:
+        thread.start()
+    for thread in searchers:
+        thread.join()
+
+@then('every concurrent search should have returned a move')
+def step_verify_concurrent_searches(context):
+    """Verify no search failed and each returned a legal move."""
+    assert not context.search_errors, f"Searches failed: {context.search_errors!r}"
+    n = context.game.geometry.n
+    empty = {(cell // n, cell % n) for cell in context.game.get_empty_cells()}
+    for result in context.search_results:
+        assert (result.row, result.col) in empty, f"Illegal move ({result.row},{result.col})"
+
+@then('every concurrent search should have used the same process pool')
+def step_verify_one_pool(context):
+    """Verify the pool was started once rather than rebuilt per worker count."""
+    assert len(context.search_pools) == 1, f"{len(context.search_pools)} pools were used"
@@ -0,0 +1,54 @@
+"""
+Step definitions for the service metrics BDD tests.
+"""
+
+from behave import given, when, then
+import sys
+import os
+
+# Add the backend directory to the path so we can import metrics.py
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+from metrics import Metrics
+
+
+class FakeRoute:
+    """Stands in for an app route: a path and its methods."""
+
+    def __init__(self, method, path):
+        self.methods = {method}
+        self.path = path
+
+
+@given('a metrics registry with the route {method} {path}')
+def step_metrics_registry(context, method, path):
+    """Create metrics with counters for one route."""
+    context.metrics = Metrics()
+    context.metrics_routes = {(method, path): FakeRoute(method, path)}
+    context.metrics.register_routes(context.metrics_routes.values())
+
+@when('{count:d} requests to {method} {path} take {ms:d} ms and answer {status:d}')
+@when('{count:d} request to {method} {path} takes {ms:d} ms and answers {status:d}')
+def step_observe_requests(context, count, method, path, ms, status):
+    """Record requests against a route's counters."""
+    route = context.metrics_routes[(method, path)]
+    counters = context.metrics.routes[id(route)]
+    for _ in range(count):
+        counters.observe(ms / 1000, status)
+
+@when('{count:d} moves are recorded at second {second:d}')
+def step_record_moves(context, count, second):
+    """Record moves at a given monotonic second."""
+    context.metrics.moves_total += count
+    context.metrics.move_rate.add(count, now=second)
+
+@then("the metrics should include '{line}'")
+def step_verify_metrics_line(context, line):
+    """Verify a line of the rendered exposition."""
+    text = context.metrics.render({"games": 0, "evictions": {}})
+    assert line in text.splitlines(), f"Missing {line!r} in:\n{text}"
+
+@then('the move rate at second {second:d} should be {rate:f} moves per second')
+def step_verify_move_rate(context, second, rate):
+    """Verify the sliding-window move rate."""
+    actual = context.metrics.move_rate.rate(now=second)
+    assert actual == rate, f"Expected {rate}, got {actual}"
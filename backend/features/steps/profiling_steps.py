@@ -0,0 +1,128 @@
+"""
+Step definitions for the request profiling BDD tests.
+"""
+
+from behave import given, when, then
+import asyncio
+import sys
+import os
+import time
+import types
+
+# Add the backend directory to the path so we can import profiling.py
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+from profiling import ProfileSession, Profiler, ProfilingMiddleware
+
+
+def make_app_module(build_ms, encode_ms):
+    """A stand-in app module with a builder that calls an encoder."""
+    module = types.ModuleType("fake_app")
+
+    def encode_body():
+        time.sleep(encode_ms / 1000)
+        return b"{}"
+
+    def build_response():
+        time.sleep(build_ms / 1000)
+        return module.encode_body()
+
+    module.encode_body = encode_body
+    module.build_response = build_response
+    return module
+
+
+def serve(context):
+    """Serve one request through the profiling middleware; return its headers."""
+    module = context.app_module
+    sent = []
+
+    async def app(scope, receive, send):
+        body = module.build_response()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": body})
+
+    async def send(message):
+        sent.append(message)
+
+    middleware = ProfilingMiddleware(app, context.profiler)
+    asyncio.run(middleware({"type": "http"}, None, send))
+    return dict(sent[0]["headers"])
+
+
+@given('an app whose handler builds a response for {build_ms:d} ms, encoding it for {encode_ms:d} ms')
+def step_fake_app(context, build_ms, encode_ms):
+    """Set up an instrumented stand-in app."""
+    context.app_module = make_app_module(build_ms, encode_ms)
+    context.original_builder = context.app_module.build_response
+    context.profiler = Profiler()
+    context.profiler.server_timing.instrument(context.app_module, {
+        "build_response": "build", "encode_body": "encode"
+    })
+
+@when('Server-Timing is turned on and the app serves a request')
+def step_serve_timed(context):
+    """Serve a request with Server-Timing on."""
+    context.profiler.server_timing.enable()
+    try:
+        header = serve(context)[b"server-timing"].decode()
+    finally:
+        context.profiler.server_timing.disable()
+    context.server_timing = {
+        name: float(duration.split("=")[1])
+        for name, duration in (entry.split(";") for entry in header.split(", "))
+    }
+
+@when('Server-Timing is turned on and then off')
+def step_toggle_timing(context):
+    """Switch Server-Timing on and off again."""
+    context.profiler.server_timing.enable()
+    assert context.app_module.build_response is not context.original_builder
+    context.profiler.server_timing.disable()
+
+@given('a cProfile session for the next {count:d} requests')
+def step_profile_session(context, count):
+    """Start a cProfile session limited by request count."""
+    context.session = ProfileSession("cprofile", count, 10.0)
+    context.session.start()
+
+@when('{count:d} requests finish')
+def step_requests_finish(context, count):
+    """Do some work and count finished requests."""
+    for _ in range(count):
+        sorted(range(1000), reverse=True)
+        context.session.request_finished()
+
+@then('the Server-Timing header should list build, encode and total')
+def step_verify_phases(context):
+    """Verify the phases reported."""
+    assert list(context.server_timing) == ["build", "encode", "total"], context.server_timing
+
+@then('the build phase should exclude the time spent encoding')
+def step_verify_exclusive(context):
+    """Verify nested time is not counted twice."""
+    phases = context.server_timing
+    assert phases["encode"] >= 10, phases
+    assert 5 <= phases["build"] < 10, phases
+    assert phases["total"] >= phases["build"] + phases["encode"], phases
+
+@then('the app\'s response builder should be the original function')
+def step_verify_restored(context):
+    """Verify the wrapper was removed."""
+    assert context.app_module.build_response is context.original_builder
+
+@then('a served request should have no Server-Timing header')
+def step_verify_no_header(context):
+    """Verify nothing is added while off."""
+    assert b"server-timing" not in serve(context)
+
+@then('the session should have stopped after {count:d} requests')
+def step_verify_session_stopped(context, count):
+    """Verify the request limit ended the session."""
+    context.session.request_finished()
+    assert context.session.result()["requests"] == count
+
+@then('the profile should list the functions called')
+def step_verify_profile(context):
+    """Verify the cProfile summary."""
+    functions = context.session.result()["functions"]
+    assert any("sorted" in entry["function"] for entry in functions), functions
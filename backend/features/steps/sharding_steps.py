@@ -0,0 +1,355 @@
+"""
+Step definitions for the sharded worker BDD tests.
+"""
+
+from behave import given, when, then
+import asyncio
+import json
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import os
+import tempfile
+import time
+import uuid
+
+import httpx
+
+# Add the backend directory to the path so we can import sharding.py
+BACKEND = os.path.join(os.path.dirname(__file__), '..', '..')
+sys.path.insert(0, BACKEND)
+from game import ID_PREFIX_LENGTH
+from sharding import HashRing, Shard, merge_metrics
+from store import InMemoryGameStore, TableGameStore
+
+STORES = {"in-memory": InMemoryGameStore, "table": TableGameStore}
+
+WORKER_METRICS = """# HELP tictactoe_games_created_total Games created
+# TYPE tictactoe_games_created_total counter
+tictactoe_games_created_total {created}
+# HELP tictactoe_request_seconds Request latency
+# TYPE tictactoe_request_seconds histogram
+tictactoe_request_seconds_bucket{{route="POST /games",le="0.1"}} {created}
+tictactoe_request_seconds_count{{}} {created}
+"""
+
+
+def _request_scope(request, worker=None):
+    method, path = request.split(" ", 1)
+    headers = [(b"x-worker", str(worker).encode())] if worker is not None else []
+    return {"type": "http", "method": method, "path": path, "headers": headers}
+
+@given('a hash ring of {workers:d} workers')
+def step_hash_ring(context, workers):
+    """Create a ring for the given number of workers."""
+    context.ring = HashRing(workers)
+
+@when('{count:d} random game ids are placed on the ring')
+def step_place_ids(context, count):
+    """Find the owner of many new game ids."""
+    context.game_ids = [str(uuid.uuid4()) for _ in range(count)]
+    context.owners = [context.ring.owner(game_id) for game_id in context.game_ids]
+
+@when('the ring grows to {workers:d} workers')
+def step_grow_ring(context, workers):
+    """Place the same ids on a ring with more workers."""
+    ring = HashRing(workers)
+    context.new_owners = [ring.owner(game_id) for game_id in context.game_ids]
+
+@then('every worker should own between {low:d}% and {high:d}% of them')
+def step_verify_spread(context, low, high):
+    """Check no worker owns far more or fewer games than its share."""
+    count = len(context.owners)
+    for worker in range(context.ring.workers):
+        share = 100 * context.owners.count(worker) / count
+        assert low <= share <= high, f"Worker {worker} owns {share:.1f}% of the games"
+
+@then('at most {percent:d}% of the games should have moved')
+def step_verify_moved(context, percent):
+    """Check growing the ring kept most games where they were."""
+    moved = sum(old != new for old, new in zip(context.owners, context.new_owners))
+    share = 100 * moved / len(context.owners)
+    assert share <= percent, f"{share:.1f}% of the games moved"
+
+@then('every game that moved should now belong to worker {worker:d}')
+def step_verify_moved_to(context, worker):
+    """Check games only moved to the new worker, never between old ones."""
+    for old, new in zip(context.owners, context.new_owners):
+        assert old == new or new == worker, f"A game moved from worker {old} to worker {new}"
+
+@given('a {kind} game store for worker {index:d} of {workers:d}')
+def step_worker_store(context, kind, index, workers):
+    """Create a store that only hands out the worker's ids."""
+    context.shard = Shard(index, workers, "/nonexistent")
+    context.store = STORES[kind]()
+    context.store.id_filter = context.shard.owns
+
+@when('{count:d} games are created in the worker\'s store, every tenth on a {m:d}x{n:d} board')
+def step_create_worker_games(context, count, m, n):
+    """Create games, some too large for the table store's arrays."""
+    context.created = [
+        context.store.create("Alice", "Bob", *((m, n, 5) if i % 10 == 9 else (3, 3, 3)))
+        for i in range(count)
+    ]
+
+@then('every game created should belong to worker {worker:d}')
+def step_verify_worker_games(context, worker):
+    """Check every id hashes to the worker and can be read back."""
+    for game in context.created:
+        assert context.shard.ring.owner(game.game_id[:ID_PREFIX_LENGTH]) == worker
+        assert context.shard.ring.owner(game.game_id) == worker
+        assert context.store.get(game.game_id) is not None, f"Game {game.game_id} was not stored"
+    assert len({game.game_id for game in context.created}) == len(context.created)
+
+@given('the shard of worker {index:d} of {workers:d}')
+def step_shard(context, index, workers):
+    """Create one worker's shard."""
+    context.shard = Shard(index, workers, "/nonexistent")
+
+@then('a request for a game should go to the game\'s owner')
+def step_verify_game_target(context):
+    """Check game routes go to the owner whichever worker received them."""
+    for _ in range(50):
+        game_id = str(uuid.uuid4())
+        for request in (f"GET /games/{game_id}", f"POST /games/{game_id}/moves"):
+            assert context.shard.target(_request_scope(request)) == context.shard.ring.owner(game_id)
+            assert context.shard.target(_request_scope(request, worker=0)) == context.shard.ring.owner(game_id)
+
+@then('"{request}" should go to worker {worker:d}')
+def step_verify_target(context, request, worker):
+    """Check where a request without a game id is answered."""
+    assert context.shard.target(_request_scope(request)) == worker
+
+@then('"{request}" naming worker {named:d} should go to worker {worker:d}')
+def step_verify_named_target(context, request, named, worker):
+    """Check the X-Worker header picks a worker, when it names one."""
+    assert context.shard.target(_request_scope(request, worker=named)) == worker
+
+@when('the metrics of {workers:d} workers are merged')
+def step_merge_metrics(context, workers):
+    """Merge the expositions of several workers."""
+    context.merged = merge_metrics([WORKER_METRICS.format(created=10 + worker) for worker in range(workers)])
+    context.workers = workers
+
+@then('the merged metrics should describe each family once')
+def step_verify_merged_meta(context):
+    """Check HELP and TYPE lines are not repeated."""
+    lines = context.merged.splitlines()
+    meta = [line for line in lines if line.startswith("# ")]
+    assert len(meta) == 4 and len(set(meta)) == 4, context.merged
+    assert lines.index("# TYPE tictactoe_request_seconds histogram") < lines.index(
+        'tictactoe_request_seconds_count{worker="0"} 10'), context.merged
+
+@then('every merged sample should carry its worker\'s label')
+def step_verify_merged_samples(context):
+    """Check each worker's samples are kept, labelled with its number."""
+    for worker in range(context.workers):
+        value = 10 + worker
+        for sample in (f'tictactoe_games_created_total{{worker="{worker}"}} {value}',
+                       f'tictactoe_request_seconds_bucket{{route="POST /games",le="0.1",worker="{worker}"}} {value}',
+                       f'tictactoe_request_seconds_count{{worker="{worker}"}} {value}'):
+            assert sample in context.merged.splitlines(), f"Missing {sample} in:\n{context.merged}"
+
+async def _owner_app(context, scope, receive, send):
+    """Echo a request's details as JSON, or stream a chunk and wait for the client to leave."""
+    message = await receive()
+    if scope["path"] == "/stream":
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain")]})
+        await send({"type": "http.response.body", "body": b"first\n", "more_body": True})
+        context.owner_saw = (await receive())["type"]
+        return
+    body = json.dumps({"path": scope["path"], "query": scope["query_string"].decode(),
+                       "client": scope["client"][0], "body": message["body"].decode()}).encode()
+    await send({"type": "http.response.start", "status": 200,
+                "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]})
+    await send({"type": "http.response.body", "body": body})
+
+def _stop_relay(context):
+    for shard in (context.forwarder, context.owner):
+        context.loop.run_until_complete(shard.close())
+    context.loop.close()
+    shutil.rmtree(context.socket_dir, ignore_errors=True)
+
+@given('worker {index:d} of {workers:d} answering forwarded requests')
+def step_relay_owner(context, index, workers):
+    """Start a worker's relay socket with a small app behind it."""
+    context.loop = asyncio.new_event_loop()
+    context.socket_dir = tempfile.mkdtemp()
+    context.owner = Shard(index, workers, context.socket_dir)
+    context.owner.app = lambda scope, receive, send: _owner_app(context, scope, receive, send)
+    context.forwarder = Shard(0 if index else 1, workers, context.socket_dir)
+    context.add_cleanup(_stop_relay, context)
+    context.relay_connections = 0
+    serve = context.owner._serve
+
+    async def counting(reader, writer):
+        context.relay_connections += 1
+        await serve(reader, writer)
+
+    context.owner._serve = counting
+    context.loop.run_until_complete(context.owner.start())
+
+async def _forward(context, path, body, leave_after_chunk=False):
+    messages = []
+    chunk_sent = asyncio.Event()
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": body}
+        if not leave_after_chunk:
+            await asyncio.Future()
+        await chunk_sent.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        messages.append(message)
+        if message.get("body"):
+            chunk_sent.set()
+
+    scope = {"type": "http", "method": "POST", "path": path, "query_string": b"page=2",
+             "headers": [(b"host", b"worker"), (b"content-length", str(len(body)).encode())],
+             "client": ("10.0.0.7", 4321)}
+    await context.forwarder.forward(context.owner.index, scope, receive, send)
+    return messages
+
+@when('worker {index:d} forwards {count:d} requests to it one after another')
+def step_forward_requests(context, index, count):
+    """Forward requests through the worker's shard and keep what its client was sent."""
+    context.forwarded = [
+        context.loop.run_until_complete(_forward(context, f"/games/{number}", f"request {number}".encode()))
+        for number in range(count)
+    ]
+
+@then('every forwarded request should get the owner\'s response')
+def step_verify_forwarded(context):
+    """Check each client got the owner's status, headers and body, with its own address and query."""
+    for number, messages in enumerate(context.forwarded):
+        assert [message["type"] for message in messages] == ["http.response.start", "http.response.body"], messages
+        assert messages[0]["status"] == 200 and (b"content-type", b"application/json") in messages[0]["headers"]
+        assert json.loads(messages[1]["body"]) == {"path": f"/games/{number}", "query": "page=2",
+                                                   "client": "10.0.0.7", "body": f"request {number}"}
+
+@then('the owner should have accepted {count:d} relay connection')
+def step_verify_relay_connections(context, count):
+    """Check requests reused the relay connection rather than opening new ones."""
+    assert context.relay_connections == count, f"{context.relay_connections} connections were opened"
+
+@when('worker {index:d} forwards a stream whose client leaves after the first chunk')
+def step_forward_stream(context, index):
+    """Forward a streamed response whose client disconnects once it has the first chunk."""
+    context.owner_saw = None
+    context.forwarded = context.loop.run_until_complete(_forward(context, "/stream", b"", leave_after_chunk=True))
+
+@then('the owner\'s app should see the client disconnect')
+def step_verify_owner_disconnect(context):
+    """Check the client got the first chunk and the owner's app was told it left."""
+    assert context.forwarded[1]["body"] == b"first\n", context.forwarded
+
+    async def disconnected():
+        while context.owner_saw is None:
+            await asyncio.sleep(0.01)
+
+    context.loop.run_until_complete(asyncio.wait_for(disconnected(), 5))
+    assert context.owner_saw == "http.disconnect", context.owner_saw
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def _stop_server(context):
+    if context.server.poll() is None:
+        context.server.terminate()
+        try:
+            context.server.communicate(timeout=30)
+        except subprocess.TimeoutExpired:
+            context.server.kill()
+            context.server.communicate()
+
+@given('a production server with {workers:d} workers')
+def step_production_server(context, workers):
+    """Start start_api.py in production mode and wait until it answers."""
+    port = _free_port()
+    env = dict(os.environ, PRODUCTION="true", WORKERS=str(workers), HOST="127.0.0.1", PORT=str(port),
+               LOG_LEVEL="warning", DRAIN_TIMEOUT="5")
+    for name in ("GAME_STORE", "GAME_STORE_PATH", "GAME_SNAPSHOT_PATH", "RATE_LIMIT"):
+        env.pop(name, None)
+    context.server = subprocess.Popen([sys.executable, "start_api.py"], cwd=BACKEND, env=env,
+                                      stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    context.add_cleanup(_stop_server, context)
+    context.http = httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=10)
+    context.add_cleanup(context.http.close)
+    context.workers = workers
+    deadline = time.monotonic() + 60
+    while True:
+        assert context.server.poll() is None, context.server.communicate()[0]
+        try:
+            # Every worker must be up, not just the first to accept
+            if all(context.http.get("/", headers={"X-Worker": str(worker)}).status_code == 200
+                   for worker in range(workers)):
+                break
+        except httpx.TransportError:
+            pass
+        assert time.monotonic() < deadline, "The server did not start"
+        time.sleep(0.2)
+
+@when('{count:d} games are created on each worker')
+def step_create_on_workers(context, count):
+    """Create games through the X-Worker header so every worker owns some."""
+    ring = HashRing(context.workers)
+    context.game_ids = []
+    for worker in range(context.workers):
+        for _ in range(count):
+            response = context.http.post("/games", json={"player1_name": "Alice", "player2_name": "Bob"},
+                                         headers={"X-Worker": str(worker)})
+            assert response.status_code == 201, response.text
+            game_id = response.json()["game_id"]
+            assert ring.owner(game_id) == worker, f"Worker {worker} created a game owned by another"
+            context.game_ids.append(game_id)
+
+@when('one move is made in every game with a single batch')
+def step_batch_on_workers(context):
+    """Move in every game at once, across all the workers."""
+    moves = [{"game_id": game_id, "row": 1, "col": 1} for game_id in context.game_ids]
+    response = context.http.post("/moves:batch", json={"moves": moves})
+    assert response.status_code == 200, response.text
+    results = response.json()["results"]
+    assert [result["game_id"] for result in results] == context.game_ids
+    assert all(result["success"] for result in results), results
+
+@then('every game should show X\'s move')
+def step_verify_games_moved(context):
+    """Read every game back, whichever worker takes the request."""
+    for game_id in context.game_ids:
+        response = context.http.get(f"/games/{game_id}")
+        assert response.status_code == 200, response.text
+        assert response.json()["board"][1][1] == "X", response.json()
+
+@then('listing {limit:d} game at a time should find all {count:d} games')
+def step_verify_cluster_listing(context, limit, count):
+    """Page through every worker's games."""
+    found = []
+    params = {"limit": limit}
+    while True:
+        response = context.http.get("/games", params=params)
+        assert response.status_code == 200, response.text
+        found.extend(game["game_id"] for game in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+        params = {"limit": limit, "cursor": cursor}
+    assert len(found) == count and set(found) == set(context.game_ids), found
+
+@then('stopping the server should drain both workers and exit cleanly')
+def step_verify_drain(context):
+    """Send SIGTERM and check the server drains, stops and exits with status 0."""
+    context.server.send_signal(signal.SIGTERM)
+    output, _ = context.server.communicate(timeout=30)
+    assert context.server.returncode == 0, output
+    assert f"Draining {context.workers} workers" in output, output
+    assert "Server stopped" in output, output
@@ -0,0 +1,246 @@
+"""
+Step definitions for the store snapshot BDD tests.
+"""
+
+from behave import given, when, then
+import asyncio
+import random
+import sys
+import os
+import shutil
+import tempfile
+import time
+
+# Add the backend and features directories to the path so we can import snapshot.py and clocks.py
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from clocks import FakeClock
+import snapshot
+from snapshot import SnapshotError, Snapshotter
+from store import InMemoryGameStore, TableGameStore
+
+STORES = {"memory": InMemoryGameStore, "table": TableGameStore}
+
+ORDINALS = {'first': 0, 'second': 1}
+
+# Board shapes played, including one too large for a game table
+BOARDS = [(3, 3, 3), (3, 3, 3), (4, 4, 3), (6, 6, 4)]
+
+
+def describe(game):
+    """Everything a restore must keep about a game."""
+    return (
+        game.game_id, game.player1_name, game.player2_name, game.m, game.n, game.k,
+        game.current_player, game.winner, game.is_draw, game.last_move_rejected, game.version,
+        game.get_board_state(), game.get_moves(), game.get_redo_moves(),
+    )
+
+
+def _snapshot_path(context):
+    if not hasattr(context, "snapshot_path"):
+        directory = tempfile.mkdtemp()
+        context.snapshot_path = os.path.join(directory, "games.snapshot")
+        context.add_cleanup(shutil.rmtree, directory, ignore_errors=True)
+    return context.snapshot_path
+
+
+def _new_store(context, backend, **limits):
+    context.clock = FakeClock()
+    return STORES[backend](clock=context.clock, **limits)
+
+
+@given('a "{backend}" store with {count:d} randomly played games, some deleted')
+def step_store_with_games(context, backend, count):
+    """Fill a store with games at random stages (including undone moves), then delete every fifth."""
+    rng = random.Random(11)
+    context.store = _new_store(context, backend)
+    games = []
+    for index in range(count):
+        m, n, k = rng.choice(BOARDS)
+        game = context.store.create(f"Player {index % 7}", "Bob", m, n, k)
+        for _ in range(rng.randrange(m * n + 1)):
+            legal = game.legal_moves()
+            if game.game_over or not legal:
+                break
+            game.make_move(*rng.choice(legal))
+        if rng.random() < 0.3:
+            game.undo()
+        if rng.random() < 0.1:
+            game.make_move(-1, -1)
+        context.store.save(game)
+        games.append(game.game_id)
+    for game_id in games[::5]:
+        context.store.delete(game_id)
+
+@given('a "{backend}" store where idle games expire after {seconds:d} seconds')
+def step_store_with_idle_ttl(context, backend, seconds):
+    """Create an empty store with an idle TTL."""
+    context.store = _new_store(context, backend, idle_ttl=seconds)
+
+@given('{count:d} games are created in the snapshot store')
+def step_create_snapshot_games(context, count):
+    """Create games to track by position."""
+    context.snapshot_games = [context.store.create("Alice", "Bob").game_id for _ in range(count)]
+
+@when('{seconds:d} seconds pass for the snapshot store')
+def step_advance_snapshot_clock(context, seconds):
+    """Advance the store's clock."""
+    context.clock.now += seconds
+
+@when('the {ordinal} snapshot game is read')
+def step_read_snapshot_game(context, ordinal):
+    """Read a game, marking it as used."""
+    assert context.store.get(context.snapshot_games[ORDINALS[ordinal]]) is not None
+
+@when('the store is saved to a snapshot file')
+def step_save_snapshot(context):
+    """Write the store to a snapshot file in this process."""
+    context.saved_games = len(context.store)
+    Snapshotter(context.store, _snapshot_path(context)).save()
+
+@when('a background snapshot starts and a game is created before it finishes')
+def step_background_snapshot(context):
+    """Save from a forked process and change the store while it writes."""
+    context.saved_games = len(context.store)
+    snapshotter = Snapshotter(context.store, _snapshot_path(context))
+
+    async def save_while_creating():
+        saving = asyncio.ensure_future(snapshotter.save_in_background())
+        # The fork happens before the save's first wait, well within this sleep
+        await asyncio.sleep(0.05)
+        context.store.create("Late", "Comer")
+        return await saving
+
+    context.save_result = asyncio.run(save_while_creating())
+
+@when('the server shuts down with a snapshot file in a missing directory')
+def step_shutdown_snapshot_fails(context):
+    """Run the shutdown save against a path that cannot be written."""
+    path = os.path.join(tempfile.gettempdir(), "missing", "dir", "games.snapshot")
+    context.snapshotter = Snapshotter(context.store, path)
+    context.shutdown_error = None
+    try:
+        asyncio.run(context.snapshotter.shutdown())
+    except Exception as exc:
+        context.shutdown_error = exc
+
+@then('the shutdown should have finished with {count:d} snapshot failure recorded')
+def step_verify_shutdown_failure(context, count):
+    """Verify the failure was counted instead of raised."""
+    assert context.shutdown_error is None, f"Shutdown raised {context.shutdown_error!r}"
+    stats = context.snapshotter.stats()
+    assert stats["failures"] == count and stats["last_error"], stats
+
+@when('a background snapshot is taken by a writer that hangs, with a {seconds:g} second limit')
+def step_hung_snapshot(context, seconds):
+    """Save from a forked writer that never finishes."""
+    def hang(path, sections):
+        os.write(context.hang_pipe[1], str(os.getpid()).encode())
+        time.sleep(60)
+
+    context.hang_pipe = os.pipe()
+    for name, value in (("write_snapshot", hang), ("FORK_TIMEOUT", seconds)):
+        context.add_cleanup(setattr, snapshot, name, getattr(snapshot, name))
+        setattr(snapshot, name, value)
+    snapshotter = Snapshotter(context.store, _snapshot_path(context))
+    context.save_error = None
+    try:
+        asyncio.run(snapshotter.save_in_background())
+    except SnapshotError as exc:
+        context.save_error = exc
+
+@then('the background snapshot should have failed with "{message}"')
+def step_verify_background_failure(context, message):
+    """Verify the save reported the stuck writer."""
+    assert context.save_error is not None and message in str(context.save_error), context.save_error
+
+@then('the hung snapshot writer should have exited')
+def step_verify_writer_gone(context):
+    """Verify the child process no longer exists."""
+    pid = int(os.read(context.hang_pipe[0], 32))
+    for descriptor in context.hang_pipe:
+        os.close(descriptor)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return
+    raise AssertionError(f"Snapshot writer {pid} is still running")
+
+@when('a byte in the middle of the snapshot file is changed')
+def step_damage_snapshot(context):
+    """Flip the bits of one byte past the header."""
+    with open(context.snapshot_path, "r+b") as snapshot:
+        snapshot.seek(os.path.getsize(context.snapshot_path) // 2)
+        value = snapshot.read(1)[0]
+        snapshot.seek(-1, os.SEEK_CUR)
+        snapshot.write(bytes([value ^ 0xFF]))
+
+@when('the snapshot is restored into a new "{backend}" store')
+def step_restore_snapshot(context, backend):
+    """Load the snapshot file into an empty store."""
+    context.restored = _new_store(context, backend)
+    context.restored_count = Snapshotter(context.restored, context.snapshot_path).restore()
+
+@when('the snapshot is restored into a new "{backend}" store where idle games expire after {seconds:d} seconds')
+def step_restore_snapshot_with_idle_ttl(context, backend, seconds):
+    """Load the snapshot file into an empty store with an idle TTL."""
+    context.restored = _new_store(context, backend, idle_ttl=seconds)
+    Snapshotter(context.restored, context.snapshot_path).restore()
+
+@when('the snapshot is restored into a new "{backend}" store holding at most {count:d} games')
+def step_restore_snapshot_with_capacity(context, backend, count):
+    """Load the snapshot file into an empty store with a game limit."""
+    context.restored = _new_store(context, backend, max_games=count)
+    Snapshotter(context.restored, context.snapshot_path).restore()
+
+@when('the restored store is swept')
+def step_sweep_restored(context):
+    """Evict expired games from the restored store."""
+    context.restored.sweep()
+
+@then('the restored store should hold the same games in the same state')
+def step_verify_same_games(context):
+    """Compare every game of the two stores."""
+    saved = sorted(describe(game) for game in context.store.values())
+    restored = sorted(describe(game) for game in context.restored.values())
+    assert context.restored_count == len(saved)
+    assert restored == saved
+
+@then('the restored store should page through the games in the same order')
+def step_verify_same_order(context):
+    """Compare the game ids of the two stores' first pages."""
+    saved, _ = context.store.page(None, 1000)
+    restored, _ = context.restored.page(None, 1000)
+    assert [game.game_id for game in restored] == [game.game_id for game in saved]
+
+@then('the {ordinal} snapshot game should be in the restored store')
+def step_verify_restored_game(context, ordinal):
+    """Verify a game survived the restore and sweep."""
+    assert context.snapshot_games[ORDINALS[ordinal]] in context.restored
+
+@then('the {ordinal} snapshot game should not be in the restored store')
+def step_verify_expired_game(context, ordinal):
+    """Verify a game expired after the restore."""
+    assert context.snapshot_games[ORDINALS[ordinal]] not in context.restored
+
+@then('the restored store should hold {count:d} games')
+def step_verify_restored_size(context, count):
+    """Verify the number of restored games."""
+    assert len(context.restored) == count, len(context.restored)
+
+@then('restoring the snapshot into a new "{backend}" store should fail with "{message}"')
+def step_verify_restore_fails(context, backend, message):
+    """Verify the snapshot is refused with a matching error."""
+    try:
+        Snapshotter(_new_store(context, backend), context.snapshot_path).restore()
+    except SnapshotError as exc:
+        assert message in str(exc), str(exc)
+    else:
+        raise AssertionError("The snapshot was restored")
+
+@then('the restored store should hold 1 game fewer than the saved store')
+def step_verify_background_snapshot(context):
+    """Verify the snapshot was taken before the late game was created."""
+    assert len(context.store) == context.saved_games + 1
+    assert context.save_result["games"] == context.saved_games
+    assert len(context.restored) == context.saved_games
@@ -0,0 +1,50 @@
+"""
+Step definitions for the perfect-play solver BDD tests.
+"""
+
+from behave import given, when, then
+import sys
+import os
+
+# Add the backend directory to the path so we can import solver.py
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+from solver import Solver
+
+# The table is built once and shared by every scenario
+_solver = None
+
+
+def get_solver():
+    """Build the solver table on first use."""
+    global _solver
+    if _solver is None:
+        _solver = Solver.build()
+    return _solver
+
+
+@given('the board has O in position ({row:d},{col:d})')
+def step_board_has_o_position(context, row, col):
+    """Set a single O position on the board."""
+    context.game.set_board_state([(row, col, 'O')])
+
+@when('I ask the solver for the best move')
+def step_ask_solver(context):
+    """Ask the solver for the perfect-play move."""
+    context.suggestion = get_solver().best_move(context.game)
+
+@then('the solver should suggest position ({row:d},{col:d})')
+def step_verify_suggested_position(context, row, col):
+    """Verify the suggested move."""
+    assert context.suggestion is not None, "Expected a suggested move"
+    assert context.suggestion[:2] == (row, col), f"Expected ({row},{col}), got {context.suggestion[:2]}"
+
+@then('the solver should predict a {outcome}')
+def step_verify_predicted_outcome(context, outcome):
+    """Verify the predicted outcome for the player to move."""
+    assert context.suggestion is not None, "Expected a suggested move"
+    assert context.suggestion[2] == outcome, f"Expected a {outcome}, got a {context.suggestion[2]}"
+
+@then('the solver should not suggest a move')
+def step_verify_no_suggestion(context):
+    """Verify the solver has nothing to suggest."""
+    assert context.suggestion is None
@@ -0,0 +1,212 @@
+"""
+Step definitions for the game store BDD tests.
+"""
+
+from behave import given, when, then
+import sys
+import os
+import shutil
+import tempfile
+
+# Add the backend and features directories to the path so we can import store.py and clocks.py
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from clocks import FakeClock
+from game import TicTacToeGame
+from store import InMemoryGameStore, SqliteGameStore
+
+
+@given('a SQLite game store in a temporary directory')
+def step_sqlite_store(context):
+    """Open a fresh SQLite store, removed again after the scenario."""
+    directory = tempfile.mkdtemp()
+    context.store_path = os.path.join(directory, "games.db")
+    context.store = SqliteGameStore(context.store_path)
+
+    def cleanup():
+        context.store.close()
+        shutil.rmtree(directory, ignore_errors=True)
+    context.add_cleanup(cleanup)
+
+@given('a game between "{player1}" and "{player2}" is stored')
+def step_game_stored(context, player1, player2):
+    """Create a game and add it to the store."""
+    context.game = TicTacToeGame(player1, player2)
+    context.store.add(context.game)
+
+@when('{player_name} places her mark in position ({row:d},{col:d}) and the game is saved')
+def step_move_and_save(context, player_name, row, col):
+    """Make a move and record it in the store."""
+    assert context.game.make_move_by_name(row, col, player_name)
+    context.store.save(context.game)
+
+@given('a write the database rejects is queued')
+def step_queue_bad_write(context):
+    """Queue a row with the wrong number of columns, as the writer thread would receive it."""
+    context.store._queue.put(("bad-row", ("bad-row",)))
+
+@when('the store finishes writing')
+def step_flush_store(context):
+    """Wait for the writer thread to apply the queue."""
+    context.store.flush()
+
+@then('the store should report {count:d} failed write')
+def step_verify_failed_writes(context, count):
+    """Verify the writer counted the writes it could not apply."""
+    assert context.store.stats()["failed_writes"] == count, context.store.stats()
+    assert context.store._writer.is_alive()
+
+@when('the game is deleted from the store')
+def step_delete_from_store(context):
+    """Delete the game."""
+    assert context.store.delete(context.game.game_id)
+
+@when('the store is closed and reopened')
+def step_reopen_store(context):
+    """Close the store, flushing pending writes, and open the same file again."""
+    context.store.close()
+    context.store = SqliteGameStore(context.store_path)
+
+@then('the reopened store should contain the game')
+def step_verify_store_has_game(context):
+    """Verify the game was loaded back."""
+    context.stored_game = context.store.get(context.game.game_id)
+    assert context.stored_game is not None
+
+@then('the stored game should show X in position ({row:d},{col:d})')
+def step_verify_stored_position(context, row, col):
+    """Verify the stored board."""
+    assert context.stored_game.get_position(row, col) == 'X'
+
+@then('the stored game should be {player_name}\'s turn')
+def step_verify_stored_turn(context, player_name):
+    """Verify the stored turn."""
+    assert context.stored_game.get_current_player_name() == player_name
+
+@then('the reopened store should be empty')
+def step_verify_store_empty(context):
+    """Verify no games were loaded."""
+    assert len(context.store) == 0
+
+
+ORDINALS = {'first': 0, 'second': 1, 'third': 2, 'fourth': 3, 'fifth': 4}
+
+
+def _bounded_store(context, **limits):
+    context.clock = FakeClock()
+    context.store = InMemoryGameStore(clock=context.clock, **limits)
+    context.stored_games = []
+
+@given('an in-memory game store holding at most {count:d} games')
+def step_store_with_capacity(context, count):
+    """Create a store with a game limit."""
+    _bounded_store(context, max_games=count)
+
+@given('an in-memory game store where idle games expire after {seconds:d} seconds')
+def step_store_with_idle_ttl(context, seconds):
+    """Create a store with an idle TTL."""
+    _bounded_store(context, idle_ttl=seconds)
+
+@given('an in-memory game store where finished games expire after {seconds:d} seconds')
+def step_store_with_finished_ttl(context, seconds):
+    """Create a store with a finished-game TTL."""
+    _bounded_store(context, finished_ttl=seconds)
+
+@given('{count:d} games are stored')
+def step_games_stored(context, count):
+    """Add games to the store."""
+    for _ in range(count):
+        game = TicTacToeGame()
+        context.store.add(game)
+        context.stored_games.append(game)
+
+@when('another game is stored')
+def step_another_game_stored(context):
+    """Add one more game."""
+    step_games_stored(context, 1)
+
+@when('the {ordinal} game is read')
+def step_game_read(context, ordinal):
+    """Read a game through the store."""
+    game = context.stored_games[ORDINALS[ordinal]]
+    assert context.store.get(game.game_id) is game
+
+@when('the {ordinal} game is played to a win for X')
+def step_game_won(context, ordinal):
+    """Play X to a win along the top row and save the game."""
+    game = context.stored_games[ORDINALS[ordinal]]
+    for row, col in [(0, 0), (1, 0), (0, 1), (1, 1), (0, 2)]:
+        game.make_move(row, col)
+    assert game.get_winner() == 'X'
+    context.store.save(game)
+
+@when('{seconds:d} seconds pass')
+def step_time_passes(context, seconds):
+    """Advance the store's clock."""
+    context.clock.now += seconds
+
+@when('the store is swept')
+def step_store_swept(context):
+    """Evict expired games."""
+    context.store.sweep()
+
+@then('the store should hold {count:d} games')
+def step_verify_store_size(context, count):
+    """Verify the number of stored games."""
+    assert len(context.store) == count, f"Expected {count} games, got {len(context.store)}"
+
+@then('the {ordinal} game should have been evicted')
+def step_verify_evicted(context, ordinal):
+    """Verify a game is no longer stored."""
+    assert context.stored_games[ORDINALS[ordinal]].game_id not in context.store
+
+@then('the {ordinal} game should still be stored')
+def step_verify_still_stored(context, ordinal):
+    """Verify a game is still stored."""
+    assert context.stored_games[ORDINALS[ordinal]].game_id in context.store
+
+@then('the store should report {count:d} "{reason}" eviction')
+def step_verify_eviction_count(context, count, reason):
+    """Verify the eviction counter for one cause."""
+    evictions = context.store.stats()["evictions"]
+    assert evictions[reason] == count, f"Expected {count} {reason} evictions, got {evictions}"
+
+@when('the {ordinal} game is deleted')
+def step_game_deleted(context, ordinal):
+    """Delete a game from the store."""
+    assert context.store.delete(context.stored_games[ORDINALS[ordinal]].game_id)
+
+def _page_through(context, size, predicate=None):
+    context.pages = []
+    cursor = None
+    while True:
+        games, cursor = context.store.page(cursor, size, predicate)
+        if games:
+            context.pages.append(games)
+        if cursor is None:
+            break
+
+@when('I page through the store {size:d} games at a time')
+def step_page_through(context, size):
+    """Collect every page of games."""
+    _page_through(context, size)
+
+@when('I page through the won games {size:d} games at a time')
+def step_page_through_won(context, size):
+    """Collect every page of won games."""
+    _page_through(context, size, lambda game: game.winner is not None)
+
+@then('I should get pages of {sizes} games')
+def step_verify_page_sizes(context, sizes):
+    """Verify the size of each page."""
+    expected = [int(size) for size in sizes.split(',')]
+    actual = [len(page) for page in context.pages]
+    assert actual == expected, f"Expected pages of {expected}, got {actual}"
+
+@then('the pages should list the {ordinals} games in order')
+def step_verify_page_order(context, ordinals):
+    """Verify the games listed across all pages."""
+    names = ordinals.replace(' and ', ', ').split(', ')
+    expected = [context.stored_games[ORDINALS[name]].game_id for name in names]
+    actual = [game.game_id for page in context.pages for game in page]
+    assert actual == expected, f"Expected {expected}, got {actual}"
@@ -46,6 +46,16 @@ def step_game_in_progress(context):
     """Create a game in progress."""
     context.game = TicTacToeGame()
 
+@given('I have a {m:d}x{n:d} game where {k:d} in a row wins')
+def step_have_mnk_game(context, m, n, k):
+    """Create a game on an m x n board with k in a row to win."""
+    context.game = TicTacToeGame(m=m, n=n, k=k)
+
+@given('the board has X in row {row:d} from column {first:d} to column {last:d}')
+def step_board_has_x_row_run(context, row, first, last):
+    """Set a horizontal run of X marks on the board."""
+    context.game.set_board_state([(row, col, 'X') for col in range(first, last + 1)])
+
 @given('the board has X in positions ({row1:d},{col1:d}) and ({row2:d},{col2:d})')
 def step_board_has_x_positions(context, row1, col1, row2, col2):
     """Set X positions on the board."""
@@ -242,6 +252,18 @@ def step_verify_game_over(context):
     """Verify the game is over."""
     assert context.game.is_game_over()
 
+@then('the game should not be over')
+def step_verify_game_not_over(context):
+    """Verify the game is still in progress."""
+    assert not context.game.is_game_over()
+
+@then('the board should have {m:d} rows and {n:d} columns')
+def step_verify_board_shape(context, m, n):
+    """Verify the board dimensions."""
+    board = context.game.get_board_state()
+    assert len(board) == m, f"Expected {m} rows, got {len(board)}"
+    assert all(len(row) == n for row in board), f"Expected {n} columns in every row"
+
 @then('the game should end in a draw')
 def step_verify_draw(context):
     """Verify the game ended in a draw."""
@@ -276,4 +298,28 @@ def step_verify_board_cleared(context):
 @then('it is player X\'s turn')
 def step_verify_x_turn_after_reset(context):
     """Verify it's player X's turn after reset."""
-    assert context.game.current_player == 'X'
\ No newline at end of file
+    assert context.game.current_player == 'X'
+
+@then('the game version should be {version:d}')
+def step_verify_game_version(context, version):
+    """Verify the game's change counter."""
+    assert context.game.version == version, f"Expected version {version}, got {context.game.version}"
+
+@then('the legal moves should be "{expected}"')
+@then('the legal moves should be ""')
+def step_verify_legal_moves(context, expected=""):
+    """Verify the legal moves, as (row,col) in board order."""
+    actual = " ".join(f"({row},{col})" for row, col in context.game.legal_moves())
+    assert actual == expected, f"Expected {expected}, got {actual}"
+
+@then('there should be {count:d} legal moves')
+def step_verify_legal_move_count(context, count):
+    """Verify the number of legal moves, counted and listed."""
+    assert context.game.count_legal_moves() == count
+    assert len(context.game.legal_moves()) == count
+
+@then('{count:d} moves should have been made')
+@then('{count:d} move should have been made')
+def step_verify_move_count(context, count):
+    """Verify the number of marks on the board."""
+    assert context.game.get_move_count() == count
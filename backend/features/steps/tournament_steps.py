@@ -0,0 +1,51 @@
+"""
+Step definitions for the strategy and tournament BDD tests.
+"""
+
+from behave import given, when, then
+import random
+import sys
+import os
+import tempfile
+
+# Add the backend directory to the path so we can import tournament.py
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+from strategies import create_strategy
+from tournament import build_schedule, run_tournament
+
+
+@given('a tournament of "{first}" against "{second}" with {games:d} games per pairing and seed {seed:d}')
+def step_tournament_schedule(context, first, second, games, seed):
+    """Build a seeded round-robin schedule."""
+    context.schedule = build_schedule([first, second], games, seed)
+
+@when('the {spec} strategy chooses a move')
+def step_strategy_chooses(context, spec):
+    """Ask a strategy for its move."""
+    context.strategy_move = create_strategy(spec).choose_move(context.game, random.Random(0))
+
+@when('I run the tournament twice')
+def step_run_tournament_twice(context):
+    """Play the schedule twice in this process."""
+    context.tournament_runs = []
+    with tempfile.TemporaryDirectory() as directory:
+        for attempt in range(2):
+            path = os.path.join(directory, f"run{attempt}.jsonl")
+            context.tournament_runs.append(run_tournament(context.schedule, path, 1, progress=False))
+
+@then('the strategy should choose position ({row:d},{col:d})')
+def step_verify_strategy_move(context, row, col):
+    """Verify the strategy's move."""
+    assert context.strategy_move == (row, col), f"Expected ({row},{col}), got {context.strategy_move}"
+
+@then('both runs should produce the same games')
+def step_verify_runs_identical(context):
+    """Verify both runs played exactly the same moves."""
+    first, second = ([(r["match"], r["moves"], r["winner"]) for r in run]
+                     for run in context.tournament_runs)
+    assert first == second
+
+@then('the tournament should have played {games:d} games')
+def step_verify_game_count(context, games):
+    """Verify the number of games played."""
+    assert len(context.tournament_runs[0]) == games
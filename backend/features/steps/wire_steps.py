@@ -0,0 +1,64 @@
+"""
+Step definitions for the compact wire format BDD tests.
+"""
+
+from behave import when, then
+import sys
+import os
+
+import msgpack
+
+# Add the backend directory to the path so we can import wire.py
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+from wire import FormatError, compact_game, encode, negotiate
+
+
+@when('a client sends "{accept}" as its Accept header')
+def step_negotiate(context, accept):
+    """Negotiate a format from an Accept header."""
+    context.wire_format = negotiate(accept)
+
+@when('the game is encoded for "{accept}"')
+def step_encode_game(context, accept):
+    """Encode the game in the negotiated compact format."""
+    wire_format = negotiate(accept)
+    try:
+        context.encoded = encode(compact_game(context.game, wire_format), wire_format)
+        context.encoding_error = None
+    except FormatError as exc:
+        context.encoding_error = exc
+
+@then('the board string should be "{expected}"')
+def step_verify_board_string(context, expected):
+    """Verify the one-character-per-cell board."""
+    assert context.game.get_board_string() == expected, context.game.get_board_string()
+
+@then('the packed board should have X bits {x_bits:d} and O bits {o_bits:d}')
+def step_verify_packed_board(context, x_bits, o_bits):
+    """Verify the packed board splits into the two bitboards."""
+    packed = context.game.get_packed_board()
+    cells = context.game.geometry.cells
+    assert packed & ((1 << cells) - 1) == x_bits
+    assert packed >> cells == o_bits
+
+@then('the negotiated format should be "{expected}"')
+def step_verify_negotiated(context, expected):
+    """Verify the negotiated format."""
+    actual = context.wire_format.tag if context.wire_format else "default"
+    assert actual == expected, f"Expected {expected}, got {actual}"
+
+@then('the decoded board should be "{expected}"')
+def step_verify_decoded_board(context, expected):
+    """Decode the msgpack body and check its board."""
+    context.decoded = msgpack.unpackb(context.encoded)
+    assert context.decoded["board"] == expected
+
+@then('the decoded game should not include player names')
+def step_verify_no_names(context):
+    """Verify the compact form leaves out the player names."""
+    assert "player1_name" not in context.decoded and "player2_name" not in context.decoded
+
+@then('the encoding should be refused')
+def step_verify_refused(context):
+    """Verify the format could not describe the game."""
+    assert isinstance(context.encoding_error, FormatError)
@@ -0,0 +1,84 @@
+Feature: Game storage
+  As an operator
+  I want games to be kept in a pluggable store
+  So that a restart does not lose games in progress
+
+  Scenario: Games survive reopening a SQLite store
+    Given a SQLite game store in a temporary directory
+    And a game between "Alice" and "Bob" is stored
+    When Alice places her mark in position (0,0) and the game is saved
+    And the store is closed and reopened
+    Then the reopened store should contain the game
+    And the stored game should show X in position (0,0)
+    And the stored game should be Bob's turn
+
+  Scenario: Deleted games stay deleted after reopening
+    Given a SQLite game store in a temporary directory
+    And a game between "Alice" and "Bob" is stored
+    When the game is deleted from the store
+    And the store is closed and reopened
+    Then the reopened store should be empty
+
+  Scenario: A write the database rejects does not stop later writes
+    Given a SQLite game store in a temporary directory
+    And a write the database rejects is queued
+    And a game between "Alice" and "Bob" is stored
+    When the store finishes writing
+    Then the store should report 1 failed write
+    When the store is closed and reopened
+    Then the reopened store should contain the game
+
+  Scenario: The least recently used game is evicted at capacity
+    Given an in-memory game store holding at most 2 games
+    And 2 games are stored
+    When the first game is read
+    And another game is stored
+    Then the store should hold 2 games
+    And the second game should have been evicted
+    And the store should report 1 "capacity" eviction
+
+  Scenario: Finished games are evicted before active ones at capacity
+    Given an in-memory game store holding at most 2 games
+    And 2 games are stored
+    When the second game is played to a win for X
+    And another game is stored
+    Then the first game should still be stored
+    And the second game should have been evicted
+
+  Scenario: Idle games expire
+    Given an in-memory game store where idle games expire after 60 seconds
+    And 2 games are stored
+    When 45 seconds pass
+    And the first game is read
+    And 30 seconds pass
+    And the store is swept
+    Then the first game should still be stored
+    And the second game should have been evicted
+    And the store should report 1 "idle" eviction
+
+  Scenario: Finished games are kept only for their retention time
+    Given an in-memory game store where finished games expire after 10 seconds
+    And 2 games are stored
+    When the first game is played to a win for X
+    And 5 seconds pass
+    And the first game is read
+    And 6 seconds pass
+    And the store is swept
+    Then the first game should have been evicted
+    And the second game should still be stored
+    And the store should report 1 "finished" eviction
+
+  Scenario: Paging through games in creation order
+    Given an in-memory game store holding at most 100 games
+    And 5 games are stored
+    When the second game is deleted
+    And I page through the store 2 games at a time
+    Then I should get pages of 2, 2 games
+    And the pages should list the first, third, fourth and fifth games in order
+
+  Scenario: Paging with a status filter
+    Given an in-memory game store holding at most 100 games
+    And 4 games are stored
+    When the third game is played to a win for X
+    And I page through the won games 2 games at a time
+    Then I should get pages of 1 games
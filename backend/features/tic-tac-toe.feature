@@ -103,4 +103,60 @@ Feature: Tic-Tac-Toe Game
     Given I have a tic-tac-toe game in progress
     When I reset the game
     Then the board is cleared 
-    And it is player X's turn  
\ No newline at end of file
+    And it is player X's turn  
+
+  Scenario: Invalid move - position outside the board
+    Given I have a tic-tac-toe game
+    And it is player O's turn
+    When player O tries to place their mark in position (3,0)
+    Then the move should be rejected
+    And the board should remain unchanged
+
+  Scenario: Create a gomoku-sized game
+    Given I have a 15x15 game where 5 in a row wins
+    Then the board should have 15 rows and 15 columns
+    And it should be Player X's turn
+
+  Scenario: Five in a row wins on a large board
+    Given I have a 15x15 game where 5 in a row wins
+    And the board has X in row 7 from column 3 to column 6
+    And it is player X's turn
+    When player X places their mark in position (7,7)
+    Then player X should win the game
+    And the game should be over
+
+  Scenario: Four in a row does not win when five are needed
+    Given I have a 15x15 game where 5 in a row wins
+    And the board has X in row 7 from column 3 to column 5
+    And it is player X's turn
+    When player X places their mark in position (7,6)
+    Then the game should not be over
+    And it should be Player O's turn
+
+  Scenario: Every change to a game bumps its version
+    Given I have a new tic-tac-toe game
+    Then the game version should be 0
+    When player X places their mark in position (1,1)
+    Then the game version should be 1
+    When player O tries to place their mark in position (1,1)
+    Then the move should be rejected
+    And the game version should be 1
+    When I reset the game
+    Then the game version should be 2
+
+  Scenario: Legal moves are the empty cells in board order
+    Given I have a tic-tac-toe game
+    When player X places their mark in position (0,0)
+    And player O places their mark in position (1,1)
+    Then the legal moves should be "(0,1) (0,2) (1,0) (1,2) (2,0) (2,1) (2,2)"
+    And 2 moves should have been made
+
+  Scenario: There are no legal moves once the game is over
+    Given I have a completed tic-tac-toe game with a winner
+    Then the legal moves should be ""
+
+  Scenario: Legal moves on a large board
+    Given I have a 15x15 game where 5 in a row wins
+    When player X places their mark in position (7,7)
+    Then there should be 224 legal moves
+    And 1 move should have been made
@@ -0,0 +1,18 @@
+Feature: Tournament runner
+  As a developer comparing strategies
+  I want reproducible tournaments between computer players
+  So that strategy changes can be measured run against run
+
+  Scenario: The heuristic strategy blocks the opponent's line
+    Given I have a tic-tac-toe game in progress
+    And the board has X in positions (0,0) and (0,1)
+    And the board has O in position (2,2)
+    And it is player O's turn
+    When the heuristic strategy chooses a move
+    Then the strategy should choose position (0,2)
+
+  Scenario: A tournament replays identically from the same seed
+    Given a tournament of "random" against "heuristic" with 5 games per pairing and seed 3
+    When I run the tournament twice
+    Then both runs should produce the same games
+    And the tournament should have played 20 games
@@ -0,0 +1,40 @@
+Feature: Compact wire formats
+  As a high-volume API client
+  I want compact game representations
+  So that every poll and move costs less bandwidth and CPU
+
+  Scenario: Board as a string of cells
+    Given I have a tic-tac-toe game
+    And the board has X in positions (0,0) and (2,2)
+    And the board has O in positions (1,1) and (1,2)
+    Then the board string should be "X...OO..X"
+
+  Scenario: Board packed into one integer
+    Given I have a tic-tac-toe game
+    And the board has X in positions (0,0) and (2,2)
+    And the board has O in positions (1,1) and (1,2)
+    Then the packed board should have X bits 257 and O bits 48
+
+  Scenario Outline: Negotiating a compact format from the Accept header
+    When a client sends "<accept>" as its Accept header
+    Then the negotiated format should be "<format>"
+
+    Examples:
+      | accept                                               | format         |
+      | application/json                                     | default        |
+      | application/vnd.tictactoe.compact+json               | json-string    |
+      | application/vnd.tictactoe.compact+json; board=packed | json-packed    |
+      | application/msgpack                                  | msgpack-string |
+      | text/html, application/x-msgpack;board=packed        | msgpack-packed |
+
+  Scenario: Compact game round-trips through msgpack
+    Given I have a tic-tac-toe game
+    And the board has X in positions (0,0) and (2,2)
+    When the game is encoded for "application/msgpack"
+    Then the decoded board should be "X.......X"
+    And the decoded game should not include player names
+
+  Scenario: Packed boards are limited to 32 cells
+    Given I have a 6x6 game where 4 in a row wins
+    When the game is encoded for "application/msgpack; board=packed"
+    Then the encoding should be refused
@@ -3,33 +3,433 @@ Tic-Tac-Toe Game Engine
 
 A clean, minimal implementation of tic-tac-toe game logic that meets all BDD test requirements.
 This module provides the core game functionality without any external dependencies.
+
+Games are played on a configurable m,n,k board: m rows, n columns, and k marks
+in a row to win (classic tic-tac-toe is 3,3,3; gomoku is 15,15,5).
+
+The board is stored as two bitboards, one integer per player, where cell
+(row, col) maps to bit ``row * n + col``. After each move only the winning
+lines through the placed mark are tested, so a move costs O(k) rather than
+O(m * n). Each game also counts its marks as they are placed, and its empty
+cells are the complement of the two bitboards, so the move count, the draw
+test and the number of legal moves are O(1) and listing the legal moves
+never scans occupied cells one by one.
+
+Every game also keeps its move history as a compact log of cell indices
+(one unsigned 16-bit entry per move) plus a board snapshot every
+SNAPSHOT_INTERVAL moves. Undo and redo move a cursor through the log in
+O(1), and any earlier position can be rebuilt from the nearest snapshot.
+
+The rules (_move_index and _move_outcome) and the read-side API
+(GameQueries) are shared with game_table.GameView, which keeps the same
+state in table columns, so both play by the same code.
 """
 
 import uuid
-from typing import Optional, List, Tuple, Union
+from array import array
+from typing import Dict, Iterable, Optional, List, Tuple
+
+# Largest board dimension accepted for m and n
+MAX_BOARD_DIMENSION = 32
+
+# Characters at the start of a game id holding its first 64 bits, which are
+# random in ids from every store ("xxxxxxxx-xxxx-xxxx")
+ID_PREFIX_LENGTH = 18
+
+# Directions of the four lines through a cell: horizontal, vertical, two diagonals
+_LINE_DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+# Boards up to this width get a precomputed row lookup table in get_board_state
+_ROW_TABLE_MAX_WIDTH = 4
+
+# Moves between board snapshots in the move log
+SNAPSHOT_INTERVAL = 64
 
 
-class TicTacToeGame:
+class BoardGeometry:
+    """
+    Precomputed bitboard masks for one m,n,k board shape.
+
+    Geometries are immutable and shared by every game of the same shape;
+    use get_geometry() rather than constructing them directly.
+    """
+
+    __slots__ = ('m', 'n', 'k', 'cells', 'full_mask', 'win_masks', 'cell_win_masks', 'row_cells')
+
+    def __init__(self, m: int, n: int, k: int):
+        self.m = m
+        self.n = n
+        self.k = k
+        self.cells = m * n
+        self.full_mask = (1 << self.cells) - 1
+
+        # Every k-long window along every line of the board
+        win_masks = []
+        for row in range(m):
+            for col in range(n):
+                for d_row, d_col in _LINE_DIRECTIONS:
+                    end_row = row + d_row * (k - 1)
+                    end_col = col + d_col * (k - 1)
+                    if not (0 <= end_row < m and 0 <= end_col < n):
+                        continue
+                    mask = 0
+                    for step in range(k):
+                        mask |= 1 << ((row + d_row * step) * n + col + d_col * step)
+                    win_masks.append(mask)
+        self.win_masks: Tuple[int, ...] = tuple(win_masks)
+
+        # Windows through each cell; at most 4 * k of them
+        self.cell_win_masks: Tuple[Tuple[int, ...], ...] = tuple(
+            tuple(mask for mask in win_masks if mask >> index & 1)
+            for index in range(self.cells)
+        )
+
+        # Cell values for one row, indexed by (X row bits) | (O row bits) << n
+        self.row_cells: Optional[Tuple[Tuple[Optional[str], ...], ...]] = None
+        if n <= _ROW_TABLE_MAX_WIDTH:
+            self.row_cells = tuple(
+                tuple('X' if x_row >> col & 1 else ('O' if o_row >> col & 1 else None)
+                      for col in range(n))
+                for o_row in range(1 << n)
+                for x_row in range(1 << n)
+            )
+
+    def __reduce__(self):
+        """Pickle as a lookup so unpickled games share the cached geometry."""
+        return get_geometry, (self.m, self.n, self.k)
+
+
+_GEOMETRIES: Dict[Tuple[int, int, int], BoardGeometry] = {}
+
+
+def get_geometry(m: int = 3, n: int = 3, k: int = 3) -> BoardGeometry:
+    """
+    Get the shared geometry for an m,n,k board, building it on first use.
+
+    Raises:
+        ValueError: If the dimensions are out of range or k cannot fit on the board
+    """
+    key = (m, n, k)
+    geometry = _GEOMETRIES.get(key)
+    if geometry is None:
+        if not (1 <= m <= MAX_BOARD_DIMENSION and 1 <= n <= MAX_BOARD_DIMENSION):
+            raise ValueError(f"Board dimensions must be between 1 and {MAX_BOARD_DIMENSION}")
+        if not 1 <= k <= max(m, n):
+            raise ValueError(f"Win length k={k} does not fit on a {m}x{n} board")
+        geometry = _GEOMETRIES[key] = BoardGeometry(m, n, k)
+    return geometry
+
+
+def _board_rows(geometry: BoardGeometry, x_bits: int, o_bits: int) -> List[List[Optional[str]]]:
+    """Expand a pair of bitboards into a list-of-lists board for any geometry."""
+    n = geometry.n
+    row_mask = (1 << n) - 1
+    row_cells = geometry.row_cells
+    if row_cells is not None:
+        return [
+            list(row_cells[(x_bits >> shift & row_mask) | (o_bits >> shift & row_mask) << n])
+            for shift in range(0, geometry.cells, n)
+        ]
+    board = []
+    for shift in range(0, geometry.cells, n):
+        x_row = x_bits >> shift & row_mask
+        o_row = o_bits >> shift & row_mask
+        board.append([
+            'X' if x_row >> col & 1 else ('O' if o_row >> col & 1 else None)
+            for col in range(n)
+        ])
+    return board
+
+
+def _board_string(geometry: BoardGeometry, x_bits: int, o_bits: int) -> str:
+    """Encode a pair of bitboards as one character per cell ('X', 'O' or '.'), row by row."""
+    return "".join(
+        'X' if x_bits >> cell & 1 else ('O' if o_bits >> cell & 1 else '.')
+        for cell in range(geometry.cells)
+    )
+
+
+# Shared geometry of the classic 3x3 board, which gets fast paths
+CLASSIC_GEOMETRY = get_geometry(3, 3, 3)
+_CLASSIC_ROW_CELLS = CLASSIC_GEOMETRY.row_cells
+_CLASSIC_ROW_STRINGS = tuple(
+    "".join(cell or '.' for cell in cells) for cells in _CLASSIC_ROW_CELLS
+)
+# Empty cell indices of a 3x3 board, indexed by its empty-cell mask
+_CLASSIC_EMPTY_CELLS = tuple(
+    tuple(cell for cell in range(9) if mask >> cell & 1) for mask in range(1 << 9)
+)
+
+
+def _set_bits(mask: int) -> List[int]:
+    """List the indices of the set bits of a mask, lowest first."""
+    # One pass over the binary digits in C beats shifting a large int per cell
+    digits = bin(mask)[:1:-1]
+    return [index for index, digit in enumerate(digits) if digit == '1']
+
+
+# Outcomes of placing a mark, from _move_outcome()
+_PLAYING = 0
+_WON = 1
+_DRAWN = 2
+
+
+def _move_index(geometry: BoardGeometry, x_bits: int, o_bits: int, to_move: str, game_over: bool,
+                row: int, col: int, player: Optional[str]) -> int:
+    """
+    Check a move against the rules and get the cell it marks.
+
+    Returns:
+        The cell index ``row * n + col``, or -1 if the move is rejected: the
+        game is over, the cell is off the board or taken, or player (when
+        given) is not the player to move
+    """
+    if game_over or not (0 <= row < geometry.m and 0 <= col < geometry.n):
+        return -1
+    index = row * geometry.n + col
+    if (x_bits | o_bits) >> index & 1 or (player is not None and player != to_move):
+        return -1
+    return index
+
+
+def _move_outcome(geometry: BoardGeometry, mover_bits: int, occupied: int, index: int) -> int:
+    """
+    Decide the game once a mark has been placed on cell ``index``.
+
+    Only lines through the new mark can have been completed, so at most
+    4 * k windows are tested.
+
+    Args:
+        mover_bits: Bitboard of the player who placed the mark, including it
+        occupied: Bitboard of every mark on the board
+
+    Returns:
+        _WON, _DRAWN (the board is full) or _PLAYING
+    """
+    for mask in geometry.cell_win_masks[index]:
+        if mover_bits & mask == mask:
+            return _WON
+    return _DRAWN if occupied == geometry.full_mask else _PLAYING
+
+
+class GameQueries:
+    """
+    Read-side game API shared by TicTacToeGame and the game table's GameView.
+
+    Subclasses provide the state: ``geometry``, ``current_player``,
+    ``winner``, ``is_draw``, ``game_over``, ``last_move_rejected``, the two
+    player names, get_bitboards(), get_move_count(), make_move() and
+    _reject_move(), which flags the last move as rejected.
+    """
+
+    __slots__ = ()
+
+    @property
+    def m(self) -> int:
+        """Number of rows on the board."""
+        return self.geometry.m
+
+    @property
+    def n(self) -> int:
+        """Number of columns on the board."""
+        return self.geometry.n
+
+    @property
+    def k(self) -> int:
+        """Number of marks in a row needed to win."""
+        return self.geometry.k
+
+    def get_current_player_name(self) -> str:
+        """Get the name of the current player."""
+        return self.player1_name if self.current_player == 'X' else self.player2_name
+
+    def get_player_name(self, symbol: str) -> str:
+        """Get player name by symbol (X or O)."""
+        return self.player1_name if symbol == 'X' else self.player2_name
+
+    def is_on_board(self, row: int, col: int) -> bool:
+        """Check whether (row, col) lies on the board."""
+        return 0 <= row < self.geometry.m and 0 <= col < self.geometry.n
+
+    def make_move_by_name(self, row: int, col: int, player_name: str) -> bool:
+        """
+        Make a move using player name instead of symbol.
+
+        Args:
+            row: Row index (0 to m-1)
+            col: Column index (0 to n-1)
+            player_name: Name of the player making the move
+
+        Returns:
+            True if move was successful, False if rejected
+        """
+        # Determine player symbol from name
+        if player_name == self.player1_name:
+            player_symbol = 'X'
+        elif player_name == self.player2_name:
+            player_symbol = 'O'
+        else:
+            self._reject_move()
+            return False
+
+        return self.make_move(row, col, player_symbol)
+
+    def get_empty_mask(self) -> int:
+        """Get a bitmask of the empty cells; bit ``row * n + col`` marks an empty cell."""
+        x_bits, o_bits = self.get_bitboards()
+        return self.geometry.full_mask ^ (x_bits | o_bits)
+
+    def get_empty_cells(self) -> List[int]:
+        """List the indices (row * n + col) of the empty cells, in board order."""
+        x_bits, o_bits = self.get_bitboards()
+        geometry = self.geometry
+        mask = geometry.full_mask ^ (x_bits | o_bits)
+        if geometry is CLASSIC_GEOMETRY:
+            return list(_CLASSIC_EMPTY_CELLS[mask])
+        return _set_bits(mask)
+
+    def legal_moves(self) -> List[Tuple[int, int]]:
+        """
+        List the moves the current player may make, in board order.
+
+        Returns:
+            (row, col) of every empty cell, or an empty list once the game is over
+        """
+        if self.game_over:
+            return []
+        n = self.geometry.n
+        return [divmod(cell, n) for cell in self.get_empty_cells()]
+
+    def count_legal_moves(self) -> int:
+        """Get the number of legal moves without listing them."""
+        return 0 if self.game_over else self.geometry.cells - self.get_move_count()
+
+    @property
+    def board(self) -> List[List[Optional[str]]]:
+        """Read-only list-of-lists view of the board (a fresh copy on every access)."""
+        return self.get_board_state()
+
+    def get_board_state(self) -> List[List[Optional[str]]]:
+        """Get a copy of the current board state."""
+        geometry = self.geometry
+        x_bits, o_bits = self.get_bitboards()
+        if geometry is CLASSIC_GEOMETRY:
+            row_cells = _CLASSIC_ROW_CELLS
+            return [
+                list(row_cells[(x_bits & 7) | (o_bits & 7) << 3]),
+                list(row_cells[(x_bits >> 3 & 7) | (o_bits >> 3 & 7) << 3]),
+                list(row_cells[(x_bits >> 6) | (o_bits >> 6) << 3]),
+            ]
+        return _board_rows(geometry, x_bits, o_bits)
+
+    def get_board_string(self) -> str:
+        """
+        Get the board as a string of m * n characters, row by row.
+
+        Each cell is 'X', 'O' or '.' (empty); "X...O...." is a 3x3 board with
+        X in the top-left corner and O in the centre.
+        """
+        x_bits, o_bits = self.get_bitboards()
+        if self.geometry is CLASSIC_GEOMETRY:
+            row_strings = _CLASSIC_ROW_STRINGS
+            return (row_strings[(x_bits & 7) | (o_bits & 7) << 3]
+                    + row_strings[(x_bits >> 3 & 7) | (o_bits >> 3 & 7) << 3]
+                    + row_strings[(x_bits >> 6) | (o_bits >> 6) << 3])
+        return _board_string(self.geometry, x_bits, o_bits)
+
+    def get_position(self, row: int, col: int) -> Optional[str]:
+        """Get the value at a specific board position."""
+        if self.is_on_board(row, col):
+            index = row * self.geometry.n + col
+            x_bits, o_bits = self.get_bitboards()
+            if x_bits >> index & 1:
+                return 'X'
+            if o_bits >> index & 1:
+                return 'O'
+        return None
+
+    def is_game_over(self) -> bool:
+        """Check if the game is over (win or draw)."""
+        return self.game_over
+
+    def get_winner(self) -> Optional[str]:
+        """Get the winning player symbol, or None if no winner."""
+        return self.winner
+
+    def get_winner_name(self) -> Optional[str]:
+        """Get the winning player name, or None if no winner."""
+        winner = self.winner
+        if winner:
+            return self.get_player_name(winner)
+        return None
+
+    def is_draw_game(self) -> bool:
+        """Check if the game ended in a draw."""
+        return self.is_draw
+
+    def was_last_move_rejected(self) -> bool:
+        """Check if the last move attempt was rejected."""
+        return self.last_move_rejected
+
+    def __str__(self) -> str:
+        """String representation of the game board."""
+        lines = []
+        for row in self.board:
+            line = " | ".join(cell if cell else " " for cell in row)
+            lines.append(line)
+        return ("\n" + "-" * (4 * self.geometry.n - 3) + "\n").join(lines)
+
+
+class TicTacToeGame(GameQueries):
     """
     A complete tic-tac-toe game implementation with support for:
-    - 3x3 game board
+    - Configurable m x n game board with k in a row to win (3x3, k=3 by default)
     - Turn-based gameplay
     - Win/draw detection
     - Move validation
     - Custom player names
     - Game reset functionality
     """
-    
-    def __init__(self, player1_name: str = "Player X", player2_name: str = "Player O"):
+
+    __slots__ = (
+        'game_id',
+        'current_player',
+        'winner',
+        'is_draw',
+        'game_over',
+        'player1_name',
+        'player2_name',
+        'last_move_rejected',
+        'geometry',
+        '_x_bits',
+        '_o_bits',
+        '_move_count',
+        'version',
+        '_moves',
+        '_ply',
+        '_snapshots',
+    )
+
+    def __init__(self, player1_name: str = "Player X", player2_name: str = "Player O",
+                 m: int = 3, n: int = 3, k: int = 3):
         """
         Initialize a new tic-tac-toe game.
-        
+
         Args:
             player1_name: Name for player X (default: "Player X")
             player2_name: Name for player O (default: "Player O")
+            m: Number of rows (default: 3)
+            n: Number of columns (default: 3)
+            k: Marks in a row needed to win (default: 3)
+
+        Raises:
+            ValueError: If the board shape is invalid
         """
+        self.geometry = get_geometry(m, n, k)
         self.game_id = str(uuid.uuid4())
-        self.board = [[None for _ in range(3)] for _ in range(3)]
+        self._x_bits = 0
+        self._o_bits = 0
+        self._move_count = 0
         self.current_player = 'X'
         self.winner = None
         self.is_draw = False
@@ -37,189 +437,349 @@ class TicTacToeGame:
         self.player1_name = player1_name
         self.player2_name = player2_name
         self.last_move_rejected = False
-    
-    def get_current_player_name(self) -> str:
-        """Get the name of the current player."""
-        return self.player1_name if self.current_player == 'X' else self.player2_name
-    
-    def get_player_name(self, symbol: str) -> str:
-        """Get player name by symbol (X or O)."""
-        return self.player1_name if symbol == 'X' else self.player2_name
-    
+        # Bumped by every state change, so callers can tell unchanged games apart
+        self.version = 0
+        # Move log: cell indices in play order; the first _ply are on the board,
+        # the rest can be redone. _snapshots[i] is the (X, O) board after
+        # (i + 1) * SNAPSHOT_INTERVAL moves (a tuple, so short games share the empty one).
+        self._moves = array('H')
+        self._ply = 0
+        self._snapshots: Tuple[Tuple[int, int], ...] = ()
+
     def make_move(self, row: int, col: int, player: Optional[str] = None) -> bool:
         """
         Attempt to make a move on the board.
-        
+
         Args:
-            row: Row index (0-2)
-            col: Column index (0-2)
+            row: Row index (0 to m-1)
+            col: Column index (0 to n-1)
             player: Player symbol ('X' or 'O'). If None, uses current player.
-            
+
         Returns:
             True if move was successful, False if rejected
         """
-        self.last_move_rejected = False
-        
-        # Validate game state
-        if self.game_over:
-            self.last_move_rejected = True
-            return False
-        
-        # Validate position bounds
-        if not (0 <= row <= 2 and 0 <= col <= 2):
-            self.last_move_rejected = True
-            return False
-        
-        # Validate position is empty
-        if self.board[row][col] is not None:
+        index = _move_index(self.geometry, self._x_bits, self._o_bits, self.current_player,
+                            self.game_over, row, col, player)
+        if index < 0:
             self.last_move_rejected = True
             return False
-        
-        # Validate turn (if player specified)
-        if player is not None and player != self.current_player:
-            self.last_move_rejected = True
-            return False
-        
+        self.last_move_rejected = False
+
+        # Record the move, discarding any moves that could have been redone
+        moves = self._moves
+        ply = self._ply
+        if ply < len(moves):
+            del moves[ply:]
+            self._snapshots = self._snapshots[:ply // SNAPSHOT_INTERVAL]
+        moves.append(index)
+        self._ply = ply + 1
+        self._place(index)
+        if self._ply % SNAPSHOT_INTERVAL == 0:
+            self._snapshots += ((self._x_bits, self._o_bits),)
+        return True
+
+    def _place(self, index: int) -> None:
+        """Put the current player's mark on an empty cell and update the game state."""
         # Make the move
-        self.board[row][col] = self.current_player
-        
-        # Check for win
-        if self._check_winner():
+        bit = 1 << index
+        if self.current_player == 'X':
+            self._x_bits |= bit
+            player_bits = self._x_bits
+        else:
+            self._o_bits |= bit
+            player_bits = self._o_bits
+        self._move_count += 1
+
+        outcome = _move_outcome(self.geometry, player_bits, self._x_bits | self._o_bits, index)
+        if outcome == _WON:
             self.winner = self.current_player
             self.game_over = True
-        # Check for draw
-        elif self._is_board_full():
+        elif outcome == _DRAWN:
             self.is_draw = True
             self.game_over = True
         else:
             # Switch turns
             self.current_player = 'O' if self.current_player == 'X' else 'X'
-        
-        return True
-    
-    def make_move_by_name(self, row: int, col: int, player_name: str) -> bool:
+
+        self.version += 1
+
+    def _reject_move(self) -> None:
+        """Flag the last move attempt as rejected."""
+        self.last_move_rejected = True
+
+    def undo(self) -> bool:
         """
-        Make a move using player name instead of symbol.
-        
-        Args:
-            row: Row index (0-2)
-            col: Column index (0-2)
-            player_name: Name of the player making the move
-            
+        Take back the last move on the board; it can be redone until a new move is made.
+
         Returns:
-            True if move was successful, False if rejected
+            True if a move was taken back, False if there was none
         """
-        # Determine player symbol from name
-        if player_name == self.player1_name:
-            player_symbol = 'X'
-        elif player_name == self.player2_name:
-            player_symbol = 'O'
+        if self._ply == 0:
+            return False
+        self._ply -= 1
+        bit = 1 << self._moves[self._ply]
+        if self._x_bits & bit:
+            self._x_bits &= ~bit
+            self.current_player = 'X'
         else:
-            self.last_move_rejected = True
+            self._o_bits &= ~bit
+            self.current_player = 'O'
+        self._move_count -= 1
+        self.winner = None
+        self.is_draw = False
+        self.game_over = False
+        self.last_move_rejected = False
+        self.version += 1
+        return True
+
+    def redo(self) -> bool:
+        """
+        Replay the next taken-back move.
+
+        Returns:
+            True if a move was replayed, False if there was none
+        """
+        if self._ply == len(self._moves) or self.game_over:
             return False
-        
-        return self.make_move(row, col, player_symbol)
-    
-    def get_board_state(self) -> List[List[Optional[str]]]:
-        """Get a copy of the current board state."""
-        return [row[:] for row in self.board]
-    
-    def get_position(self, row: int, col: int) -> Optional[str]:
-        """Get the value at a specific board position."""
-        if 0 <= row <= 2 and 0 <= col <= 2:
-            return self.board[row][col]
-        return None
-    
-    def is_game_over(self) -> bool:
-        """Check if the game is over (win or draw)."""
-        return self.game_over
-    
-    def get_winner(self) -> Optional[str]:
-        """Get the winning player symbol, or None if no winner."""
-        return self.winner
-    
-    def get_winner_name(self) -> Optional[str]:
-        """Get the winning player name, or None if no winner."""
-        if self.winner:
-            return self.get_player_name(self.winner)
-        return None
-    
-    def is_draw_game(self) -> bool:
-        """Check if the game ended in a draw."""
-        return self.is_draw
-    
-    def was_last_move_rejected(self) -> bool:
-        """Check if the last move attempt was rejected."""
-        return self.last_move_rejected
-    
+        index = self._moves[self._ply]
+        self._ply += 1
+        self.last_move_rejected = False
+        self._place(index)
+        return True
+
+    def can_undo(self) -> bool:
+        """Check whether there is a move to take back."""
+        return self._ply > 0
+
+    def can_redo(self) -> bool:
+        """Check whether there is a taken-back move to replay."""
+        return self._ply < len(self._moves) and not self.game_over
+
+    def get_moves(self) -> List[int]:
+        """Get the cell indices (row * n + col) of the moves on the board, in play order."""
+        return self._moves[:self._ply].tolist()
+
+    def get_redo_moves(self) -> List[int]:
+        """Get the cell indices of the taken-back moves that redo() would replay, in order."""
+        return self._moves[self._ply:].tolist()
+
+    def get_move_log(self) -> Tuple[bytes, int]:
+        """
+        Get the raw move log for storage.
+
+        Returns:
+            (log as packed unsigned 16-bit cell indices, number of moves on the board)
+        """
+        return self._moves.tobytes(), self._ply
+
+    def position_at(self, ply: int) -> Tuple[int, int]:
+        """
+        Get the (X, O) bitboards after the first ``ply`` logged moves.
+
+        Starts from the nearest earlier snapshot, so at most SNAPSHOT_INTERVAL
+        moves are replayed.
+
+        Raises:
+            ValueError: If ply is outside the log
+        """
+        if not 0 <= ply <= len(self._moves):
+            raise ValueError(f"Move {ply} is outside the log of {len(self._moves)} moves")
+        snapshot = min(ply // SNAPSHOT_INTERVAL, len(self._snapshots))
+        if snapshot:
+            x_bits, o_bits = self._snapshots[snapshot - 1]
+        else:
+            x_bits = o_bits = 0
+        moves = self._moves
+        for position in range(snapshot * SNAPSHOT_INTERVAL, ply):
+            if position % 2 == 0:
+                x_bits |= 1 << moves[position]
+            else:
+                o_bits |= 1 << moves[position]
+        return x_bits, o_bits
+
+    def get_move_count(self) -> int:
+        """Get the number of marks on the board."""
+        return self._move_count
+
+    def get_packed_board(self) -> int:
+        """
+        Get the board packed into one integer of 2 * m * n bits.
+
+        The low m * n bits are X's bitboard and the next m * n bits O's
+        (18 bits on a 3x3 board); bit ``row * n + col`` marks a cell.
+        """
+        return self._x_bits | self._o_bits << self.geometry.cells
+
+    @classmethod
+    def restore(cls, game_id: str, player1_name: str, player2_name: str, m: int, n: int, k: int,
+                x_bits: int, o_bits: int, current_player: str, winner: Optional[str],
+                is_draw: bool) -> "TicTacToeGame":
+        """
+        Rebuild a game from previously saved state, keeping its game_id.
+
+        Args:
+            game_id: Identifier of the saved game
+            player1_name: Name for player X
+            player2_name: Name for player O
+            m, n, k: Board shape
+            x_bits, o_bits: Bitboards as returned by get_bitboards()
+            current_player: Symbol of the player to move
+            winner: Winning symbol, or None
+            is_draw: Whether the game ended in a draw
+        """
+        game = cls.__new__(cls)
+        game.geometry = get_geometry(m, n, k)
+        game.game_id = game_id
+        game.player1_name = player1_name
+        game.player2_name = player2_name
+        game._x_bits = x_bits
+        game._o_bits = o_bits
+        game._move_count = (x_bits | o_bits).bit_count()
+        game.current_player = current_player
+        game.winner = winner
+        game.is_draw = is_draw
+        game.game_over = winner is not None or is_draw
+        game.last_move_rejected = False
+        game.version = 0
+        game._moves = array('H')
+        game._ply = 0
+        game._snapshots = ()
+        return game
+
+    @classmethod
+    def replay(cls, game_id: str, player1_name: str, player2_name: str, m: int, n: int, k: int,
+               moves: Iterable[int], ply: Optional[int] = None) -> "TicTacToeGame":
+        """
+        Rebuild a game from its move log, keeping its game_id.
+
+        The log is trusted to be a legal game with X moving first, so marks are
+        placed directly and only the last move is checked for a win: O(moves)
+        with no per-move validation.
+
+        Args:
+            game_id: Identifier of the saved game
+            player1_name: Name for player X
+            player2_name: Name for player O
+            m, n, k: Board shape
+            moves: Cell indices in play order (bytes from get_move_log() are accepted)
+            ply: Number of logged moves on the board; the rest can be redone (default: all)
+        """
+        log = array('H')
+        if isinstance(moves, (bytes, bytearray)):
+            log.frombytes(moves)
+        else:
+            log.extend(moves)
+        ply = len(log) if ply is None else ply
+        geometry = get_geometry(m, n, k)
+
+        x_bits = o_bits = 0
+        snapshots = []
+        for position in range(ply):
+            if position % 2 == 0:
+                x_bits |= 1 << log[position]
+            else:
+                o_bits |= 1 << log[position]
+            if (position + 1) % SNAPSHOT_INTERVAL == 0:
+                snapshots.append((x_bits, o_bits))
+
+        current_player = 'X'
+        winner = None
+        is_draw = False
+        if ply:
+            mover = 'X' if (ply - 1) % 2 == 0 else 'O'
+            current_player = mover
+            outcome = _move_outcome(geometry, x_bits if mover == 'X' else o_bits,
+                                    x_bits | o_bits, log[ply - 1])
+            if outcome == _WON:
+                winner = mover
+            elif outcome == _DRAWN:
+                is_draw = True
+            else:
+                current_player = 'O' if mover == 'X' else 'X'
+
+        game = cls.restore(game_id, player1_name, player2_name, m, n, k,
+                           x_bits, o_bits, current_player, winner, is_draw)
+        game._moves = log
+        game._ply = ply
+        game._snapshots = tuple(snapshots)
+        return game
+
+    def copy(self) -> "TicTacToeGame":
+        """
+        Get an independent copy of this game with the same game_id.
+
+        Cheaper than constructing a new game; used for search and simulation.
+        """
+        clone = TicTacToeGame.__new__(TicTacToeGame)
+        for name in TicTacToeGame.__slots__:
+            setattr(clone, name, getattr(self, name))
+        clone._moves = array('H', self._moves)
+        return clone
+
+    def get_bitboards(self) -> Tuple[int, int]:
+        """Get the raw (X, O) bitboards; bit ``row * n + col`` marks an occupied cell."""
+        return self._x_bits, self._o_bits
+
     def reset_game(self) -> None:
-        """Reset the game to initial state, keeping the same player names."""
-        self.board = [[None for _ in range(3)] for _ in range(3)]
+        """
+        Reset the game to initial state, keeping the same player names.
+
+        The move log is kept: the cleared moves can be redone one by one until
+        a new move is made.
+        """
+        self._x_bits = 0
+        self._o_bits = 0
+        self._move_count = 0
         self.current_player = 'X'
         self.winner = None
         self.is_draw = False
         self.game_over = False
         self.last_move_rejected = False
-        # Keep the same game_id and player names
-    
+        self._ply = 0
+        self.version += 1
+        # Keep the same game_id, player names and board shape
+
     def set_board_state(self, positions: List[Tuple[int, int, str]]) -> None:
         """
         Set multiple board positions at once (for testing).
-        
+
+        Marks set this way bypass the move log and cannot be undone.
+
         Args:
             positions: List of (row, col, symbol) tuples
         """
         for row, col, symbol in positions:
-            if 0 <= row <= 2 and 0 <= col <= 2 and symbol in ['X', 'O']:
-                self.board[row][col] = symbol
-    
+            if self.is_on_board(row, col) and symbol in ['X', 'O']:
+                bit = 1 << (row * self.geometry.n + col)
+                if symbol == 'X':
+                    self._x_bits |= bit
+                    self._o_bits &= ~bit
+                else:
+                    self._o_bits |= bit
+                    self._x_bits &= ~bit
+        self._move_count = (self._x_bits | self._o_bits).bit_count()
+        self.version += 1
+
     def set_current_player(self, player: str) -> None:
         """Set the current player (for testing)."""
         if player in ['X', 'O']:
             self.current_player = player
-    
+            self.version += 1
+
     def _check_winner(self) -> bool:
-        """Check if there's a winner on the current board."""
-        # Check rows
-        for row in self.board:
-            if row[0] == row[1] == row[2] and row[0] is not None:
-                return True
-        
-        # Check columns
-        for col in range(3):
-            if (self.board[0][col] == self.board[1][col] == self.board[2][col] 
-                and self.board[0][col] is not None):
+        """Check if there's a winner anywhere on the current board (full scan)."""
+        for mask in self.geometry.win_masks:
+            if self._x_bits & mask == mask or self._o_bits & mask == mask:
                 return True
-        
-        # Check diagonals
-        if (self.board[0][0] == self.board[1][1] == self.board[2][2] 
-            and self.board[0][0] is not None):
-            return True
-        
-        if (self.board[0][2] == self.board[1][1] == self.board[2][0] 
-            and self.board[0][2] is not None):
-            return True
-        
         return False
-    
+
     def _is_board_full(self) -> bool:
         """Check if the board is completely filled."""
-        for row in self.board:
-            for cell in row:
-                if cell is None:
-                    return False
-        return True
-    
-    def __str__(self) -> str:
-        """String representation of the game board."""
-        lines = []
-        for row in self.board:
-            line = " | ".join(cell if cell else " " for cell in row)
-            lines.append(line)
-        return "\n---------\n".join(lines)
-    
+        return self._move_count == self.geometry.cells
+
     def __repr__(self) -> str:
         """Developer representation of the game."""
         return (f"TicTacToeGame(id={self.game_id[:8]}..., "
+                f"board={self.geometry.m}x{self.geometry.n}, k={self.geometry.k}, "
                 f"current_player={self.current_player}, "
-                f"game_over={self.game_over})")
\ No newline at end of file
+                f"game_over={self.game_over})")
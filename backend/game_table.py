@@ -0,0 +1,706 @@
+"""
+Struct-of-arrays table of games.
+
+A TicTacToeGame object costs over a kilobyte once its uuid4 id, name
+strings, move log array and the store's dict entries are counted. A
+GameTable instead keeps each game as one row across contiguous typed
+arrays (``array`` columns, one machine word or less per field):
+
+- boards: both bitboards packed into one 32-bit word (X in the low m * n
+  bits, O above them, as in get_packed_board())
+- moves, plies, log_lengths: the move log as 4-bit cell indices packed in a
+  64-bit word, the number of moves on the board and the number logged
+- flags: player to move, winner, draw and rejected-move bits
+- shapes: index into the table's list of board geometries
+- player1, player2: indices into a table of interned player names
+- versions, nonces, used, ended: change counter, id check and the
+  store's timestamps
+
+That bounds the table to boards of at most MAX_TABLE_CELLS cells (3x3 and
+4x4 tic-tac-toe, but not gomoku), and costs 44 bytes per game.
+
+Each game's compact id is its row number (slot). Its public id is a UUID-
+formatted string of a random 64-bit nonce followed by the slot XORed with
+a scrambled copy of the nonce (so ids do not reveal slot numbers), and finding a
+game by public id is a parse and one comparison, with no dict of ids at all;
+the nonce makes ids unguessable and tells a reused slot's new game from the
+deleted one. GameView wraps a slot in the TicTacToeGame API, reading and
+writing the columns in place; the rules themselves are game.py's.
+"""
+
+import os
+from array import array
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from game import (BoardGeometry, GameQueries, TicTacToeGame, _DRAWN, _WON, _move_index, _move_outcome,
+                  get_geometry)
+from snapshot import pack_strings, unpack_strings
+
+# Largest board kept in a table, in cells: two bitboards must fit one 32-bit
+# word and a full move log of 4-bit cell indices one 64-bit word
+MAX_TABLE_CELLS = 16
+
+# Bits of the flags column
+_O_TO_MOVE = 1
+_X_WON = 2
+_O_WON = 4
+_DRAW = 8
+_REJECTED = 16
+_LIVE = 32
+_GAME_OVER = _X_WON | _O_WON | _DRAW
+
+# Bits per logged move
+_MOVE_BITS = 4
+_MOVE_MASK = (1 << _MOVE_BITS) - 1
+
+# Nonces drawn from os.urandom at a time (one call per batch rather than per game)
+_NONCE_BATCH = 4096
+
+_SLOT_MASK = (1 << 64) - 1
+
+# Odd 64-bit multiplier scrambling a nonce into the mask for its slot number
+_SLOT_SCRAMBLE = 0x9E3779B97F4A7C15
+
+# Names of the columns, in the order of GameTable.columns
+_COLUMN_NAMES = ("boards", "moves", "plies", "log_lengths", "flags", "shapes",
+                 "player1", "player2", "versions", "nonces", "used", "ended")
+
+
+class NameTable:
+    """Interned strings with reference counts, so each distinct player name is held once."""
+
+    def __init__(self):
+        self.names: List[Optional[str]] = []
+        self._indices: Dict[str, int] = {}
+        self._refs = array('I')
+        self._free: List[int] = []
+
+    def intern(self, name: str) -> int:
+        """Get the index of a name, adding it if new, and count one more reference."""
+        index = self._indices.get(name)
+        if index is None:
+            if self._free:
+                index = self._free.pop()
+                self.names[index] = name
+                self._refs[index] = 0
+            else:
+                index = len(self.names)
+                self.names.append(name)
+                self._refs.append(0)
+            self._indices[name] = index
+        self._refs[index] += 1
+        return index
+
+    def release(self, index: int) -> None:
+        """Drop one reference to a name, forgetting the name with its last reference."""
+        self._refs[index] -= 1
+        if not self._refs[index]:
+            del self._indices[self.names[index]]
+            self.names[index] = None
+            self._free.append(index)
+
+    def __len__(self) -> int:
+        return len(self._indices)
+
+    def dump(self) -> Dict[str, Any]:
+        """The names and reference counts as snapshot sections."""
+        blob, ends = pack_strings(self.names)
+        return {"table.names": blob, "table.name_ends": ends, "table.name_refs": self._refs}
+
+    @classmethod
+    def load(cls, sections: Mapping[str, Any]) -> "NameTable":
+        """Rebuild a name table from the sections written by dump()."""
+        table = cls()
+        table._refs.frombytes(sections["table.name_refs"])
+        table.names = unpack_strings(sections["table.names"], sections["table.name_ends"])
+        for index, name in enumerate(table.names):
+            if table._refs[index]:
+                table._indices[name] = index
+            else:
+                table.names[index] = None
+                table._free.append(index)
+        return table
+
+
+class GameTable:
+    """Games stored column-wise in typed arrays, addressed by slot."""
+
+    def __init__(self):
+        self.boards = array('I')
+        self.moves = array('Q')
+        self.plies = array('B')
+        self.log_lengths = array('B')
+        self.flags = array('B')
+        self.shapes = array('B')
+        self.player1 = array('I')
+        self.player2 = array('I')
+        self.versions = array('I')
+        self.nonces = array('Q')
+        # Seconds (on the owning store's clock) the game was last used and
+        # finished; 0 when not finished. Maintained by the store.
+        self.used = array('I')
+        self.ended = array('I')
+        self.names = NameTable()
+        self.geometries: List[BoardGeometry] = []
+        self._shape_indices: Dict[BoardGeometry, int] = {}
+        self._free: List[int] = []
+        self._nonce_pool: List[int] = []
+        self.live = 0
+
+    @property
+    def columns(self) -> Tuple[array, ...]:
+        return tuple(getattr(self, name) for name in _COLUMN_NAMES)
+
+    @staticmethod
+    def fits(m: int, n: int) -> bool:
+        """Check whether games on an m x n board can be kept in a table."""
+        return m * n <= MAX_TABLE_CELLS
+
+    def create(self, player1_name: str, player2_name: str, m: int = 3, n: int = 3, k: int = 3,
+               now: int = 0, id_filter: Optional[Callable[[str], bool]] = None) -> int:
+        """
+        Add a new game and return its slot.
+
+        Args:
+            player1_name: Name for player X
+            player2_name: Name for player O
+            m, n, k: Board shape (at most MAX_TABLE_CELLS cells)
+            now: Timestamp to record as the game's last use
+            id_filter: Accepts the ids the game may get, by their first 18 characters
+                (which only the nonce decides)
+
+        Raises:
+            ValueError: If the board shape is invalid or too large for the table
+        """
+        geometry = get_geometry(m, n, k)
+        if geometry.cells > MAX_TABLE_CELLS:
+            raise ValueError(f"A {m}x{n} board does not fit a game table (at most {MAX_TABLE_CELLS} cells)")
+        shape = self._shape_indices.get(geometry)
+        if shape is None:
+            shape = self._shape_indices[geometry] = len(self.geometries)
+            self.geometries.append(geometry)
+        nonce = self._next_nonce(id_filter)
+        player1 = self.names.intern(player1_name)
+        player2 = self.names.intern(player2_name)
+        self.live += 1
+
+        if self._free:
+            slot = self._free.pop()
+            self.boards[slot] = 0
+            self.moves[slot] = 0
+            self.plies[slot] = 0
+            self.log_lengths[slot] = 0
+            self.flags[slot] = _LIVE
+            self.shapes[slot] = shape
+            self.player1[slot] = player1
+            self.player2[slot] = player2
+            self.versions[slot] = 0
+            self.nonces[slot] = nonce
+            self.used[slot] = now
+            self.ended[slot] = 0
+            return slot
+
+        self.boards.append(0)
+        self.moves.append(0)
+        self.plies.append(0)
+        self.log_lengths.append(0)
+        self.flags.append(_LIVE)
+        self.shapes.append(shape)
+        self.player1.append(player1)
+        self.player2.append(player2)
+        self.versions.append(0)
+        self.nonces.append(nonce)
+        self.used.append(now)
+        self.ended.append(0)
+        return len(self.nonces) - 1
+
+    def free(self, slot: int) -> None:
+        """Delete the game in a slot; the slot is reused by a later create()."""
+        self.names.release(self.player1[slot])
+        self.names.release(self.player2[slot])
+        self.flags[slot] = 0
+        self.nonces[slot] = 0
+        self._free.append(slot)
+        self.live -= 1
+
+    def is_live(self, slot: int) -> bool:
+        return bool(self.flags[slot] & _LIVE)
+
+    def live_slots(self, start: int = 0) -> Iterator[int]:
+        """Iterate over the slots holding games, in slot order."""
+        flags = self.flags
+        return (slot for slot in range(start, len(flags)) if flags[slot] & _LIVE)
+
+    def public_id(self, slot: int) -> str:
+        """Format a slot's public id: its nonce and masked slot number as a UUID string."""
+        nonce = self.nonces[slot]
+        digits = f"{nonce << 64 | (slot ^ (nonce * _SLOT_SCRAMBLE & _SLOT_MASK)):032x}"
+        return f"{digits[:8]}-{digits[8:12]}-{digits[12:16]}-{digits[16:20]}-{digits[20:]}"
+
+    def find(self, game_id: str) -> Optional[int]:
+        """
+        Get the slot of a public id, or None if it names no game in this table.
+
+        Only the id exactly as public_id() formats it is accepted: int() would
+        also parse uppercase digits, underscores and signs, and such aliases
+        must not find the game under a second name.
+        """
+        if len(game_id) != 36:
+            return None
+        try:
+            value = int(game_id.replace("-", ""), 16)
+        except ValueError:
+            return None
+        nonce = value >> 64
+        slot = (value & _SLOT_MASK) ^ (nonce * _SLOT_SCRAMBLE & _SLOT_MASK)
+        if (nonce and slot < len(self.nonces) and self.nonces[slot] == nonce
+                and self.public_id(slot) == game_id):
+            return slot
+        return None
+
+    def view(self, slot: int, game_id: Optional[str] = None) -> "GameView":
+        """Wrap a slot in the TicTacToeGame API."""
+        return GameView(self, slot, game_id or self.public_id(slot))
+
+    def count_finished(self) -> int:
+        """Number of finished games, counted with one vectorized pass over the flags."""
+        flags = np.frombuffer(self.flags, dtype=np.uint8)
+        return int(np.count_nonzero((flags & _LIVE != 0) & (flags & _GAME_OVER != 0)))
+
+    def expired(self, now: int, idle_ttl: Optional[float],
+                finished_ttl: Optional[float]) -> Tuple[List[int], List[int]]:
+        """
+        Find games past their time limits, with one vectorized pass per limit.
+
+        Args:
+            now: Current timestamp, on the same clock as the used and ended columns
+            idle_ttl: Seconds a game may go unused (None for no limit)
+            finished_ttl: Seconds a game may stay finished (None for no limit)
+
+        Returns:
+            (slots of expired finished games, slots of other idle games), each oldest first
+        """
+        flags = np.frombuffer(self.flags, dtype=np.uint8)
+        live = flags & _LIVE != 0
+        finished: List[int] = []
+        idle: List[int] = []
+        if finished_ttl is not None and now - finished_ttl >= 1:
+            ended = np.frombuffer(self.ended, dtype=np.uint32)
+            slots = np.flatnonzero(live & (ended != 0) & (ended <= now - finished_ttl))
+            finished = slots[np.argsort(ended[slots], kind="stable")].tolist()
+        if idle_ttl is not None and now - idle_ttl >= 1:
+            used = np.frombuffer(self.used, dtype=np.uint32)
+            expired = live & (used <= now - idle_ttl)
+            expired[finished] = False
+            slots = np.flatnonzero(expired)
+            idle = slots[np.argsort(used[slots], kind="stable")].tolist()
+        return finished, idle
+
+    def oldest(self, count: int) -> List[int]:
+        """
+        Pick up to ``count`` games to evict: finished games first, earliest
+        finished first, then the least recently used.
+        """
+        flags = np.frombuffer(self.flags, dtype=np.uint8)
+        slots = np.flatnonzero(flags & _LIVE)
+        count = min(count, len(slots))
+        if not count:
+            return []
+        ended = np.frombuffer(self.ended, dtype=np.uint32)[slots].astype(np.int64)
+        used = np.frombuffer(self.used, dtype=np.uint32)[slots].astype(np.int64)
+        # Finished games sort by finish time, ahead of every unfinished game
+        keys = np.where(ended != 0, ended, used + (1 << 32))
+        chosen = np.argpartition(keys, count - 1)[:count]
+        return slots[chosen[np.argsort(keys[chosen], kind="stable")]].tolist()
+
+    def nbytes(self) -> int:
+        """Bytes held by the columns (excluding interned names)."""
+        return sum(column.itemsize * len(column) for column in self.columns)
+
+    def dump(self) -> Dict[str, Any]:
+        """
+        The table as snapshot sections: every column as it is, the interned
+        names and the board geometries. Free slots are written too and
+        recognized by their flags when loading.
+        """
+        sections: Dict[str, Any] = {f"table.{name}": getattr(self, name) for name in _COLUMN_NAMES}
+        sections.update(self.names.dump())
+        sections["table.geometries"] = array('H', [value for geometry in self.geometries
+                                                   for value in (geometry.m, geometry.n, geometry.k)])
+        return sections
+
+    @classmethod
+    def load(cls, sections: Mapping[str, Any]) -> "GameTable":
+        """
+        Rebuild a table from the sections written by dump(), with one bulk
+        copy per column.
+
+        Raises:
+            ValueError: If the columns differ in length
+        """
+        table = cls()
+        for name in _COLUMN_NAMES:
+            getattr(table, name).frombytes(sections[f"table.{name}"])
+        if len({len(column) for column in table.columns}) != 1:
+            raise ValueError("The table's columns differ in length")
+        triples = array('H')
+        triples.frombytes(sections["table.geometries"])
+        for index in range(0, len(triples), 3):
+            geometry = get_geometry(*triples[index:index + 3])
+            table._shape_indices[geometry] = len(table.geometries)
+            table.geometries.append(geometry)
+        table.names = NameTable.load(sections)
+        live = np.frombuffer(table.flags, dtype=np.uint8) & _LIVE != 0
+        table.live = int(np.count_nonzero(live))
+        table._free = np.flatnonzero(~live)[::-1].tolist()
+        return table
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "slots": len(self.nonces),
+            "free_slots": len(self._free),
+            "names": len(self.names),
+            "column_bytes": self.nbytes(),
+        }
+
+    def _next_nonce(self, id_filter: Optional[Callable[[str], bool]] = None) -> int:
+        pool = self._nonce_pool
+        while True:
+            if not pool:
+                pool.extend(array('Q', os.urandom(8 * _NONCE_BATCH)))
+            nonce = pool.pop()
+            if not nonce:
+                continue
+            if id_filter is None:
+                return nonce
+            # The nonce is the id's first 64 bits, so it alone decides the id's prefix
+            digits = f"{nonce:016x}"
+            if id_filter(f"{digits[:8]}-{digits[8:12]}-{digits[12:]}"):
+                return nonce
+
+
+class GameView(GameQueries):
+    """
+    A game in a GameTable, with the TicTacToeGame API.
+
+    Views are cheap handles: every read and write goes to the table's
+    columns, so two views of the same slot always agree. The rules and the
+    read-side API come from game.py (_move_index, _move_outcome and
+    GameQueries), so a view only reads and writes its row. Once the game is
+    deleted its views are stale: moves and other changes through them are
+    rejected rather than applied to whatever game reuses the slot.
+    """
+
+    __slots__ = ('_table', '_slot', '_nonce', 'game_id')
+
+    def __init__(self, table: GameTable, slot: int, game_id: str):
+        self._table = table
+        self._slot = slot
+        self._nonce = table.nonces[slot]
+        self.game_id = game_id
+
+    @property
+    def slot(self) -> int:
+        """The game's compact id: its row in the table."""
+        return self._slot
+
+    @property
+    def is_stale(self) -> bool:
+        """Whether the game has been deleted from the table."""
+        return self._table.nonces[self._slot] != self._nonce
+
+    @property
+    def geometry(self) -> BoardGeometry:
+        return self._table.geometries[self._table.shapes[self._slot]]
+
+    @property
+    def current_player(self) -> str:
+        return 'O' if self._table.flags[self._slot] & _O_TO_MOVE else 'X'
+
+    @property
+    def winner(self) -> Optional[str]:
+        flags = self._table.flags[self._slot]
+        if flags & _X_WON:
+            return 'X'
+        if flags & _O_WON:
+            return 'O'
+        return None
+
+    @property
+    def is_draw(self) -> bool:
+        return bool(self._table.flags[self._slot] & _DRAW)
+
+    @property
+    def game_over(self) -> bool:
+        return bool(self._table.flags[self._slot] & _GAME_OVER)
+
+    @property
+    def last_move_rejected(self) -> bool:
+        return bool(self._table.flags[self._slot] & _REJECTED)
+
+    @property
+    def player1_name(self) -> str:
+        return self._table.names.names[self._table.player1[self._slot]]
+
+    @property
+    def player2_name(self) -> str:
+        return self._table.names.names[self._table.player2[self._slot]]
+
+    @property
+    def version(self) -> int:
+        return self._table.versions[self._slot]
+
+    def make_move(self, row: int, col: int, player: Optional[str] = None) -> bool:
+        """
+        Attempt to make a move on the board.
+
+        Args:
+            row: Row index (0 to m-1)
+            col: Column index (0 to n-1)
+            player: Player symbol ('X' or 'O'). If None, uses current player.
+
+        Returns:
+            True if move was successful, False if rejected (or the game was deleted)
+        """
+        table = self._table
+        slot = self._slot
+        if table.nonces[slot] != self._nonce:
+            return False
+        flags = table.flags[slot] & ~_REJECTED
+        geometry = table.geometries[table.shapes[slot]]
+        board = table.boards[slot]
+        index = _move_index(geometry, board & geometry.full_mask, board >> geometry.cells,
+                            'O' if flags & _O_TO_MOVE else 'X', bool(flags & _GAME_OVER),
+                            row, col, player)
+        if index < 0:
+            table.flags[slot] = flags | _REJECTED
+            return False
+
+        # Record the move, discarding any moves that could have been redone
+        ply = table.plies[slot]
+        shift = ply * _MOVE_BITS
+        table.moves[slot] = table.moves[slot] & ((1 << shift) - 1) | index << shift
+        table.plies[slot] = table.log_lengths[slot] = ply + 1
+        table.flags[slot] = flags
+        self._place(index)
+        return True
+
+    def _place(self, index: int) -> None:
+        """Put the current player's mark on an empty cell and update the game state."""
+        table = self._table
+        slot = self._slot
+        geometry = table.geometries[table.shapes[slot]]
+        cells = geometry.cells
+        flags = table.flags[slot]
+        board = table.boards[slot]
+        if flags & _O_TO_MOVE:
+            board |= 1 << (index + cells)
+            player_bits = board >> cells
+            won = _O_WON
+        else:
+            board |= 1 << index
+            player_bits = board & geometry.full_mask
+            won = _X_WON
+        table.boards[slot] = board
+
+        outcome = _move_outcome(geometry, player_bits, (board | board >> cells) & geometry.full_mask, index)
+        if outcome == _WON:
+            flags |= won
+        elif outcome == _DRAWN:
+            flags |= _DRAW
+        else:
+            flags ^= _O_TO_MOVE
+        table.flags[slot] = flags
+        table.versions[slot] = (table.versions[slot] + 1) & 0xFFFFFFFF
+
+    def _reject_move(self) -> None:
+        """Flag the last move attempt as rejected, unless the game was deleted."""
+        if not self.is_stale:
+            self._table.flags[self._slot] |= _REJECTED
+
+    def undo(self) -> bool:
+        """
+        Take back the last move on the board; it can be redone until a new move is made.
+
+        Returns:
+            True if a move was taken back, False if there was none
+        """
+        table = self._table
+        slot = self._slot
+        ply = table.plies[slot]
+        if ply == 0 or table.nonces[slot] != self._nonce:
+            return False
+        ply -= 1
+        table.plies[slot] = ply
+        index = table.moves[slot] >> (ply * _MOVE_BITS) & _MOVE_MASK
+        board = table.boards[slot]
+        flags = table.flags[slot] & _LIVE
+        if board >> index & 1:
+            board &= ~(1 << index)
+        else:
+            board &= ~(1 << (index + table.geometries[table.shapes[slot]].cells))
+            flags |= _O_TO_MOVE
+        table.boards[slot] = board
+        table.flags[slot] = flags
+        table.versions[slot] = (table.versions[slot] + 1) & 0xFFFFFFFF
+        return True
+
+    def redo(self) -> bool:
+        """
+        Replay the next taken-back move.
+
+        Returns:
+            True if a move was replayed, False if there was none
+        """
+        table = self._table
+        slot = self._slot
+        ply = table.plies[slot]
+        if (ply == table.log_lengths[slot] or table.flags[slot] & _GAME_OVER
+                or table.nonces[slot] != self._nonce):
+            return False
+        index = table.moves[slot] >> (ply * _MOVE_BITS) & _MOVE_MASK
+        table.plies[slot] = ply + 1
+        table.flags[slot] &= ~_REJECTED
+        self._place(index)
+        return True
+
+    def can_undo(self) -> bool:
+        """Check whether there is a move to take back."""
+        return self._table.plies[self._slot] > 0
+
+    def can_redo(self) -> bool:
+        """Check whether there is a taken-back move to replay."""
+        table = self._table
+        return table.plies[self._slot] < table.log_lengths[self._slot] and not self.game_over
+
+    def _logged(self, start: int, stop: int) -> List[int]:
+        moves = self._table.moves[self._slot]
+        return [moves >> (ply * _MOVE_BITS) & _MOVE_MASK for ply in range(start, stop)]
+
+    def get_moves(self) -> List[int]:
+        """Get the cell indices (row * n + col) of the moves on the board, in play order."""
+        return self._logged(0, self._table.plies[self._slot])
+
+    def get_redo_moves(self) -> List[int]:
+        """Get the cell indices of the taken-back moves that redo() would replay, in order."""
+        table = self._table
+        return self._logged(table.plies[self._slot], table.log_lengths[self._slot])
+
+    def get_move_log(self) -> Tuple[bytes, int]:
+        """
+        Get the raw move log for storage.
+
+        Returns:
+            (log as packed unsigned 16-bit cell indices, number of moves on the board)
+        """
+        table = self._table
+        log = self._logged(0, table.log_lengths[self._slot])
+        return array('H', log).tobytes(), table.plies[self._slot]
+
+    def position_at(self, ply: int) -> Tuple[int, int]:
+        """
+        Get the (X, O) bitboards after the first ``ply`` logged moves.
+
+        Raises:
+            ValueError: If ply is outside the log
+        """
+        length = self._table.log_lengths[self._slot]
+        if not 0 <= ply <= length:
+            raise ValueError(f"Move {ply} is outside the log of {length} moves")
+        x_bits = o_bits = 0
+        for position, index in enumerate(self._logged(0, ply)):
+            if position % 2 == 0:
+                x_bits |= 1 << index
+            else:
+                o_bits |= 1 << index
+        return x_bits, o_bits
+
+    def get_move_count(self) -> int:
+        """Get the number of marks on the board."""
+        return self._table.boards[self._slot].bit_count()
+
+    def get_packed_board(self) -> int:
+        """Get the board packed into one integer of 2 * m * n bits (X low, O high)."""
+        return self._table.boards[self._slot]
+
+    def get_bitboards(self) -> Tuple[int, int]:
+        """Get the raw (X, O) bitboards; bit ``row * n + col`` marks an occupied cell."""
+        table = self._table
+        cells = table.geometries[table.shapes[self._slot]].cells
+        board = table.boards[self._slot]
+        return board & ((1 << cells) - 1), board >> cells
+
+    def copy(self) -> TicTacToeGame:
+        """
+        Get an independent TicTacToeGame with this game's state, log and game_id.
+
+        Used for search and simulation, which must not write to the table.
+        """
+        log, ply = self.get_move_log()
+        game = TicTacToeGame.replay(self.game_id, self.player1_name, self.player2_name,
+                                    self.m, self.n, self.k, log, ply)
+        if (game.get_bitboards() != self.get_bitboards() or game.current_player != self.current_player
+                or game.winner != self.winner or game.is_draw != self.is_draw):
+            # Marks were placed with set_board_state(), or the turn changed with
+            # set_current_player(), outside the log. Keep the log for undo and
+            # redo; table logs are too short to need snapshots.
+            x_bits, o_bits = self.get_bitboards()
+            moves = game._moves
+            game = TicTacToeGame.restore(self.game_id, self.player1_name, self.player2_name,
+                                         self.m, self.n, self.k, x_bits, o_bits,
+                                         self.current_player, self.winner, self.is_draw)
+            game._moves = moves
+            game._ply = ply
+        game.version = self.version
+        return game
+
+    def reset_game(self) -> None:
+        """Reset the game to its initial state; the cleared moves can be redone until a new move."""
+        table = self._table
+        slot = self._slot
+        if table.nonces[slot] != self._nonce:
+            return
+        table.boards[slot] = 0
+        table.flags[slot] = _LIVE
+        table.plies[slot] = 0
+        table.versions[slot] = (table.versions[slot] + 1) & 0xFFFFFFFF
+
+    def set_board_state(self, positions: Iterable[Tuple[int, int, str]]) -> None:
+        """
+        Set multiple board positions at once (for testing).
+
+        Marks set this way bypass the move log and cannot be undone.
+        """
+        table = self._table
+        slot = self._slot
+        if table.nonces[slot] != self._nonce:
+            return
+        x_bits, o_bits = self.get_bitboards()
+        for row, col, symbol in positions:
+            if self.is_on_board(row, col) and symbol in ['X', 'O']:
+                bit = 1 << (row * self.geometry.n + col)
+                if symbol == 'X':
+                    x_bits |= bit
+                    o_bits &= ~bit
+                else:
+                    o_bits |= bit
+                    x_bits &= ~bit
+        table.boards[slot] = x_bits | o_bits << self.geometry.cells
+        table.versions[slot] = (table.versions[slot] + 1) & 0xFFFFFFFF
+
+    def set_current_player(self, player: str) -> None:
+        """Set the current player (for testing)."""
+        table = self._table
+        if player in ['X', 'O'] and table.nonces[self._slot] == self._nonce:
+            if player == 'O':
+                table.flags[self._slot] |= _O_TO_MOVE
+            else:
+                table.flags[self._slot] &= ~_O_TO_MOVE
+            table.versions[self._slot] = (table.versions[self._slot] + 1) & 0xFFFFFFFF
+
+    def __repr__(self) -> str:
+        return (f"GameView(id={self.game_id[:8]}..., slot={self._slot}, "
+                f"board={self.m}x{self.n}, k={self.k}, "
+                f"current_player={self.current_player}, game_over={self.game_over})")
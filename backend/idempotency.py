@@ -0,0 +1,90 @@
+"""
+Replay cache for retried requests.
+
+A client retrying a move over a flaky connection cannot tell whether its
+first attempt was applied. Sending the same Idempotency-Key header with
+every attempt makes retries safe: the first attempt's response is kept and
+later attempts with the key get that response back, without the engine
+running again or the move being applied twice.
+
+Responses are kept per game, as the encoded bytes that were sent, in two
+bounds: the most recent keys_per_game keys of each game, and max_keys keys
+overall (the oldest dropped first). Looking a key up is one dict access.
+A game's keys are dropped with the game.
+"""
+
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Hashable, NamedTuple, Optional, Tuple
+
+# Keys remembered per game, and across all games
+DEFAULT_KEYS_PER_GAME = 16
+DEFAULT_MAX_KEYS = 100_000
+
+# Longest Idempotency-Key accepted
+MAX_KEY_LENGTH = 255
+
+
+class KeyReused(Exception):
+    """Raised when a key arrives again with a different request than the one it was first used for."""
+
+
+class StoredResponse(NamedTuple):
+    """A response as first sent for a key."""
+    request: Hashable  # What the request asked for, to tell retries from key reuse
+    status_code: int
+    body: bytes
+    media_type: str
+
+
+class IdempotencyCache:
+    """Responses of recent keyed requests, per game."""
+
+    def __init__(self, keys_per_game: int = DEFAULT_KEYS_PER_GAME, max_keys: int = DEFAULT_MAX_KEYS):
+        self.keys_per_game = keys_per_game
+        self.max_keys = max_keys
+        # (game_id, key) -> response, oldest first
+        self._responses: "OrderedDict[Tuple[str, str], StoredResponse]" = OrderedDict()
+        # Keys of each game, oldest first
+        self._keys: Dict[str, Deque[str]] = {}
+        self.replays = 0
+
+    def get(self, game_id: str, key: str, request: Hashable) -> Optional[StoredResponse]:
+        """
+        Get the response first sent for a key, if it is remembered.
+
+        Raises:
+            KeyReused: If the key was first used for a different request
+        """
+        response = self._responses.get((game_id, key))
+        if response is None:
+            return None
+        if response.request != request:
+            raise KeyReused(f"Idempotency-Key {key!r} was already used for a different request")
+        self.replays += 1
+        return response
+
+    def put(self, game_id: str, key: str, response: StoredResponse) -> None:
+        """Remember the response sent for a key, dropping the oldest keys beyond the limits."""
+        if (game_id, key) in self._responses:
+            return
+        self._responses[(game_id, key)] = response
+        keys = self._keys.get(game_id)
+        if keys is None:
+            keys = self._keys[game_id] = deque()
+        keys.append(key)
+        if len(keys) > self.keys_per_game:
+            del self._responses[(game_id, keys.popleft())]
+        if len(self._responses) > self.max_keys:
+            (oldest_game, oldest_key), _ = self._responses.popitem(last=False)
+            oldest_keys = self._keys[oldest_game]
+            oldest_keys.remove(oldest_key)
+            if not oldest_keys:
+                del self._keys[oldest_game]
+
+    def forget(self, game_id: str) -> None:
+        """Drop every key of a game (called when the game is deleted)."""
+        for key in self._keys.pop(game_id, ()):
+            self._responses.pop((game_id, key), None)
+
+    def __len__(self) -> int:
+        return len(self._responses)
@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+HTTP load test for the game API.
+
+Drives a weighted mix of API traffic from many concurrent asyncio clients and
+reports throughput and p50/p95/p99 latency per endpoint. By default the app
+is served in-process through httpx's ASGI transport, which measures the
+application (routing, validation, engine, serialization) without sockets or
+a separate server. With --url or --launch it targets a real uvicorn server
+instead, so the numbers include the HTTP stack.
+
+Traffic kinds, weighted by --mix:
+
+- create: POST /games
+- move: POST /games/{id}/moves on a game no other client is moving in, so
+  every move is legal; finished games leave the pool
+- poll: GET /games/{id} with the last ETag seen, as a polling client would
+- list: GET /games?limit=100
+
+Usage:
+    python3 load_test.py --requests 20000 --concurrency 64
+    python3 load_test.py --launch --duration 30 --mix create=1,move=8,poll=8,list=1
+    python3 load_test.py --url http://localhost:8000 --output load.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, NamedTuple, Optional, Tuple
+
+import httpx
+
+DEFAULT_MIX = {"create": 1, "move": 6, "poll": 4, "list": 1}
+
+# Games created before timing starts, so moves and polls have targets
+DEFAULT_WARMUP_GAMES = 100
+
+# Most games kept in the client's pool; later games are created but not reused
+MAX_POOL_GAMES = 10000
+
+# Seconds to wait for a launched server to accept requests
+LAUNCH_TIMEOUT = 20.0
+
+
+class EndpointSummary(NamedTuple):
+    """Latency and throughput of one traffic kind."""
+    requests: int
+    errors: int
+    throughput: float  # requests per second over the whole run
+    p50: float         # latencies in milliseconds
+    p95: float
+    p99: float
+    max: float
+
+
+class LoadReport(NamedTuple):
+    """Outcome of a load test run."""
+    elapsed: float
+    concurrency: int
+    endpoints: Dict[str, EndpointSummary]
+
+    @property
+    def requests(self) -> int:
+        return sum(summary.requests for summary in self.endpoints.values())
+
+    @property
+    def errors(self) -> int:
+        return sum(summary.errors for summary in self.endpoints.values())
+
+    def to_dict(self) -> Dict:
+        """Describe the report as JSON-serializable data."""
+        return {
+            "elapsed": round(self.elapsed, 6),
+            "concurrency": self.concurrency,
+            "requests": self.requests,
+            "errors": self.errors,
+            "throughput": round(self.requests / self.elapsed, 1) if self.elapsed else 0.0,
+            "endpoints": {
+                name: {field: round(value, 3) if isinstance(value, float) else value
+                       for field, value in summary._asdict().items()}
+                for name, summary in self.endpoints.items()
+            },
+        }
+
+
+def parse_mix(spec: str) -> Dict[str, int]:
+    """
+    Parse a traffic mix such as "create=1,move=6,poll=4,list=1".
+
+    Raises:
+        ValueError: If a kind is unknown or a weight is not a non-negative integer
+    """
+    mix = {}
+    for entry in spec.split(","):
+        name, _, weight = entry.strip().partition("=")
+        if name not in DEFAULT_MIX:
+            raise ValueError(f"Unknown traffic kind {name!r}; choose from {', '.join(DEFAULT_MIX)}")
+        if not weight.isdigit():
+            raise ValueError(f"Weight of {name!r} must be a non-negative integer")
+        mix[name] = int(weight)
+    if not any(mix.values()):
+        raise ValueError("At least one traffic kind needs a positive weight")
+    return mix
+
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list (0.0 for an empty one)."""
+    if not ordered:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> EndpointSummary:
+    """Summarize one endpoint's latencies (in seconds) as milliseconds."""
+    ordered = sorted(latencies)
+    requests = len(ordered) + errors
+    return EndpointSummary(
+        requests=requests,
+        errors=errors,
+        throughput=requests / elapsed if elapsed else 0.0,
+        p50=percentile(ordered, 0.50) * 1000,
+        p95=percentile(ordered, 0.95) * 1000,
+        p99=percentile(ordered, 0.99) * 1000,
+        max=(ordered[-1] if ordered else 0.0) * 1000,
+    )
+
+
+class LoadTest:
+    """One load test run against one client."""
+
+    def __init__(self, client: httpx.AsyncClient, mix: Dict[str, int], seed: int = 0,
+                 m: int = 3, n: int = 3, k: int = 3):
+        self.client = client
+        self.rng = random.Random(seed)
+        self.kinds = [kind for kind, weight in mix.items() if weight]
+        self.weights = [mix[kind] for kind in self.kinds]
+        self.game_settings = {"player1_name": "Load X", "player2_name": "Load O", "m": m, "n": n, "k": k}
+        self.cells = [(row, col) for row in range(m) for col in range(n)]
+        # Games nobody is moving in, and the shuffled cells each game has left to play
+        self.idle: List[str] = []
+        self.remaining: Dict[str, List[Tuple[int, int]]] = {}
+        self.etags: Dict[str, str] = {}
+        self.latencies: Dict[str, List[float]] = {kind: [] for kind in self.kinds}
+        self.errors: Dict[str, int] = {kind: 0 for kind in self.kinds}
+
+    async def run(self, concurrency: int, requests: Optional[int] = None,
+                  duration: Optional[float] = None, warmup_games: int = DEFAULT_WARMUP_GAMES) -> LoadReport:
+        """
+        Send traffic from ``concurrency`` clients until ``requests`` have been
+        sent or ``duration`` seconds have passed, whichever comes first.
+        """
+        for _ in range(warmup_games):
+            await self._create(record=False)
+
+        issued = 0
+        deadline = time.perf_counter() + duration if duration is not None else None
+
+        async def client_loop() -> None:
+            nonlocal issued
+            while requests is None or issued < requests:
+                if deadline is not None and time.perf_counter() >= deadline:
+                    return
+                issued += 1
+                kind = self.rng.choices(self.kinds, self.weights)[0]
+                await getattr(self, f"_{kind}")()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        endpoints = {kind: summarize(self.latencies[kind], self.errors[kind], elapsed)
+                     for kind in self.kinds}
+        return LoadReport(elapsed, concurrency, endpoints)
+
+    async def _send(self, kind: str, method: str, url: str, record: bool = True,
+                    **kwargs) -> Optional[httpx.Response]:
+        """Send one request, recording its latency, or an error for a failure."""
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            response = None
+        latency = time.perf_counter() - start
+        if not record:
+            return response
+        if response is None or response.status_code >= 400:
+            self.errors[kind] += 1
+            return None
+        self.latencies[kind].append(latency)
+        return response
+
+    def _add_game(self, game_id: str) -> None:
+        if len(self.remaining) < MAX_POOL_GAMES:
+            cells = self.cells[:]
+            self.rng.shuffle(cells)
+            self.remaining[game_id] = cells
+            self.idle.append(game_id)
+
+    def _drop_game(self, game_id: str) -> None:
+        del self.remaining[game_id]
+        self.etags.pop(game_id, None)
+
+    def _take_idle_game(self) -> Optional[str]:
+        """Check out a random idle game so no other client moves in it meanwhile."""
+        if not self.idle:
+            return None
+        index = self.rng.randrange(len(self.idle))
+        self.idle[index], self.idle[-1] = self.idle[-1], self.idle[index]
+        return self.idle.pop()
+
+    async def _create(self, record: bool = True) -> None:
+        response = await self._send("create", "POST", "/games", record, json=self.game_settings)
+        if response is not None and response.is_success:
+            self._add_game(response.json()["game_id"])
+
+    async def _move(self) -> None:
+        game_id = self._take_idle_game()
+        if game_id is None:
+            await self._create(record="create" in self.latencies)
+            return
+        row, col = self.remaining[game_id].pop()
+        response = await self._send("move", "POST", f"/games/{game_id}/moves",
+                                    json={"row": row, "col": col})
+        if response is None or response.json()["game_state"]["is_game_over"]:
+            self._drop_game(game_id)
+        else:
+            self.idle.append(game_id)
+
+    async def _poll(self) -> None:
+        if not self.idle:
+            await self._create(record="create" in self.latencies)
+            return
+        game_id = self.rng.choice(self.idle)
+        etag = self.etags.get(game_id)
+        headers = {"If-None-Match": etag} if etag else None
+        response = await self._send("poll", "GET", f"/games/{game_id}", headers=headers)
+        if response is not None and "etag" in response.headers and game_id in self.remaining:
+            self.etags[game_id] = response.headers["etag"]
+
+    async def _list(self) -> None:
+        await self._send("list", "GET", "/games", params={"limit": 100})
+
+
+@asynccontextmanager
+async def in_process_client() -> AsyncIterator[httpx.AsyncClient]:
+    """Serve the app in this process, running its startup and shutdown."""
+    from main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest") as client:
+            yield client
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@asynccontextmanager
+async def launched_server() -> AsyncIterator[str]:
+    """Start uvicorn on a free local port and yield its base URL."""
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning", "--no-access-log"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    try:
+        deadline = time.perf_counter() + LAUNCH_TIMEOUT
+        async with httpx.AsyncClient(base_url=url) as client:
+            while True:
+                try:
+                    await client.get("/")
+                    break
+                except httpx.TransportError:
+                    if server.poll() is not None or time.perf_counter() >= deadline:
+                        raise RuntimeError("The launched server did not start")
+                    await asyncio.sleep(0.1)
+        yield url
+    finally:
+        server.terminate()
+        server.wait()
+
+
+@asynccontextmanager
+async def open_client(url: Optional[str], launch: bool, concurrency: int) -> AsyncIterator[httpx.AsyncClient]:
+    """Open a client for the in-process app, a given URL or a launched server."""
+    if url is None and not launch:
+        async with in_process_client() as client:
+            yield client
+        return
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    if launch:
+        async with launched_server() as launched_url:
+            async with httpx.AsyncClient(base_url=launched_url, limits=limits) as client:
+                yield client
+    else:
+        async with httpx.AsyncClient(base_url=url, limits=limits) as client:
+            yield client
+
+
+async def run_load_test(mix: Dict[str, int], concurrency: int, requests: Optional[int] = None,
+                        duration: Optional[float] = None, url: Optional[str] = None,
+                        launch: bool = False, seed: int = 0, m: int = 3, n: int = 3, k: int = 3,
+                        warmup_games: int = DEFAULT_WARMUP_GAMES) -> LoadReport:
+    """
+    Run one load test.
+
+    Args:
+        mix: Weight of each traffic kind
+        concurrency: Number of concurrent clients
+        requests: Total requests to send (None for no limit)
+        duration: Seconds to run for (None for no limit)
+        url: Base URL of a running server; None serves the app in-process
+        launch: Start a local uvicorn server and target it
+        seed: Seed for the traffic choices and move orders
+        m, n, k: Board shape of the games created
+        warmup_games: Games created before timing starts
+
+    Raises:
+        ValueError: If neither requests nor duration limits the run
+    """
+    if requests is None and duration is None:
+        raise ValueError("Limit the run with a request count or a duration")
+    async with open_client(url, launch, concurrency) as client:
+        load_test = LoadTest(client, mix, seed, m, n, k)
+        return await load_test.run(concurrency, requests, duration, warmup_games)
+
+
+def print_report(report: LoadReport, target: str) -> None:
+    print("📈 Tic-Tac-Toe API Load Test")
+    print("=" * 78)
+    print(f"Target: {target} | Clients: {report.concurrency} | "
+          f"Requests: {report.requests} | Errors: {report.errors}")
+    print("-" * 78)
+    print(f"{'endpoint':<10} {'requests':>9} {'errors':>7} {'req/s':>10} "
+          f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for name, summary in report.endpoints.items():
+        print(f"{name:<10} {summary.requests:>9} {summary.errors:>7} {summary.throughput:>10,.1f} "
+              f"{summary.p50:>9.2f} {summary.p95:>9.2f} {summary.p99:>9.2f} {summary.max:>9.2f}")
+    print("=" * 78)
+    print(f"✅ {report.requests} requests in {report.elapsed:.2f}s "
+          f"({report.requests / report.elapsed:,.1f} req/s)")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load test the tic-tac-toe API")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", help="Base URL of a running server (default: serve the app in-process)")
+    target.add_argument("--launch", action="store_true", help="Start a local uvicorn server and target it")
+    parser.add_argument("--requests", type=int, help="Total requests to send (default: 10000 without --duration)")
+    parser.add_argument("--duration", type=float, help="Seconds to run for")
+    parser.add_argument("--concurrency", type=int, default=64, help="Concurrent clients")
+    parser.add_argument("--mix", default=",".join(f"{kind}={weight}" for kind, weight in DEFAULT_MIX.items()),
+                        help="Traffic weights, e.g. create=1,move=6,poll=4,list=1")
+    parser.add_argument("--m", type=int, default=3, help="Board rows")
+    parser.add_argument("--n", type=int, default=3, help="Board columns")
+    parser.add_argument("--k", type=int, default=3, help="Marks in a row to win")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the traffic and move orders")
+    parser.add_argument("--output", help="Also write the report to this JSON file")
+    args = parser.parse_args(argv)
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as exc:
+        parser.error(str(exc))
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    requests = args.requests
+    if requests is None and args.duration is None:
+        requests = 10000
+
+    report = asyncio.run(run_load_test(mix, args.concurrency, requests, args.duration, args.url,
+                                       args.launch, args.seed, args.m, args.n, args.k))
+    print_report(report, args.url or ("launched uvicorn" if args.launch else "in-process ASGI"))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            json.dump(report.to_dict(), output, indent=2)
+    return 1 if report.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
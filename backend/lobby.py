@@ -0,0 +1,236 @@
+"""
+Matchmaking lobby pairing players who want the same kind of board.
+
+A player joins the queue for a board size (m, n, k) and waits on an asyncio
+future until an opponent joins the same queue; the second player's join
+creates the game and resolves both sides at once, so nobody polls. Each
+queue is a deque served first come, first served: joining appends, and
+pairing pops the longest-waiting player.
+
+Players who give up (their wait timed out or their connection closed) are
+not searched for and removed from the middle of the deque. They are marked
+as gone and skipped when they reach the front, and a queue that has become
+mostly departed players is rebuilt, so joining, pairing and leaving all
+stay O(1) amortized however many players wait. Timeouts are event loop
+timers, one per waiting player.
+"""
+
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, NamedTuple, Optional, Tuple
+
+# Players allowed to wait at once across all queues
+DEFAULT_MAX_WAITING = 100_000
+
+# Seconds a player waits for an opponent unless they ask otherwise, and the most they may ask for
+DEFAULT_WAIT_SECONDS = 30.0
+MAX_WAIT_SECONDS = 300.0
+
+# Departed players a queue may hold before it is considered for rebuilding
+_COMPACT_MIN = 64
+
+# Ways of choosing who plays X: the player who waited longer, or a coin toss
+SEAT_POLICIES = ("fifo", "random")
+
+Board = Tuple[int, int, int]
+
+
+class LobbyFull(Exception):
+    """Raised when the lobby already holds its maximum number of waiting players."""
+
+
+class MatchTimeout(Exception):
+    """Raised to a waiting player when no opponent arrived in time."""
+
+
+class PlayerLeft(Exception):
+    """Raised to a waiting player whose place was given up (their client went away)."""
+
+
+class Match(NamedTuple):
+    """A player's side of a pairing."""
+    game: Any
+    symbol: str  # "X" or "O"
+    opponent: str
+    waited: float  # Seconds between joining and being paired
+
+
+class Ticket:
+    """A player's place in a queue."""
+
+    __slots__ = ('player_name', 'board', 'future', 'joined', 'timer', 'waiting')
+
+    def __init__(self, player_name: str, board: Board, future: asyncio.Future, joined: float):
+        self.player_name = player_name
+        self.board = board
+        self.future = future
+        self.joined = joined
+        self.timer: Optional[asyncio.TimerHandle] = None
+        # True while the player is in a queue and may still be paired
+        self.waiting = False
+
+
+class _Queue:
+    """Players waiting for one board size, oldest first, including departed ones not yet skipped."""
+
+    __slots__ = ('tickets', 'departed')
+
+    def __init__(self):
+        self.tickets: Deque[Ticket] = deque()
+        self.departed = 0
+
+
+class Lobby:
+    """First-come, first-served matchmaking queues, one per board size."""
+
+    def __init__(self, create_game: Callable[[str, str, Board], Any],
+                 max_waiting: int = DEFAULT_MAX_WAITING, seats: str = "fifo"):
+        """
+        Args:
+            create_game: Creates and stores a game from (player X, player O, (m, n, k))
+            max_waiting: Most players allowed to wait at once
+            seats: "fifo" gives X (the first move) to the player who waited
+                longer; "random" tosses a coin
+
+        Raises:
+            ValueError: If the seat policy is unknown
+        """
+        if seats not in SEAT_POLICIES:
+            raise ValueError(f"Unknown seat policy {seats!r}; choose one of {', '.join(SEAT_POLICIES)}")
+        self.create_game = create_game
+        self.max_waiting = max_waiting
+        self.seats = seats
+        self.waiting = 0
+        self.matches = 0
+        self.timeouts = 0
+        self.departures = 0
+        self._queues: Dict[Board, _Queue] = {}
+
+    def join(self, player_name: str, board: Board, timeout: float = DEFAULT_WAIT_SECONDS) -> Ticket:
+        """
+        Join the queue for a board size.
+
+        If someone is already waiting for the same board they are paired at
+        once: the game is created and the returned ticket's future is already
+        resolved. Otherwise the player waits for up to ``timeout`` seconds.
+
+        Args:
+            player_name: Name shown to the opponent
+            board: Board rows, columns and win length (m, n, k)
+            timeout: Seconds to wait for an opponent (at most MAX_WAIT_SECONDS)
+
+        Returns:
+            The player's ticket, to pass to wait() and leave()
+
+        Raises:
+            LobbyFull: If the player would have to wait and the lobby is full
+        """
+        loop = asyncio.get_running_loop()
+        now = time.monotonic()
+        ticket = Ticket(player_name, board, loop.create_future(), now)
+        queue = self._queues.get(board)
+        opponent = self._pop_waiting(queue) if queue is not None else None
+
+        if opponent is not None:
+            if not queue.tickets:
+                del self._queues[board]
+            self._pair(opponent, ticket, now)
+            return ticket
+
+        if self.waiting >= self.max_waiting:
+            raise LobbyFull(f"The lobby is full ({self.max_waiting} players waiting)")
+        if queue is None:
+            queue = self._queues[board] = _Queue()
+        queue.tickets.append(ticket)
+        ticket.waiting = True
+        ticket.timer = loop.call_later(min(timeout, MAX_WAIT_SECONDS), self._expire, ticket)
+        self.waiting += 1
+        return ticket
+
+    async def wait(self, ticket: Ticket) -> Match:
+        """
+        Wait until a ticket's player is paired.
+
+        Raises:
+            MatchTimeout: If no opponent arrived in time
+            PlayerLeft: If the player was removed with leave()
+        """
+        try:
+            return await ticket.future
+        except asyncio.CancelledError:
+            self.leave(ticket)
+            raise
+
+    def leave(self, ticket: Ticket) -> None:
+        """Give up a player's place; does nothing once they are paired or gone."""
+        if self._depart(ticket, PlayerLeft(f"{ticket.player_name} left the lobby")):
+            self.departures += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Waiting players, queues and outcome counters."""
+        return {
+            "waiting": self.waiting,
+            "max_waiting": self.max_waiting,
+            "boards": len(self._queues),
+            "seats": self.seats,
+            "matches": self.matches,
+            "timeouts": self.timeouts,
+            "departures": self.departures,
+        }
+
+    def _pop_waiting(self, queue: _Queue) -> Optional[Ticket]:
+        """Take the longest-waiting player still present, skipping departed ones."""
+        tickets = queue.tickets
+        while tickets:
+            ticket = tickets.popleft()
+            if ticket.waiting and not ticket.future.done():
+                ticket.waiting = False
+                ticket.timer.cancel()
+                self.waiting -= 1
+                return ticket
+            if ticket.waiting:
+                # Its wait was cancelled but the cancellation has not run yet
+                ticket.waiting = False
+                ticket.timer.cancel()
+                self.waiting -= 1
+                self.departures += 1
+            else:
+                queue.departed -= 1
+        return None
+
+    def _pair(self, first: Ticket, second: Ticket, now: float) -> None:
+        """Create the game for two players and resolve both of their waits."""
+        if self.seats == "random" and random.random() < 0.5:
+            player_x, player_o = second, first
+        else:
+            player_x, player_o = first, second
+        game = self.create_game(player_x.player_name, player_o.player_name, first.board)
+        self.matches += 1
+        player_x.future.set_result(Match(game, "X", player_o.player_name, now - player_x.joined))
+        player_o.future.set_result(Match(game, "O", player_x.player_name, now - player_o.joined))
+
+    def _expire(self, ticket: Ticket) -> None:
+        """End a wait that ran out of time."""
+        if self._depart(ticket, MatchTimeout("No opponent joined within the time limit")):
+            self.timeouts += 1
+
+    def _depart(self, ticket: Ticket, reason: Exception) -> bool:
+        """Mark a waiting player as gone and end their wait with an error; False if they were not waiting."""
+        if not ticket.waiting:
+            return False
+        ticket.waiting = False
+        ticket.timer.cancel()
+        if not ticket.future.done():
+            ticket.future.set_exception(reason)
+        self.waiting -= 1
+
+        queue = self._queues[ticket.board]
+        queue.departed += 1
+        if queue.departed == len(queue.tickets):
+            del self._queues[ticket.board]
+        elif queue.departed > _COMPACT_MIN and queue.departed * 2 > len(queue.tickets):
+            queue.tickets = deque(waiting for waiting in queue.tickets if waiting.waiting)
+            queue.departed = 0
+        return True
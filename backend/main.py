@@ -5,12 +5,73 @@ This module provides REST API endpoints for the tic-tac-toe game,
 integrating with the standalone game engine from game.py.
 """
 
-from fastapi import FastAPI, HTTPException, status
+from contextlib import asynccontextmanager
+import asyncio
+from fastapi import FastAPI, Header, HTTPException, Query, Request, WebSocket, status
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
-from typing import Optional, Dict, List, Tuple
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field, model_validator
+from sse_starlette.sse import EventSourceResponse
+from starlette.concurrency import run_in_threadpool
+from typing import Annotated, Any, AsyncIterator, Callable, Literal, Optional, Dict, List, Tuple
+import json
+import os
+import sys
 import uuid
-from game import TicTacToeGame
+import mcts
+from admission import create_admission
+from game import TicTacToeGame, MAX_BOARD_DIMENSION
+from events import DELETED, GameEvent, GameEvents, encode_event
+from idempotency import DEFAULT_KEYS_PER_GAME, DEFAULT_MAX_KEYS, MAX_KEY_LENGTH, IdempotencyCache, KeyReused, StoredResponse
+from lobby import DEFAULT_MAX_WAITING, DEFAULT_WAIT_SECONDS, MAX_WAIT_SECONDS, Lobby, LobbyFull, Match, MatchTimeout, PlayerLeft
+from metrics import Metrics, MetricsMiddleware
+from profiling import Profiler, ProfilingMiddleware
+from sharding import ShardMiddleware, create_shard
+from snapshot import SnapshotError, create_snapshotter, run_snapshotter
+from solver import Solver
+from wire import FormatError, WireFormat, compact_board, compact_game, encode, negotiate
+from store import GameStore, create_store, run_sweeper
+
+# Perfect-play solver for 3x3 games, built (or loaded) at startup
+solver: Optional[Solver] = None
+
+def get_solver() -> Solver:
+    """Get the shared solver, building its table on first use."""
+    global solver
+    if solver is None:
+        solver = Solver.load_or_build(os.getenv("SOLVER_TABLE_PATH"))
+    return solver
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Prepare shared resources before serving requests and release them on shutdown."""
+    get_solver()
+    metrics.register_routes(app.routes)
+    admission.install(app.routes)
+    if os.getenv("SERVER_TIMING", "false").lower() == "true":
+        profiler.server_timing.enable()
+    snapshots = None
+    if snapshotter is not None:
+        snapshotter.restore()
+        if snapshotter.interval is not None:
+            snapshots = asyncio.create_task(run_snapshotter(snapshotter))
+    sweeper = asyncio.create_task(run_sweeper(store))
+    if shard is not None:
+        await shard.start()
+    yield
+    sweeper.cancel()
+    try:
+        if snapshotter is not None:
+            if snapshots is not None:
+                snapshots.cancel()
+            await snapshotter.shutdown()
+    finally:
+        # Release everything else even if the final snapshot failed, above all the store's pending writes
+        profiler.server_timing.disable()
+        if shard is not None:
+            await shard.close()
+        mcts.shutdown_pool()
+        store.close()
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -18,7 +79,8 @@ app = FastAPI(
     description="A REST API for playing tic-tac-toe games with support for custom player names and game management",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # Add CORS middleware for frontend integration
@@ -30,25 +92,130 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# In-memory game storage (use database in production)
-games: Dict[str, TicTacToeGame] = {}
+# Request counts, latency histograms and game counters served at /metrics
+metrics = Metrics()
+app.add_middleware(MetricsMiddleware, metrics=metrics)
+
+# Server-Timing headers and on-demand profile sessions, both off until asked for
+profiler = Profiler()
+app.add_middleware(ProfilingMiddleware, profiler=profiler)
+
+# Per-client rate limits and the in-flight request cap, installed on the
+# routes at startup (see admission.py). Lobby joins wait for an opponent on
+# purpose and are bounded by the lobby itself, so they are not capped.
+admission = create_admission(uncapped=("POST /lobby",))
+
+# Game storage backend, selected by GAME_STORE (see store.py)
+store: GameStore = create_store()
+
+# This worker's share of the games when several run behind one port (see
+# cluster.py). It only creates games it owns, and forwards requests for the
+# others to their owners; added last so it runs before everything else.
+shard = create_shard()
+if shard is not None:
+    store.id_filter = shard.owns
+    app.add_middleware(ShardMiddleware, shard=shard)
+
+# Snapshots of the store, restored at startup and written periodically and
+# on shutdown when GAME_SNAPSHOT_PATH is set (see snapshot.py)
+snapshotter = create_snapshotter(store)
+
+# Games per page when listing games without an explicit limit
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Maximum games created or moves applied by one batch request
+MAX_BATCH_SIZE = 1000
+
+# Games serialized per chunk when streaming NDJSON
+STREAM_BATCH_SIZE = 500
+
+# Distinguishes this process's ETags from those of earlier runs, since
+# game versions start again at 0 when games are reloaded from storage
+BOOT_ID = uuid.uuid4().hex[:8]
+
+# Encoded response bodies per game: game_id -> (version, {kind: body})
+response_cache: Dict[str, Tuple[int, Dict[str, bytes]]] = {}
+store.add_delete_listener(lambda game_id: response_cache.pop(game_id, None))
+
+# Subscribers following games over SSE and WebSocket
+game_events = GameEvents()
+store.add_delete_listener(game_events.close)
+
+# Responses to moves sent with an Idempotency-Key, replayed to retries (see idempotency.py)
+idempotency = IdempotencyCache(
+    keys_per_game=int(os.getenv("IDEMPOTENCY_KEYS_PER_GAME", str(DEFAULT_KEYS_PER_GAME))),
+    max_keys=int(os.getenv("IDEMPOTENCY_MAX_KEYS", str(DEFAULT_MAX_KEYS))),
+)
+store.add_delete_listener(idempotency.forget)
+
+def start_matched_game(player_x: str, player_o: str, board: Tuple[int, int, int]) -> TicTacToeGame:
+    """Create and store the game for two players paired by the lobby."""
+    game = store.create(player_x, player_o, *board)
+    metrics.games_created_total += 1
+    return game
+
+# Players waiting for an opponent, paired first come, first served (see lobby.py)
+lobby = Lobby(
+    start_matched_game,
+    max_waiting=int(os.getenv("LOBBY_MAX_WAITING", str(DEFAULT_MAX_WAITING))),
+    seats=os.getenv("LOBBY_SEATS", "fifo").lower(),
+)
+
+# Filters for the status query parameter of GET /games
+STATUS_FILTERS: Dict[str, Callable[[TicTacToeGame], bool]] = {
+    "active": lambda game: not game.game_over,
+    "won": lambda game: game.winner is not None,
+    "draw": lambda game: game.is_draw,
+}
 
 # Pydantic models for request/response validation
 class CreateGameRequest(BaseModel):
     """Request model for creating a new game."""
     player1_name: Optional[str] = Field(default="Player X", description="Name for player 1 (X)")
     player2_name: Optional[str] = Field(default="Player O", description="Name for player 2 (O)")
+    m: int = Field(default=3, ge=1, le=MAX_BOARD_DIMENSION, description="Number of rows on the board")
+    n: int = Field(default=3, ge=1, le=MAX_BOARD_DIMENSION, description="Number of columns on the board")
+    k: int = Field(default=3, ge=1, le=MAX_BOARD_DIMENSION, description="Marks in a row needed to win")
+
+    @model_validator(mode="after")
+    def check_win_length_fits(self) -> "CreateGameRequest":
+        """Reject win lengths that cannot fit on the requested board."""
+        if self.k > max(self.m, self.n):
+            raise ValueError(f"k={self.k} does not fit on a {self.m}x{self.n} board")
+        return self
 
 class MakeMoveRequest(BaseModel):
     """Request model for making a move."""
-    row: int = Field(ge=0, le=2, description="Row position (0-2)")
-    col: int = Field(ge=0, le=2, description="Column position (0-2)")
+    row: int = Field(ge=0, description="Row position (0 to m-1)")
+    col: int = Field(ge=0, description="Column position (0 to n-1)")
+    expected_version: Optional[int] = Field(default=None, ge=0, description="Only move if the game is still at this version (409 otherwise)")
+    player: Optional[Literal["X", "O"]] = Field(default=None, description="Only move if it is this player's turn (409 otherwise)")
+
+class BatchCreateGamesRequest(CreateGameRequest):
+    """Request model for creating many games with the same settings."""
+    count: int = Field(ge=1, le=MAX_BATCH_SIZE, description="Number of games to create")
+
+class BatchMove(BaseModel):
+    """One move of a batch."""
+    game_id: str
+    row: int = Field(ge=0, description="Row position (0 to m-1)")
+    col: int = Field(ge=0, description="Column position (0 to n-1)")
+    expected_version: Optional[int] = Field(default=None, ge=0, description="Only move if the game is still at this version")
+    player: Optional[Literal["X", "O"]] = Field(default=None, description="Only move if it is this player's turn")
+
+class BatchMovesRequest(BaseModel):
+    """Request model for applying moves across many games."""
+    moves: List[BatchMove] = Field(min_length=1, max_length=MAX_BATCH_SIZE, description="Moves, applied in order")
 
 class GameResponse(BaseModel):
     """Response model for game state."""
     game_id: str
     player1_name: str
     player2_name: str
+    m: int
+    n: int
+    k: int
     current_player: str
     current_player_name: str
     board: List[List[Optional[str]]]
@@ -56,6 +223,7 @@ class GameResponse(BaseModel):
     winner_name: Optional[str]
     is_draw: bool
     is_game_over: bool
+    version: int = Field(description="Changes with every move, undo, redo and reset; send as expected_version")
 
 class MoveResponse(BaseModel):
     """Response model for move results."""
@@ -63,26 +231,308 @@ class MoveResponse(BaseModel):
     message: str
     game_state: GameResponse
 
+class BatchMoveResult(BaseModel):
+    """Outcome of one move of a batch."""
+    game_id: str
+    row: int
+    col: int
+    success: bool
+    message: str
+    conflict: bool = Field(default=False, description="The move was not tried: expected_version or player did not match")
+    current_player: Optional[str] = Field(default=None, description="Symbol to move next; null if the game was not found")
+    winner: Optional[str] = None
+    is_draw: bool = False
+    is_game_over: bool = False
+    version: Optional[int] = Field(default=None, description="Game version after the move; null if the game was not found")
+
+class BatchMovesResponse(BaseModel):
+    """Response model for a batch of moves."""
+    results: List[BatchMoveResult]
+
+class AIMoveRequest(BaseModel):
+    """Request model for letting the computer play the current player's move."""
+    mode: Literal["mcts", "solver"] = Field(default="mcts", description="mcts for any board, solver for perfect play on 3x3")
+    think_time: float = Field(default=1.0, gt=0, le=30, description="MCTS think time in seconds")
+    iterations: Optional[int] = Field(default=None, ge=1, le=10_000_000, description="Optional MCTS iteration budget")
+
+class AIMoveResponse(BaseModel):
+    """Response model for a computer move."""
+    success: bool
+    message: str
+    mode: str
+    row: int
+    col: int
+    iterations: Optional[int] = Field(default=None, description="MCTS iterations run across all workers")
+    iterations_per_second: Optional[float] = Field(default=None, description="MCTS search throughput")
+    think_time: Optional[float] = Field(default=None, description="Seconds spent searching")
+    game_state: GameResponse
+
+class BestMoveResponse(BaseModel):
+    """Response model for the perfect-play move suggestion."""
+    game_id: str
+    row: int
+    col: int
+    player: str
+    outcome: str = Field(description="Result for the player to move under perfect play: win, draw or loss")
+
+class JoinLobbyRequest(BaseModel):
+    """Request model for waiting to be paired with an opponent."""
+    player_name: str = Field(default="Player", min_length=1, description="Name shown to the opponent")
+    m: int = Field(default=3, ge=1, le=MAX_BOARD_DIMENSION, description="Number of rows on the board")
+    n: int = Field(default=3, ge=1, le=MAX_BOARD_DIMENSION, description="Number of columns on the board")
+    k: int = Field(default=3, ge=1, le=MAX_BOARD_DIMENSION, description="Marks in a row needed to win")
+    timeout: float = Field(default=DEFAULT_WAIT_SECONDS, gt=0, le=MAX_WAIT_SECONDS, description="Seconds to wait for an opponent")
+
+    @model_validator(mode="after")
+    def check_win_length_fits(self) -> "JoinLobbyRequest":
+        """Reject win lengths that cannot fit on the requested board."""
+        if self.k > max(self.m, self.n):
+            raise ValueError(f"k={self.k} does not fit on a {self.m}x{self.n} board")
+        return self
+
+class MatchResponse(BaseModel):
+    """Response model for a player paired by the lobby."""
+    game_id: str
+    symbol: str = Field(description="The symbol this player plays: X moves first")
+    player_name: str
+    opponent_name: str
+    waited_seconds: float
+    game_state: GameResponse
+
+class ProfileRequest(BaseModel):
+    """Request model for profiling the next requests."""
+    mode: Literal["cprofile", "sampling"] = Field(default="cprofile", description="Deterministic cProfile or stack sampling")
+    requests: Optional[int] = Field(default=None, ge=1, description="Stop after this many requests")
+    seconds: float = Field(default=10.0, gt=0, le=60, description="Stop after this many seconds at the latest")
+    limit: int = Field(default=30, ge=1, le=500, description="Functions (and stacks) to return")
+
+class ServerTimingSettings(BaseModel):
+    """Request and response model for the Server-Timing switch."""
+    enabled: bool
+
 class ErrorResponse(BaseModel):
     """Response model for errors."""
     error: str
     message: str
 
-# Helper function to convert game to response model
+# Helper functions to convert a game to its response
+def game_to_dict(game: TicTacToeGame) -> Dict[str, Any]:
+    """Convert a TicTacToeGame instance to the fields of a GameResponse, without validation."""
+    return {
+        "game_id": game.game_id,
+        "player1_name": game.player1_name,
+        "player2_name": game.player2_name,
+        "m": game.m,
+        "n": game.n,
+        "k": game.k,
+        "current_player": game.current_player,
+        "current_player_name": game.get_current_player_name(),
+        "board": game.get_board_state(),
+        "winner": game.get_winner(),
+        "winner_name": game.get_winner_name(),
+        "is_draw": game.is_draw_game(),
+        "is_game_over": game.is_game_over(),
+        "version": game.version
+    }
+
 def game_to_response(game: TicTacToeGame) -> GameResponse:
     """Convert a TicTacToeGame instance to a GameResponse model."""
-    return GameResponse(
-        game_id=game.game_id,
-        player1_name=game.player1_name,
-        player2_name=game.player2_name,
-        current_player=game.current_player,
-        current_player_name=game.get_current_player_name(),
-        board=game.get_board_state(),
-        winner=game.get_winner(),
-        winner_name=game.get_winner_name(),
-        is_draw=game.is_draw_game(),
-        is_game_over=game.is_game_over()
-    )
+    return GameResponse(**game_to_dict(game))
+
+def describe_move(game: TicTacToeGame, row: int, col: int, success: bool) -> str:
+    """Build the human-readable message for a move attempt."""
+    if success:
+        message = f"Move successful at position ({row}, {col})"
+        if game.is_game_over():
+            if game.get_winner():
+                message += f". {game.get_winner_name()} wins!"
+            elif game.is_draw_game():
+                message += ". Game ends in a draw!"
+        return message
+    
+    # Determine why the move failed
+    if game.is_game_over():
+        return "Game is already over"
+    if not game.is_on_board(row, col):
+        return f"Position ({row}, {col}) is outside the {game.m}x{game.n} board"
+    if game.get_position(row, col) is not None:
+        return f"Position ({row}, {col}) is already occupied"
+    return "Invalid move"
+
+def encode_json(content: Any) -> bytes:
+    """Encode content the way FastAPI's JSONResponse does."""
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+def compact_response(build: Callable[[], Any], wire_format: WireFormat,
+                     headers: Optional[Dict[str, str]] = None,
+                     status_code: int = status.HTTP_200_OK) -> Response:
+    """Encode compact content in the negotiated format, raising 406 if the game cannot use it."""
+    try:
+        body = encode(build(), wire_format)
+    except FormatError as exc:
+        raise HTTPException(status_code=status.HTTP_406_NOT_ACCEPTABLE, detail=str(exc))
+    return Response(body, status_code=status_code, media_type=wire_format.media_type, headers=headers)
+
+def cached_game_response(request: Request, game: TicTacToeGame, kind: str,
+                         build: Callable[[TicTacToeGame], Any],
+                         build_compact: Optional[Callable[[TicTacToeGame, WireFormat], Any]] = None) -> Response:
+    """
+    Respond with a view of a game, reusing the encoded body while the game is unchanged.
+    
+    Args:
+        request: Incoming request, checked for If-None-Match and Accept
+        game: Game to describe
+        kind: Name of the view (one cached body per view, format and game version)
+        build: Builds the view's JSON content from the game
+        build_compact: Builds the view's compact content, if the view has one
+    
+    Returns:
+        304 Not Modified if the client's ETag is current, otherwise the body with its ETag
+    """
+    wire_format = negotiate(request.headers.get("accept")) if build_compact else None
+    tag = f"-{wire_format.tag}" if wire_format else ""
+    etag = f'"{game.version}-{BOOT_ID}{tag}"'
+    headers = {"ETag": etag, "Vary": "Accept"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    entry = response_cache.get(game.game_id)
+    if entry is None or entry[0] != game.version:
+        entry = response_cache[game.game_id] = (game.version, {})
+    key = kind + tag
+    body = entry[1].get(key)
+    if body is None:
+        if wire_format:
+            response = compact_response(lambda: build_compact(game, wire_format), wire_format, headers)
+            entry[1][key] = response.body
+            return response
+        body = entry[1][key] = encode_json(build(game))
+    return Response(body, media_type=wire_format.media_type if wire_format else "application/json",
+                    headers=headers)
+
+def game_status(game: TicTacToeGame) -> Dict[str, Any]:
+    """Build the summary returned by the status endpoint."""
+    return {
+        "game_id": game.game_id,
+        "current_player": game.get_current_player_name(),
+        "winner": game.get_winner_name(),
+        "is_draw": game.is_draw_game(),
+        "is_game_over": game.is_game_over(),
+        "moves_made": game.get_move_count()
+    }
+
+def publish_move(game: TicTacToeGame, row: int, col: int, player: str) -> None:
+    """Push a move, and the game's end if it ended the game, to the game's subscribers."""
+    if not game_events.has_subscribers(game.game_id):
+        return
+    game_events.publish(game.game_id, encode_event("move", game.version, {
+        "row": row,
+        "col": col,
+        "player": player,
+        "game": game_to_dict(game)
+    }))
+    if game.game_over:
+        game_events.publish(game.game_id, encode_event("game_over", game.version, {
+            "winner": game.get_winner(),
+            "winner_name": game.get_winner_name(),
+            "is_draw": game.is_draw_game()
+        }))
+
+def publish_state(game: TicTacToeGame, event: str) -> None:
+    """Push a whole-game change (reset, undo, redo) to the game's subscribers."""
+    if game_events.has_subscribers(game.game_id):
+        game_events.publish(game.game_id, encode_event(event, game.version, game_to_dict(game)))
+
+def game_snapshot(game_id: str) -> GameEvent:
+    """Build the first event of a subscription: the game's current state."""
+    game = store.get(game_id)
+    if game is None:
+        return DELETED
+    return encode_event("state", game.version, game_to_dict(game))
+
+def game_history(game: TicTacToeGame) -> Dict[str, Any]:
+    """Build the move history returned by the moves endpoint."""
+    n = game.n
+    
+    def describe(cells: List[int], first_ply: int) -> List[Dict[str, Any]]:
+        return [
+            {"ply": ply, "row": cell // n, "col": cell % n, "player": 'X' if ply % 2 else 'O'}
+            for ply, cell in enumerate(cells, first_ply)
+        ]
+    
+    moves = game.get_moves()
+    return {
+        "game_id": game.game_id,
+        "ply": len(moves),
+        "moves": describe(moves, 1),
+        "redo": describe(game.get_redo_moves(), len(moves) + 1)
+    }
+
+def game_legal_moves(game: TicTacToeGame) -> Dict[str, Any]:
+    """Build the move list returned by the legal moves endpoint."""
+    return {
+        "game_id": game.game_id,
+        "current_player": game.current_player,
+        "count": game.count_legal_moves(),
+        "moves": [list(move) for move in game.legal_moves()]
+    }
+
+# Response builders and encoders timed as phases while Server-Timing is on
+profiler.server_timing.instrument(sys.modules[__name__], {
+    "game_to_dict": "build",
+    "game_to_response": "build",
+    "game_status": "build",
+    "game_history": "build",
+    "game_legal_moves": "build",
+    "compact_game": "build",
+    "compact_board": "build",
+    "encode_json": "encode",
+    "encode": "encode",
+})
+
+def match_to_dict(player_name: str, match: Match) -> Dict[str, Any]:
+    """Convert one player's side of a lobby pairing to the fields of a MatchResponse."""
+    return {
+        "game_id": match.game.game_id,
+        "symbol": match.symbol,
+        "player_name": player_name,
+        "opponent_name": match.opponent,
+        "waited_seconds": round(match.waited, 3),
+        "game_state": game_to_dict(match.game),
+    }
+
+def join_lobby_or_503(request: JoinLobbyRequest):
+    """Put a player in the lobby, raising 503 if it is full."""
+    try:
+        return lobby.join(request.player_name, (request.m, request.n, request.k), request.timeout)
+    except LobbyFull as exc:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(exc),
+                            headers={"Retry-After": "1"})
+
+async def wait_for_disconnect(request: Request) -> None:
+    """Return once the client has closed its connection (the body must already be read)."""
+    while (await request.receive())["type"] != "http.disconnect":
+        pass
+
+def get_game_or_404(game_id: str) -> TicTacToeGame:
+    """Look up a game in the store, raising 404 if it does not exist."""
+    game = store.get(game_id)
+    if game is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Game with ID {game_id} not found"
+        )
+    return game
 
 # API Endpoints
 
@@ -102,83 +552,241 @@ async def create_game(request: CreateGameRequest):
     
     - **player1_name**: Name for player 1 (plays as X)
     - **player2_name**: Name for player 2 (plays as O)
+    - **m**, **n**: Board rows and columns (default 3x3)
+    - **k**: Marks in a row needed to win (default 3)
     
     Returns the initial game state with a unique game ID.
     """
-    game = TicTacToeGame(request.player1_name, request.player2_name)
-    games[game.game_id] = game
+    game = store.create(request.player1_name, request.player2_name, request.m, request.n, request.k)
+    metrics.games_created_total += 1
     
     return game_to_response(game)
 
-@app.get("/games", response_model=List[GameResponse], summary="List All Games")
-async def list_games():
+def parse_cursor(cursor: Optional[str]) -> Optional[int]:
+    """Decode a pagination cursor, raising 400 if it is malformed."""
+    if cursor is None:
+        return None
+    try:
+        return int(cursor)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid cursor: {cursor}"
+        )
+
+async def stream_games(predicate: Optional[Callable[[TicTacToeGame], bool]],
+                       after: Optional[int], limit: Optional[int]) -> AsyncIterator[bytes]:
+    """Yield games as NDJSON in chunks, resuming from a cursor between chunks."""
+    sent = 0
+    while limit is None or sent < limit:
+        batch_size = STREAM_BATCH_SIZE if limit is None else min(STREAM_BATCH_SIZE, limit - sent)
+        games, after = store.page(after, batch_size, predicate)
+        if games:
+            yield "".join(json.dumps(game_to_dict(game)) + "\n" for game in games).encode()
+            sent += len(games)
+        if after is None:
+            break
+        # Let other requests run between chunks
+        await asyncio.sleep(0)
+
+@app.post("/games:batch", response_model=List[GameResponse], status_code=status.HTTP_201_CREATED,
+          summary="Create Games in Bulk")
+async def create_games_batch(request: BatchCreateGamesRequest):
     """
-    Get a list of all active games.
+    Create many games with the same settings in one request.
+    
+    - **count**: Number of games to create (at most 1000)
+    - **player1_name**, **player2_name**, **m**, **n**, **k**: As for POST /games
     
-    Returns an array of all games currently in memory.
+    Returns the initial state of every new game, in creation order.
     """
-    return [game_to_response(game) for game in games.values()]
+    created = []
+    for _ in range(request.count):
+        game = store.create(request.player1_name, request.player2_name, request.m, request.n, request.k)
+        created.append(game_to_dict(game))
+    metrics.games_created_total += request.count
+    
+    return JSONResponse(created, status_code=status.HTTP_201_CREATED)
+
+@app.post("/moves:batch", response_model=BatchMovesResponse, summary="Make Moves in Bulk")
+async def make_moves_batch(request: BatchMovesRequest):
+    """
+    Apply a list of moves across any number of games.
+    
+    - **moves**: List of {game_id, row, col} (at most 1000), applied in order,
+      each with optional expected_version and player conditions
+    
+    Moves are validated exactly as by POST /games/{game_id}/moves. A rejected
+    move or an unknown game fails only that entry; the response holds one
+    result per move, in request order.
+    """
+    results = []
+    changed: Dict[str, TicTacToeGame] = {}
+    for move in request.moves:
+        game = store.get(move.game_id)
+        if game is None:
+            results.append({
+                "game_id": move.game_id, "row": move.row, "col": move.col, "success": False,
+                "message": f"Game with ID {move.game_id} not found", "conflict": False, "current_player": None,
+                "winner": None, "is_draw": False, "is_game_over": False, "version": None
+            })
+            continue
+        
+        conflict = move_conflict(game, move.expected_version, move.player)
+        if conflict is None:
+            player = game.current_player
+            success = game.make_move(move.row, move.col)
+            if success:
+                changed[game.game_id] = game
+                publish_move(game, move.row, move.col, player)
+            message = describe_move(game, move.row, move.col, success)
+        else:
+            success = False
+            message = conflict
+        results.append({
+            "game_id": move.game_id, "row": move.row, "col": move.col, "success": success,
+            "message": message, "conflict": conflict is not None,
+            "current_player": game.current_player, "winner": game.winner,
+            "is_draw": game.is_draw, "is_game_over": game.game_over, "version": game.version
+        })
+    
+    # Record each changed game once, however many of its moves the batch held
+    for game in changed.values():
+        store.save(game)
+    metrics.record_moves(sum(result["success"] for result in results))
+    
+    return JSONResponse({"results": results})
+
+@app.get("/games", response_model=List[GameResponse], summary="List Games")
+async def list_games(
+    request: Request,
+    status_filter: Optional[Literal["active", "won", "draw"]] = Query(
+        default=None, alias="status", description="Only list active, won or drawn games"
+    ),
+    cursor: Optional[str] = Query(default=None, description="Cursor from the previous page's Link header"),
+    limit: Optional[int] = Query(default=None, ge=1, le=MAX_PAGE_SIZE, description="Games per page")
+):
+    """
+    List games in creation order, one page at a time.
+    
+    - **status**: Optional filter: active, won or draw
+    - **cursor**: Resume after the previous page (from its `Link` or `X-Next-Cursor` header)
+    - **limit**: Games per page (default 100, at most 1000)
+    
+    Send `Accept: application/x-ndjson` to stream every matching game as
+    newline-delimited JSON instead; `limit` then caps the total streamed.
+    """
+    predicate = STATUS_FILTERS.get(status_filter) if status_filter else None
+    after = parse_cursor(cursor)
+    
+    if "application/x-ndjson" in request.headers.get("accept", ""):
+        return StreamingResponse(stream_games(predicate, after, limit), media_type="application/x-ndjson")
+    
+    games, next_cursor = store.page(after, limit or DEFAULT_PAGE_SIZE, predicate)
+    headers = {"Vary": "Accept", "X-Result-Count": str(len(games))}
+    if next_cursor is not None:
+        next_url = request.url.include_query_params(cursor=str(next_cursor))
+        headers["Link"] = f'<{next_url}>; rel="next"'
+        headers["X-Next-Cursor"] = str(next_cursor)
+    
+    wire_format = negotiate(request.headers.get("accept"))
+    if wire_format:
+        return compact_response(lambda: [compact_game(game, wire_format) for game in games],
+                                wire_format, headers)
+    # Built from plain dicts: validating every page through GameResponse is the slow part
+    return JSONResponse([game_to_dict(game) for game in games], headers=headers)
 
 @app.get("/games/{game_id}", response_model=GameResponse, summary="Get Game State")
-async def get_game(game_id: str):
+async def get_game(game_id: str, request: Request):
     """
     Get the current state of a specific game.
     
     - **game_id**: Unique identifier for the game
     
     Returns the current game state including board, players, and status.
+    Send the response's `ETag` back as `If-None-Match` to get `304 Not Modified`
+    while the game is unchanged. Compact formats are available through the
+    Accept header (see wire.py).
     """
-    if game_id not in games:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Game with ID {game_id} not found"
-        )
+    return cached_game_response(request, get_game_or_404(game_id), "game", game_to_dict, compact_game)
+
+def move_conflict(game: TicTacToeGame, expected_version: Optional[int], player: Optional[str]) -> Optional[str]:
+    """Describe why a conditional move must not be tried, or None if its conditions hold."""
+    if expected_version is not None and expected_version != game.version:
+        return f"Game is at version {game.version}, not {expected_version}"
+    if player is not None and player != game.current_player:
+        return f"It is {game.current_player}'s turn, not {player}'s"
+    return None
+
+def apply_move(game: TicTacToeGame, request: MakeMoveRequest, wire_format: Optional[WireFormat]) -> Response:
+    """Make a move and build its response: 409 with the current game if its conditions fail."""
+    conflict = move_conflict(game, request.expected_version, request.player)
+    if conflict is None:
+        player = game.current_player
+        success = game.make_move(request.row, request.col)
+        if success:
+            store.save(game)
+            metrics.record_moves()
+            publish_move(game, request.row, request.col, player)
+        message = describe_move(game, request.row, request.col, success)
+        status_code = status.HTTP_200_OK
+    else:
+        success = False
+        message = conflict
+        status_code = status.HTTP_409_CONFLICT
     
-    return game_to_response(games[game_id])
+    if wire_format:
+        return compact_response(
+            lambda: {"success": success, "message": message, "game": compact_game(game, wire_format)},
+            wire_format, {"Vary": "Accept"}, status_code
+        )
+    return JSONResponse(
+        {"success": success, "message": message, "game_state": game_to_dict(game)},
+        status_code=status_code, headers={"Vary": "Accept"}
+    )
 
-@app.post("/games/{game_id}/moves", response_model=MoveResponse, summary="Make a Move")
-async def make_move(game_id: str, request: MakeMoveRequest):
+@app.post("/games/{game_id}/moves", response_model=MoveResponse, summary="Make a Move",
+          responses={409: {"model": MoveResponse, "description": "expected_version or player did not match"}})
+async def make_move(game_id: str, request: MakeMoveRequest,
+                    accept: Optional[str] = Header(default=None, include_in_schema=False),
+                    idempotency_key: Optional[str] = Header(
+                        default=None, min_length=1, max_length=MAX_KEY_LENGTH,
+                        description="Client-chosen key; retries with the same key get the first response back")):
     """
     Make a move in the specified game.
     
     - **game_id**: Unique identifier for the game
-    - **row**: Row position (0-2)
-    - **col**: Column position (0-2)
-    
-    Returns the move result and updated game state.
-    """
-    if game_id not in games:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Game with ID {game_id} not found"
-        )
-    
-    game = games[game_id]
+    - **row**: Row position (0 to m-1)
+    - **col**: Column position (0 to n-1)
+    - **expected_version**: Optional; only move if the game's version still
+      matches, otherwise 409 Conflict with the current game
+    - **player**: Optional; only move if it is this symbol's turn, otherwise 409
     
-    # Attempt to make the move
-    success = game.make_move(request.row, request.col)
+    With an Idempotency-Key header, the response is remembered for the game
+    and a retry with the same key and body gets it back unchanged (with an
+    Idempotent-Replayed header) instead of the move being applied again.
+    Reusing a key for a different move is rejected with 422.
     
-    if success:
-        message = f"Move successful at position ({request.row}, {request.col})"
-        if game.is_game_over():
-            if game.get_winner():
-                message += f". {game.get_winner_name()} wins!"
-            elif game.is_draw_game():
-                message += ". Game ends in a draw!"
-    else:
-        # Determine why the move failed
-        if game.is_game_over():
-            message = "Game is already over"
-        elif game.get_position(request.row, request.col) is not None:
-            message = f"Position ({request.row}, {request.col}) is already occupied"
-        else:
-            message = "Invalid move"
+    Returns the move result and updated game state, in a compact format if
+    the Accept header asks for one.
+    """
+    game = get_game_or_404(game_id)
+    wire_format = negotiate(accept)
+    if idempotency_key is None:
+        return apply_move(game, request, wire_format)
     
-    return MoveResponse(
-        success=success,
-        message=message,
-        game_state=game_to_response(game)
-    )
+    fingerprint = (request.row, request.col, request.expected_version, request.player, wire_format)
+    try:
+        stored = idempotency.get(game.game_id, idempotency_key, fingerprint)
+    except KeyReused as exc:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc))
+    if stored is not None:
+        return Response(stored.body, status_code=stored.status_code, media_type=stored.media_type,
+                        headers={"Vary": "Accept", "Idempotent-Replayed": "true"})
+    response = apply_move(game, request, wire_format)
+    idempotency.put(game.game_id, idempotency_key,
+                    StoredResponse(fingerprint, response.status_code, response.body, response.media_type))
+    return response
 
 @app.post("/games/{game_id}/reset", response_model=GameResponse, summary="Reset Game")
 async def reset_game(game_id: str):
@@ -189,16 +797,53 @@ async def reset_game(game_id: str):
     
     Returns the reset game state with an empty board.
     """
-    if game_id not in games:
+    game = get_game_or_404(game_id)
+    game.reset_game()
+    store.save(game)
+    publish_state(game, "reset")
+    
+    return game_to_response(game)
+
+@app.post("/games/{game_id}/undo", response_model=GameResponse, summary="Undo Move")
+async def undo_move(game_id: str):
+    """
+    Take back the last move.
+    
+    - **game_id**: Unique identifier for the game
+    
+    The move can be replayed with redo until a new move is made.
+    Returns the game state after the undo; 409 if there is no move to take back.
+    """
+    game = get_game_or_404(game_id)
+    if not game.undo():
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Game with ID {game_id} not found"
+            status_code=status.HTTP_409_CONFLICT,
+            detail="No move to undo"
         )
+    store.save(game)
+    publish_state(game, "undo")
     
-    game = games[game_id]
-    game.reset_game()
+    return JSONResponse(game_to_dict(game))
+
+@app.post("/games/{game_id}/redo", response_model=GameResponse, summary="Redo Move")
+async def redo_move(game_id: str):
+    """
+    Replay the last taken-back move (after an undo or a reset).
     
-    return game_to_response(game)
+    - **game_id**: Unique identifier for the game
+    
+    Returns the game state after the redo; 409 if there is no move to replay.
+    """
+    game = get_game_or_404(game_id)
+    if not game.redo():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="No move to redo"
+        )
+    store.save(game)
+    publish_state(game, "redo")
+    
+    return JSONResponse(game_to_dict(game))
 
 @app.delete("/games/{game_id}", status_code=status.HTTP_204_NO_CONTENT, summary="Delete Game")
 async def delete_game(game_id: str):
@@ -209,67 +854,390 @@ async def delete_game(game_id: str):
     
     Removes the game from memory.
     """
-    if game_id not in games:
+    if not store.delete(game_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Game with ID {game_id} not found"
         )
     
-    del games[game_id]
     return None
 
 @app.get("/games/{game_id}/board", response_model=List[List[Optional[str]]], summary="Get Game Board")
-async def get_board(game_id: str):
+async def get_board(game_id: str, request: Request):
     """
     Get just the board state for the specified game.
     
     - **game_id**: Unique identifier for the game
     
-    Returns a 3x3 array representing the current board state.
+    Returns an m x n array representing the current board state, or the
+    compact board string / packed integer when the Accept header asks for it.
+    Supports `ETag` / `If-None-Match` like the game state endpoint.
     """
-    if game_id not in games:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Game with ID {game_id} not found"
-        )
-    
-    return games[game_id].get_board_state()
+    return cached_game_response(request, get_game_or_404(game_id), "board",
+                                lambda game: game.get_board_state(), compact_board)
 
 @app.get("/games/{game_id}/status", summary="Get Game Status")
-async def get_game_status(game_id: str):
+async def get_game_status(game_id: str, request: Request):
     """
     Get a summary of the game status.
     
     - **game_id**: Unique identifier for the game
     
     Returns key status information about the game.
+    Supports `ETag` / `If-None-Match` like the game state endpoint.
     """
-    if game_id not in games:
+    return cached_game_response(request, get_game_or_404(game_id), "status", game_status)
+
+@app.get("/games/{game_id}/moves", summary="Get Move History")
+async def get_move_history(game_id: str, request: Request):
+    """
+    Get the moves played in the game, in order.
+    
+    - **game_id**: Unique identifier for the game
+    
+    `moves` lists the moves on the board and `redo` the taken-back moves that
+    redo would replay. Supports `ETag` / `If-None-Match` like the game state endpoint.
+    """
+    return cached_game_response(request, get_game_or_404(game_id), "moves", game_history)
+
+@app.get("/games/{game_id}/legal-moves", summary="Get Legal Moves")
+async def get_legal_moves(game_id: str, request: Request):
+    """
+    List the moves the player to move may make.
+    
+    - **game_id**: Unique identifier for the game
+    
+    Returns `[row, col]` of every empty cell in board order, or no moves once
+    the game is over. Supports `ETag` / `If-None-Match` like the game state endpoint.
+    """
+    return cached_game_response(request, get_game_or_404(game_id), "legal-moves", game_legal_moves)
+
+@app.get("/games/{game_id}/best-move", response_model=BestMoveResponse, summary="Get Best Move")
+async def get_best_move(game_id: str):
+    """
+    Get the perfect-play move for the player to move.
+    
+    - **game_id**: Unique identifier for the game
+    
+    Answered from the precomputed solver table; only 3x3 games with k=3 are supported.
+    """
+    game = get_game_or_404(game_id)
+    
+    try:
+        suggestion = get_solver().best_move(game)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    
+    if suggestion is None:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Game with ID {game_id} not found"
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Game is already over"
         )
     
-    game = games[game_id]
+    row, col, outcome = suggestion
+    return BestMoveResponse(
+        game_id=game.game_id,
+        row=row,
+        col=col,
+        player=game.current_player,
+        outcome=outcome
+    )
+
+@app.post("/games/{game_id}/ai-move", response_model=AIMoveResponse, summary="Make a Computer Move")
+async def make_ai_move(game_id: str, request: AIMoveRequest):
+    """
+    Let the computer play the current player's move.
+    
+    - **game_id**: Unique identifier for the game
+    - **mode**: "mcts" (Monte Carlo tree search, any board) or "solver" (perfect play, 3x3 only)
+    - **think_time**: MCTS wall-clock budget in seconds
+    - **iterations**: Optional MCTS iteration budget
     
-    return {
-        "game_id": game.game_id,
-        "current_player": game.get_current_player_name(),
-        "winner": game.get_winner_name(),
-        "is_draw": game.is_draw_game(),
-        "is_game_over": game.is_game_over(),
-        "moves_made": sum(1 for row in game.board for cell in row if cell is not None)
-    }
+    MCTS searches run on a process pool sized by MCTS_WORKERS; the response
+    reports the iterations run and the search throughput. If the game is
+    moved, reset or deleted while the computer thinks, the move is not played
+    and 409 Conflict is returned.
+    """
+    game = get_game_or_404(game_id)
+    if game.is_game_over():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Game is already over"
+        )
+    
+    player = game.current_player
+    version = game.version
+    result = None
+    if request.mode == "solver":
+        try:
+            row, col, _ = get_solver().best_move(game)
+        except ValueError as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    else:
+        # Search a snapshot off the event loop so other requests keep flowing
+        result = await run_in_threadpool(
+            mcts.search, game.copy(), request.think_time, request.iterations
+        )
+        row, col = result.row, result.col
+    
+    # The game may have moved on, or been deleted, while the search was running
+    game = store.get(game_id)
+    if game is None or game.version != version or not game.make_move(row, col, player):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Game changed while the computer was thinking"
+        )
+    store.save(game)
+    metrics.record_moves()
+    publish_move(game, row, col, player)
+    
+    return AIMoveResponse(
+        success=True,
+        message=describe_move(game, row, col, True),
+        mode=request.mode,
+        row=row,
+        col=col,
+        iterations=result.iterations if result else None,
+        iterations_per_second=result.iterations_per_second if result else None,
+        think_time=result.elapsed if result else None,
+        game_state=game_to_response(game)
+    )
+
+@app.post("/lobby", response_model=MatchResponse, summary="Find an Opponent")
+async def join_lobby(request: JoinLobbyRequest, connection: Request):
+    """
+    Wait in the matchmaking lobby until paired with an opponent (long poll).
+    
+    - **player_name**: Name shown to the opponent
+    - **m**, **n**, **k**: Board to play on; only players asking for the same board are paired
+    - **timeout**: Seconds to wait for an opponent (default 30, at most 300)
+    
+    Players are paired first come, first served, and the response arrives as
+    soon as an opponent joins: the new game and which symbol this player
+    plays. Returns 408 if nobody joins in time and 503 if the lobby is full.
+    Closing the connection gives up the player's place.
+    """
+    ticket = join_lobby_or_503(request)
+    if not ticket.future.done():
+        watcher = asyncio.create_task(wait_for_disconnect(connection))
+        watcher.add_done_callback(lambda _: lobby.leave(ticket))
+    else:
+        watcher = None
+    try:
+        match = await lobby.wait(ticket)
+    except (MatchTimeout, PlayerLeft) as exc:
+        raise HTTPException(status_code=status.HTTP_408_REQUEST_TIMEOUT, detail=str(exc))
+    finally:
+        if watcher is not None:
+            watcher.cancel()
+    return JSONResponse(match_to_dict(request.player_name, match))
+
+@app.get("/lobby/events", summary="Find an Opponent (Server-Sent Events)")
+async def follow_lobby(request: Annotated[JoinLobbyRequest, Query()]):
+    """
+    Wait in the matchmaking lobby, following the wait as Server-Sent Events.
+    
+    Takes the same fields as `POST /lobby` as query parameters. The first
+    event (`waiting`) reports how many players are waiting, then `matched`
+    carries the same body as `POST /lobby` or `timeout` says nobody joined
+    in time. Closing the stream gives up the player's place.
+    """
+    ticket = join_lobby_or_503(request)
+    
+    async def messages():
+        yield encode_event("waiting", None, {"waiting": lobby.waiting}).sse
+        try:
+            match = await lobby.wait(ticket)
+        except (MatchTimeout, PlayerLeft) as exc:
+            yield encode_event("timeout", None, {"message": str(exc)}).sse
+            return
+        yield encode_event("matched", None, match_to_dict(request.player_name, match)).sse
+    
+    return EventSourceResponse(messages())
+
+@app.get("/games/{game_id}/events", summary="Follow Game Events")
+async def follow_game_events(game_id: str):
+    """
+    Stream a game's updates as Server-Sent Events.
+    
+    - **game_id**: Unique identifier for the game
+    
+    The first event (`state`) carries the current game state, followed by a
+    `move` event for every move, `game_over` when the game ends and `reset`
+    when it is reset. Each event's `id` is the game version after it.
+    """
+    get_game_or_404(game_id)
+    
+    async def messages():
+        async for event in game_events.listen(game_id, lambda: game_snapshot(game_id)):
+            yield event.sse
+    
+    return EventSourceResponse(messages())
+
+@app.websocket("/games/{game_id}/ws")
+async def follow_game_socket(websocket: WebSocket, game_id: str):
+    """
+    WebSocket equivalent of the events stream.
+    
+    Every event is sent as a text frame holding {"event", "version", "data"}.
+    Connections to unknown games are closed with code 4404.
+    """
+    await websocket.accept()
+    if store.get(game_id) is None:
+        await websocket.close(code=4404, reason=f"Game with ID {game_id} not found")
+        return
+    
+    async def send_events():
+        async for event in game_events.listen(game_id, lambda: game_snapshot(game_id)):
+            await websocket.send_text(event.frame)
+    
+    async def wait_for_disconnect():
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+    
+    sender = asyncio.create_task(send_events())
+    receiver = asyncio.create_task(wait_for_disconnect())
+    done, pending = await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
+    for task in pending:
+        task.cancel()
+    # The subscription ended (game deleted or client too slow) while the client is still connected
+    if sender in done and sender.exception() is None:
+        await websocket.close()
+
+@app.get("/admin/store", summary="Get Store Statistics")
+async def get_store_stats():
+    """
+    Get the size, limits and eviction counters of the game store.
+    
+    Eviction counts are split by cause (capacity, idle, finished) to help
+    tune GAME_STORE_MAX_GAMES, GAME_IDLE_TTL and GAME_FINISHED_TTL.
+    """
+    return store.stats()
+
+@app.get("/admin/snapshot", summary="Get Snapshot Status")
+async def get_snapshot_status():
+    """
+    Get the store snapshot settings and the outcome of the last save and of the restore at startup.
+    
+    - **enabled**: Whether GAME_SNAPSHOT_PATH is set
+    - **last_save**: Games and bytes written and seconds taken by the last save
+    - **restored**: Games loaded at startup and seconds taken
+    """
+    if snapshotter is None:
+        return {"enabled": False}
+    return {"enabled": True, **snapshotter.stats()}
+
+@app.post("/admin/snapshot", summary="Save a Snapshot Now")
+async def save_snapshot():
+    """
+    Write a snapshot of the store now, without waiting for the next periodic one.
+    
+    The snapshot is written by a forked process while this one keeps serving
+    requests; the response arrives once it is on disk. Returns 409 Conflict
+    when snapshots are off.
+    """
+    if snapshotter is None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT,
+                            detail="Snapshots are off; set GAME_SNAPSHOT_PATH to enable them")
+    try:
+        return await snapshotter.save_in_background()
+    except (OSError, SnapshotError) as exc:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(exc))
+
+@app.get("/admin/rate-limits", summary="Get Rate Limits and Load")
+async def get_rate_limits(
+    client: Optional[str] = Query(default=None, description="Also report this client's buckets"),
+    limit: int = Query(default=50, ge=1, le=1000, description="Empty buckets to list"),
+):
+    """
+    Get the rate limit settings, requests in flight and rejection counters.
+    
+    - **rate_limited**, **overloaded**: Requests refused with 429 and 503, also split by route
+    - **limited**: Clients whose bucket for a route is empty now, most recently active first
+    - **client**: With `client`, the tokens left in each of that client's buckets
+    """
+    stats = admission.stats()
+    stats["limited"] = admission.limited(limit)
+    if client is not None:
+        stats["client"] = {"client": client, "buckets": admission.client_buckets(client)}
+    return stats
+
+@app.get("/admin/lobby", summary="Get Lobby Statistics")
+async def get_lobby_stats():
+    """
+    Get the number of players waiting in the lobby and its outcome counters.
+    
+    - **waiting**: Players waiting now, across **boards** distinct board sizes
+    - **matches**: Games started by pairing players
+    - **timeouts**, **departures**: Players who stopped waiting unpaired
+    """
+    return lobby.stats()
+
+@app.get("/metrics", response_class=PlainTextResponse, summary="Get Metrics")
+async def get_metrics():
+    """
+    Get service metrics in the Prometheus text format.
+    
+    - Request counts by route and status class, and latency histograms by route
+    - Active and finished games, games created and moves applied
+    - Moves per second over the last minute
+    - Store capacity and evictions by cause
+    - Process resident memory
+    """
+    return PlainTextResponse(metrics.render(store.stats()), media_type="text/plain; version=0.0.4")
+
+@app.post("/admin/profile", summary="Profile Upcoming Requests")
+async def profile_requests(request: ProfileRequest):
+    """
+    Profile the requests that arrive from now on and return the aggregated profile.
+    
+    - **mode**: `cprofile` (every call, higher overhead) or `sampling` (event loop stack every 2 ms)
+    - **requests**: Stop after this many requests have finished
+    - **seconds**: Stop after this many seconds at the latest (at most 60)
+    - **limit**: Number of functions (and, when sampling, stacks) to return
+    
+    The response arrives when the session ends. Only one session runs at a
+    time; a second request gets 409 Conflict.
+    """
+    try:
+        return await profiler.profile(request.mode, request.requests, request.seconds, request.limit)
+    except RuntimeError as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc))
+
+@app.get("/admin/server-timing", response_model=ServerTimingSettings, summary="Get Server-Timing Setting")
+async def get_server_timing():
+    """Report whether responses carry Server-Timing headers."""
+    return ServerTimingSettings(enabled=profiler.server_timing.enabled)
+
+@app.put("/admin/server-timing", response_model=ServerTimingSettings, summary="Turn Server-Timing On or Off")
+async def set_server_timing(request: ServerTimingSettings):
+    """
+    Turn Server-Timing headers on or off for every response.
+    
+    - **enabled**: Whether to add the phase breakdown to responses
+    
+    Also settable at startup with SERVER_TIMING=true. While off, no timing
+    code runs at all.
+    """
+    if request.enabled:
+        profiler.server_timing.enable()
+    else:
+        profiler.server_timing.disable()
+    return ServerTimingSettings(enabled=profiler.server_timing.enabled)
 
 # Error handlers
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc):
     """Custom HTTP exception handler."""
-    return {
-        "error": exc.__class__.__name__,
-        "message": exc.detail,
-        "status_code": exc.status_code
-    }
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={
+            "error": exc.__class__.__name__,
+            "message": exc.detail,
+            "status_code": exc.status_code
+        },
+        headers=getattr(exc, "headers", None)
+    )
 
 if __name__ == "__main__":
     import uvicorn
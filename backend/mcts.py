@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Monte Carlo tree search player for m,n,k games.
+
+Exact solving stops being practical beyond 3x3, so larger boards are played
+by MCTS (UCT selection, uniformly random rollouts) on top of TicTacToeGame's
+own move and win logic. Each call is bounded by a think time, an iteration
+budget, or both.
+
+Searches can run on a process pool using root parallelization: every worker
+grows an independent tree from the same position and the root visit counts
+are summed, so throughput scales with the number of cores.
+
+Usage:
+    python3 mcts.py --m 15 --n 15 --k 5 --think-time 2 --workers 4
+"""
+
+import argparse
+import math
+import multiprocessing
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from game import TicTacToeGame
+
+# UCT exploration constant (sqrt(2) is the textbook value for rewards in [0, 1])
+DEFAULT_EXPLORATION = math.sqrt(2)
+
+# Number of worker processes used when none is requested
+DEFAULT_WORKERS = int(os.getenv("MCTS_WORKERS", str(os.cpu_count() or 1)))
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+class SearchResult(NamedTuple):
+    """Outcome of one MCTS call."""
+    row: int
+    col: int
+    iterations: int
+    elapsed: float
+    workers: int
+
+    @property
+    def iterations_per_second(self) -> float:
+        """Search throughput across all workers."""
+        return self.iterations / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class _Node:
+    """A search tree node; ``mover`` is the player whose move led here."""
+
+    __slots__ = ('cell', 'parent', 'children', 'untried', 'visits', 'wins', 'mover')
+
+    def __init__(self, cell: Optional[int], parent: Optional["_Node"], untried: List[int],
+                 mover: Optional[str]):
+        self.cell = cell
+        self.parent = parent
+        self.children: List[_Node] = []
+        self.untried = untried
+        self.visits = 0
+        self.wins = 0.0
+        self.mover = mover
+
+
+def _run_search(game: TicTacToeGame, iterations: Optional[int], think_time: Optional[float],
+                seed: Optional[int], exploration: float) -> Tuple[Dict[int, int], int]:
+    """
+    Grow one search tree from ``game``.
+
+    Returns:
+        (visits per root cell, iterations completed)
+    """
+    rng = random.Random(seed)
+    n = game.geometry.n
+    deadline = time.perf_counter() + think_time if think_time is not None else None
+    root = _Node(None, None, game.get_empty_cells(), None)
+    completed = 0
+
+    while iterations is None or completed < iterations:
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+
+        node = root
+        state = game.copy()
+
+        # Selection: descend through fully expanded nodes by UCT
+        while not node.untried and node.children:
+            log_visits = math.log(node.visits)
+            best_score = -1.0
+            best_child = node.children[0]
+            for child in node.children:
+                score = (child.wins / child.visits
+                         + exploration * math.sqrt(log_visits / child.visits))
+                if score > best_score:
+                    best_score = score
+                    best_child = child
+            node = best_child
+            state.make_move(node.cell // n, node.cell % n)
+
+        # Expansion: add one untried move
+        if node.untried and not state.game_over:
+            untried = node.untried
+            index = rng.randrange(len(untried))
+            untried[index], untried[-1] = untried[-1], untried[index]
+            cell = untried.pop()
+            mover = state.current_player
+            state.make_move(cell // n, cell % n)
+            child = _Node(cell, node, [] if state.game_over else state.get_empty_cells(), mover)
+            node.children.append(child)
+            node = child
+
+        # Rollout: play the remaining cells in a random order
+        if not state.game_over:
+            cells = state.get_empty_cells()
+            rng.shuffle(cells)
+            for cell in cells:
+                state.make_move(cell // n, cell % n)
+                if state.game_over:
+                    break
+
+        # Backpropagation: score each node for the player who moved into it
+        winner = state.winner
+        while node is not None:
+            node.visits += 1
+            if node.mover is not None:
+                if winner is None:
+                    node.wins += 0.5
+                elif winner == node.mover:
+                    node.wins += 1.0
+            node = node.parent
+
+        completed += 1
+
+    return {child.cell: child.visits for child in root.children}, completed
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Get the shared process pool, starting it on first use.
+
+    The pool has DEFAULT_WORKERS processes (or ``workers``, if the first search
+    asks for more) and is never resized: searches running at once, from
+    different threads, share it, and a search asking for fewer workers just
+    submits fewer tasks. Searches asking for more than its size queue.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Spawn rather than fork: the API server process is multithreaded, and
+            # these processes live on running arbitrary work, so a lock held by
+            # another thread at a fork could hang them at any time (snapshot.py
+            # forks only a short-lived writer that takes no such locks)
+            _pool = ProcessPoolExecutor(max_workers=max(workers, DEFAULT_WORKERS),
+                                        mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def shutdown_pool() -> None:
+    """Shut down the shared process pool, if one was started."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True)
+
+
+def search(game: TicTacToeGame, think_time: Optional[float] = 1.0, iterations: Optional[int] = None,
+           workers: Optional[int] = None, seed: Optional[int] = None,
+           exploration: float = DEFAULT_EXPLORATION) -> SearchResult:
+    """
+    Choose a move for the player to move by Monte Carlo tree search.
+
+    Args:
+        game: Position to search from; it is not modified
+        think_time: Wall-clock budget in seconds per worker (None for no limit)
+        iterations: Total iteration budget shared by the workers (None for no limit)
+        workers: Number of processes; 1 searches in the calling process
+        seed: Base seed for reproducible searches (worker i uses seed + i)
+        exploration: UCT exploration constant
+
+    Returns:
+        The most visited move and search statistics
+
+    Raises:
+        ValueError: If the game is over or no budget was given
+    """
+    if game.is_game_over():
+        raise ValueError("Game is already over")
+    if think_time is None and iterations is None:
+        raise ValueError("A think time or an iteration budget is required")
+
+    workers = max(1, workers or DEFAULT_WORKERS)
+    if iterations is not None:
+        workers = min(workers, iterations)
+    start = time.perf_counter()
+
+    if workers == 1:
+        visits, completed = _run_search(game, iterations, think_time, seed, exploration)
+    else:
+        budgets = [None] * workers
+        if iterations is not None:
+            budgets = [iterations // workers + (1 if i < iterations % workers else 0) for i in range(workers)]
+        pool = _get_pool(workers)
+        futures = [
+            pool.submit(_run_search, game, budgets[i], think_time,
+                        None if seed is None else seed + i, exploration)
+            for i in range(workers)
+        ]
+        visits = {}
+        completed = 0
+        for future in futures:
+            worker_visits, worker_completed = future.result()
+            completed += worker_completed
+            for cell, count in worker_visits.items():
+                visits[cell] = visits.get(cell, 0) + count
+
+    elapsed = time.perf_counter() - start
+    if visits:
+        cell = max(sorted(visits), key=visits.__getitem__)
+    else:
+        # The budget ran out before a single iteration finished
+        cell = game.get_empty_cells()[0]
+    n = game.geometry.n
+    return SearchResult(cell // n, cell % n, completed, elapsed, workers)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measure MCTS throughput on an empty m,n,k board")
+    parser.add_argument("--m", type=int, default=3, help="Board rows")
+    parser.add_argument("--n", type=int, default=3, help="Board columns")
+    parser.add_argument("--k", type=int, default=3, help="Marks in a row to win")
+    parser.add_argument("--think-time", type=float, default=1.0, help="Seconds per search")
+    parser.add_argument("--iterations", type=int, default=None, help="Iteration budget per search")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Worker processes")
+    parser.add_argument("--seed", type=int, default=None, help="Base random seed")
+    args = parser.parse_args()
+
+    game = TicTacToeGame(m=args.m, n=args.n, k=args.k)
+    try:
+        result = search(game, think_time=args.think_time, iterations=args.iterations,
+                        workers=args.workers, seed=args.seed)
+    finally:
+        shutdown_pool()
+
+    print(f"🌲 MCTS on {args.m}x{args.n} (k={args.k}) with {result.workers} worker(s)")
+    print(f"   Move:        ({result.row}, {result.col})")
+    print(f"   Iterations:  {result.iterations}")
+    print(f"   Elapsed:     {result.elapsed:.3f}s")
+    print(f"   Throughput:  {result.iterations_per_second:,.0f} iterations/s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
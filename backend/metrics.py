@@ -0,0 +1,211 @@
+"""
+Request and game metrics in the Prometheus text format.
+
+Every API route gets its counters when the app starts: a request count per
+status class and a fixed-bucket latency histogram, all plain integer lists.
+Recording a request is a bisect into the bucket bounds and a few integer
+increments, with no labels built or strings formatted on the hot path; the
+text exposition is only rendered when /metrics is scraped.
+
+Latency is measured until the response starts, so long-lived streams (SSE,
+NDJSON) count the time to their first byte rather than their lifetime.
+WebSocket connections are not timed.
+"""
+
+import os
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+# Upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# Seconds of history behind the moves-per-second gauge
+MOVE_RATE_WINDOW = 60
+
+# Status classes counted per route, indexed by status // 100 - 1
+_STATUS_CLASSES = ("1xx", "2xx", "3xx", "4xx", "5xx")
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+class RouteMetrics:
+    """Request counts and latency histogram of one route."""
+
+    __slots__ = ('method', 'path', 'statuses', 'buckets', 'total_seconds')
+
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.statuses = [0] * len(_STATUS_CLASSES)
+        # One count per bucket plus an overflow count for +Inf (not cumulative)
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total_seconds = 0.0
+
+    def observe(self, seconds: float, status: int) -> None:
+        """Record one request."""
+        self.buckets[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.total_seconds += seconds
+        self.statuses[min(status // 100, 5) - 1] += 1
+
+    @property
+    def count(self) -> int:
+        return sum(self.buckets)
+
+
+class MoveRate:
+    """Moves applied per second over a sliding window of one-second slots."""
+
+    __slots__ = ('_counts', '_seconds')
+
+    def __init__(self, window: int = MOVE_RATE_WINDOW):
+        self._counts = [0] * window
+        self._seconds = [0] * window
+
+    def add(self, moves: int = 1, now: Optional[float] = None) -> None:
+        """Count moves in the current second's slot, clearing it if it holds an older second."""
+        second = int(time.monotonic() if now is None else now)
+        slot = second % len(self._counts)
+        if self._seconds[slot] != second:
+            self._seconds[slot] = second
+            self._counts[slot] = 0
+        self._counts[slot] += moves
+
+    def rate(self, now: Optional[float] = None) -> float:
+        """Mean moves per second over the window's completed seconds."""
+        second = int(time.monotonic() if now is None else now)
+        window = len(self._counts)
+        moves = sum(count for count, stamp in zip(self._counts, self._seconds)
+                    if second - window <= stamp < second)
+        return moves / window
+
+
+def resident_memory_bytes() -> Optional[int]:
+    """Current resident set size of this process, or None where it cannot be read."""
+    try:
+        with open("/proc/self/statm", "rb") as statm:
+            return int(statm.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+class Metrics:
+    """All metrics of one API process."""
+
+    def __init__(self):
+        # Keyed by id() of the route object, since Starlette routes are unhashable
+        self.routes: Dict[int, RouteMetrics] = {}
+        self.unmatched = RouteMetrics("", "unmatched")
+        self.moves_total = 0
+        self.games_created_total = 0
+        self.move_rate = MoveRate()
+        self.started = time.time()
+
+    def register_routes(self, routes: Iterable[Any]) -> None:
+        """Preallocate counters for every HTTP route of an app (routes with a path and methods)."""
+        for route in routes:
+            methods = getattr(route, "methods", None)
+            if methods and id(route) not in self.routes:
+                method = "GET" if "GET" in methods else sorted(methods)[0]
+                self.routes[id(route)] = RouteMetrics(method, route.path)
+
+    def counters_for(self, route: Any) -> RouteMetrics:
+        """Get the counters of a route missed by register_routes(), adding them once."""
+        if route is None or not getattr(route, "methods", None):
+            return self.unmatched
+        self.register_routes((route,))
+        return self.routes[id(route)]
+
+    def record_moves(self, count: int = 1) -> None:
+        """Count moves applied to games."""
+        self.moves_total += count
+        self.move_rate.add(count)
+
+    def render(self, store_stats: Dict[str, Any]) -> str:
+        """Render every metric in the Prometheus text exposition format (version 0.0.4)."""
+        lines: List[str] = []
+
+        def family(name: str, kind: str, help_text: str) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        routes = [route for route in self.routes.values() if route.count] + (
+            [self.unmatched] if self.unmatched.count else [])
+
+        family("tictactoe_http_requests_total", "counter", "HTTP requests by route and status class.")
+        for route in routes:
+            for status_class, count in zip(_STATUS_CLASSES, route.statuses):
+                if count:
+                    lines.append(f'tictactoe_http_requests_total{{method="{route.method}",'
+                                 f'route="{route.path}",status="{status_class}"}} {count}')
+
+        family("tictactoe_http_request_duration_seconds", "histogram",
+               "Time until the response starts, by route.")
+        for route in routes:
+            labels = f'method="{route.method}",route="{route.path}"'
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, route.buckets):
+                cumulative += count
+                lines.append(f'tictactoe_http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            cumulative += route.buckets[-1]
+            lines.append(f'tictactoe_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {cumulative}')
+            lines.append(f'tictactoe_http_request_duration_seconds_sum{{{labels}}} {route.total_seconds:.6f}')
+            lines.append(f'tictactoe_http_request_duration_seconds_count{{{labels}}} {cumulative}')
+
+        finished = store_stats.get("finished_games", 0)
+        family("tictactoe_games", "gauge", "Games held in the store by state.")
+        lines.append(f'tictactoe_games{{state="active"}} {store_stats["games"] - finished}')
+        lines.append(f'tictactoe_games{{state="finished"}} {finished}')
+        if store_stats.get("max_games") is not None:
+            family("tictactoe_store_max_games", "gauge", "Capacity of the game store.")
+            lines.append(f"tictactoe_store_max_games {store_stats['max_games']}")
+        family("tictactoe_store_evictions_total", "counter", "Games evicted from the store by cause.")
+        for cause, count in store_stats.get("evictions", {}).items():
+            lines.append(f'tictactoe_store_evictions_total{{cause="{cause}"}} {count}')
+
+        family("tictactoe_games_created_total", "counter", "Games created.")
+        lines.append(f"tictactoe_games_created_total {self.games_created_total}")
+        family("tictactoe_moves_total", "counter", "Moves applied to games.")
+        lines.append(f"tictactoe_moves_total {self.moves_total}")
+        family("tictactoe_moves_per_second", "gauge",
+               f"Moves applied per second over the last {MOVE_RATE_WINDOW} seconds.")
+        lines.append(f"tictactoe_moves_per_second {self.move_rate.rate():.3f}")
+
+        rss = resident_memory_bytes()
+        if rss is not None:
+            family("process_resident_memory_bytes", "gauge", "Resident memory size in bytes.")
+            lines.append(f"process_resident_memory_bytes {rss}")
+        family("process_start_time_seconds", "gauge", "Start time of the process since the Unix epoch.")
+        lines.append(f"process_start_time_seconds {self.started:.3f}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware timing every HTTP request into its route's counters.
+
+    The route is read from the scope once routing has matched it, so the
+    labels are route templates ("/games/{game_id}") and never raw paths.
+    """
+
+    def __init__(self, app: Callable, metrics: Metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        metrics = self.metrics
+
+        async def timed_send(message):
+            if message["type"] == "http.response.start":
+                route = scope.get("route")
+                counters = metrics.routes.get(id(route))
+                if counters is None:
+                    counters = metrics.counters_for(route)
+                counters.observe(time.perf_counter() - start, message["status"])
+            await send(message)
+
+        await self.app(scope, receive, timed_send)
@@ -0,0 +1,347 @@
+"""
+On-demand request profiling.
+
+Two tools for finding where request time goes, both off by default:
+
+- Server-Timing: each response carries a ``Server-Timing`` header breaking
+  its time down by phase. Turning it on wraps a few functions (FastAPI's
+  endpoint runner and response serializer, Starlette's JSON rendering and
+  the app's own response builders); turning it off puts the originals back,
+  so a disabled server runs exactly the code it would without this module.
+- Profile sessions: cProfile, or a sampling profiler reading the event loop
+  thread's stack every few milliseconds, runs for the next N requests or T
+  seconds, whichever comes first, and the aggregated profile is returned.
+
+Phases report exclusive time: a builder called inside the endpoint counts
+toward "build", not also toward "handler".
+
+- validate: routing, reading the body and validating parameters
+- handler: the endpoint's own work (engine, store, events)
+- build: turning games into response dicts and models
+- serialize: FastAPI's response_model validation and encoding
+- encode: JSON or msgpack encoding of the body
+- total: until the response starts
+"""
+
+import asyncio
+import cProfile
+import inspect
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from functools import wraps
+from types import ModuleType
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import fastapi.routing
+from starlette.responses import JSONResponse
+
+# Longest a profile session may run, in seconds
+MAX_PROFILE_SECONDS = 60.0
+
+# Seconds between stack samples in sampling mode
+DEFAULT_SAMPLE_INTERVAL = 0.002
+
+# Deepest stack recorded per sample
+_MAX_STACK_DEPTH = 64
+
+_PHASE_ORDER = ("validate", "handler", "build", "serialize", "encode")
+
+
+class RequestTiming:
+    """Phase durations of one request, accumulated as exclusive time."""
+
+    __slots__ = ('start', 'phases', 'inner')
+
+    def __init__(self, start: float):
+        self.start = start
+        self.phases: Dict[str, float] = {}
+        # Time spent in measured calls nested inside the one running now
+        self.inner = 0.0
+
+    def header(self, end: float) -> str:
+        """Format the phases as a Server-Timing header value, in milliseconds."""
+        entries = [f"{name};dur={self.phases[name] * 1000:.3f}"
+                   for name in _PHASE_ORDER if name in self.phases]
+        entries.append(f"total;dur={(end - self.start) * 1000:.3f}")
+        return ", ".join(entries)
+
+
+_current: ContextVar[Optional[RequestTiming]] = ContextVar("request_timing", default=None)
+
+
+def _record(timing: RequestTiming, phase: str, elapsed: float, outer: float) -> None:
+    """Add a finished call's exclusive time to its phase and its full time to the caller's nested time."""
+    timing.phases[phase] = timing.phases.get(phase, 0.0) + elapsed - timing.inner
+    timing.inner = outer + elapsed
+
+
+def _timed(phase: str, function: Callable) -> Callable:
+    """Wrap a function (or coroutine function) so calls made during a timed request add to a phase."""
+    if inspect.iscoroutinefunction(function):
+        @wraps(function)
+        async def timed_coroutine(*args, **kwargs):
+            timing = _current.get()
+            if timing is None:
+                return await function(*args, **kwargs)
+            outer = timing.inner
+            timing.inner = 0.0
+            start = time.perf_counter()
+            try:
+                return await function(*args, **kwargs)
+            finally:
+                _record(timing, phase, time.perf_counter() - start, outer)
+        return timed_coroutine
+
+    @wraps(function)
+    def timed(*args, **kwargs):
+        timing = _current.get()
+        if timing is None:
+            return function(*args, **kwargs)
+        outer = timing.inner
+        timing.inner = 0.0
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            _record(timing, phase, time.perf_counter() - start, outer)
+    return timed
+
+
+def _timed_endpoint(function: Callable) -> Callable:
+    """Wrap FastAPI's endpoint runner, also recording everything before it as validation."""
+    @wraps(function)
+    async def timed(*args, **kwargs):
+        timing = _current.get()
+        if timing is None:
+            return await function(*args, **kwargs)
+        start = time.perf_counter()
+        timing.phases["validate"] = start - timing.start
+        timing.inner = 0.0
+        try:
+            return await function(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            timing.phases["handler"] = timing.phases.get("handler", 0.0) + elapsed - timing.inner
+            timing.inner = 0.0
+    return timed
+
+
+class ServerTiming:
+    """Switch for Server-Timing headers and the instrumentation behind them."""
+
+    def __init__(self):
+        self.enabled = False
+        # (owner, attribute, phase) of every function timed while enabled
+        self._targets: List[Tuple[Any, str, str]] = [
+            (fastapi.routing, "serialize_response", "serialize"),
+            (JSONResponse, "render", "encode"),
+        ]
+        self._originals: Dict[Tuple[int, str], Any] = {}
+
+    def instrument(self, module: ModuleType, phases: Dict[str, str]) -> None:
+        """Time a module's functions (looked up by name at call time) while enabled."""
+        for name, phase in phases.items():
+            self._targets.append((module, name, phase))
+        if self.enabled:
+            self.disable()
+            self.enable()
+
+    def enable(self) -> None:
+        if self.enabled:
+            return
+        original = fastapi.routing.run_endpoint_function
+        self._originals[(id(fastapi.routing), "run_endpoint_function")] = original
+        fastapi.routing.run_endpoint_function = _timed_endpoint(original)
+        for owner, name, phase in self._targets:
+            original = owner.__dict__[name] if isinstance(owner, type) else getattr(owner, name)
+            self._originals[(id(owner), name)] = original
+            setattr(owner, name, _timed(phase, original))
+        self.enabled = True
+
+    def disable(self) -> None:
+        if not self.enabled:
+            return
+        setattr(fastapi.routing, "run_endpoint_function",
+                self._originals.pop((id(fastapi.routing), "run_endpoint_function")))
+        for owner, name, _ in self._targets:
+            setattr(owner, name, self._originals.pop((id(owner), name)))
+        self.enabled = False
+
+
+class ProfileSession:
+    """One profiling run over the next N requests or T seconds."""
+
+    def __init__(self, mode: str, max_requests: Optional[int], max_seconds: float,
+                 interval: float = DEFAULT_SAMPLE_INTERVAL):
+        if mode not in ("cprofile", "sampling"):
+            raise ValueError(f"Unknown profiling mode {mode!r}; choose cprofile or sampling")
+        self.mode = mode
+        self.max_requests = max_requests
+        self.max_seconds = max_seconds
+        self.interval = interval
+        self.requests = 0
+        self.samples: Counter = Counter()
+        self._profile: Optional[cProfile.Profile] = None
+        self._sampler: Optional[threading.Thread] = None
+        self._stop_sampling = threading.Event()
+        self._done = asyncio.Event()
+        self._started = 0.0
+        self.elapsed = 0.0
+
+    def start(self) -> None:
+        """Start profiling; call from the event loop thread."""
+        self._started = time.perf_counter()
+        if self.mode == "cprofile":
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        else:
+            self._sampler = threading.Thread(target=self._sample, args=(threading.get_ident(),),
+                                             name="profile-sampler", daemon=True)
+            self._sampler.start()
+
+    def request_finished(self) -> None:
+        """Count a request that started during the session, ending it after the last one."""
+        if self._done.is_set():
+            return
+        self.requests += 1
+        if self.max_requests is not None and self.requests >= self.max_requests:
+            self.stop()
+
+    async def wait(self) -> None:
+        """Wait until enough requests have finished or the time limit has passed, then stop."""
+        try:
+            await asyncio.wait_for(self._done.wait(), self.max_seconds)
+        except asyncio.TimeoutError:
+            pass
+        self.stop()
+
+    def stop(self) -> None:
+        """Stop profiling (once); call from the event loop thread."""
+        if self._done.is_set():
+            return
+        self._done.set()
+        if self._profile is not None:
+            self._profile.disable()
+        if self._sampler is not None:
+            self._stop_sampling.set()
+            self._sampler.join()
+        self.elapsed = time.perf_counter() - self._started
+
+    def _sample(self, thread_id: int) -> None:
+        """Count the stacks the event loop thread is in, until stopped."""
+        while not self._stop_sampling.wait(self.interval):
+            frame = sys._current_frames().get(thread_id)
+            stack = []
+            while frame is not None and len(stack) < _MAX_STACK_DEPTH:
+                code = frame.f_code
+                stack.append(f"{code.co_filename.rsplit('/', 1)[-1]}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def result(self, limit: int = 30) -> Dict[str, Any]:
+        """Summarize the profile: the top functions (cProfile) or stacks (sampling)."""
+        summary: Dict[str, Any] = {
+            "mode": self.mode,
+            "requests": self.requests,
+            "seconds": round(self.elapsed, 3),
+        }
+        if self._profile is not None:
+            stats = pstats.Stats(self._profile).stats
+            rows = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+            summary["functions"] = [
+                {
+                    "function": f"{filename.rsplit('/', 1)[-1]}:{line}({name})",
+                    "calls": calls,
+                    "own_seconds": round(own, 6),
+                    "cumulative_seconds": round(cumulative, 6),
+                }
+                for (filename, line, name), (_, calls, own, cumulative, _) in rows
+            ]
+        else:
+            total = sum(self.samples.values())
+            leaves: Counter = Counter()
+            for stack, count in self.samples.items():
+                leaves[stack.rsplit(";", 1)[-1]] += count
+            summary["samples"] = total
+            summary["functions"] = [{"function": name, "samples": count}
+                                    for name, count in leaves.most_common(limit)]
+            # Folded stacks ("a;b;c count"), the input format of flame graph tools
+            summary["stacks"] = [f"{stack} {count}" for stack, count in self.samples.most_common(limit)]
+        return summary
+
+
+class Profiler:
+    """The server's Server-Timing switch and its single active profile session."""
+
+    def __init__(self):
+        self.server_timing = ServerTiming()
+        self.session: Optional[ProfileSession] = None
+
+    async def profile(self, mode: str, max_requests: Optional[int], max_seconds: float,
+                      limit: int = 30, interval: float = DEFAULT_SAMPLE_INTERVAL) -> Dict[str, Any]:
+        """
+        Profile the requests that start from now on and return the profile.
+
+        Raises:
+            ValueError: If the mode is unknown
+            RuntimeError: If another session is already running
+        """
+        if self.session is not None:
+            raise RuntimeError("A profile session is already running")
+        session = ProfileSession(mode, max_requests, min(max_seconds, MAX_PROFILE_SECONDS), interval)
+        self.session = session
+        session.start()
+        try:
+            await session.wait()
+        finally:
+            self.session = None
+        return session.result(limit)
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware adding Server-Timing headers and counting profiled requests.
+
+    When neither tool is on it only checks two attributes per request.
+    """
+
+    def __init__(self, app: Callable, profiler: Profiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        profiler = self.profiler
+        session = profiler.session
+        if scope["type"] != "http" or (session is None and not profiler.server_timing.enabled):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            if profiler.server_timing.enabled:
+                await self._timed(scope, receive, send)
+            else:
+                await self.app(scope, receive, send)
+        finally:
+            if session is not None:
+                session.request_finished()
+
+    async def _timed(self, scope, receive, send) -> None:
+        """Serve a request, adding its phase breakdown as a Server-Timing header."""
+        timing = RequestTiming(time.perf_counter())
+        token = _current.set(timing)
+
+        async def timed_send(message):
+            if message["type"] == "http.response.start":
+                value = timing.header(time.perf_counter()).encode("latin-1")
+                message["headers"] = list(message.get("headers", [])) + [(b"server-timing", value)]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, timed_send)
+        finally:
+            _current.reset(token)
@@ -0,0 +1,760 @@
+"""
+Games sharded across worker processes, and forwarding to the owning worker.
+
+In production mode (see cluster.py) several workers accept connections on
+the same port, and each keeps only its own share of the games in memory.
+Ownership is decided by consistent hashing: every worker has VIRTUAL_NODES
+points on a 64-bit hash ring, and a game belongs to the worker whose point
+follows the hash of the game id's first 64 bits. A worker only hands out new
+ids that hash to itself (see GameStore.id_filter), so games are created on
+whichever worker received the request and never move afterwards.
+
+A request that arrives at a worker which does not own its game is forwarded
+to the owner and the response relayed back, streamed as it arrives (events,
+NDJSON). Every worker forwards for itself; there is no central router to
+become the bottleneck, and no state is shared between processes, so nothing
+is locked.
+
+HTTP requests are not sent as HTTP: each worker's app also listens on a relay
+socket, and forwarders keep persistent connections to it that carry ASGI
+messages, so neither side builds or parses HTTP. A forwarded request is one
+frame (the scope and the whole body), answered by the owner app's
+http.response.start and http.response.body messages as they are sent and a
+final None once the app returns, after which the connection carries the next
+request. A forwarder whose client leaves closes the connection, which the
+owner's app sees as the client disconnecting. Frames are a 4-byte length and
+a marshalled message; the sockets live in the cluster's private directory,
+so only its workers can connect. WebSockets go frame by frame over the
+owner's uvicorn unix socket.
+
+- /games/{game_id}/...: the game's owner
+- POST /games, POST /games:batch: the worker that received the request
+- POST /moves:batch: split by owner, sent to the owners at once, and the
+  results put back in request order
+- GET /games: each worker's games in turn; cursors name the worker
+- /lobby, /lobby/events, /admin/lobby: worker 0, so all players meet
+- GET /metrics: every worker's metrics, merged and labelled worker="N"
+- Anything else (health, admin, metrics): the receiving worker, or the one
+  named by an X-Worker header
+
+Forwarded requests carry the original client's address, which the owner
+uses for rate limits and logs: in the relayed scope, or for WebSockets in a
+header that is only believed on the unix socket.
+"""
+
+import asyncio
+import json
+import logging
+import marshal
+import os
+import struct
+from bisect import bisect_right
+from hashlib import blake2b
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+from websockets.asyncio.client import unix_connect
+from websockets.exceptions import ConnectionClosed, WebSocketException
+
+from game import ID_PREFIX_LENGTH
+
+logger = logging.getLogger(__name__)
+
+# Points each worker gets on the hash ring; more points spread games more evenly
+VIRTUAL_NODES = 256
+
+# The worker holding the matchmaking lobby (and so the games it starts)
+LOBBY_WORKER = 0
+
+# Moves accepted by POST /moves:batch (as in main.py); larger batches are
+# passed through to be refused there
+MAX_BATCH_MOVES = 1000
+
+# Idle connections kept open to each other worker
+MAX_IDLE_CONNECTIONS = 256
+
+# Seconds requests being answered for other workers get to finish on shutdown
+CLOSE_TIMEOUT = 5.0
+
+# Request header carrying a forwarded WebSocket's client address
+FORWARDED_HEADER = b"x-shard-forwarded-for"
+
+# Request header naming the worker to answer (e.g. for its /metrics)
+WORKER_HEADER = b"x-worker"
+
+# Connection-level headers, which are not passed through in either direction
+_HOP_BY_HOP = frozenset((b"connection", b"keep-alive", b"proxy-authenticate", b"proxy-authorization",
+                         b"te", b"trailer", b"transfer-encoding", b"upgrade", b"content-length"))
+
+_LOBBY_PATHS = ("/lobby", "/lobby/events", "/admin/lobby")
+
+# Length prefix of every relay frame
+_FRAME_HEADER = struct.Struct(">I")
+
+# Scope keys sent with a relayed request; the owner adds its own state
+_SCOPE_KEYS = ("type", "asgi", "http_version", "method", "scheme", "path", "raw_path", "query_string",
+               "root_path", "headers", "client", "server")
+
+
+def _hash64(text: str) -> int:
+    return int.from_bytes(blake2b(text.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Consistent hashing of game ids onto workers."""
+
+    def __init__(self, workers: int, virtual_nodes: int = VIRTUAL_NODES):
+        if workers < 1:
+            raise ValueError(f"A hash ring needs at least one worker, not {workers}")
+        self.workers = workers
+        points = sorted((_hash64(f"worker-{worker}#{node}"), worker)
+                        for worker in range(workers) for node in range(virtual_nodes))
+        self._points = [point for point, _ in points]
+        self._owners = [worker for _, worker in points]
+
+    def owner(self, game_id: str) -> int:
+        """The worker owning a game id (any string is placed; unknown ids are answered 404 by their owner)."""
+        index = bisect_right(self._points, _hash64(game_id[:ID_PREFIX_LENGTH]))
+        return self._owners[index if index < len(self._owners) else 0]
+
+
+def _error(status_code: int, message: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Response messages shaped like the app's HTTPException responses."""
+    body = json.dumps({"error": "HTTPException", "message": message, "status_code": status_code}).encode()
+    start = {"type": "http.response.start", "status": status_code,
+             "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]}
+    return start, {"type": "http.response.body", "body": body}
+
+
+def _frame(message: Any) -> bytes:
+    data = marshal.dumps(message)
+    return _FRAME_HEADER.pack(len(data)) + data
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> Any:
+    """Read one relay frame; raises IncompleteReadError if the connection closes first."""
+    size, = _FRAME_HEADER.unpack(await reader.readexactly(_FRAME_HEADER.size))
+    return marshal.loads(await reader.readexactly(size))
+
+
+class _Response:
+    """A response arriving on a relay connection, read like a streamed httpx response."""
+
+    def __init__(self, shard: "Shard", worker: int, reader: asyncio.StreamReader,
+                 writer: asyncio.StreamWriter, start: Dict[str, Any]):
+        self.status_code = start["status"]
+        self.raw_headers = [(name.lower(), value) for name, value in start.get("headers", ())]
+        self.headers = {name.decode("latin-1"): value.decode("latin-1") for name, value in self.raw_headers}
+        self._shard = shard
+        self._worker = worker
+        self._reader = reader
+        self._writer: Optional[asyncio.StreamWriter] = writer
+        self._complete = False
+
+    async def aiter_raw(self) -> AsyncIterator[bytes]:
+        """Yield the body as the owner's app sends it."""
+        while not self._complete:
+            message = await _read_frame(self._reader)
+            if message is None:
+                raise ConnectionError(f"Worker {self._worker} ended a response before its body")
+            if message["type"] == "http.response.body":
+                self._complete = not message.get("more_body", False)
+                if message.get("body"):
+                    yield message["body"]
+
+    async def aread(self) -> bytes:
+        return b"".join([chunk async for chunk in self.aiter_raw()])
+
+    async def aclose(self) -> None:
+        """Give the connection back for the next request, or close it if the response was cut short."""
+        writer, self._writer = self._writer, None
+        if writer is None:
+            return
+        if self._complete:
+            try:
+                if await _read_frame(self._reader) is None:
+                    self._shard._release(self._worker, self._reader, writer)
+                    return
+            except (OSError, asyncio.IncompleteReadError):
+                pass
+        writer.close()
+
+
+async def _read_body(receive: Callable) -> Optional[bytes]:
+    """Read a request body, or None if the client went away first."""
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return None
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            return b"".join(chunks)
+
+
+async def _until_disconnect(work: "asyncio.Future", receive: Callable) -> None:
+    """Run work until it finishes or the client disconnects, cancelling it in that case."""
+
+    async def disconnected():
+        while (await receive())["type"] != "http.disconnect":
+            pass
+
+    work = asyncio.ensure_future(work)
+    watcher = asyncio.ensure_future(disconnected())
+    done, pending = await asyncio.wait({work, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    for task in pending:
+        task.cancel()
+    if work in done:
+        work.result()
+
+
+class Shard:
+    """One worker's share of the games, and its connections to the other workers."""
+
+    def __init__(self, index: int, workers: int, socket_dir: str, ring: Optional[HashRing] = None):
+        if not 0 <= index < workers:
+            raise ValueError(f"Worker {index} is not one of {workers} workers")
+        self.index = index
+        self.workers = workers
+        self.socket_dir = socket_dir
+        self.ring = ring or HashRing(workers)
+        # The app answering requests forwarded to this worker (set by ShardMiddleware)
+        self.app: Optional[Callable] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._serving: Set[asyncio.Task] = set()
+        self._answering: Set[asyncio.Task] = set()
+        self._idle: Dict[int, List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]]] = {}
+        self._closed = False
+        self.forwarded = 0
+
+    def socket_path(self, worker: int) -> str:
+        """Unix socket on which a worker's uvicorn accepts forwarded WebSockets."""
+        return os.path.join(self.socket_dir, f"worker-{worker}.sock")
+
+    def relay_path(self, worker: int) -> str:
+        """Unix socket on which a worker's app accepts forwarded HTTP requests."""
+        return os.path.join(self.socket_dir, f"relay-{worker}.sock")
+
+    def owns(self, id_prefix: str) -> bool:
+        """Whether this worker owns game ids starting with id_prefix (see GameStore.id_filter)."""
+        return self.ring.owner(id_prefix) == self.index
+
+    def target(self, scope: Dict[str, Any]) -> int:
+        """The worker that should answer a request."""
+        path = scope["path"]
+        if path.startswith("/games/"):
+            return self.ring.owner(path[7:].split("/", 1)[0])
+        if path in _LOBBY_PATHS:
+            return LOBBY_WORKER
+        for name, value in scope["headers"]:
+            if name == WORKER_HEADER:
+                try:
+                    worker = int(value)
+                except ValueError:
+                    break
+                if 0 <= worker < self.workers:
+                    return worker
+        return self.index
+
+    async def start(self) -> None:
+        """Start answering requests the other workers forward to this one."""
+        self._server = await asyncio.start_unix_server(self._serve, path=self.relay_path(self.index))
+
+    async def close(self) -> None:
+        """Stop answering forwarded requests and close the connections to the other workers."""
+        self._closed = True
+        if self._server is not None:
+            self._server.close()
+        if self._answering:
+            await asyncio.wait(self._answering, timeout=CLOSE_TIMEOUT)
+        for task in list(self._serving):
+            task.cancel()
+        idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for _, writer in connections:
+                writer.close()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Answer the requests forwarded on one relay connection, one after another."""
+        task = asyncio.current_task()
+        self._serving.add(task)
+        following = asyncio.ensure_future(_read_frame(reader))
+        try:
+            while True:
+                await asyncio.wait({following})
+                if following.exception() is not None:
+                    return
+                scope, body = following.result()
+                following = asyncio.ensure_future(_read_frame(reader))
+                answer = asyncio.ensure_future(self._answer(scope, body, following, writer))
+                self._answering.add(answer)
+                answer.add_done_callback(self._answering.discard)
+                if not await answer:
+                    return
+        except (OSError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            following.cancel()
+            self._serving.discard(task)
+            writer.close()
+
+    async def _answer(self, scope: Dict[str, Any], body: bytes, following: "asyncio.Future",
+                      writer: asyncio.StreamWriter) -> bool:
+        """Run the app on one relayed request; False if the connection cannot carry another."""
+        requested = False
+        started = False
+        # The start is held back and written with the first body message
+        pending = b""
+
+        async def receive():
+            nonlocal requested
+            if not requested:
+                requested = True
+                return {"type": "http.request", "body": body}
+            # Nothing more is sent for this request: the next read ends when the client leaves
+            await asyncio.wait({following})
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            nonlocal pending, started
+            if following.done():
+                return
+            if message["type"] == "http.response.start":
+                started = True
+                pending = _frame(message)
+                return
+            writer.write(pending + _frame(message))
+            pending = b""
+            await writer.drain()
+
+        try:
+            await self.app(dict(scope, state={}), receive, send)
+        except Exception:
+            logger.exception("Error answering a request forwarded to worker %d", self.index)
+            if started or following.done():
+                return False
+            start, end = _error(500, "Internal Server Error")
+            pending = _frame(start) + _frame(end)
+        if following.done():
+            return False
+        if not started and not pending:
+            start, end = _error(500, "The app sent no response")
+            pending = _frame(start) + _frame(end)
+        writer.write(pending + _frame(None))
+        await writer.drain()
+        return True
+
+    async def _connect(self, worker: int) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        idle = self._idle.get(worker)
+        while idle:
+            reader, writer = idle.pop()
+            # The owner closes connections when it stops (or dies), which shows here as end of file
+            if not reader.at_eof() and not writer.is_closing():
+                return reader, writer
+            writer.close()
+        return await asyncio.open_unix_connection(self.relay_path(worker))
+
+    def _release(self, worker: int, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        idle = self._idle.setdefault(worker, [])
+        if self._closed or len(idle) >= MAX_IDLE_CONNECTIONS:
+            writer.close()
+        else:
+            idle.append((reader, writer))
+
+    async def _send(self, worker: int, scope: Dict[str, Any], body: bytes,
+                    query: Optional[str] = None) -> Optional[_Response]:
+        """Relay a copy of a request to a worker, or None if the worker cannot be reached."""
+        relayed = {key: scope[key] for key in _SCOPE_KEYS if key in scope}
+        headers = [(name, value) for name, value in scope["headers"] if name not in _HOP_BY_HOP]
+        if body:
+            headers.append((b"content-length", str(len(body)).encode()))
+        relayed["headers"] = headers
+        if query is not None:
+            relayed["query_string"] = query.encode("latin-1")
+        try:
+            reader, writer = await self._connect(worker)
+        except OSError:
+            return None
+        try:
+            writer.write(_frame((relayed, body)))
+            start = await _read_frame(reader)
+        except (OSError, asyncio.IncompleteReadError):
+            writer.close()
+            return None
+        except BaseException:
+            # Cancelled (the client left): closing tells the owner's app
+            writer.close()
+            raise
+        return _Response(self, worker, reader, writer, start)
+
+    async def _relay(self, response: _Response, send: Callable, receive: Callable,
+                     headers: Optional[List[Tuple[bytes, bytes]]] = None) -> None:
+        """Send a worker's response on to the client, streaming it if it has no length."""
+        try:
+            start_headers = response.raw_headers
+            if headers is not None:
+                start_headers = [(name, value) for name, value in start_headers
+                                 if name not in {header for header, _ in headers}] + headers
+            await send({"type": "http.response.start", "status": response.status_code, "headers": start_headers})
+            if "content-length" in response.headers:
+                await send({"type": "http.response.body", "body": await response.aread()})
+                return
+
+            async def stream():
+                async for chunk in response.aiter_raw():
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                await send({"type": "http.response.body", "body": b""})
+
+            await _until_disconnect(stream(), receive)
+        finally:
+            await response.aclose()
+
+    async def forward(self, worker: int, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        """Answer an HTTP request with another worker's response."""
+        body = await _read_body(receive)
+        if body is None:
+            return
+        self.forwarded += 1
+
+        async def exchange():
+            await self._relay_or_502(worker, await self._send(worker, scope, body), send, receive)
+
+        if scope["path"] in _LOBBY_PATHS:
+            # Lobby joins wait for an opponent; a client leaving must give up its place
+            await _until_disconnect(exchange(), receive)
+        else:
+            await exchange()
+
+    async def forward_websocket(self, worker: int, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        """Connect a WebSocket to another worker and pass frames both ways."""
+        client = scope.get("client")
+        query = scope["query_string"].decode("latin-1")
+        url = "ws://worker" + scope["path"] + ("?" + query if query else "")
+        if (await receive())["type"] != "websocket.connect":
+            return
+        try:
+            upstream = await unix_connect(self.socket_path(worker), url, additional_headers=[
+                (FORWARDED_HEADER.decode(), client[0] if client else "unknown")])
+        except (OSError, WebSocketException):
+            await send({"type": "websocket.close", "code": 1011})
+            return
+        self.forwarded += 1
+        await send({"type": "websocket.accept"})
+
+        async def downstream():
+            try:
+                async for message in upstream:
+                    key = "text" if isinstance(message, str) else "bytes"
+                    await send({"type": "websocket.send", key: message})
+            except ConnectionClosed:
+                pass
+            await send({"type": "websocket.close", "code": upstream.close_code or 1000,
+                        "reason": upstream.close_reason or ""})
+
+        async def upstream_pump():
+            while True:
+                message = await receive()
+                if message["type"] == "websocket.disconnect":
+                    return
+                if message.get("text") is not None:
+                    await upstream.send(message["text"])
+                elif message.get("bytes") is not None:
+                    await upstream.send(message["bytes"])
+
+        tasks = {asyncio.ensure_future(downstream()), asyncio.ensure_future(upstream_pump())}
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await upstream.close()
+
+    async def batch_moves(self, scope: Dict[str, Any], receive: Callable, send: Callable, app: Callable) -> None:
+        """Split a batch of moves by owner, apply the parts at once, and merge the results in order."""
+        body = await _read_body(receive)
+        if body is None:
+            return
+        try:
+            moves = json.loads(body)["moves"]
+            groups: Dict[int, List[int]] = {}
+            for position, move in enumerate(moves):
+                groups.setdefault(self.ring.owner(move["game_id"]), []).append(position)
+            valid = 0 < len(moves) <= MAX_BATCH_MOVES
+        except (ValueError, KeyError, TypeError, AttributeError):
+            valid = False
+        if not valid or len(groups) == 1:
+            # One owner (or a batch main.py will refuse): pass it on whole
+            worker = next(iter(groups)) if valid else self.index
+            if worker == self.index:
+                await app(scope, _replay(body), send)
+            else:
+                response = await self._send(worker, scope, body)
+                await self._relay_or_502(worker, response, send, receive)
+            return
+        self.forwarded += 1
+
+        async def apply(worker: int, positions: List[int]) -> Tuple[int, Optional[_Response], bytes]:
+            part = json.dumps({"moves": [moves[position] for position in positions]}).encode()
+            response = await self._send(worker, scope, part)
+            if response is None:
+                return worker, None, b""
+            try:
+                return worker, response, await response.aread()
+            finally:
+                await response.aclose()
+
+        parts = await asyncio.gather(*(apply(worker, positions) for worker, positions in groups.items()))
+        results: List[Any] = [None] * len(moves)
+        for worker, response, content in parts:
+            if response is None or response.status_code != 200:
+                # A part was refused as a whole (e.g. validation): answer as a single worker would
+                if response is None:
+                    start, end = _error(502, f"Worker {worker} is unavailable")
+                else:
+                    start = {"type": "http.response.start", "status": response.status_code,
+                             "headers": [(b"content-type", response.headers.get("content-type", "").encode()),
+                                         (b"content-length", str(len(content)).encode())]}
+                    end = {"type": "http.response.body", "body": content}
+                await send(start)
+                await send(end)
+                return
+            for position, result in zip(groups[worker], json.loads(content)["results"]):
+                results[position] = result
+        merged = json.dumps({"results": results}).encode()
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"application/json"),
+                                (b"content-length", str(len(merged)).encode())]})
+        await send({"type": "http.response.body", "body": merged})
+
+    async def _relay_or_502(self, worker: int, response: Optional[_Response], send: Callable,
+                            receive: Callable, headers: Optional[List[Tuple[bytes, bytes]]] = None) -> None:
+        if response is None:
+            start, end = _error(502, f"Worker {worker} is unavailable")
+            await send(start)
+            await send(end)
+        else:
+            await self._relay(response, send, receive, headers)
+
+    async def list_games(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        """
+        List games worker by worker, with cursors of the form "worker.cursor".
+
+        Pages never mix workers, so one may hold fewer games than asked for;
+        workers with no games left are skipped. NDJSON streams go through
+        every worker in turn.
+        """
+        if await _read_body(receive) is None:
+            return
+        query = parse_qsl(scope["query_string"].decode("latin-1"), keep_blank_values=True)
+        params = dict(query)
+        worker, inner = 0, None
+        if params.get("cursor"):
+            worker_text, separator, inner = params["cursor"].partition(".")
+            if not separator or not worker_text.isdigit() or int(worker_text) >= self.workers:
+                start, end = _error(400, f"Invalid cursor: {params['cursor']}")
+                await send(start)
+                await send(end)
+                return
+            worker, inner = int(worker_text), inner or None
+
+        def shard_query(cursor: Optional[str], limit: Optional[str]) -> str:
+            rest = [(name, value) for name, value in query if name not in ("cursor", "limit")]
+            return urlencode(rest + ([("cursor", cursor)] if cursor else []) + ([("limit", limit)] if limit else []))
+
+        accept = dict(scope["headers"]).get(b"accept", b"")
+        if b"application/x-ndjson" in accept:
+            await _until_disconnect(self._stream_games(scope, send, worker, inner, params.get("limit"),
+                                                        shard_query), receive)
+            return
+
+        while True:
+            response = await self._send(worker, scope, b"", shard_query(inner, params.get("limit")))
+            if response is None:
+                await self._relay_or_502(worker, None, send, receive)
+                return
+            next_inner = response.headers.get("x-next-cursor")
+            if next_inner is not None:
+                next_cursor = f"{worker}.{next_inner}"
+            elif worker + 1 < self.workers:
+                next_cursor = f"{worker + 1}."
+            else:
+                next_cursor = None
+            if response.headers.get("x-result-count") == "0" and next_inner is None and next_cursor is not None:
+                # This worker has nothing (more) to list: go on to the next one
+                await response.aclose()
+                worker, inner = worker + 1, None
+                continue
+            headers = []
+            if next_cursor is not None:
+                host = dict(scope["headers"]).get(b"host", b"localhost").decode("latin-1")
+                next_query = urlencode([(name, value) for name, value in query if name != "cursor"]
+                                       + [("cursor", next_cursor)])
+                scheme = scope.get("scheme", "http")
+                headers = [(b"link", f'<{scheme}://{host}{scope["path"]}?{next_query}>; rel="next"'.encode()),
+                           (b"x-next-cursor", next_cursor.encode())]
+            await self._relay(response, send, receive, headers)
+            return
+
+    async def metrics(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        """Answer a metrics scrape with every worker's metrics."""
+        if await _read_body(receive) is None:
+            return
+
+        async def scrape(worker: int) -> Optional[str]:
+            response = await self._send(worker, scope, b"")
+            if response is None:
+                return None
+            try:
+                return (await response.aread()).decode() if response.status_code == 200 else None
+            finally:
+                await response.aclose()
+
+        texts = await asyncio.gather(*(scrape(worker) for worker in range(self.workers)))
+        if any(text is None for text in texts):
+            missing = ", ".join(str(worker) for worker, text in enumerate(texts) if text is None)
+            start, end = _error(502, f"Metrics of worker {missing} are unavailable")
+        else:
+            body = merge_metrics(texts).encode()
+            start = {"type": "http.response.start", "status": 200,
+                     "headers": [(b"content-type", b"text/plain; version=0.0.4; charset=utf-8"),
+                                 (b"content-length", str(len(body)).encode())]}
+            end = {"type": "http.response.body", "body": body}
+        await send(start)
+        await send(end)
+
+    async def _stream_games(self, scope: Dict[str, Any], send: Callable, worker: int, inner: Optional[str],
+                            limit: Optional[str], shard_query: Callable) -> None:
+        remaining = int(limit) if limit and limit.isdigit() else None
+        started = False
+        for current in range(worker, self.workers):
+            response = await self._send(current, scope, b"",
+                                        shard_query(inner, str(remaining) if remaining is not None else None))
+            inner = None
+            if response is None or response.status_code != 200:
+                if not started:
+                    await self._relay_or_502(current, response, send, _replay(b""))
+                    return
+                break
+            try:
+                if not started:
+                    started = True
+                    await send({"type": "http.response.start", "status": 200,
+                                "headers": [(b"content-type", b"application/x-ndjson")]})
+                async for chunk in response.aiter_raw():
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                    if remaining is not None:
+                        remaining -= chunk.count(b"\n")
+            finally:
+                await response.aclose()
+            if remaining is not None and remaining <= 0:
+                break
+        await send({"type": "http.response.body", "body": b""})
+
+
+def merge_metrics(texts: List[str]) -> str:
+    """Merge workers' Prometheus expositions into one, adding a worker label to every sample."""
+    families: Dict[str, Tuple[List[str], List[str]]] = {}
+    for worker, text in enumerate(texts):
+        samples: List[str] = []
+        for line in text.splitlines():
+            if line.startswith("# "):
+                name = line.split(" ", 3)[2]
+                meta, samples = families.setdefault(name, ([], []))
+                if len(meta) < 2 and line not in meta:
+                    meta.append(line)
+            elif line:
+                labels, separator, value = line.rpartition("} ")
+                if separator:
+                    comma = "" if labels.endswith("{") else ","
+                    samples.append(f'{labels}{comma}worker="{worker}"}} {value}')
+                else:
+                    name, _, value = line.partition(" ")
+                    samples.append(f'{name}{{worker="{worker}"}} {value}')
+    lines = []
+    for meta, samples in families.values():
+        lines.extend(meta)
+        lines.extend(samples)
+    return "\n".join(lines) + "\n"
+
+
+def _replay(body: bytes) -> Callable:
+    """A receive callable giving an already read body, then waiting as if the client stayed."""
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body}
+        await asyncio.Future()
+
+    return receive
+
+
+class ShardMiddleware:
+    """
+    ASGI middleware sending each request to the worker that owns its game.
+
+    Installed outermost, so forwarded requests skip this worker's metrics,
+    rate limits and CORS handling and get the owner's instead.
+    """
+
+    def __init__(self, app: Callable, shard: Shard):
+        self.app = app
+        self.shard = shard
+        # Requests relayed from other workers skip this middleware, like forwarded WebSockets
+        shard.app = app
+
+    async def __call__(self, scope, receive, send):
+        kind = scope["type"]
+        if kind != "http" and kind != "websocket":
+            await self.app(scope, receive, send)
+            return
+        if scope.get("client") is None:
+            # Arrived on this worker's unix socket: a WebSocket forwarded by another worker
+            for name, value in scope["headers"]:
+                if name == FORWARDED_HEADER:
+                    scope = dict(scope, client=(value.decode("latin-1"), 0))
+                    break
+            await self.app(scope, receive, send)
+            return
+        shard = self.shard
+        worker = shard.target(scope)
+        if kind == "websocket":
+            if worker == shard.index:
+                await self.app(scope, receive, send)
+            else:
+                await shard.forward_websocket(worker, scope, receive, send)
+            return
+        if worker == shard.index:
+            path, method = scope["path"], scope["method"]
+            if path == "/moves:batch" and method == "POST":
+                await shard.batch_moves(scope, receive, send, self.app)
+                return
+            if path == "/games" and method == "GET" and not _names_worker(scope):
+                await shard.list_games(scope, receive, send)
+                return
+            if path == "/metrics" and method == "GET" and not _names_worker(scope):
+                await shard.metrics(scope, receive, send)
+                return
+            await self.app(scope, receive, send)
+            return
+        await shard.forward(worker, scope, receive, send)
+
+
+def _names_worker(scope: Dict[str, Any]) -> bool:
+    return any(name == WORKER_HEADER for name, _ in scope["headers"])
+
+
+def create_shard() -> Optional[Shard]:
+    """
+    The shard of this process when it runs as one of several workers (set by cluster.py).
+
+    WORKER_INDEX: This worker's number, from 0
+    WORKER_COUNT: Number of workers; unset or 1 means a single process owning every game
+    WORKER_SOCKET_DIR: Directory of the workers' unix sockets
+    """
+    workers = int(os.getenv("WORKER_COUNT", "1"))
+    if workers <= 1:
+        return None
+    return Shard(int(os.environ["WORKER_INDEX"]), workers, os.environ["WORKER_SOCKET_DIR"])
@@ -0,0 +1,555 @@
+"""
+Snapshots of the game store in a compact binary file.
+
+A snapshot file is a directory of named sections followed by the sections'
+bytes, each 8-byte aligned and checked with a CRC-32:
+
+- header: magic, format version, number of sections and the directory's checksum
+- directory: per section its name, offset, length and checksum
+- sections: raw typed-array bytes, in the machine's byte order (recorded in
+  the "meta" section, with the store class that wrote the file)
+
+Stores turn their games into sections (GameStore.snapshot()) and back
+(GameStore.restore_snapshot()). A TableGameStore's columns are written and
+read as they are, so restoring a table is a few bulk copies out of the
+memory-mapped file (a million games in under a tenth of a second). Games
+held as objects are written column-wise too but rebuilt one by one from
+their move logs, at several microseconds per game.
+
+Files are written to a temporary name and renamed over the previous
+snapshot, so a crash mid-write leaves the last complete snapshot in place.
+Periodic snapshots are written by a forked child process: the child gets
+a copy-on-write view of the store as it was at the fork and writes it out
+while the server keeps handling requests, so a snapshot costs the server
+the fork and the pages it changes meanwhile rather than the write itself.
+"""
+
+import asyncio
+import gc
+import json
+import logging
+import mmap
+import os
+import signal
+import struct
+import sys
+import time
+import traceback
+import zlib
+from array import array
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from game import TicTacToeGame, get_geometry
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"TTTSNAP\0"
+FORMAT_VERSION = 1
+
+# Seconds between periodic snapshots unless configured otherwise
+DEFAULT_SNAPSHOT_INTERVAL = 300.0
+
+# Seconds a forked snapshot writer may take before it is killed (ten million
+# games take under a second; a child that is still running is stuck)
+FORK_TIMEOUT = 300.0
+
+# Seconds between checks on whether the forked writer has exited
+_FORK_POLL_INTERVAL = 0.01
+
+_HEADER = struct.Struct("<8sIII")
+# Section name, offset, length and CRC-32
+_ENTRY = struct.Struct("<32sQQI4x")
+_ALIGN = 8
+
+# Bits of the object games' flags section
+_O_TO_MOVE = 1
+_X_WON = 2
+_O_WON = 4
+_DRAW = 8
+_REJECTED = 16
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot file cannot be read or written."""
+
+
+def pack_strings(strings: Iterable[Optional[str]]) -> Tuple[bytes, array]:
+    """Encode strings as one UTF-8 blob and the offsets of their ends (None becomes empty)."""
+    encoded = [string.encode() if string is not None else b"" for string in strings]
+    ends = array('Q')
+    total = 0
+    for data in encoded:
+        total += len(data)
+        ends.append(total)
+    return b"".join(encoded), ends
+
+
+def unpack_strings(blob: Any, ends: Any) -> List[str]:
+    """Decode strings packed by pack_strings()."""
+    data = bytes(blob)
+    offsets = array('Q')
+    offsets.frombytes(ends)
+    strings = []
+    start = 0
+    for end in offsets:
+        strings.append(data[start:end].decode())
+        start = end
+    return strings
+
+
+def encode_games(games: Iterable[Tuple[TicTacToeGame, float, Optional[float]]],
+                 prefix: str = "games") -> Dict[str, Any]:
+    """
+    Encode game objects column-wise into snapshot sections.
+
+    Args:
+        games: (game, seconds since last used, seconds since it finished or None) tuples
+        prefix: Section name prefix
+
+    Returns:
+        Section name -> bytes-like object
+    """
+    names: Dict[str, int] = {}
+    shapes: Dict[Tuple[int, int, int], int] = {}
+    ids: List[str] = []
+    players = array('I')
+    shape_indices = array('H')
+    flags = array('B')
+    versions = array('I')
+    plies = array('H')
+    log_ends = array('Q')
+    logs: List[bytes] = []
+    boards: List[bytes] = []
+    idle_ages = array('d')
+    finished_ages = array('d')
+    log_length = 0
+
+    for game, idle_age, finished_age in games:
+        ids.append(game.game_id)
+        for name in (game.player1_name, game.player2_name):
+            index = names.get(name)
+            if index is None:
+                index = names[name] = len(names)
+            players.append(index)
+        shape = (game.m, game.n, game.k)
+        index = shapes.get(shape)
+        if index is None:
+            index = shapes[shape] = len(shapes)
+        shape_indices.append(index)
+        flags.append((_O_TO_MOVE if game.current_player == 'O' else 0)
+                     | (_X_WON if game.winner == 'X' else 0)
+                     | (_O_WON if game.winner == 'O' else 0)
+                     | (_DRAW if game.is_draw else 0)
+                     | (_REJECTED if game.last_move_rejected else 0))
+        versions.append(game.version)
+        log, ply = game.get_move_log()
+        plies.append(ply)
+        logs.append(log)
+        log_length += len(log) // 2
+        log_ends.append(log_length)
+        # Kept for games whose board did not come from their move log (set_board_state())
+        width = (game.m * game.n + 7) // 8
+        x_bits, o_bits = game.get_bitboards()
+        boards.append(x_bits.to_bytes(width, "little") + o_bits.to_bytes(width, "little"))
+        idle_ages.append(idle_age)
+        finished_ages.append(-1.0 if finished_age is None else finished_age)
+
+    id_blob, id_ends = pack_strings(ids)
+    name_blob, name_ends = pack_strings(names)
+    return {
+        f"{prefix}.ids": id_blob,
+        f"{prefix}.id_ends": id_ends,
+        f"{prefix}.names": name_blob,
+        f"{prefix}.name_ends": name_ends,
+        f"{prefix}.players": players,
+        f"{prefix}.geometries": array('H', [value for shape in shapes for value in shape]),
+        f"{prefix}.shapes": shape_indices,
+        f"{prefix}.flags": flags,
+        f"{prefix}.versions": versions,
+        f"{prefix}.plies": plies,
+        f"{prefix}.log_ends": log_ends,
+        f"{prefix}.logs": b"".join(logs),
+        f"{prefix}.boards": b"".join(boards),
+        f"{prefix}.idle_ages": idle_ages,
+        f"{prefix}.finished_ages": finished_ages,
+    }
+
+
+def decode_games(sections: Mapping[str, Any],
+                 prefix: str = "games") -> List[Tuple[TicTacToeGame, float, Optional[float]]]:
+    """
+    Rebuild the games written by encode_games(), in the same order.
+
+    Each game is replayed from its move log; a game whose replayed state
+    does not match its saved board is restored from the board instead,
+    without a log, as GameView.copy() does.
+    """
+    def column(name: str, typecode: str) -> array:
+        values = array(typecode)
+        values.frombytes(sections[f"{prefix}.{name}"])
+        return values
+
+    ids = unpack_strings(sections[f"{prefix}.ids"], sections[f"{prefix}.id_ends"])
+    names = unpack_strings(sections[f"{prefix}.names"], sections[f"{prefix}.name_ends"])
+    triples = column("geometries", 'H')
+    geometries = [get_geometry(*triples[index:index + 3]) for index in range(0, len(triples), 3)]
+    players = column("players", 'I')
+    shapes = column("shapes", 'H')
+    flags = column("flags", 'B')
+    versions = column("versions", 'I')
+    plies = column("plies", 'H')
+    log_ends = column("log_ends", 'Q')
+    logs = column("logs", 'H')
+    boards = bytes(sections[f"{prefix}.boards"])
+    idle_ages = column("idle_ages", 'd')
+    finished_ages = column("finished_ages", 'd')
+
+    games = []
+    log_start = 0
+    board_start = 0
+    for index, game_id in enumerate(ids):
+        geometry = geometries[shapes[index]]
+        player1 = names[players[2 * index]]
+        player2 = names[players[2 * index + 1]]
+        log_end = log_ends[index]
+        game = TicTacToeGame.replay(game_id, player1, player2, geometry.m, geometry.n, geometry.k,
+                                    logs[log_start:log_end], plies[index])
+        log_start = log_end
+
+        width = (geometry.cells + 7) // 8
+        x_bits = int.from_bytes(boards[board_start:board_start + width], "little")
+        o_bits = int.from_bytes(boards[board_start + width:board_start + 2 * width], "little")
+        board_start += 2 * width
+        game_flags = flags[index]
+        current_player = 'O' if game_flags & _O_TO_MOVE else 'X'
+        winner = 'X' if game_flags & _X_WON else 'O' if game_flags & _O_WON else None
+        is_draw = bool(game_flags & _DRAW)
+        if ((x_bits, o_bits) != game.get_bitboards() or current_player != game.current_player
+                or winner != game.winner or is_draw != game.is_draw):
+            # Marks were placed with set_board_state(), outside the log
+            game = TicTacToeGame.restore(game_id, player1, player2, geometry.m, geometry.n, geometry.k,
+                                         x_bits, o_bits, current_player, winner, is_draw)
+        game.last_move_rejected = bool(game_flags & _REJECTED)
+        game.version = versions[index]
+        finished_age = finished_ages[index]
+        games.append((game, idle_ages[index], None if finished_age < 0 else finished_age))
+    return games
+
+
+def write_snapshot(path: str, sections: Mapping[str, Any]) -> int:
+    """
+    Write sections to a snapshot file, replacing any previous one atomically.
+
+    Returns:
+        Size of the file in bytes
+    """
+    views = {name: memoryview(data).cast('B') for name, data in sections.items()}
+    offset = _HEADER.size + _ENTRY.size * len(views)
+    directory = []
+    for name, view in views.items():
+        encoded = name.encode()
+        if len(encoded) > 32:
+            raise SnapshotError(f"Section name too long: {name}")
+        offset += -offset % _ALIGN
+        directory.append(_ENTRY.pack(encoded, offset, len(view), zlib.crc32(view)))
+        offset += len(view)
+
+    directory_bytes = b"".join(directory)
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as output:
+        output.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(views), zlib.crc32(directory_bytes)))
+        output.write(directory_bytes)
+        for view in views.values():
+            output.write(b"\0" * (-output.tell() % _ALIGN))
+            output.write(view)
+        output.flush()
+        os.fsync(output.fileno())
+    os.replace(temporary, path)
+    return offset
+
+
+class SnapshotFile:
+    """A snapshot file opened through a read-only memory map; sections are read as memoryviews."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as source:
+            try:
+                self._map = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise SnapshotError(f"{path} is empty")
+        self._views: List[memoryview] = []
+        self._sections: Dict[str, Tuple[int, int]] = {}
+        try:
+            self._read_directory(path)
+        except Exception:
+            self.close()
+            raise
+
+    def _read_directory(self, path: str) -> None:
+        data = self._map
+        if len(data) < _HEADER.size:
+            raise SnapshotError(f"{path} is not a snapshot file")
+        magic, version, count, checksum = _HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise SnapshotError(f"{path} is not a snapshot file")
+        if version != FORMAT_VERSION:
+            raise SnapshotError(f"{path} has snapshot format {version}; this server reads {FORMAT_VERSION}")
+        if len(data) < _HEADER.size + _ENTRY.size * count:
+            raise SnapshotError(f"{path} is truncated")
+        if zlib.crc32(data[_HEADER.size:_HEADER.size + _ENTRY.size * count]) != checksum:
+            raise SnapshotError(f"{path} is corrupt (its directory fails its checksum)")
+        for index in range(count):
+            name, offset, length, checksum = _ENTRY.unpack_from(data, _HEADER.size + _ENTRY.size * index)
+            name = name.rstrip(b"\0").decode()
+            if offset + length > len(data):
+                raise SnapshotError(f"{path} is truncated (section {name})")
+            with memoryview(data)[offset:offset + length] as view:
+                if zlib.crc32(view) != checksum:
+                    raise SnapshotError(f"{path} is corrupt (section {name} fails its checksum)")
+            self._sections[name] = (offset, length)
+
+    def __getitem__(self, name: str) -> memoryview:
+        if name not in self._sections:
+            raise SnapshotError(f"The snapshot has no {name} section")
+        offset, length = self._sections[name]
+        view = memoryview(self._map)[offset:offset + length]
+        self._views.append(view)
+        return view
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._sections
+
+    def close(self) -> None:
+        for view in self._views:
+            view.release()
+        self._views.clear()
+        self._map.close()
+
+    def __enter__(self) -> "SnapshotFile":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class Snapshotter:
+    """
+    Saves a store to a snapshot file (periodically and on shutdown) and restores it at startup.
+
+    Only one save runs at a time; asking for another while one runs waits
+    for the running one.
+    """
+
+    def __init__(self, store: Any, path: str, interval: Optional[float] = DEFAULT_SNAPSHOT_INTERVAL):
+        """
+        Args:
+            store: Store to save and restore (one with supports_snapshots)
+            path: Snapshot file
+            interval: Seconds between periodic saves (None for saving only on shutdown)
+
+        Raises:
+            ValueError: If the store cannot be snapshotted
+        """
+        if not store.supports_snapshots:
+            raise ValueError(f"{type(store).__name__} does not support snapshots")
+        self.store = store
+        self.path = path
+        self.interval = interval
+        self.saves = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self.last_saved: Optional[float] = None
+        self.last_save: Dict[str, Any] = {}
+        self.restored: Dict[str, Any] = {}
+        self._saving: Optional[asyncio.Future] = None
+
+    def restore(self) -> int:
+        """
+        Load the snapshot file into the (empty) store, if the file exists.
+
+        Returns:
+            Number of games restored
+
+        Raises:
+            SnapshotError: If the file is unreadable or was written by another kind of store
+        """
+        if not os.path.exists(self.path):
+            return 0
+        start = time.perf_counter()
+        collecting = gc.isenabled()
+        # Rebuilt games create no reference cycles; collections would only rescan them
+        gc.disable()
+        try:
+            with SnapshotFile(self.path) as snapshot:
+                meta = json.loads(bytes(snapshot["meta"]))
+                if meta["store"] != type(self.store).__name__:
+                    raise SnapshotError(f"{self.path} was written by {meta['store']}, "
+                                        f"not {type(self.store).__name__}")
+                if meta["byteorder"] != sys.byteorder:
+                    raise SnapshotError(f"{self.path} was written on a {meta['byteorder']}-endian machine")
+                games = self.store.restore_snapshot(snapshot)
+        finally:
+            if collecting:
+                gc.enable()
+        self.restored = {"games": games, "seconds": round(time.perf_counter() - start, 6),
+                         "saved_at": meta["saved_at"]}
+        return games
+
+    def save(self) -> Dict[str, Any]:
+        """Write a snapshot in this process, blocking until it is on disk."""
+        start = time.perf_counter()
+        games = len(self.store)
+        try:
+            size = write_snapshot(self.path, self._sections())
+        except (OSError, SnapshotError) as exc:
+            self._failed(str(exc))
+            raise
+        return self._saved(games, size, start)
+
+    async def save_in_background(self) -> Dict[str, Any]:
+        """
+        Write a snapshot from a forked child process while this one keeps serving.
+
+        Falls back to save() where fork() is not available.
+        """
+        if self._saving is None:
+            self._saving = asyncio.ensure_future(self._save_forked())
+            self._saving.add_done_callback(self._save_finished)
+        return await asyncio.shield(self._saving)
+
+    async def shutdown(self) -> None:
+        """
+        Wait for a running background save, then write a final snapshot.
+
+        A failed final save is logged and counted in stats() rather than
+        raised, so the rest of the shutdown still runs.
+        """
+        if self._saving is not None:
+            try:
+                await asyncio.shield(self._saving)
+            except (OSError, SnapshotError):
+                pass
+        try:
+            self.save()
+        except (OSError, SnapshotError):
+            logger.exception("Final snapshot to %s failed", self.path)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "interval": self.interval,
+            "saving": self._saving is not None,
+            "saves": self.saves,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "last_saved": self.last_saved,
+            "last_save": self.last_save,
+            "restored": self.restored,
+        }
+
+    async def _save_forked(self) -> Dict[str, Any]:
+        """
+        Write a snapshot from a forked child of this (multithreaded) process.
+
+        Only the forking thread exists in the child, and any lock another
+        thread held at the fork stays held there for good. The child is
+        safe because it takes none of them: it runs on the event loop
+        thread, which owns the store, and only encodes the store's arrays
+        and objects (struct, zlib, json) and writes one file through os
+        calls. It never logs, imports, touches the SQLite store (which has
+        no snapshots) or the thread pools, and reports errors straight to
+        file descriptor 2 rather than through sys.stderr's lock. It then
+        leaves with os._exit(), skipping the parent's cleanup handlers. This
+        suits a short-lived child; the MCTS pool, whose processes live on
+        and run arbitrary work, is spawned instead (see mcts.py).
+
+        Should the child hang anyway, it is killed after FORK_TIMEOUT
+        seconds and the save fails with SnapshotError.
+        """
+        if not hasattr(os, "fork"):
+            return self.save()
+        start = time.perf_counter()
+        games = len(self.store)
+        pid = os.fork()
+        if pid == 0:
+            # The child sees the store as it was at the fork
+            exit_code = 1
+            try:
+                gc.disable()
+                write_snapshot(self.path, self._sections())
+                exit_code = 0
+            except BaseException:
+                os.write(2, traceback.format_exc().encode())
+            finally:
+                os._exit(exit_code)
+
+        # Polled from the event loop: a thread blocked in waitpid() would be lost to a stuck child
+        deadline = time.monotonic() + FORK_TIMEOUT
+        while True:
+            finished, wait_status = os.waitpid(pid, os.WNOHANG)
+            if finished:
+                break
+            if time.monotonic() > deadline:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+                self._failed(f"Snapshot writer did not finish within {FORK_TIMEOUT:g}s and was killed")
+                raise SnapshotError(self.last_error)
+            await asyncio.sleep(_FORK_POLL_INTERVAL)
+        exit_code = os.waitstatus_to_exitcode(wait_status)
+        if exit_code != 0:
+            self._failed(f"Snapshot writer exited with status {exit_code}")
+            raise SnapshotError(self.last_error)
+        return self._saved(games, os.path.getsize(self.path), start)
+
+    def _save_finished(self, future: asyncio.Future) -> None:
+        self._saving = None
+        if not future.cancelled():
+            future.exception()  # Retrieved so an unawaited failure is not reported as lost
+
+    def _sections(self) -> Dict[str, Any]:
+        sections = self.store.snapshot()
+        sections["meta"] = json.dumps({
+            "store": type(self.store).__name__,
+            "byteorder": sys.byteorder,
+            "games": len(self.store),
+            "saved_at": time.time(),
+        }).encode()
+        return sections
+
+    def _saved(self, games: int, size: int, start: float) -> Dict[str, Any]:
+        self.saves += 1
+        self.last_saved = time.time()
+        self.last_save = {"games": games, "bytes": size, "seconds": round(time.perf_counter() - start, 6)}
+        return self.last_save
+
+    def _failed(self, error: str) -> None:
+        self.failures += 1
+        self.last_error = error
+
+
+async def run_snapshotter(snapshotter: Snapshotter) -> None:
+    """Save a snapshot in the background every snapshotter.interval seconds until cancelled."""
+    while True:
+        await asyncio.sleep(snapshotter.interval)
+        try:
+            await snapshotter.save_in_background()
+        except (OSError, SnapshotError):
+            # Counted in the snapshotter's stats; the next interval tries again
+            pass
+
+
+def create_snapshotter(store: Any) -> Optional[Snapshotter]:
+    """
+    Create the snapshotter configured by the environment, or None when snapshots are off.
+
+    GAME_SNAPSHOT_PATH: Snapshot file (unset for no snapshots)
+    GAME_SNAPSHOT_INTERVAL: Seconds between background snapshots (default 300, 0 for shutdown only)
+
+    Raises:
+        ValueError: If the store cannot be snapshotted
+    """
+    path = os.getenv("GAME_SNAPSHOT_PATH")
+    if not path:
+        return None
+    interval = float(os.getenv("GAME_SNAPSHOT_INTERVAL", str(DEFAULT_SNAPSHOT_INTERVAL)))
+    return Snapshotter(store, path, interval if interval > 0 else None)
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Perfect-play solver for classic 3x3 tic-tac-toe.
+
+The solver runs a memoized negamax over every reachable position once and
+keeps the result in a transposition table. Positions that are rotations or
+reflections of each other share a single canonical key, so the table holds
+one entry per symmetry class instead of one per position. After the table
+is built (or loaded from a precomputed file) answering a best-move query is
+a handful of table lookups.
+
+Usage:
+    python3 solver.py --output solver_table.json
+"""
+
+import argparse
+import json
+import sys
+from typing import Dict, List, Optional, Tuple
+
+from game import CLASSIC_GEOMETRY, TicTacToeGame
+
+# Format version written to and expected from table files
+TABLE_FORMAT_VERSION = 1
+
+# Scores are (10 - stones on the board when the game ends) for the winner, so
+# faster wins and slower losses are preferred; a draw scores 0.
+_WIN_SCORE_BASE = 10
+
+_CELLS = 9
+_FULL_MASK = CLASSIC_GEOMETRY.full_mask
+_WIN_MASKS = CLASSIC_GEOMETRY.win_masks
+_OUTCOMES = {1: "win", 0: "draw", -1: "loss"}
+
+
+def _symmetry_permutations() -> List[Tuple[int, ...]]:
+    """Cell permutations for the 8 symmetries of the square: perm[cell] = image cell."""
+    transforms = [
+        lambda r, c: (r, c),
+        lambda r, c: (c, 2 - r),
+        lambda r, c: (2 - r, 2 - c),
+        lambda r, c: (2 - c, r),
+        lambda r, c: (r, 2 - c),
+        lambda r, c: (2 - r, c),
+        lambda r, c: (c, r),
+        lambda r, c: (2 - c, 2 - r),
+    ]
+    permutations = []
+    for transform in transforms:
+        perm = []
+        for cell in range(_CELLS):
+            row, col = transform(cell // 3, cell % 3)
+            perm.append(row * 3 + col)
+        permutations.append(tuple(perm))
+    return permutations
+
+
+_PERMUTATIONS = _symmetry_permutations()
+_INVERSE_PERMUTATIONS = [
+    tuple(perm.index(cell) for cell in range(_CELLS)) for perm in _PERMUTATIONS
+]
+
+# _BIT_TRANSFORMS[s][bits] is the 9-bit bitboard ``bits`` mapped through symmetry s
+_BIT_TRANSFORMS: List[Tuple[int, ...]] = [
+    tuple(
+        sum(1 << perm[cell] for cell in range(_CELLS) if bits >> cell & 1)
+        for bits in range(1 << _CELLS)
+    )
+    for perm in _PERMUTATIONS
+]
+
+
+def canonical_key(x_bits: int, o_bits: int) -> Tuple[int, int]:
+    """
+    Get the canonical key of a position and the symmetry that produces it.
+
+    Returns:
+        (key, symmetry) where key packs the transformed X bits in the low 9
+        bits and the transformed O bits above them
+    """
+    best_key = -1
+    best_symmetry = 0
+    for symmetry, transform in enumerate(_BIT_TRANSFORMS):
+        key = transform[x_bits] | transform[o_bits] << _CELLS
+        if best_key < 0 or key < best_key:
+            best_key = key
+            best_symmetry = symmetry
+    return best_key, best_symmetry
+
+
+def _has_line(bits: int) -> bool:
+    """Check whether a bitboard covers any winning line."""
+    for mask in _WIN_MASKS:
+        if bits & mask == mask:
+            return True
+    return False
+
+
+class Solver:
+    """
+    Transposition table of game-theoretic values for 3x3 tic-tac-toe.
+
+    Each entry maps a canonical position key to (score, best cell), with the
+    score from the point of view of the player to move and the best cell in
+    canonical coordinates (-1 for finished positions).
+    """
+
+    def __init__(self, table: Optional[Dict[int, Tuple[int, int]]] = None):
+        """
+        Initialize the solver.
+
+        Args:
+            table: Precomputed table; use build() or load() to obtain one
+        """
+        self.table: Dict[int, Tuple[int, int]] = table if table is not None else {}
+
+    @classmethod
+    def build(cls) -> "Solver":
+        """Solve every position reachable from the empty board."""
+        solver = cls()
+        solver._solve(0, 0)
+        return solver
+
+    @classmethod
+    def load(cls, path: str) -> "Solver":
+        """
+        Load a table written by save().
+
+        Raises:
+            ValueError: If the file was written in an unsupported format
+        """
+        with open(path, "r", encoding="utf-8") as handle:
+            data = json.load(handle)
+        if data.get("version") != TABLE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported solver table version: {data.get('version')}")
+        table = {int(key): (score, cell) for key, (score, cell) in data["table"].items()}
+        return cls(table)
+
+    @classmethod
+    def load_or_build(cls, path: Optional[str]) -> "Solver":
+        """Load the table from path if it exists, otherwise build it in memory."""
+        if path:
+            try:
+                return cls.load(path)
+            except FileNotFoundError:
+                pass
+        return cls.build()
+
+    def save(self, path: str) -> None:
+        """Write the table to a JSON file."""
+        data = {
+            "version": TABLE_FORMAT_VERSION,
+            "table": {str(key): [score, cell] for key, (score, cell) in self.table.items()},
+        }
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump(data, handle, separators=(",", ":"))
+
+    def evaluate(self, x_bits: int, o_bits: int) -> Tuple[int, Optional[int]]:
+        """
+        Evaluate a position.
+
+        Returns:
+            (score, cell) for the player to move, where cell is the best cell
+            index (row * 3 + col) or None if the game is already over
+        """
+        key, symmetry = canonical_key(x_bits, o_bits)
+        entry = self.table.get(key)
+        if entry is None:
+            # Positions that cannot arise in play (e.g. set up for tests) are solved on demand
+            self._solve(x_bits, o_bits)
+            entry = self.table[key]
+        score, canonical_cell = entry
+        if canonical_cell < 0:
+            return score, None
+        return score, _INVERSE_PERMUTATIONS[symmetry][canonical_cell]
+
+    def best_move(self, game: TicTacToeGame) -> Optional[Tuple[int, int, str]]:
+        """
+        Get the perfect-play move for the player to move.
+
+        Args:
+            game: A game on the classic 3x3 board with k=3
+
+        Returns:
+            (row, col, outcome) where outcome is "win", "draw" or "loss" for
+            the player to move under perfect play, or None if the game is over
+
+        Raises:
+            ValueError: If the game is not played on the classic board
+        """
+        if game.geometry is not CLASSIC_GEOMETRY:
+            raise ValueError("The solver only supports 3x3 boards with k=3")
+        if game.is_game_over():
+            return None
+        score, cell = self.evaluate(*game.get_bitboards())
+        if cell is None:
+            return None
+        outcome = _OUTCOMES[(score > 0) - (score < 0)]
+        return cell // 3, cell % 3, outcome
+
+    def _solve(self, x_bits: int, o_bits: int) -> int:
+        """Negamax with the table as memo; returns the score for the player to move."""
+        key, symmetry = canonical_key(x_bits, o_bits)
+        entry = self.table.get(key)
+        if entry is not None:
+            return entry[0]
+
+        x_to_move = bin(x_bits).count("1") == bin(o_bits).count("1")
+        mover, other = (x_bits, o_bits) if x_to_move else (o_bits, x_bits)
+        occupied = x_bits | o_bits
+        stones = bin(occupied).count("1")
+
+        if _has_line(other):
+            self.table[key] = (-(_WIN_SCORE_BASE - stones), -1)
+            return self.table[key][0]
+        if occupied == _FULL_MASK:
+            self.table[key] = (0, -1)
+            return 0
+
+        best_score = -_WIN_SCORE_BASE - 1
+        best_cell = -1
+        for cell in range(_CELLS):
+            bit = 1 << cell
+            if occupied & bit:
+                continue
+            if x_to_move:
+                score = -self._solve(x_bits | bit, o_bits)
+            else:
+                score = -self._solve(x_bits, o_bits | bit)
+            if score > best_score:
+                best_score = score
+                best_cell = cell
+
+        self.table[key] = (best_score, _PERMUTATIONS[symmetry][best_cell])
+        return best_score
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Precompute the tic-tac-toe solver table")
+    parser.add_argument("--output", default="solver_table.json", help="Path of the table file to write")
+    args = parser.parse_args()
+
+    solver = Solver.build()
+    solver.save(args.output)
+    print(f"✅ Solved {len(solver.table)} canonical positions -> {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
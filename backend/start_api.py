@@ -4,6 +4,10 @@ Startup script for the Tic-Tac-Toe FastAPI server.
 
 This script starts the FastAPI server with appropriate configuration
 for development and production environments.
+
+Development (the default) runs one process with auto-reload. Production
+mode (PRODUCTION=true) runs WORKERS processes (default: one per core)
+sharing the port, each owning a shard of the games (see cluster.py).
 """
 
 import uvicorn
@@ -18,17 +22,30 @@ def main():
     # Configuration
     host = os.getenv("HOST", "0.0.0.0")
     port = int(os.getenv("PORT", "8000"))
-    reload = os.getenv("RELOAD", "true").lower() == "true"
+    production = os.getenv("PRODUCTION", "false").lower() == "true"
+    reload = os.getenv("RELOAD", "false" if production else "true").lower() == "true"
+    workers = int(os.getenv("WORKERS", str(os.cpu_count() or 1) if production else "1"))
     log_level = os.getenv("LOG_LEVEL", "info")
 
+    if workers > 1 and reload:
+        print("❌ Auto-reload runs a single process; set RELOAD=false to use WORKERS")
+        sys.exit(1)
+
     print(f"📡 Server is listening on: http://localhost:{port}")
     print(f"📡 Server will start on: http://localhost:{port}")
     print(f"📚 API Documentation: http://localhost:{port}/docs")
     print(f"📖 ReDoc Documentation: http://localhost:{port}/redoc")
     print(f"🔄 Auto-reload: {reload}")
+    print(f"👷 Workers: {workers}")
     print("=" * 50)
     
     try:
+        if production or workers > 1:
+            from cluster import DEFAULT_DRAIN_TIMEOUT, run_cluster
+            drain_timeout = float(os.getenv("DRAIN_TIMEOUT", str(DEFAULT_DRAIN_TIMEOUT)))
+            run_cluster(host, port, workers, log_level, drain_timeout)
+            print("👋 Server stopped")
+            return
         uvicorn.run(
             "main:app",
             host=host,
@@ -0,0 +1,813 @@
+"""
+Game storage backends for the Tic-Tac-Toe API.
+
+All endpoints reach games through a GameStore. Three backends are provided:
+
+- InMemoryGameStore keeps games in a dict (the original behaviour).
+- SqliteGameStore keeps the same in-memory working set and persists every
+  change to a SQLite database in WAL mode. Writes go through a write-behind
+  queue drained by a background thread in batched transactions, so request
+  latency stays at in-memory levels, and games survive restarts. Each
+  database file has one writer process: several workers each open a file of
+  their own (see cluster.py).
+- TableGameStore keeps games as rows of a struct-of-arrays GameTable (see
+  game_table.py), about 44 bytes per game instead of an object each, for
+  millions of concurrent games in one process.
+
+The memory and table stores can be saved to and restored from a binary
+snapshot file (see snapshot.py), so their games survive restarts without a
+database.
+
+The backend is chosen with the GAME_STORE environment variable ("memory",
+"sqlite" or "table"); GAME_STORE_PATH sets the SQLite file. All three bound
+their size with a game limit and idle/finished-game TTLs (see create_store()).
+"""
+
+import asyncio
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Tuple
+
+from game import ID_PREFIX_LENGTH, TicTacToeGame
+from game_table import GameTable, GameView
+from snapshot import decode_games, encode_games
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of queued writes applied in one SQLite transaction
+WRITE_BATCH_SIZE = 512
+
+# Seconds between background sweeps for expired games
+DEFAULT_SWEEP_INTERVAL = float(os.getenv("GAME_SWEEP_INTERVAL", "30"))
+
+# Maximum evictions per sweep step before yielding to the event loop
+SWEEP_BATCH_SIZE = 1000
+
+# Share of a full TableGameStore evicted at once, so each scan for victims
+# is paid for by many creations
+TABLE_EVICTION_FRACTION = 0.01
+
+# Page cursors at or above this refer to a TableGameStore's object games
+_OBJECT_CURSOR_BASE = 1 << 48
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    game_id TEXT PRIMARY KEY,
+    player1_name TEXT NOT NULL,
+    player2_name TEXT NOT NULL,
+    m INTEGER NOT NULL,
+    n INTEGER NOT NULL,
+    k INTEGER NOT NULL,
+    x_bits TEXT NOT NULL,
+    o_bits TEXT NOT NULL,
+    current_player TEXT NOT NULL,
+    winner TEXT,
+    is_draw INTEGER NOT NULL,
+    moves BLOB,
+    ply INTEGER NOT NULL DEFAULT 0
+)
+"""
+
+# Columns added since the first schema, with their definitions
+_ADDED_COLUMNS = {"moves": "BLOB", "ply": "INTEGER NOT NULL DEFAULT 0"}
+
+_COLUMNS = ("game_id, player1_name, player2_name, m, n, k, x_bits, o_bits, current_player, winner, "
+            "is_draw, moves, ply")
+
+_UPSERT = f"INSERT OR REPLACE INTO games ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+
+
+class GameStore(ABC):
+    """Interface every game storage backend implements."""
+
+    # Whether snapshot() and restore_snapshot() are implemented
+    supports_snapshots = False
+
+    # Decides, from their first ID_PREFIX_LENGTH characters, which new game
+    # ids this store may hand out; set when several worker processes each
+    # own part of the id space (see sharding.py)
+    id_filter: Optional[Callable[[str], bool]] = None
+
+    def __init__(self):
+        self._delete_listeners: List[Callable[[str], None]] = []
+
+    @abstractmethod
+    def get(self, game_id: str) -> Optional[TicTacToeGame]:
+        """Get a game by ID, or None if it does not exist."""
+
+    @abstractmethod
+    def add(self, game: TicTacToeGame) -> None:
+        """Store a newly created game."""
+
+    def create(self, player1_name: str, player2_name: str, m: int = 3, n: int = 3,
+               k: int = 3) -> TicTacToeGame:
+        """
+        Create a new game and store it.
+
+        Returns:
+            The stored game; backends may return their own game type with the TicTacToeGame API
+
+        Raises:
+            ValueError: If the board shape is invalid
+        """
+        game = TicTacToeGame(player1_name, player2_name, m, n, k)
+        if self.id_filter is not None:
+            while not self.id_filter(game.game_id[:ID_PREFIX_LENGTH]):
+                game.game_id = str(uuid.uuid4())
+        self.add(game)
+        return game
+
+    @abstractmethod
+    def save(self, game: TicTacToeGame) -> None:
+        """Record changes made to a stored game (moves, resets)."""
+
+    @abstractmethod
+    def delete(self, game_id: str) -> bool:
+        """Delete a game; returns False if it did not exist."""
+
+    @abstractmethod
+    def values(self) -> Iterator[TicTacToeGame]:
+        """Iterate over all stored games."""
+
+    @abstractmethod
+    def page(self, after: Optional[int], limit: int,
+             predicate: Optional[Callable[[TicTacToeGame], bool]] = None
+             ) -> Tuple[List[TicTacToeGame], Optional[int]]:
+        """
+        Get games in creation order, resuming after a cursor.
+
+        Args:
+            after: Cursor returned by the previous page (None to start at the beginning)
+            limit: Maximum number of games to return
+            predicate: Only return games for which this returns True
+
+        Returns:
+            (games, cursor for the next page or None if no games remain)
+        """
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Number of stored games."""
+
+    def __contains__(self, game_id: str) -> bool:
+        return self.get(game_id) is not None
+
+    def add_delete_listener(self, listener: Callable[[str], None]) -> None:
+        """Call ``listener(game_id)`` whenever a game is deleted or evicted."""
+        self._delete_listeners.append(listener)
+
+    def sweep(self, limit: Optional[int] = None) -> int:
+        """Evict expired games and return how many were evicted."""
+        return 0
+
+    def stats(self) -> Dict:
+        """Size, limits and eviction counters of the store."""
+        return {"games": len(self)}
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Encode every game, with its age and eviction state, as snapshot sections."""
+        raise NotImplementedError(f"{type(self).__name__} does not support snapshots")
+
+    def restore_snapshot(self, sections: Mapping[str, Any]) -> int:
+        """
+        Load the games of a snapshot into this empty store.
+
+        Returns:
+            Number of games restored
+
+        Raises:
+            ValueError: If the store already holds games
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support snapshots")
+
+    def close(self) -> None:
+        """Flush pending work and release resources."""
+
+
+class InMemoryGameStore(GameStore):
+    """
+    Games held in a dict; nothing outlives the process.
+
+    Optional limits bound the store's memory:
+
+    - max_games: adding a game beyond the limit evicts the oldest finished
+      game, or the least recently used game if none has finished.
+    - idle_ttl: games not read or changed for this many seconds expire.
+    - finished_ttl: finished games expire this many seconds after the game
+      ended, however recently they were read.
+
+    Games are kept in least-recently-used order and finished games in the
+    order they ended, so every eviction pops the front of an ordered dict
+    instead of scanning the store. Expired games are removed by sweep(),
+    which the API calls periodically from a background task.
+    """
+
+    supports_snapshots = True
+
+    def __init__(self, max_games: Optional[int] = None, idle_ttl: Optional[float] = None,
+                 finished_ttl: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            max_games: Maximum number of games held (None for no limit)
+            idle_ttl: Seconds an unused game is kept (None for no limit)
+            finished_ttl: Seconds a finished game is kept (None for no limit)
+            clock: Time source, in seconds
+        """
+        if max_games is not None and max_games < 1:
+            raise ValueError("max_games must be at least 1")
+        super().__init__()
+        self.max_games = max_games
+        self.idle_ttl = idle_ttl
+        self.finished_ttl = finished_ttl
+        self._clock = clock
+        # Least recently used first
+        self._games: "OrderedDict[str, TicTacToeGame]" = OrderedDict()
+        self._last_used: Dict[str, float] = {}
+        # Finish time per finished game, earliest first
+        self._finished: "OrderedDict[str, float]" = OrderedDict()
+        self.evictions: Dict[str, int] = {"capacity": 0, "idle": 0, "finished": 0}
+        # Creation order for pagination: parallel lists of sequence numbers and
+        # game IDs, appended in increasing sequence order. Deleted games are
+        # skipped when paging and compacted away once they are half the lists.
+        self._next_sequence = 0
+        self._order_sequences: List[int] = []
+        self._order_ids: List[str] = []
+        self._order_holes = 0
+
+    def get(self, game_id: str) -> Optional[TicTacToeGame]:
+        game = self._games.get(game_id)
+        if game is not None:
+            self._touch(game_id)
+        return game
+
+    def add(self, game: TicTacToeGame) -> None:
+        self._remember(game)
+
+    def save(self, game: TicTacToeGame) -> None:
+        # Games are mutated in place; only the eviction order needs updating.
+        # A game evicted while a request still held it stays evicted.
+        if game.game_id in self._games:
+            self._touch(game.game_id)
+            self._track_finished(game)
+
+    def delete(self, game_id: str) -> bool:
+        self._last_used.pop(game_id, None)
+        self._finished.pop(game_id, None)
+        if self._games.pop(game_id, None) is None:
+            return False
+        self._order_holes += 1
+        if self._order_holes > len(self._order_ids) // 2:
+            self._compact_order()
+        for listener in self._delete_listeners:
+            listener(game_id)
+        return True
+
+    def values(self) -> Iterator[TicTacToeGame]:
+        return iter(list(self._games.values()))
+
+    def page(self, after: Optional[int], limit: int,
+             predicate: Optional[Callable[[TicTacToeGame], bool]] = None
+             ) -> Tuple[List[TicTacToeGame], Optional[int]]:
+        sequences = self._order_sequences
+        ids = self._order_ids
+        games = []
+        # Binary search for the resume point, so each page costs O(log n + page)
+        index = 0 if after is None else bisect_right(sequences, after)
+        while index < len(ids):
+            game = self._games.get(ids[index])
+            if game is not None and (predicate is None or predicate(game)):
+                games.append(game)
+                if len(games) == limit:
+                    return games, (sequences[index] if index + 1 < len(ids) else None)
+            index += 1
+        return games, None
+
+    def __len__(self) -> int:
+        return len(self._games)
+
+    def __contains__(self, game_id: str) -> bool:
+        return game_id in self._games
+
+    def sweep(self, limit: Optional[int] = None) -> int:
+        """
+        Evict expired games, oldest first.
+
+        Args:
+            limit: Maximum number of games to evict in this call (None for all)
+
+        Returns:
+            Number of games evicted
+        """
+        now = self._clock()
+        evicted = 0
+        if self.finished_ttl is not None:
+            while self._finished and (limit is None or evicted < limit):
+                game_id, finished_at = next(iter(self._finished.items()))
+                if now - finished_at < self.finished_ttl:
+                    break
+                self._evict(game_id, "finished")
+                evicted += 1
+        if self.idle_ttl is not None:
+            while self._games and (limit is None or evicted < limit):
+                game_id = next(iter(self._games))
+                if now - self._last_used[game_id] < self.idle_ttl:
+                    break
+                self._evict(game_id, "idle")
+                evicted += 1
+        return evicted
+
+    def stats(self) -> Dict:
+        return {
+            "games": len(self._games),
+            "finished_games": len(self._finished),
+            "max_games": self.max_games,
+            "idle_ttl": self.idle_ttl,
+            "finished_ttl": self.finished_ttl,
+            "evictions": dict(self.evictions),
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Encode the games in creation order, with the seconds since each was used and finished."""
+        now = self._clock()
+        finished = self._finished
+        return encode_games(
+            (game, now - self._last_used[game_id],
+             now - finished[game_id] if game_id in finished else None)
+            for game_id in self._order_ids
+            for game in (self._games.get(game_id),) if game is not None
+        )
+
+    def restore_snapshot(self, sections: Mapping[str, Any]) -> int:
+        if self._games:
+            raise ValueError("Snapshots can only be restored into an empty store")
+        now = self._clock()
+        games = decode_games(sections)
+        for game, idle_age, finished_age in games:
+            self._order_sequences.append(self._next_sequence)
+            self._order_ids.append(game.game_id)
+            self._next_sequence += 1
+            self._last_used[game.game_id] = now - idle_age
+            if finished_age is not None:
+                self._finished[game.game_id] = now - finished_age
+        by_use = sorted(games, key=lambda entry: entry[1], reverse=True)
+        self._games = OrderedDict((game.game_id, game) for game, _, _ in by_use)
+        self._finished = OrderedDict(sorted(self._finished.items(), key=lambda item: item[1]))
+        self._enforce_capacity()
+        return len(self._games)
+
+    def _remember(self, game: TicTacToeGame) -> None:
+        """Hold a game as the most recently used one, evicting others if over capacity."""
+        if game.game_id not in self._games:
+            self._order_sequences.append(self._next_sequence)
+            self._order_ids.append(game.game_id)
+            self._next_sequence += 1
+        self._games[game.game_id] = game
+        self._touch(game.game_id)
+        self._track_finished(game)
+        self._enforce_capacity(game.game_id)
+
+    def _enforce_capacity(self, keep: Optional[str] = None) -> None:
+        """Evict games while over capacity: finished games first (except ``keep``), then the least recently used."""
+        if self.max_games is not None:
+            while len(self._games) > self.max_games:
+                victim = next(iter(self._finished), None)
+                if victim is None or victim == keep:
+                    victim = next(iter(self._games))
+                self._evict(victim, "capacity")
+
+    def _touch(self, game_id: str) -> None:
+        self._games.move_to_end(game_id)
+        self._last_used[game_id] = self._clock()
+
+    def _track_finished(self, game: TicTacToeGame) -> None:
+        """Start a finished game's retention period, or cancel it when the game was reset."""
+        if game.game_over:
+            if game.game_id not in self._finished:
+                self._finished[game.game_id] = self._clock()
+        else:
+            self._finished.pop(game.game_id, None)
+
+    def _compact_order(self) -> None:
+        """Drop deleted games from the creation-order lists."""
+        live = [(sequence, game_id) for sequence, game_id in zip(self._order_sequences, self._order_ids)
+                if game_id in self._games]
+        self._order_sequences = [sequence for sequence, _ in live]
+        self._order_ids = [game_id for _, game_id in live]
+        self._order_holes = 0
+
+    def _evict(self, game_id: str, reason: str) -> None:
+        self.delete(game_id)
+        self.evictions[reason] += 1
+
+
+def _game_to_row(game: TicTacToeGame) -> Tuple:
+    """Snapshot a game into a database row (bitboards as hex, since they can exceed 64 bits)."""
+    x_bits, o_bits = game.get_bitboards()
+    moves, ply = game.get_move_log()
+    return (
+        game.game_id,
+        game.player1_name,
+        game.player2_name,
+        game.m,
+        game.n,
+        game.k,
+        format(x_bits, "x"),
+        format(o_bits, "x"),
+        game.current_player,
+        game.winner,
+        int(game.is_draw),
+        moves,
+        ply,
+    )
+
+
+def _row_to_game(row: Tuple) -> TicTacToeGame:
+    """Rebuild a game from a database row: replayed from its move log, or from its bitboards for rows saved without one."""
+    (game_id, player1_name, player2_name, m, n, k,
+     x_bits, o_bits, current_player, winner, is_draw, moves, ply) = row
+    if moves is not None:
+        return TicTacToeGame.replay(game_id, player1_name, player2_name, m, n, k, moves, ply)
+    return TicTacToeGame.restore(
+        game_id, player1_name, player2_name, m, n, k,
+        int(x_bits, 16), int(o_bits, 16), current_player, winner, bool(is_draw)
+    )
+
+
+class SqliteGameStore(InMemoryGameStore):
+    """
+    In-memory working set backed by a SQLite database in WAL mode.
+
+    Mutations are snapshotted into rows on the calling thread and queued; a
+    writer thread applies them in batches of up to WRITE_BATCH_SIZE per
+    transaction, keeping only the latest row per game. A crash can lose the
+    writes still in the queue; close() drains it on shutdown. If a batch
+    fails its games are written one at a time; writes that still fail (disk
+    full, database locked) are logged and counted in stats() as
+    failed_writes, and the writer carries on. Each game's next change writes
+    its whole row again.
+
+    Every game is loaded at startup and then served from memory, so the
+    store must be the database's only writer: two processes sharing a file
+    would each keep serving their own copy of a game and overwrite the
+    other's moves. Several workers each open a file of their own (see
+    cluster.py).
+    """
+
+    # Every change is persisted already
+    supports_snapshots = False
+
+    _STOP = object()
+
+    def __init__(self, path: str, **limits):
+        """
+        Open (or create) the database and load its games.
+
+        Args:
+            path: SQLite database file
+            **limits: Eviction limits, as for InMemoryGameStore; evicted
+                games are deleted from the database too
+        """
+        super().__init__(**limits)
+        self.path = path
+        self._reader = sqlite3.connect(path, check_same_thread=False)
+        self._reader.execute("PRAGMA journal_mode=WAL")
+        self._reader.execute(_SCHEMA)
+        existing = {column[1] for column in self._reader.execute("PRAGMA table_info(games)")}
+        for column, definition in _ADDED_COLUMNS.items():
+            if column not in existing:
+                self._reader.execute(f"ALTER TABLE games ADD COLUMN {column} {definition}")
+        self._reader.commit()
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self.failed_writes = 0
+        self._writer = threading.Thread(target=self._write_loop, name="game-store-writer", daemon=True)
+        self._writer.start()
+
+        # Every write replaces its row with a new rowid, so this is least recently written first
+        rows = self._reader.execute(f"SELECT {_COLUMNS} FROM games ORDER BY rowid").fetchall()
+        for row in rows:
+            self._remember(_row_to_game(row))
+
+    def add(self, game: TicTacToeGame) -> None:
+        super().add(game)
+        self._queue.put((game.game_id, _game_to_row(game)))
+
+    def save(self, game: TicTacToeGame) -> None:
+        if game.game_id in self._games:
+            super().save(game)
+            self._queue.put((game.game_id, _game_to_row(game)))
+
+    def delete(self, game_id: str) -> bool:
+        existed = super().delete(game_id)
+        if existed:
+            self._queue.put((game_id, None))
+        return existed
+
+    def stats(self) -> Dict:
+        return {**super().stats(), "failed_writes": self.failed_writes}
+
+    def flush(self) -> None:
+        """Block until every queued write has been committed (or has failed)."""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Drain the write-behind queue and close the database."""
+        if self._writer.is_alive():
+            self._queue.put(self._STOP)
+            self._writer.join()
+        self._reader.close()
+
+    def _write_loop(self) -> None:
+        """Apply queued writes in batched transactions until close() is called."""
+        connection = sqlite3.connect(self.path)
+        connection.execute("PRAGMA synchronous=NORMAL")
+        stopping = False
+        while not stopping:
+            items = [self._queue.get()]
+            while len(items) < WRITE_BATCH_SIZE:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            # Keep only the last write per game, in the order of those last writes
+            latest: Dict[str, Optional[Tuple]] = {}
+            for item in items:
+                if item is self._STOP:
+                    stopping = True
+                    continue
+                game_id, row = item
+                latest.pop(game_id, None)
+                latest[game_id] = row
+
+            upserts: List[Tuple] = [row for row in latest.values() if row is not None]
+            deletes = [(game_id,) for game_id, row in latest.items() if row is None]
+            try:
+                with connection:
+                    if upserts:
+                        connection.executemany(_UPSERT, upserts)
+                    if deletes:
+                        connection.executemany("DELETE FROM games WHERE game_id = ?", deletes)
+            except Exception:
+                # Retry one game at a time so only the games that cannot be written are lost
+                self._write_each(connection, upserts, deletes)
+            finally:
+                for _ in items:
+                    self._queue.task_done()
+        connection.close()
+
+    def _write_each(self, connection: sqlite3.Connection, upserts: List[Tuple], deletes: List[Tuple]) -> None:
+        """Apply a failed batch's writes one transaction each, logging and counting those that fail."""
+        writes = [(_UPSERT, row) for row in upserts]
+        writes += [("DELETE FROM games WHERE game_id = ?", key) for key in deletes]
+        for statement, parameters in writes:
+            try:
+                with connection:
+                    connection.execute(statement, parameters)
+            except Exception:
+                self.failed_writes += 1
+                logger.exception("Failed to write game %s to %s", parameters[0], self.path)
+
+
+class TableGameStore(GameStore):
+    """
+    Games kept as rows of a GameTable instead of one object each.
+
+    Games created through create() on boards of up to MAX_TABLE_CELLS cells
+    become table rows, and get() hands out GameView handles to them. Games on
+    larger boards, and TicTacToeGame objects passed to add(), are kept by an
+    InMemoryGameStore alongside the table.
+
+    The limits of InMemoryGameStore apply, to table games and object games
+    separately, with timestamps kept to the second in the table's columns.
+    Keeping table games in recency order would cost an ordered dict entry
+    per game, so evictions scan the timestamp columns with NumPy instead:
+    sweep() finds every expired game in one pass, and a full table evicts
+    TABLE_EVICTION_FRACTION of its games at a time (finished games first,
+    then the least recently used), so one scan serves many creations.
+
+    Table games are paged in slot order, which is creation order until
+    deleted games' slots are reused.
+    """
+
+    supports_snapshots = True
+
+    def __init__(self, max_games: Optional[int] = None, idle_ttl: Optional[float] = None,
+                 finished_ttl: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            max_games: Maximum number of table games held (None for no limit)
+            idle_ttl: Seconds an unused game is kept (None for no limit)
+            finished_ttl: Seconds a finished game is kept (None for no limit)
+            clock: Time source, in seconds
+        """
+        if max_games is not None and max_games < 1:
+            raise ValueError("max_games must be at least 1")
+        super().__init__()
+        self.table = GameTable()
+        self.max_games = max_games
+        self.idle_ttl = idle_ttl
+        self.finished_ttl = finished_ttl
+        self._clock = clock
+        self._epoch = clock()
+        self.evictions: Dict[str, int] = {"capacity": 0, "idle": 0, "finished": 0}
+        self._objects = InMemoryGameStore(max_games, idle_ttl, finished_ttl, clock)
+        self._objects.add_delete_listener(self._notify_deleted)
+
+    def create(self, player1_name: str, player2_name: str, m: int = 3, n: int = 3,
+               k: int = 3) -> TicTacToeGame:
+        if not GameTable.fits(m, n):
+            return super().create(player1_name, player2_name, m, n, k)
+        if self.max_games is not None and self.table.live >= self.max_games:
+            for slot in self.table.oldest(max(1, int(self.max_games * TABLE_EVICTION_FRACTION))):
+                self._evict(slot, "capacity")
+        slot = self.table.create(player1_name, player2_name, m, n, k, self._now(), self.id_filter)
+        return self.table.view(slot)
+
+    def get(self, game_id: str) -> Optional[TicTacToeGame]:
+        table = self.table
+        slot = table.find(game_id)
+        if slot is None:
+            return self._objects.get(game_id)
+        table.used[slot] = self._now()
+        return GameView(table, slot, game_id)
+
+    def add(self, game: TicTacToeGame) -> None:
+        if isinstance(game, GameView):
+            self.save(game)
+        else:
+            self._objects.add(game)
+
+    def save(self, game: TicTacToeGame) -> None:
+        if not isinstance(game, GameView):
+            self._objects.save(game)
+            return
+        if game.is_stale:
+            return
+        table = self.table
+        now = self._now()
+        table.used[game.slot] = now
+        if not game.game_over:
+            table.ended[game.slot] = 0
+        elif not table.ended[game.slot]:
+            table.ended[game.slot] = now
+
+    def delete(self, game_id: str) -> bool:
+        slot = self.table.find(game_id)
+        if slot is None:
+            return self._objects.delete(game_id)
+        self.table.free(slot)
+        self._notify_deleted(game_id)
+        return True
+
+    def values(self) -> Iterator[TicTacToeGame]:
+        table = self.table
+        views = [table.view(slot) for slot in table.live_slots()]
+        return iter(views + list(self._objects.values()))
+
+    def page(self, after: Optional[int], limit: int,
+             predicate: Optional[Callable[[TicTacToeGame], bool]] = None
+             ) -> Tuple[List[TicTacToeGame], Optional[int]]:
+        games: List[TicTacToeGame] = []
+        if after is None or after < _OBJECT_CURSOR_BASE:
+            table = self.table
+            start = 0 if after is None else after + 1
+            for slot in table.live_slots(start):
+                game = table.view(slot)
+                if predicate is None or predicate(game):
+                    games.append(game)
+                    if len(games) == limit:
+                        more = slot + 1 < len(table.nonces) or len(self._objects) > 0
+                        return games, (slot if more else None)
+            after = None
+        else:
+            after -= _OBJECT_CURSOR_BASE
+        objects, cursor = self._objects.page(after, limit - len(games), predicate)
+        return games + objects, (cursor + _OBJECT_CURSOR_BASE if cursor is not None else None)
+
+    def __len__(self) -> int:
+        return self.table.live + len(self._objects)
+
+    def __contains__(self, game_id: str) -> bool:
+        return self.table.find(game_id) is not None or game_id in self._objects
+
+    def sweep(self, limit: Optional[int] = None) -> int:
+        """
+        Evict expired games, oldest first.
+
+        Args:
+            limit: Maximum number of games to evict in this call (None for all)
+
+        Returns:
+            Number of games evicted
+        """
+        finished, idle = self.table.expired(self._now(), self.idle_ttl, self.finished_ttl)
+        evicted = 0
+        for slots, reason in ((finished, "finished"), (idle, "idle")):
+            for slot in slots:
+                if limit is not None and evicted >= limit:
+                    return evicted
+                self._evict(slot, reason)
+                evicted += 1
+        return evicted + self._objects.sweep(None if limit is None else limit - evicted)
+
+    def stats(self) -> Dict:
+        objects = self._objects.stats()
+        return {
+            "games": len(self),
+            "finished_games": self.table.count_finished() + objects["finished_games"],
+            "max_games": self.max_games,
+            "idle_ttl": self.idle_ttl,
+            "finished_ttl": self.finished_ttl,
+            "evictions": {reason: count + objects["evictions"][reason]
+                          for reason, count in self.evictions.items()},
+            "table": self.table.stats(),
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        """The table's columns as they are, plus the object games and the table's clock."""
+        sections = self.table.dump()
+        sections.update(self._objects.snapshot())
+        sections["table.clock"] = array('Q', [self._now()])
+        return sections
+
+    def restore_snapshot(self, sections: Mapping[str, Any]) -> int:
+        if len(self):
+            raise ValueError("Snapshots can only be restored into an empty store")
+        table = GameTable.load(sections)
+        saved_clock = array('Q')
+        saved_clock.frombytes(sections["table.clock"])
+        # Continue the saved clock, so a game idle for a minute at the snapshot is idle for a minute now
+        self._epoch = self._clock() - (saved_clock[0] - 1)
+        self.table = table
+        if self.max_games is not None and table.live > self.max_games:
+            for slot in table.oldest(table.live - self.max_games):
+                self._evict(slot, "capacity")
+        return table.live + self._objects.restore_snapshot(sections)
+
+    def _now(self) -> int:
+        """Whole seconds since the store was created, starting at 1 (0 marks "never" in the columns)."""
+        return int(self._clock() - self._epoch) + 1
+
+    def _evict(self, slot: int, reason: str) -> None:
+        game_id = self.table.public_id(slot)
+        self.table.free(slot)
+        self.evictions[reason] += 1
+        self._notify_deleted(game_id)
+
+    def _notify_deleted(self, game_id: str) -> None:
+        for listener in self._delete_listeners:
+            listener(game_id)
+
+
+async def run_sweeper(store: GameStore, interval: float = DEFAULT_SWEEP_INTERVAL) -> None:
+    """Evict expired games every ``interval`` seconds until cancelled."""
+    while True:
+        await asyncio.sleep(interval)
+        # Large backlogs are evicted in steps so requests keep being served
+        while store.sweep(SWEEP_BATCH_SIZE) == SWEEP_BATCH_SIZE:
+            await asyncio.sleep(0)
+
+
+def _limit_from_env(name: str, default: str) -> Optional[float]:
+    """Read a positive limit from the environment; 0 disables it."""
+    value = float(os.getenv(name, default))
+    return value if value > 0 else None
+
+
+def create_store() -> GameStore:
+    """
+    Create the store selected by the environment.
+
+    GAME_STORE: "memory" (default), "sqlite" or "table"
+    GAME_STORE_PATH: SQLite database file (default "games.db")
+    GAME_STORE_MAX_GAMES: Maximum games held (default 100000, 0 for no limit)
+    GAME_IDLE_TTL: Seconds before an unused game expires (default 3600, 0 for never)
+    GAME_FINISHED_TTL: Seconds a finished game is kept (default 600, 0 for no limit)
+
+    Raises:
+        ValueError: If GAME_STORE names an unknown backend
+    """
+    max_games = _limit_from_env("GAME_STORE_MAX_GAMES", "100000")
+    limits = {
+        "max_games": int(max_games) if max_games is not None else None,
+        "idle_ttl": _limit_from_env("GAME_IDLE_TTL", "3600"),
+        "finished_ttl": _limit_from_env("GAME_FINISHED_TTL", "600"),
+    }
+    backend = os.getenv("GAME_STORE", "memory").lower()
+    if backend == "memory":
+        return InMemoryGameStore(**limits)
+    if backend == "table":
+        return TableGameStore(**limits)
+    if backend == "sqlite":
+        return SqliteGameStore(os.getenv("GAME_STORE_PATH", "games.db"), **limits)
+    raise ValueError(f"Unknown GAME_STORE backend: {backend}")
@@ -0,0 +1,154 @@
+"""
+Pluggable move-selection strategies for computer players.
+
+Every strategy implements choose_move(game, rng) and returns the (row, col)
+it wants to play for the current player. Strategies are created from short
+specs such as "random", "heuristic", "solver" or "mcts:2000" (MCTS with a
+2000-iteration budget) so they can be named on a command line and sent to
+worker processes.
+"""
+
+import random
+from typing import Dict, Optional, Tuple, Type
+
+import mcts
+from game import CLASSIC_GEOMETRY, TicTacToeGame
+from solver import Solver
+
+# Iteration budget for "mcts" specs that do not give one
+DEFAULT_MCTS_ITERATIONS = 1000
+
+# Solver table shared by every SolverStrategy in the process
+_solver: Optional[Solver] = None
+
+
+class Strategy:
+    """Base class for move-selection strategies."""
+
+    name = "base"
+
+    def choose_move(self, game: TicTacToeGame, rng: random.Random) -> Tuple[int, int]:
+        """
+        Choose a move for the current player.
+
+        Args:
+            game: Position to move in; it is not modified
+            rng: Random source, so games are reproducible from a seed
+
+        Returns:
+            (row, col) of an empty cell
+        """
+        raise NotImplementedError
+
+    def __repr__(self) -> str:
+        return self.name
+
+
+class RandomStrategy(Strategy):
+    """Play a uniformly random empty cell."""
+
+    name = "random"
+
+    def choose_move(self, game: TicTacToeGame, rng: random.Random) -> Tuple[int, int]:
+        cell = rng.choice(game.get_empty_cells())
+        return divmod(cell, game.geometry.n)
+
+
+class HeuristicStrategy(Strategy):
+    """
+    Rule-based play: win if possible, otherwise block the opponent's win,
+    otherwise take the free cell closest to the centre (ties broken randomly).
+    """
+
+    name = "heuristic"
+
+    def choose_move(self, game: TicTacToeGame, rng: random.Random) -> Tuple[int, int]:
+        geometry = game.geometry
+        x_bits, o_bits = game.get_bitboards()
+        mine, theirs = (x_bits, o_bits) if game.current_player == 'X' else (o_bits, x_bits)
+        cells = game.get_empty_cells()
+
+        for bits in (mine, theirs):
+            for cell in cells:
+                placed = bits | 1 << cell
+                for mask in geometry.cell_win_masks[cell]:
+                    if placed & mask == mask:
+                        return divmod(cell, geometry.n)
+
+        centre_row = (geometry.m - 1) / 2
+        centre_col = (geometry.n - 1) / 2
+        best_distance = None
+        best_cells = []
+        for cell in cells:
+            row, col = divmod(cell, geometry.n)
+            distance = max(abs(row - centre_row), abs(col - centre_col))
+            if best_distance is None or distance < best_distance:
+                best_distance = distance
+                best_cells = [cell]
+            elif distance == best_distance:
+                best_cells.append(cell)
+        return divmod(rng.choice(best_cells), geometry.n)
+
+
+class SolverStrategy(Strategy):
+    """Perfect play from the solver table (3x3 boards with k=3 only)."""
+
+    name = "solver"
+
+    def __init__(self):
+        global _solver
+        if _solver is None:
+            _solver = Solver.build()
+        self.solver = _solver
+
+    def choose_move(self, game: TicTacToeGame, rng: random.Random) -> Tuple[int, int]:
+        if game.geometry is not CLASSIC_GEOMETRY:
+            raise ValueError("The solver strategy only supports 3x3 boards with k=3")
+        row, col, _ = self.solver.best_move(game)
+        return row, col
+
+
+class MCTSStrategy(Strategy):
+    """Monte Carlo tree search with a fixed iteration budget, in the calling process."""
+
+    name = "mcts"
+
+    def __init__(self, iterations: int = DEFAULT_MCTS_ITERATIONS):
+        self.iterations = iterations
+
+    def choose_move(self, game: TicTacToeGame, rng: random.Random) -> Tuple[int, int]:
+        # An iteration budget (not a time budget) keeps results independent of machine load
+        result = mcts.search(game, think_time=None, iterations=self.iterations, workers=1,
+                             seed=rng.getrandbits(32))
+        return result.row, result.col
+
+    def __repr__(self) -> str:
+        return f"mcts:{self.iterations}"
+
+
+STRATEGIES: Dict[str, Type[Strategy]] = {
+    "random": RandomStrategy,
+    "heuristic": HeuristicStrategy,
+    "solver": SolverStrategy,
+    "mcts": MCTSStrategy,
+}
+
+
+def create_strategy(spec: str) -> Strategy:
+    """
+    Create a strategy from a spec of the form "name" or "name:argument".
+
+    Raises:
+        ValueError: If the name is unknown or the argument is invalid
+    """
+    name, _, argument = spec.partition(":")
+    if name not in STRATEGIES:
+        raise ValueError(f"Unknown strategy {name!r}; choose from {', '.join(STRATEGIES)}")
+    if not argument:
+        return STRATEGIES[name]()
+    if name != "mcts":
+        raise ValueError(f"Strategy {name!r} takes no argument")
+    iterations = int(argument)
+    if iterations < 1:
+        raise ValueError("MCTS iterations must be at least 1")
+    return MCTSStrategy(iterations)
@@ -9,6 +9,8 @@ with the game engine integration.
 import requests
 import json
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any
 
 # API base URL
@@ -179,6 +181,130 @@ def run_api_tests():
     if deleted_game is None:
         print("   ✅ Correctly returned 404 for deleted game")
     
+    # Test 13: Batch creation and batch moves
+    print("\n13. Testing batch endpoints...")
+    batch_games = test_api_endpoint("POST", "/games:batch", {"count": 3}, 201)
+    if not batch_games:
+        return False
+    print(f"   Created {len(batch_games)} games in one request")
+    
+    batch_moves = [{"game_id": game["game_id"], "row": 1, "col": 1} for game in batch_games]
+    batch_moves.append({"game_id": batch_games[0]["game_id"], "row": 1, "col": 1})  # Occupied
+    batch_result = test_api_endpoint("POST", "/moves:batch", {"moves": batch_moves})
+    if not batch_result:
+        return False
+    successes = [result["success"] for result in batch_result["results"]]
+    if successes != [True, True, True, False]:
+        print(f"   ❌ Unexpected batch results: {successes}")
+        return False
+    print("   ✅ Batch moves applied with one result per move")
+    
+    # Test 14: Prometheus metrics
+    print("\n14. Testing metrics endpoint...")
+    metrics_response = requests.get(f"{BASE_URL}/metrics")
+    print(f"✅ GET /metrics - Status: {metrics_response.status_code}")
+    # Labels are matched as a prefix: in production mode a worker label follows them
+    expected_lines = [
+        'tictactoe_http_requests_total{method="POST",route="/games/{game_id}/moves",status="2xx"',
+        'tictactoe_http_request_duration_seconds_count{method="GET",route="/games/{game_id}"',
+        "tictactoe_moves_total",
+    ]
+    missing = [line for line in expected_lines if line not in metrics_response.text]
+    if metrics_response.status_code != 200 or missing:
+        print(f"   ❌ Missing metrics: {missing}")
+        return False
+    print("   ✅ Per-route request counts, latency histograms and move counters reported")
+    
+    # Test 15: Matchmaking lobby
+    print("\n15. Testing matchmaking lobby...")
+    lobby_request = {"m": 6, "n": 6, "k": 4, "timeout": 10}
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        waiting = pool.submit(requests.post, f"{BASE_URL}/lobby", json={**lobby_request, "player_name": "Ann"})
+        time.sleep(0.5)
+        joining = pool.submit(requests.post, f"{BASE_URL}/lobby", json={**lobby_request, "player_name": "Bob"})
+        first, second = waiting.result().json(), joining.result().json()
+    print(f"✅ POST /lobby (x2) - {first['player_name']} plays {first['symbol']}, {second['player_name']} plays {second['symbol']}")
+    if first["game_id"] != second["game_id"] or (first["symbol"], second["symbol"]) != ("X", "O"):
+        print("   ❌ Players were not paired into one game")
+        return False
+    print("   ✅ Both players paired into the same game, longest-waiting player first")
+
+    # Test 16: Store snapshots (only saved when the server runs with GAME_SNAPSHOT_PATH)
+    print("\n16. Testing store snapshots...")
+    snapshot_status = requests.get(f"{BASE_URL}/admin/snapshot").json()
+    if snapshot_status["enabled"]:
+        snapshot_response = requests.post(f"{BASE_URL}/admin/snapshot")
+        print(f"✅ POST /admin/snapshot - Status: {snapshot_response.status_code}")
+        if snapshot_response.status_code != 200 or snapshot_response.json()["games"] < 1:
+            print("   ❌ Snapshot was not saved")
+            return False
+        print(f"   ✅ Saved {snapshot_response.json()['games']} games in {snapshot_response.json()['bytes']} bytes")
+    else:
+        snapshot_response = requests.post(f"{BASE_URL}/admin/snapshot")
+        print(f"✅ POST /admin/snapshot - Status: {snapshot_response.status_code}")
+        if snapshot_response.status_code != 409:
+            print("   ❌ Snapshot requested while snapshots are off should be refused")
+            return False
+        print("   ✅ Snapshots are off; request refused with 409")
+
+    # Test 17: Conditional and idempotent moves
+    print("\n17. Testing conditional and idempotent moves...")
+    game = requests.post(f"{BASE_URL}/games", json={"player1_name": "Ann", "player2_name": "Bob"}).json()
+    moves_url = f"{BASE_URL}/games/{game['game_id']}/moves"
+    move = {"row": 1, "col": 1, "expected_version": game["version"], "player": "X"}
+    first = requests.post(moves_url, json=move, headers={"Idempotency-Key": "ann-1"})
+    retry = requests.post(moves_url, json=move, headers={"Idempotency-Key": "ann-1"})
+    print(f"✅ POST /games/{{id}}/moves (x2, same key) - Status: {first.status_code}, {retry.status_code}")
+    if (first.status_code, retry.status_code) != (200, 200) or retry.content != first.content \
+            or retry.headers.get("idempotent-replayed") != "true":
+        print("   ❌ Retry was not answered with the first response")
+        return False
+    stale = requests.post(moves_url, json={"row": 0, "col": 0, "expected_version": game["version"]})
+    print(f"✅ POST /games/{{id}}/moves (stale version) - Status: {stale.status_code}")
+    if stale.status_code != 409 or stale.json()["game_state"]["version"] != first.json()["game_state"]["version"]:
+        print("   ❌ Stale move was not refused with the current game")
+        return False
+    reused = requests.post(moves_url, json={"row": 0, "col": 0}, headers={"Idempotency-Key": "ann-1"})
+    if reused.status_code != 422:
+        print("   ❌ Reusing a key for another move was not refused")
+        return False
+    print("   ✅ Retry replayed once-applied move; stale move got 409; key reuse got 422")
+
+    # Test 18: Admission control (limits are only enforced when the server runs with RATE_LIMIT)
+    print("\n18. Testing rate limits and load...")
+    limits = test_api_endpoint("GET", "/admin/rate-limits?client=127.0.0.1")
+    if not limits or "in_flight" not in limits or limits["client"]["client"] != "127.0.0.1":
+        print("   ❌ Rate limit state was not reported")
+        return False
+    print(f"   ✅ {limits['rate_limited']} requests rate limited, {limits['overloaded']} shed, "
+          f"cap of {limits['max_concurrent']} in flight")
+
+    # Test 19: Concurrent computer moves with different budgets share the search pool
+    print("\n19. Testing concurrent computer moves...")
+    games = [requests.post(f"{BASE_URL}/games", json={"player1_name": "Ann", "player2_name": "Bob",
+                                                      "m": 5, "n": 5, "k": 4}).json() for _ in range(6)]
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        ai_moves = list(pool.map(
+            lambda pair: requests.post(f"{BASE_URL}/games/{pair[1]['game_id']}/ai-move",
+                                       json={"iterations": 2 + pair[0] % 3}),
+            enumerate(games)))
+    print(f"✅ POST /games/{{id}}/ai-move (x6, concurrent) - Status: {sorted({r.status_code for r in ai_moves})}")
+    if any(response.status_code != 200 for response in ai_moves):
+        print(f"   ❌ Concurrent computer moves failed: {[r.text for r in ai_moves if r.status_code != 200]}")
+        return False
+    print("   ✅ Every computer move was played")
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        thinking = [pool.submit(requests.post, f"{BASE_URL}/games/{game['game_id']}/ai-move",
+                                json={"think_time": 1.0}) for game in games[:2]]
+        time.sleep(0.3)
+        requests.post(f"{BASE_URL}/games/{games[0]['game_id']}/moves", json={"row": 4, "col": 4})
+        requests.delete(f"{BASE_URL}/games/{games[1]['game_id']}")
+        stale = [future.result().status_code for future in thinking]
+    if stale != [409, 409]:
+        print(f"   ❌ Computer moves for a game that moved on or was deleted got {stale}, not 409")
+        return False
+    print("   ✅ Computer moves for a game that moved on or was deleted got 409")
+
     print("\n" + "=" * 50)
     print("🎉 All API tests completed successfully!")
     return True
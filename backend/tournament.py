@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Multi-process tournament and self-play runner.
+
+Plays every ordered pair of strategies (each side plays both X and O) over a
+multiprocessing pool and streams one JSON line per finished game to the
+output file. The schedule and every game's random seed are derived from a
+single master seed, so a run is reproducible regardless of how many workers
+play it or in which order games finish.
+
+Usage:
+    python3 tournament.py --strategies random heuristic solver mcts:500 \\
+        --games 200 --workers 8 --seed 42 --output results.jsonl
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from game import TicTacToeGame, get_geometry
+from strategies import Strategy, create_strategy
+
+# Strategies already built in this worker process, keyed by spec
+_strategy_cache: Dict[str, Strategy] = {}
+
+
+class Match(NamedTuple):
+    """One scheduled game."""
+    index: int
+    x_spec: str
+    o_spec: str
+    seed: int
+    m: int
+    n: int
+    k: int
+
+
+def build_schedule(specs: List[str], games_per_pair: int, seed: int,
+                   m: int = 3, n: int = 3, k: int = 3) -> List[Match]:
+    """
+    Build the full round-robin schedule.
+
+    Every ordered pair of distinct specs (and each spec against itself, for
+    self-play) plays ``games_per_pair`` games. Game seeds come from one
+    master-seeded generator, so the schedule is identical on every run.
+    """
+    rng = random.Random(seed)
+    schedule = []
+    for x_spec in specs:
+        for o_spec in specs:
+            for _ in range(games_per_pair):
+                schedule.append(Match(len(schedule), x_spec, o_spec, rng.getrandbits(63), m, n, k))
+    return schedule
+
+
+def _get_strategy(spec: str) -> Strategy:
+    """Get a strategy for this worker, building it on first use."""
+    strategy = _strategy_cache.get(spec)
+    if strategy is None:
+        strategy = _strategy_cache[spec] = create_strategy(spec)
+    return strategy
+
+
+def play_match(match: Match) -> Dict:
+    """Play one scheduled game and return its result record."""
+    rng = random.Random(match.seed)
+    players = {'X': _get_strategy(match.x_spec), 'O': _get_strategy(match.o_spec)}
+    game = TicTacToeGame(m=match.m, n=match.n, k=match.k)
+    moves = []
+    start = time.perf_counter()
+    while not game.is_game_over():
+        row, col = players[game.current_player].choose_move(game, rng)
+        if not game.make_move(row, col):
+            raise RuntimeError(f"{players[game.current_player]!r} chose an illegal move ({row}, {col})")
+        moves.append(row * match.n + col)
+    return {
+        "match": match.index,
+        "x": match.x_spec,
+        "o": match.o_spec,
+        "seed": match.seed,
+        "winner": game.get_winner(),
+        "moves": moves,
+        "elapsed": round(time.perf_counter() - start, 6),
+    }
+
+
+def summarize(results: List[Dict]) -> Dict[Tuple[str, str], List[int]]:
+    """Tally [X wins, O wins, draws] per (X strategy, O strategy) pairing."""
+    table: Dict[Tuple[str, str], List[int]] = {}
+    for result in results:
+        tally = table.setdefault((result["x"], result["o"]), [0, 0, 0])
+        if result["winner"] == 'X':
+            tally[0] += 1
+        elif result["winner"] == 'O':
+            tally[1] += 1
+        else:
+            tally[2] += 1
+    return table
+
+
+def run_tournament(schedule: List[Match], output_path: str, workers: int,
+                   progress: bool = True) -> List[Dict]:
+    """
+    Play a schedule on a pool of ``workers`` processes.
+
+    Results are appended to ``output_path`` as JSON lines as soon as each
+    game finishes (in completion order; every record carries its match index).
+    """
+    results = []
+    # Small chunks keep results streaming while amortizing inter-process overhead
+    chunksize = max(1, min(64, len(schedule) // (workers * 16)))
+    with open(output_path, "w", encoding="utf-8") as output:
+        if workers == 1:
+            finished = map(play_match, schedule)
+            pool = None
+        else:
+            pool = multiprocessing.Pool(workers)
+            finished = pool.imap_unordered(play_match, schedule, chunksize)
+        try:
+            for result in finished:
+                output.write(json.dumps(result) + "\n")
+                output.flush()
+                results.append(result)
+                if progress and len(results) % 100 == 0:
+                    print(f"   {len(results)}/{len(schedule)} games finished", file=sys.stderr)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run a tournament between computer strategies")
+    parser.add_argument("--strategies", nargs="+", default=["random", "heuristic"],
+                        help="Strategy specs: random, heuristic, solver, mcts or mcts:ITERATIONS")
+    parser.add_argument("--games", type=int, default=100, help="Games per ordered pairing")
+    parser.add_argument("--m", type=int, default=3, help="Board rows")
+    parser.add_argument("--n", type=int, default=3, help="Board columns")
+    parser.add_argument("--k", type=int, default=3, help="Marks in a row to win")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument("--seed", type=int, default=0, help="Master seed for the schedule")
+    parser.add_argument("--output", default="tournament_results.jsonl", help="JSON lines results file")
+    args = parser.parse_args(argv)
+
+    try:
+        get_geometry(args.m, args.n, args.k)
+        for spec in args.strategies:
+            create_strategy(spec)
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    schedule = build_schedule(args.strategies, args.games, args.seed, args.m, args.n, args.k)
+    print("🏆 Tic-Tac-Toe Tournament")
+    print("=" * 60)
+    print(f"Board: {args.m}x{args.n} (k={args.k}) | Games: {len(schedule)} | "
+          f"Workers: {args.workers} | Seed: {args.seed}")
+    print(f"Streaming results to {args.output}")
+
+    start = time.perf_counter()
+    results = run_tournament(schedule, args.output, max(1, args.workers))
+    elapsed = time.perf_counter() - start
+
+    print("-" * 60)
+    print(f"{'X':<14} {'O':<14} {'X wins':>8} {'O wins':>8} {'draws':>8}")
+    for (x_spec, o_spec), (x_wins, o_wins, draws) in sorted(summarize(results).items()):
+        print(f"{x_spec:<14} {o_spec:<14} {x_wins:>8} {o_wins:>8} {draws:>8}")
+    print("=" * 60)
+    print(f"✅ {len(results)} games in {elapsed:.2f}s ({len(results) / elapsed:,.1f} games/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""
+Compact wire formats for game responses.
+
+The default responses describe the board as a nested JSON list and repeat
+both player names every time. Clients that poll or play at high volume can
+instead ask, through the Accept header, for a compact representation:
+
+- application/vnd.tictactoe.compact+json: compact fields as JSON
+- application/msgpack (or application/x-msgpack): compact fields as msgpack
+
+A ``board`` media type parameter picks the board encoding:
+
+- board=string (default): one character per cell, row by row, 'X', 'O' or
+  '.' for empty ("X...O...." on 3x3)
+- board=packed: one integer, X's bitboard in the low m*n bits and O's in the
+  next m*n bits (18 bits on 3x3); bit row*n+col marks a cell. Available on
+  boards of at most 32 cells, so the value fits in 64 bits.
+
+Compact bodies are built straight from the engine into plain dicts, with no
+Pydantic models, and encoded once.
+"""
+
+import json
+from functools import lru_cache
+from typing import Any, Dict, NamedTuple, Optional
+
+import msgpack
+
+from game import TicTacToeGame
+
+COMPACT_JSON = "application/vnd.tictactoe.compact+json"
+MSGPACK = "application/msgpack"
+
+# Media types accepted for each encoding
+_ENCODINGS = {
+    COMPACT_JSON: "json",
+    MSGPACK: "msgpack",
+    "application/x-msgpack": "msgpack",
+}
+
+# Largest board whose packed form fits in an unsigned 64-bit integer
+MAX_PACKED_CELLS = 32
+
+
+class WireFormat(NamedTuple):
+    """A negotiated compact representation."""
+    media_type: str
+    encoding: str  # "json" or "msgpack"
+    board: str     # "string" or "packed"
+
+    @property
+    def tag(self) -> str:
+        """Short name distinguishing this representation in caches and ETags."""
+        return f"{self.encoding}-{self.board}"
+
+
+class FormatError(ValueError):
+    """The requested compact representation cannot describe this game."""
+
+
+@lru_cache(maxsize=256)
+def negotiate(accept: Optional[str]) -> Optional[WireFormat]:
+    """
+    Pick a compact format from an Accept header.
+
+    The first compact media type listed wins; quality values are ignored.
+    Results are cached per header value, since clients send the same few.
+
+    Returns:
+        The compact format, or None to use the default JSON responses
+    """
+    if not accept:
+        return None
+    for entry in accept.split(","):
+        media_type, *parameters = entry.split(";")
+        media_type = media_type.strip().lower()
+        encoding = _ENCODINGS.get(media_type)
+        if encoding is None:
+            continue
+        board = "string"
+        for parameter in parameters:
+            name, _, value = parameter.partition("=")
+            if name.strip().lower() == "board" and value.strip().lower() == "packed":
+                board = "packed"
+        return WireFormat(MSGPACK if encoding == "msgpack" else COMPACT_JSON, encoding, board)
+    return None
+
+
+def compact_board(game: TicTacToeGame, wire_format: WireFormat) -> Any:
+    """
+    Encode a game's board in the negotiated board format.
+
+    Raises:
+        FormatError: If a packed board was requested for a board over 32 cells
+    """
+    if wire_format.board == "packed":
+        if game.geometry.cells > MAX_PACKED_CELLS:
+            raise FormatError(f"Packed boards are limited to {MAX_PACKED_CELLS} cells")
+        return game.get_packed_board()
+    return game.get_board_string()
+
+
+def compact_game(game: TicTacToeGame, wire_format: WireFormat) -> Dict[str, Any]:
+    """Build the compact description of a game (no player names)."""
+    return {
+        "id": game.game_id,
+        "v": game.version,
+        "m": game.m,
+        "n": game.n,
+        "k": game.k,
+        "board": compact_board(game, wire_format),
+        "turn": game.current_player,
+        "winner": game.winner,
+        "draw": game.is_draw,
+        "over": game.game_over,
+    }
+
+
+def encode(content: Any, wire_format: WireFormat) -> bytes:
+    """Encode compact content as JSON or msgpack."""
+    if wire_format.encoding == "msgpack":
+        return msgpack.packb(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")